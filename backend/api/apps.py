@@ -1,7 +1,26 @@
 from django.apps import AppConfig
+from django.db.models.signals import post_delete, post_migrate, post_save
+
+
+def _seed_users_after_migrate(sender, **kwargs):
+    # One-time dev seeding of in-memory USERS, kept off the request path
+    from .views_common import _maybe_seed_from_memory
+    _maybe_seed_from_memory()
 
 
 class ApiConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "api"
 
+    def ready(self):
+        from . import checks  # noqa: F401  (registers system checks)
+
+        post_migrate.connect(_seed_users_after_migrate, sender=self)
+
+        from .utils_principal import _on_appuser_changed
+        app_user = self.get_model("AppUser")
+        post_save.connect(_on_appuser_changed, sender=app_user, dispatch_uid="principal_cache_save")
+        post_delete.connect(_on_appuser_changed, sender=app_user, dispatch_uid="principal_cache_delete")
+
+        from .order_sync import _on_menu_item_saved
+        post_save.connect(_on_menu_item_saved, sender=self.get_model("MenuItem"), dispatch_uid="menu_item_price_history")
@@ -0,0 +1,37 @@
+"""System checks run by manage.py (check, migrate, runserver)."""
+
+from django.conf import settings
+from django.core.checks import Error, register
+
+from .utils_cache import local_cache_problem
+from .utils_order_numbers import max_location_length
+
+_SHARED_BACKENDS = (
+    ("RATE_LIMIT_BACKEND", "CacheRateLimitBackend", "RATE_LIMIT_CACHE_ALIAS", "api.E001"),
+    ("LOGIN_LOCKOUT_BACKEND", "CacheLockoutStore", "LOGIN_LOCKOUT_CACHE_ALIAS", "api.E002"),
+)
+
+
+@register()
+def check_shared_caches(app_configs=None, **kwargs):
+    errors = []
+    for setting, cls, alias_setting, check_id in _SHARED_BACKENDS:
+        if not str(getattr(settings, setting, "")).endswith("." + cls):
+            continue
+        problem = local_cache_problem(getattr(settings, alias_setting, "default") or "default", setting)
+        if problem:
+            errors.append(Error(problem, hint="Set CACHE_URL or select the local backend.", id=check_id))
+    return errors
+
+
+@register()
+def check_order_number_location(app_configs=None, **kwargs):
+    location = str(getattr(settings, "ORDER_NUMBER_LOCATION", "") or "")
+    limit = max_location_length("W")
+    if len(location) <= limit:
+        return []
+    return [Error(
+        f"ORDER_NUMBER_LOCATION '{location}' is {len(location)} characters; order numbers allow at most {limit}",
+        hint="Use a shorter site code; longer ones are cut, so similar codes would share numbers.",
+        id="api.E003",
+    )]
@@ -1,6 +1,27 @@
+"""Outbound email helpers.
+
+When settings.EMAIL_OUTBOX_ENABLED is true (off by default) messages are
+written to the EmailOutbox table and delivered by the
+`process_email_outbox` command, which batches sends over one reused SMTP
+connection with retry/backoff. Request handlers therefore never wait on the
+mail server. With the outbox disabled, mail is sent inline as before.
+"""
+
+from datetime import timedelta
+
 from django.conf import settings
-from django.core.mail import send_mail, mail_admins
+from django.core.mail import EmailMultiAlternatives, get_connection, send_mail
+from django.db import transaction
 from django.template.loader import render_to_string
+from django.utils import timezone as dj_timezone
+
+
+def _debug_log(msg: str):
+    try:
+        if getattr(settings, "DEBUG", False):
+            print(f"[email] {msg}")
+    except Exception:
+        pass
 
 
 def _safe_send(func, *args, **kwargs):
@@ -8,12 +29,144 @@ def _safe_send(func, *args, **kwargs):
         func(*args, **kwargs)
     except Exception as e:
         # Log in debug to aid troubleshooting (e.g., SMTP misconfig)
+        _debug_log(f"send failed: {e}")
+
+
+def _queue_or_send(subject, message, recipients, *, html_message=None, from_email=None, category=""):
+    recipients = [r for r in (recipients or []) if r]
+    if not recipients:
+        return
+    from_email = from_email or settings.DEFAULT_FROM_EMAIL
+    if getattr(settings, "EMAIL_OUTBOX_ENABLED", False):
+        try:
+            from .models import EmailOutbox
+            EmailOutbox.objects.create(
+                to=recipients,
+                from_email=from_email,
+                subject=subject[:255],
+                body=message or "",
+                html_body=html_message or "",
+                category=category,
+            )
+            return
+        except Exception as e:
+            # Fall back to inline delivery if the outbox is unavailable
+            _debug_log(f"enqueue failed, sending inline: {e}")
+    _safe_send(
+        send_mail,
+        subject,
+        message,
+        from_email,
+        recipients,
+        fail_silently=True,
+        html_message=html_message,
+    )
+
+
+def _backoff_seconds(attempts: int) -> int:
+    base = max(1, int(getattr(settings, "EMAIL_OUTBOX_BACKOFF_SECONDS", 30)))
+    cap = max(base, int(getattr(settings, "EMAIL_OUTBOX_BACKOFF_MAX_SECONDS", 3600)))
+    return min(cap, base * (2 ** max(0, attempts - 1)))
+
+
+def _claim_outbox_rows(limit: int, lease_seconds: int) -> list:
+    """Lease up to `limit` due rows to this worker in one short transaction.
+
+    Claimed rows are marked sending with next_attempt_at as the lease expiry,
+    so a worker that dies mid-batch leaves them to be picked up again once
+    the lease runs out. The attempt is counted at claim time.
+    """
+    from .models import EmailOutbox
+
+    now = dj_timezone.now()
+    lease_until = now + timedelta(seconds=max(1, int(lease_seconds)))
+    with transaction.atomic():
+        rows = list(
+            EmailOutbox.objects.select_for_update(skip_locked=True)
+            .filter(
+                status__in=[EmailOutbox.STATUS_PENDING, EmailOutbox.STATUS_FAILED, EmailOutbox.STATUS_SENDING],
+                next_attempt_at__lte=now,
+            )
+            .order_by("next_attempt_at")[: max(1, int(limit))]
+        )
+        for row in rows:
+            row.status = EmailOutbox.STATUS_SENDING
+            row.attempts = (row.attempts or 0) + 1
+            row.next_attempt_at = lease_until
+            row.save(update_fields=["status", "attempts", "next_attempt_at", "updated_at"])
+    return rows
+
+
+def send_outbox_batch(limit: int = 100, max_attempts: int = 5) -> dict:
+    """Deliver due EmailOutbox rows over a single SMTP connection.
+
+    Three steps, so no database transaction or row lock is held while
+    talking to the mail server: claim due rows under a lease
+    (EMAIL_OUTBOX_LEASE_SECONDS; SKIP LOCKED where supported, so several
+    workers can run side by side), send them outside any transaction, then
+    record the outcomes in a second short transaction. Failures are retried
+    with exponential backoff until `max_attempts`, after which the row is
+    marked dead. Bodies of sent messages are cleared so one-time codes are
+    not retained.
+    """
+    from .models import EmailOutbox
+
+    stats = {"sent": 0, "failed": 0, "dead": 0}
+    lease_seconds = int(getattr(settings, "EMAIL_OUTBOX_LEASE_SECONDS", 300))
+    rows = _claim_outbox_rows(limit, lease_seconds)
+    if not rows:
+        return stats
+
+    connection = get_connection(fail_silently=False)
+    try:
+        connection.open()
+    except Exception as e:
+        _debug_log(f"connection failed: {e}")
+    outcomes = []
+    try:
+        for row in rows:
+            try:
+                msg = EmailMultiAlternatives(
+                    row.subject,
+                    row.body,
+                    row.from_email or settings.DEFAULT_FROM_EMAIL,
+                    list(row.to or []),
+                    connection=connection,
+                )
+                if row.html_body:
+                    msg.attach_alternative(row.html_body, "text/html")
+                msg.send()
+                outcomes.append((row, None, dj_timezone.now()))
+            except Exception as e:
+                outcomes.append((row, str(e)[:500] or e.__class__.__name__, None))
+    finally:
         try:
-            if getattr(settings, "DEBUG", False):
-                print(f"[email] send failed: {e}")
+            connection.close()
         except Exception:
             pass
 
+    with transaction.atomic():
+        for row, error, sent_at in outcomes:
+            if error is None:
+                changes = {"status": EmailOutbox.STATUS_SENT, "sent_at": sent_at, "last_error": "",
+                           "body": "", "html_body": ""}
+                stats["sent"] += 1
+            elif row.attempts >= max_attempts:
+                changes = {"status": EmailOutbox.STATUS_DEAD, "last_error": error}
+                stats["dead"] += 1
+            else:
+                changes = {
+                    "status": EmailOutbox.STATUS_FAILED,
+                    "last_error": error,
+                    "next_attempt_at": dj_timezone.now() + timedelta(seconds=_backoff_seconds(row.attempts)),
+                }
+                stats["failed"] += 1
+            # Only while our lease holds: an expired lease may have been re-claimed
+            EmailOutbox.objects.filter(
+                id=row.id, status=EmailOutbox.STATUS_SENDING, next_attempt_at=row.next_attempt_at
+            ).update(updated_at=dj_timezone.now(), **changes)
+    return stats
+
 
 def notify_admins_verification_submitted(app_user, access_request=None):
     subject = f"New verification submitted: {app_user.email}"
@@ -24,7 +177,14 @@ def notify_admins_verification_submitted(app_user, access_request=None):
         f"Status: {app_user.status}\n"
         f"Role: {app_user.role}\n"
     )
-    _safe_send(mail_admins, subject, message, fail_silently=True)
+    admins = [addr for _, addr in (getattr(settings, "ADMINS", None) or [])]
+    _queue_or_send(
+        f"{getattr(settings, 'EMAIL_SUBJECT_PREFIX', '')}{subject}",
+        message,
+        admins,
+        from_email=settings.SERVER_EMAIL,
+        category="admins",
+    )
 
 
 def email_user_verification_received(app_user):
@@ -37,14 +197,7 @@ def email_user_verification_received(app_user):
         "An administrator will review it shortly. You will be notified once approved or if we need more information.\n\n"
         "Thank you."
     )
-    _safe_send(
-        send_mail,
-        subject,
-        message,
-        settings.DEFAULT_FROM_EMAIL,
-        [app_user.email],
-        fail_silently=True,
-    )
+    _queue_or_send(subject, message, [app_user.email], category="verification")
 
 
 def email_user_approved(app_user):
@@ -56,14 +209,7 @@ def email_user_approved(app_user):
         "Your account has been approved. You can now sign in and access the system.\n\n"
         "Thank you."
     )
-    _safe_send(
-        send_mail,
-        subject,
-        message,
-        settings.DEFAULT_FROM_EMAIL,
-        [app_user.email],
-        fail_silently=True,
-    )
+    _queue_or_send(subject, message, [app_user.email], category="approval")
 
 
 def email_user_rejected(app_user, note: str = ""):
@@ -76,14 +222,7 @@ def email_user_rejected(app_user, note: str = ""):
         "Your access request was not approved at this time." + body_note + "\n\n"
         "You may contact support for more information or resubmit if applicable."
     )
-    _safe_send(
-        send_mail,
-        subject,
-        message,
-        settings.DEFAULT_FROM_EMAIL,
-        [app_user.email],
-        fail_silently=True,
-    )
+    _queue_or_send(subject, message, [app_user.email], category="approval")
 
 
 def email_user_password_reset(email: str, reset_link: str, code: str | None = None, expires_minutes: int = 15):
@@ -115,15 +254,7 @@ def email_user_password_reset(email: str, reset_link: str, code: str | None = No
         )
     except Exception:
         html = None
-    _safe_send(
-        send_mail,
-        subject,
-        message,
-        settings.DEFAULT_FROM_EMAIL,
-        [email],
-        fail_silently=True,
-        html_message=html,
-    )
+    _queue_or_send(subject, message, [email], html_message=html, category="password_reset")
 
 def email_user_login_otp(app_user, code: str, expires_minutes: int = 5):
     """Send a login verification code via email."""
@@ -153,15 +284,7 @@ def email_user_login_otp(app_user, code: str, expires_minutes: int = 5):
         )
     except Exception:
         html = None
-    _safe_send(
-        send_mail,
-        subject,
-        message,
-        settings.DEFAULT_FROM_EMAIL,
-        [email],
-        fail_silently=True,
-        html_message=html,
-    )
+    _queue_or_send(subject, message, [email], html_message=html, category="login_otp")
 
 
 def email_user_email_verification(email: str, verify_link: str):
@@ -185,12 +308,4 @@ def email_user_email_verification(email: str, verify_link: str):
         )
     except Exception:
         html = None
-    _safe_send(
-        send_mail,
-        subject,
-        message,
-        settings.DEFAULT_FROM_EMAIL,
-        [email],
-        fail_silently=True,
-        html_message=html,
-    )
+    _queue_or_send(subject, message, [email], html_message=html, category="email_verification")
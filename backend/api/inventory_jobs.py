@@ -0,0 +1,216 @@
+"""Background stock consumption for completed orders.
+
+Completing an order used to build the ingredient map, lock stock and record
+sale movements (plus low-stock notifications and web push) inside the status
+PATCH. Now order_status only enqueues an InventoryConsumptionJob in the same
+transaction as the transition, and the process_inventory_jobs command applies
+it later.
+
+Jobs are idempotent per order: the row is unique on order_id, a worker marks
+it done in the same transaction that writes the movements, and an order that
+already has sale movements is never consumed again. Failures (e.g.
+insufficient stock) are retried with exponential backoff and become "dead"
+after `max_attempts`; managers can inspect and re-queue them through
+/inventory/consumption-jobs.
+
+A worker first leases a batch of due jobs in one short transaction (status
+processing, next_attempt_at = lease expiry; INVENTORY_JOB_LEASE_SECONDS),
+then applies each job in its own transaction. Stock balance locks are
+therefore held for one order at a time rather than for the whole batch, and
+jobs left by a crashed worker are picked up again once the lease runs out.
+
+With INVENTORY_JOBS_ASYNC disabled (the default) the job is processed right
+after the status transition commits, without a worker. Turning it on requires
+a scheduled process_inventory_jobs worker (see RUNBOOK.md).
+"""
+
+from __future__ import annotations
+
+from datetime import timedelta
+from typing import Dict, List, Optional, Tuple
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone as dj_timezone
+
+
+def _jobs_async() -> bool:
+    return bool(getattr(settings, "INVENTORY_JOBS_ASYNC", False))
+
+
+def _backoff_seconds(attempts: int) -> int:
+    base = max(1, int(getattr(settings, "INVENTORY_JOB_BACKOFF_SECONDS", 30)))
+    cap = max(base, int(getattr(settings, "INVENTORY_JOB_BACKOFF_MAX_SECONDS", 3600)))
+    return min(cap, base * (2 ** max(0, attempts - 1)))
+
+
+def enqueue_order_consumption(order, actor=None, location_code: str = "MAIN"):
+    """Record that `order` owes stock consumption; safe to call more than once."""
+    from .models import InventoryConsumptionJob
+
+    job, created = InventoryConsumptionJob.objects.get_or_create(
+        order_id=order.id,
+        defaults={
+            "order_number": order.order_number or "",
+            "location_code": location_code or "MAIN",
+            "actor": actor if hasattr(actor, "id") else None,
+        },
+    )
+    if created and not _jobs_async():
+        transaction.on_commit(lambda: run_consumption_batch(job_ids=[job.id]))
+    return job
+
+
+def enqueue_orders_consumption(orders, actor=None, location_code: str = "MAIN") -> int:
+    """Bulk form of enqueue_order_consumption: one INSERT, existing jobs kept."""
+    from .models import InventoryConsumptionJob
+
+    orders = list(orders or [])
+    if not orders:
+        return 0
+    rows = [
+        InventoryConsumptionJob(
+            order_id=o.id,
+            order_number=o.order_number or "",
+            location_code=location_code or "MAIN",
+            actor=actor if hasattr(actor, "id") else None,
+        )
+        for o in orders
+    ]
+    InventoryConsumptionJob.objects.bulk_create(rows, ignore_conflicts=True)
+    if not _jobs_async():
+        order_ids = [o.id for o in orders]
+
+        def _run():
+            ids = list(InventoryConsumptionJob.objects.filter(order_id__in=order_ids).values_list("id", flat=True))
+            run_consumption_batch(limit=len(ids) or 1, job_ids=ids)
+
+        transaction.on_commit(_run)
+    return len(rows)
+
+
+def order_components(order_id) -> List[Tuple[object, int]]:
+    """[(InventoryItem, qty)] for an order: one unit per ingredient per line quantity."""
+    from .models import InventoryItem, OrderItem
+
+    comp_map: Dict[str, int] = {}
+    for li in OrderItem.objects.filter(order_id=order_id).select_related("menu_item"):
+        mi = li.menu_item
+        if not mi:
+            continue
+        for inv_id in mi.ingredients or []:
+            iid = str(inv_id)
+            comp_map[iid] = comp_map.get(iid, 0) + int(li.quantity or 0)
+    if not comp_map:
+        return []
+    invs = {str(x.id): x for x in InventoryItem.objects.filter(id__in=list(comp_map.keys()))}
+    return [(invs[k], comp_map[k]) for k in comp_map.keys() if k in invs]
+
+
+def _apply(job) -> int:
+    """Consume stock for one job; returns the number of movements written."""
+    from .models import Location, StockMovement
+    from .inventory_services import consume_for_order
+
+    already = StockMovement.objects.filter(
+        reference_type="order", reference_id=str(job.order_id), movement_type=StockMovement.TYPE_SALE
+    ).exists()
+    if already:
+        return 0
+    components = order_components(job.order_id)
+    if not components:
+        return 0
+    code = job.location_code or "MAIN"
+    loc = Location.objects.filter(code=code).first() or Location.objects.create(code=code, name=code.title())
+    return len(consume_for_order(order_id=str(job.order_id), components=components, location=loc, actor=job.actor))
+
+
+def _claim_jobs(limit: int, lease_seconds: int, job_ids: Optional[list] = None) -> list:
+    """Lease up to `limit` due jobs to this worker in one short transaction.
+
+    `job_ids` picks specific jobs whether or not they are due (inline
+    processing and "run now" retries); a job still leased to another worker
+    is never taken. The attempt is counted at claim time.
+    """
+    from .models import InventoryConsumptionJob
+
+    now = dj_timezone.now()
+    lease_until = now + timedelta(seconds=max(1, int(lease_seconds)))
+    waiting = Q(status__in=[InventoryConsumptionJob.STATUS_PENDING, InventoryConsumptionJob.STATUS_FAILED])
+    expired = Q(status=InventoryConsumptionJob.STATUS_PROCESSING, next_attempt_at__lte=now)
+    with transaction.atomic():
+        qs = InventoryConsumptionJob.objects.select_for_update(skip_locked=True)
+        if job_ids is not None:
+            qs = qs.filter(waiting | expired, id__in=job_ids)
+        else:
+            qs = qs.filter(waiting | expired, next_attempt_at__lte=now)
+        jobs = list(qs.order_by("next_attempt_at")[: max(1, int(limit))])
+        for job in jobs:
+            job.status = InventoryConsumptionJob.STATUS_PROCESSING
+            job.attempts = (job.attempts or 0) + 1
+            job.next_attempt_at = lease_until
+            job.save(update_fields=["status", "attempts", "next_attempt_at", "updated_at"])
+    return jobs
+
+
+def run_consumption_batch(limit: int = 50, max_attempts: int = 5, job_ids: Optional[list] = None) -> dict:
+    """Apply due consumption jobs.
+
+    Jobs are leased first (SKIP LOCKED where supported, so several workers
+    can run side by side), then each one is applied in its own transaction:
+    its movements and its "done" mark commit together, so a crash never
+    leaves stock consumed with the job pending. Every write is guarded by the
+    lease, so a job whose lease expired and was taken over is left alone.
+    """
+    from .models import InventoryConsumptionJob
+
+    stats = {"done": 0, "failed": 0, "dead": 0}
+    lease_seconds = int(getattr(settings, "INVENTORY_JOB_LEASE_SECONDS", 300))
+    for job in _claim_jobs(limit, lease_seconds, job_ids):
+        leased = InventoryConsumptionJob.objects.filter(
+            id=job.id, status=InventoryConsumptionJob.STATUS_PROCESSING, next_attempt_at=job.next_attempt_at,
+        )
+        try:
+            with transaction.atomic():
+                held = leased.select_for_update().select_related("actor").first()
+                if held is None:
+                    continue
+                held.movements = _apply(held)
+                held.status = InventoryConsumptionJob.STATUS_DONE
+                held.processed_at = dj_timezone.now()
+                held.last_error = ""
+                held.save(update_fields=["status", "movements", "processed_at", "last_error", "updated_at"])
+            stats["done"] += 1
+        except Exception as e:
+            changes = {"last_error": str(e)[:500] or e.__class__.__name__, "updated_at": dj_timezone.now()}
+            if job.attempts >= max_attempts:
+                changes["status"] = InventoryConsumptionJob.STATUS_DEAD
+                key = "dead"
+            else:
+                changes["status"] = InventoryConsumptionJob.STATUS_FAILED
+                changes["next_attempt_at"] = dj_timezone.now() + timedelta(seconds=_backoff_seconds(job.attempts))
+                key = "failed"
+            with transaction.atomic():
+                if leased.update(**changes):
+                    stats[key] += 1
+    return stats
+
+
+def requeue_job(job) -> None:
+    """Make a failed or dead job due immediately with a fresh attempt budget."""
+    from .models import InventoryConsumptionJob
+
+    job.status = InventoryConsumptionJob.STATUS_PENDING
+    job.attempts = 0
+    job.next_attempt_at = dj_timezone.now()
+    job.save(update_fields=["status", "attempts", "next_attempt_at", "updated_at"])
+
+
+__all__ = [
+    "enqueue_order_consumption",
+    "enqueue_orders_consumption",
+    "order_components",
+    "run_consumption_batch",
+    "requeue_job",
+]
@@ -6,10 +6,13 @@ from decimal import Decimal, ROUND_HALF_UP
 from typing import Iterable, List, Optional, Sequence, Tuple, Dict
 
 from django.db import transaction
-from django.db.models import Sum, Q, F
-from django.utils import timezone as dj_tz
+from django.db.models import Case, Sum, Q, F, OuterRef, Subquery, Value, When
+from django.db.models.functions import Coalesce
 
-from .models import InventoryItem, StockMovement, Batch, Location, ReorderSetting, AppUser
+from .models import InventoryItem, StockMovement, StockBalance, Batch, Location, ReorderSetting, AppUser
+from .stock_allocation import load_availability
+from .stock_balances import apply_movement, apply_movements, batch_balances, current_balances, lock_balances
+from .stock_checkpoints import ledger_as_of
 from .utils_notify import notify_users
 from .utils_dbtime import db_now
 
@@ -88,20 +91,16 @@ def get_current_stock(
 ) -> Dict[str, Decimal]:
     """Return current stock per item as a dict {item_id: qty}.
 
-    - Sums StockMovement.qty filtered by item/location/effective_at<=as_of.
+    - Without as_of, reads the materialized StockBalance rows.
+    - With as_of, starts from the nearest StockCheckpoint and adds the
+      movements after it (see stock_checkpoints).
     - If location_id is None, sums across all locations.
     """
-    qs = StockMovement.objects.all()
-    if item_ids:
-        qs = qs.filter(item_id__in=list(item_ids))
-    if location_id:
-        qs = qs.filter(location_id=location_id)
-    if as_of:
-        qs = qs.filter(effective_at__lte=as_of)
-    agg = qs.values("item_id").annotate(total=Sum("qty"))
+    if as_of is None:
+        return {k: _as_decimal(v) for k, v in current_balances(item_ids, location_id).items()}
     out: Dict[str, Decimal] = {}
-    for row in agg:
-        out[str(row["item_id"])] = _as_decimal(row["total"]) or DEC0
+    for (iid, _, _), qty in ledger_as_of(as_of, item_ids, location_id).items():
+        out[iid] = out.get(iid, DEC0) + _as_decimal(qty)
     return out
 
 
@@ -114,19 +113,14 @@ def get_batch_stock_by_location(
 
     Returns {batch_id: qty} considering movements until as_of.
     """
-    qs = StockMovement.objects.filter(item_id=item_id)
-    if location_id:
-        qs = qs.filter(location_id=location_id)
-    if as_of:
-        qs = qs.filter(effective_at__lte=as_of)
-    agg = qs.values("batch_id").annotate(total=Sum("qty"))
+    if as_of is None:
+        return batch_balances(item_id, location_id)
     res: Dict[str, Decimal] = {}
-    for row in agg:
-        bid = row["batch_id"]
-        if bid is None:
+    for (_, _, key), qty in ledger_as_of(as_of, [str(item_id)], location_id).items():
+        if not key:
             # Unbatched stock not tracked per batch
             continue
-        res[str(bid)] = _as_decimal(row["total"]) or DEC0
+        res[key] = res.get(key, DEC0) + _as_decimal(qty)
     return res
 
 
@@ -143,10 +137,7 @@ def get_expiring_batches(
     # If location provided, keep batches that still have stock at location
     if location_id:
         batch_ids_with_stock = (
-            StockMovement.objects.filter(location_id=location_id)
-            .values("batch_id")
-            .annotate(total=Sum("qty"))
-            .filter(total__gt=0)
+            StockBalance.objects.filter(location_id=location_id, batch__isnull=False, qty__gt=0)
             .values_list("batch_id", flat=True)
         )
         qs = qs.filter(id__in=batch_ids_with_stock)
@@ -173,21 +164,28 @@ def get_stock_ledger(
 
 
 def get_low_stock(item_ids: Optional[Sequence[str]] = None) -> List[Tuple[InventoryItem, Decimal]]:
-    settings_qs = ReorderSetting.objects.select_related("item", "location").all()
+    """[(item, qty)] for every reorder setting whose location stock is at or below its reorder point.
+
+    One query: the (item, location) balance is a correlated SUM over
+    StockBalance and the comparison with reorder_point happens in the database.
+    """
+    on_hand = (
+        StockBalance.objects.filter(item_id=OuterRef("item_id"), location_id=OuterRef("location_id"))
+        .order_by()
+        .values("item_id")
+        .annotate(total=Sum("qty"))
+        .values("total")
+    )
+    qty_field = StockBalance._meta.get_field("qty")
+    settings_qs = (
+        ReorderSetting.objects.select_related("item")
+        .annotate(on_hand=Coalesce(Subquery(on_hand, output_field=qty_field), Value(DEC0), output_field=qty_field))
+        .filter(on_hand__lte=F("reorder_point"))
+        .order_by("item__name", "location_id")
+    )
     if item_ids:
         settings_qs = settings_qs.filter(item_id__in=list(item_ids))
-    # Aggregate current stock per (item, location)
-    pairs = list(settings_qs.values_list("item_id", "location_id", "reorder_point"))
-    by_item_loc: Dict[Tuple[str, str], Decimal] = {}
-    for item_id, location_id, _ in pairs:
-        stock_map = get_current_stock([item_id], location_id)
-        by_item_loc[(str(item_id), str(location_id))] = stock_map.get(str(item_id), DEC0)
-    low = []
-    for rs in settings_qs:
-        qty = by_item_loc.get((str(rs.item_id), str(rs.location_id)), DEC0)
-        if qty <= _as_decimal(rs.reorder_point):
-            low.append((rs.item, qty))
-    return low
+    return [(rs.item, _as_decimal(rs.on_hand)) for rs in settings_qs]
 
 
 def get_last_stock_update(item_id: str, location_id: Optional[str] = None) -> Optional[Tuple[datetime, datetime]]:
@@ -230,7 +228,7 @@ def record_receipt(
             unit_cost=batch_payload.get("unit_cost"),
         )
     now = get_db_now()
-    mv = StockMovement.objects.create(
+    mv = _create_movement(
         item=item,
         location=location,
         batch=batch,
@@ -254,22 +252,39 @@ def record_receipt(
     return mv
 
 
-def _fefo_batches_with_available(item_id: str, location_id: str) -> List[Tuple[Batch, Decimal]]:
-    # Compute available per batch at location
-    per_batch = get_batch_stock_by_location(item_id=item_id, location_id=location_id)
-    if not per_batch:
-        return []
-    batches = Batch.objects.filter(id__in=list(per_batch.keys())).all()
-    # Sort FEFO: expiry asc, then received_at asc, then id asc
-    annotated = []
-    for b in batches:
-        annotated.append((b, per_batch.get(str(b.id), DEC0)))
-    annotated.sort(key=lambda t: (
-        t[0].expiry_date or datetime.max.date(),
-        t[0].received_at or datetime.max.replace(tzinfo=dj_tz.utc),
-        str(t[0].id),
-    ))
-    return annotated
+def _create_movement(**fields) -> StockMovement:
+    """Insert a ledger row and add it to the materialized balance in the same transaction."""
+    mv = StockMovement.objects.create(**fields)
+    apply_movement(mv.item_id, mv.location_id, mv.batch_id, mv.qty)
+    return mv
+
+
+def _locked_stock(item_id: str, location_id: str) -> Decimal:
+    """Total stock at a location with its balance rows locked for this transaction."""
+    return sum((_as_decimal(v) for v in lock_balances(item_id, location_id).values()), DEC0)
+
+
+def _write_movements(movements: List[StockMovement]) -> List[StockMovement]:
+    """bulk_create ledger rows and fold them into the balances (constant query count)."""
+    if movements:
+        StockMovement.objects.bulk_create(movements, batch_size=500)
+        apply_movements(movements)
+    return movements
+
+
+def _refresh_cached_quantities(item_ids: Iterable[str]) -> None:
+    """Copy current totals into InventoryItem.quantity with one CASE UPDATE."""
+    ids = sorted({str(i) for i in item_ids})
+    if not ids:
+        return
+    totals = get_current_stock(ids, location_id=None, as_of=None)
+    qty_field = InventoryItem._meta.get_field("quantity")
+    InventoryItem.objects.filter(id__in=ids).update(
+        quantity=Case(
+            *[When(id=iid, then=Value(_q2(totals.get(iid, DEC0)))) for iid in ids],
+            output_field=qty_field,
+        )
+    )
 
 
 @transaction.atomic
@@ -285,63 +300,38 @@ def consume_for_order(
 ) -> List[StockMovement]:
     now = get_db_now()
     effective = effective_at or now
+    components = [(item, _as_decimal(qty)) for item, qty in components]
+    # Prevent over-consumption: every component is checked before anything is written
+    available = load_availability([str(item.id) for item, _ in components], location)
     movements: List[StockMovement] = []
     affected_ids = set()
     for item, req_qty in components:
-        # Prevent over-consumption: ensure sufficient stock at location
-        avail_total = get_current_stock([str(item.id)], location_id=str(location.id)).get(str(item.id), DEC0)
-        remaining = _as_decimal(req_qty)
-        if remaining <= DEC0:
+        if req_qty <= DEC0:
             continue
-        if remaining > avail_total:
-            raise ValueError(f"Insufficient stock for item {item.name}: need {remaining}, have {avail_total}")
-        if fefo:
-            for batch, avail in _fefo_batches_with_available(str(item.id), str(location.id)):
-                if remaining <= DEC0:
-                    break
-                take = min(remaining, avail)
-                if take <= DEC0:
-                    continue
-                mv = StockMovement.objects.create(
-                    item=item,
-                    location=location,
-                    batch=batch,
-                    movement_type=StockMovement.TYPE_SALE,
-                    qty=-take,
-                    effective_at=effective,
-                    recorded_at=now,
-                    actor=actor,
-                    reference_type="order",
-                    reference_id=str(order_id),
-                    reason="Consumption for order",
-                )
-                movements.append(mv)
-                remaining -= take
-        # If still remaining (due to no batches), do not over-consume
-        if remaining > DEC0:
-            # At this point, since avail_total was enough, this path should be rare (unbatched stock)
-            mv = StockMovement.objects.create(
+        slices = available.allocate(item, req_qty, fefo=fefo)
+        if slices is None:
+            have = available.total(item.id)
+            raise ValueError(f"Insufficient stock for item {item.name}: need {req_qty}, have {have}")
+        for sl in slices:
+            movements.append(StockMovement(
                 item=item,
                 location=location,
-                batch=None,
+                batch=sl.batch,
                 movement_type=StockMovement.TYPE_SALE,
-                qty=-remaining,
+                qty=-sl.qty,
                 effective_at=effective,
                 recorded_at=now,
                 actor=actor,
                 reference_type="order",
                 reference_id=str(order_id),
-                reason="Consumption for order (unbatched)",
-            )
-            movements.append(mv)
+                reason="Consumption for order" if sl.batch else "Consumption for order (unbatched)",
+            ))
         affected_ids.add(str(item.id))
+    _write_movements(movements)
     # Update cached quantities for affected items
     try:
         if affected_ids:
-            smap = get_current_stock(list(affected_ids), location_id=None, as_of=None)
-            for iid in affected_ids:
-                total = _q2(smap.get(iid, DEC0))
-                InventoryItem.objects.filter(id=iid).update(quantity=total)
+            _refresh_cached_quantities(affected_ids)
             # Notify managers if any cross the low stock threshold
             _maybe_notify_low_stock(list(affected_ids))
     except Exception:
@@ -364,11 +354,11 @@ def adjust_stock(
     if delta == DEC0:
         raise ValueError("delta_qty cannot be zero")
     # Prevent negative stock if adjustment would make it negative
-    current = get_current_stock([str(item.id)], str(location.id)).get(str(item.id), DEC0)
+    current = _locked_stock(str(item.id), str(location.id))
     if current + delta < DEC0:
         raise ValueError("Adjustment would result in negative stock")
     now = get_db_now()
-    mv = StockMovement.objects.create(
+    mv = _create_movement(
         item=item,
         location=location,
         batch=None,
@@ -408,85 +398,48 @@ def transfer_stock(
     amount = _as_decimal(qty)
     if amount <= DEC0:
         raise ValueError("qty must be positive to transfer")
-    # Prevent over-transfer
-    avail_total = get_current_stock([str(item.id)], location_id=str(from_location.id)).get(str(item.id), DEC0)
-    if amount > avail_total:
-        raise ValueError(f"Insufficient stock to transfer: need {amount}, have {avail_total}")
+    # Prevent over-transfer; batches leave the source in FEFO order. Destination
+    # rows are locked in the same ordered statement so opposite transfers queue
+    available = load_availability([str(item.id)], from_location, also_lock=[to_location])
+    slices = available.allocate(item, amount, fefo=fefo)
+    if slices is None:
+        raise ValueError(f"Insufficient stock to transfer: need {amount}, have {available.total(item.id)}")
     now = get_db_now()
     effective = effective_at or now
+    reference = f"{from_location.id}->{to_location.id}"
     movements: List[StockMovement] = []
-    remaining = amount
-    # Transfer by batches using FEFO from source
-    for batch, avail in _fefo_batches_with_available(str(item.id), str(from_location.id)):
-        if remaining <= DEC0:
-            break
-        take = min(remaining, avail)
-        if take <= DEC0:
-            continue
-        # Out from source
-        mv_out = StockMovement.objects.create(
+    for sl in slices:
+        suffix = "" if sl.batch else " (unbatched)"
+        movements.append(StockMovement(
             item=item,
             location=from_location,
-            batch=batch,
+            batch=sl.batch,
             movement_type=StockMovement.TYPE_TRANSFER_OUT,
-            qty=-take,
+            qty=-sl.qty,
             effective_at=effective,
             recorded_at=now,
             actor=actor,
             reference_type="transfer",
-            reference_id=f"{from_location.id}->{to_location.id}",
-            reason="Transfer out",
-        )
-        # In to destination
-        mv_in = StockMovement.objects.create(
+            reference_id=reference,
+            reason="Transfer out" + suffix,
+        ))
+        movements.append(StockMovement(
             item=item,
             location=to_location,
-            batch=batch,
+            batch=sl.batch,
             movement_type=StockMovement.TYPE_TRANSFER_IN,
-            qty=take,
-            effective_at=effective,
-            recorded_at=now,
-            actor=actor,
-            reference_type="transfer",
-            reference_id=f"{from_location.id}->{to_location.id}",
-            reason="Transfer in",
-        )
-        movements.extend([mv_out, mv_in])
-        remaining -= take
-    # If still remaining, transfer unbatched
-    if remaining > DEC0:
-        mv_out = StockMovement.objects.create(
-            item=item,
-            location=from_location,
-            batch=None,
-            movement_type=StockMovement.TYPE_TRANSFER_OUT,
-            qty=-remaining,
+            qty=sl.qty,
             effective_at=effective,
             recorded_at=now,
             actor=actor,
             reference_type="transfer",
-            reference_id=f"{from_location.id}->{to_location.id}",
-            reason="Transfer out (unbatched)",
-        )
-        mv_in = StockMovement.objects.create(
-            item=item,
-            location=to_location,
-            batch=None,
-            movement_type=StockMovement.TYPE_TRANSFER_IN,
-            qty=remaining,
-            effective_at=effective,
-            recorded_at=now,
-            actor=actor,
-            reference_type="transfer",
-            reference_id=f"{from_location.id}->{to_location.id}",
-            reason="Transfer in (unbatched)",
-        )
-        movements.extend([mv_out, mv_in])
+            reference_id=reference,
+            reason="Transfer in" + suffix,
+        ))
+    _write_movements(movements)
     # Update cached item quantity (net stays the same globally, but ensure sync)
     try:
-        total_map = get_current_stock([str(item.id)], location_id=None, as_of=None)
-        total = _q2(total_map.get(str(item.id), DEC0))
-        InventoryItem.objects.filter(id=item.id).update(quantity=total)
+        _refresh_cached_quantities([str(item.id)])
         _maybe_notify_low_stock([str(item.id)])
     except Exception:
         pass
@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand
+
+from api.order_archive import archivable_orders, archive_closed_orders, archive_cutoff
+
+
+class Command(BaseCommand):
+    help = "Move closed orders older than the archive horizon into the order archive tables."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--older-than-days", type=int, default=None, help="Horizon (default ORDER_ARCHIVE_AFTER_DAYS)")
+        parser.add_argument("--batch-size", type=int, default=None, help="Orders per transaction (default ORDER_ARCHIVE_BATCH_SIZE)")
+        parser.add_argument("--max-batches", type=int, default=None, help="Stop after this many batches")
+        parser.add_argument("--dry-run", action="store_true", help="Only report how many orders would move")
+
+    def handle(self, *args, **options):
+        days = options.get("older_than_days")
+        if options.get("dry_run"):
+            count = archivable_orders(archive_cutoff(days)).count()
+            self.stdout.write(f"{count} closed orders would be archived")
+            return
+        totals = archive_closed_orders(
+            older_than_days=days,
+            batch_size=options.get("batch_size"),
+            max_batches=options.get("max_batches"),
+        )
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Archived {totals['orders']} orders ({totals['items']} items) in {totals['batches']} batches"
+            )
+        )
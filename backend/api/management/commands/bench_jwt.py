@@ -0,0 +1,89 @@
+import time
+import uuid
+
+import jwt
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.test.utils import override_settings
+
+from api.utils_jwt import TokenCache, decode_token
+
+
+def _keypair(alg):
+    """Return (signing_key, verifying_key) for `alg`, generating keys for asymmetric ones."""
+    from cryptography.hazmat.primitives import serialization
+    from cryptography.hazmat.primitives.asymmetric import ec, ed25519, rsa
+
+    if alg.startswith("HS"):
+        return ("bench-" + uuid.uuid4().hex) * 2, None
+    if alg.startswith(("RS", "PS")):
+        private = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    elif alg.startswith("ES"):
+        curve = {"ES256": ec.SECP256R1, "ES384": ec.SECP384R1, "ES512": ec.SECP521R1}.get(alg, ec.SECP256R1)
+        private = ec.generate_private_key(curve())
+    elif alg == "EdDSA":
+        private = ed25519.Ed25519PrivateKey.generate()
+    else:
+        raise ValueError(f"unsupported algorithm {alg}")
+    priv_pem = private.private_bytes(
+        serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8, serialization.NoEncryption()
+    ).decode()
+    pub_pem = private.public_key().public_bytes(
+        serialization.Encoding.PEM, serialization.PublicFormat.SubjectPublicKeyInfo
+    ).decode()
+    return priv_pem, pub_pem
+
+
+class Command(BaseCommand):
+    help = "Compare bearer JWT decode cost with and without the digest cache (HS256 vs an asymmetric alg)."
+
+    def add_arguments(self, parser):
+        default_alg = getattr(settings, "JWT_ALGORITHM", "HS256")
+        parser.add_argument(
+            "--alg",
+            default=default_alg if not default_alg.startswith("HS") else "RS256",
+            help="Asymmetric algorithm to compare against HS256 (default: DJANGO_JWT_ALG or RS256)",
+        )
+        parser.add_argument("--tokens", type=int, default=200, help="Distinct tokens (users) (default: 200)")
+        parser.add_argument("--polls", type=int, default=20, help="Decodes per token (default: 20)")
+
+    def handle(self, *args, **options):
+        tokens_n = max(1, int(options.get("tokens") or 200))
+        polls = max(1, int(options.get("polls") or 20))
+        for alg in ("HS256", options["alg"]):
+            self._bench(alg, tokens_n, polls)
+
+    def _bench(self, alg, tokens_n, polls):
+        signing, verifying = _keypair(alg)
+        now = int(time.time())
+        tokens = [
+            jwt.encode(
+                {"sub": str(uuid.uuid4()), "email": f"u{i}@example.com", "role": "staff", "iat": now, "exp": now + 3600},
+                signing,
+                algorithm=alg,
+            )
+            for i in range(tokens_n)
+        ]
+        overrides = {"JWT_SECRET": signing, "JWT_ALGORITHM": alg, "JWT_PUBLIC_KEY": verifying or ""}
+        with override_settings(**overrides):
+            total = tokens_n * polls
+            start = time.perf_counter()
+            for _ in range(polls):
+                for t in tokens:
+                    jwt.decode(t, verifying or signing, algorithms=[alg])
+            uncached = time.perf_counter() - start
+
+            cache = TokenCache(max_entries=tokens_n * 2, ttl_seconds=300)
+            start = time.perf_counter()
+            for _ in range(polls):
+                for t in tokens:
+                    decode_token(t, cache=cache)
+            cached = time.perf_counter() - start
+
+        stats = cache.stats()
+        self.stdout.write(
+            f"{alg:<6} decodes={total} uncached={uncached / total * 1e6:.1f}us/op "
+            f"cached={cached / total * 1e6:.1f}us/op speedup={uncached / cached:.1f}x "
+            f"hits={stats['hits']} misses={stats['misses']}"
+        )
+
@@ -0,0 +1,96 @@
+import json
+import statistics
+import threading
+import time
+import uuid
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test import RequestFactory
+
+from api.models import AppUser
+from api.utils_passwords import PasswordHashingService, get_password_hashing, hash_password, set_password_hashing
+from api.utils_ratelimit import LocalRateLimitBackend, get_rate_limit_backend, set_rate_limit_backend
+from api.views_auth import auth_login
+
+
+class Command(BaseCommand):
+    help = "Measure login latency (p50/p99) under N concurrent password logins."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--concurrency", type=int, default=16, help="Concurrent client threads (default: 16)")
+        parser.add_argument("--requests", type=int, default=200, help="Total login requests (default: 200)")
+        parser.add_argument("--pool", type=int, default=None, help="Override PASSWORD_HASH_CONCURRENCY for the run")
+
+    def handle(self, *args, **options):
+        clients = max(1, int(options.get("concurrency") or 16))
+        total = max(1, int(options.get("requests") or 200))
+        pool = options.get("pool")
+
+        password = "bench-" + uuid.uuid4().hex[:12]
+        email = f"bench-login-{uuid.uuid4().hex[:8]}@example.invalid"
+        # Pending status keeps the run on the password path (no OTP email is sent)
+        user = AppUser.objects.create(
+            email=email, name="Login Bench", role="staff", status="pending", password_hash=hash_password(password)
+        )
+
+        previous_hashing = get_password_hashing()
+        previous_rl = get_rate_limit_backend()
+        service = PasswordHashingService(concurrency=pool) if pool else PasswordHashingService()
+        set_password_hashing(service)
+        set_rate_limit_backend(LocalRateLimitBackend())
+
+        factory = RequestFactory()
+        body = json.dumps({"email": email, "password": password})
+        latencies = []
+        statuses = {}
+        lock = threading.Lock()
+        counter = iter(range(total))
+
+        def _client():
+            try:
+                while True:
+                    with lock:
+                        i = next(counter, None)
+                    if i is None:
+                        return
+                    req = factory.post(
+                        "/api/auth/login",
+                        data=body,
+                        content_type="application/json",
+                        REMOTE_ADDR=f"10.9.{(i >> 8) & 255}.{i & 255}",
+                    )
+                    start = time.perf_counter()
+                    resp = auth_login(req)
+                    elapsed = time.perf_counter() - start
+                    with lock:
+                        latencies.append(elapsed)
+                        statuses[resp.status_code] = statuses.get(resp.status_code, 0) + 1
+            finally:
+                connection.close()
+
+        try:
+            threads = [threading.Thread(target=_client) for _ in range(clients)]
+            wall = time.perf_counter()
+            for t in threads:
+                t.start()
+            for t in threads:
+                t.join()
+            wall = time.perf_counter() - wall
+        finally:
+            set_password_hashing(previous_hashing)
+            set_rate_limit_backend(previous_rl)
+            AppUser.objects.filter(id=user.id).delete()
+
+        latencies.sort()
+        p50 = statistics.median(latencies)
+        p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))]
+        stats = service.stats()
+        self.stdout.write(
+            f"logins={len(latencies)} clients={clients} pool={service.concurrency} "
+            f"wall={wall:.2f}s rps={len(latencies) / wall:.1f}"
+        )
+        self.stdout.write(
+            f"p50={p50 * 1000:.1f}ms p99={p99 * 1000:.1f}ms max={latencies[-1] * 1000:.1f}ms "
+            f"statuses={dict(sorted(statuses.items()))} peak_waiting={stats['peakWaiting']} rejected={stats['rejected']}"
+        )
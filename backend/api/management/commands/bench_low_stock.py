@@ -0,0 +1,65 @@
+import statistics
+import time
+import uuid
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+
+from api.inventory_services import get_low_stock
+from api.models import InventoryItem, Location, ReorderSetting, StockBalance
+
+
+class _Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = "Benchmark get_low_stock against a synthetic set of reorder settings (rolled back)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--count", type=int, default=5000, help="Reorder settings to create (default: 5000)")
+        parser.add_argument("--locations", type=int, default=2, help="Locations to spread them over (default: 2)")
+        parser.add_argument("--runs", type=int, default=10, help="Timed calls (default: 10)")
+
+    def handle(self, *args, **options):
+        try:
+            with transaction.atomic():
+                self._run(
+                    max(1, int(options.get("count") or 5000)),
+                    max(1, int(options.get("locations") or 2)),
+                    max(1, int(options.get("runs") or 10)),
+                )
+                raise _Rollback()
+        except _Rollback:
+            pass
+
+    def _run(self, count, location_count, runs):
+        tag = uuid.uuid4().hex[:6]
+        locations = [Location(code=f"B{tag}{i}"[:32], name=f"Bench {i}") for i in range(location_count)]
+        Location.objects.bulk_create(locations)
+        items = [InventoryItem(name=f"Bench item {tag} {i}", unit="pc") for i in range((count + location_count - 1) // location_count)]
+        InventoryItem.objects.bulk_create(items, batch_size=1000)
+        settings_rows, balances = [], []
+        for n in range(count):
+            item, loc = items[n // location_count], locations[n % location_count]
+            settings_rows.append(ReorderSetting(item=item, location=loc, reorder_point=Decimal("10")))
+            # Every third pair is below its reorder point
+            balances.append(StockBalance(item=item, location=loc, qty=Decimal(5 if n % 3 == 0 else 50)))
+        ReorderSetting.objects.bulk_create(settings_rows, batch_size=1000)
+        StockBalance.objects.bulk_create(balances, batch_size=1000)
+
+        latencies, queries, low = [], [], 0
+        for _ in range(runs):
+            with CaptureQueriesContext(connection) as ctx:
+                start = time.perf_counter()
+                low = len(get_low_stock())
+                latencies.append(time.perf_counter() - start)
+            queries.append(len(ctx.captured_queries))
+        latencies.sort()
+        self.stdout.write(f"{'settings':>8} {'low':>6} {'queries':>7} {'p50 ms':>8} {'max ms':>8}")
+        self.stdout.write(
+            f"{count:>8} {low:>6} {statistics.median(queries):>7.0f} "
+            f"{statistics.median(latencies) * 1000:>8.2f} {latencies[-1] * 1000:>8.2f}"
+        )
@@ -0,0 +1,74 @@
+import json
+import statistics
+import time
+import uuid
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test import RequestFactory
+from django.test.utils import CaptureQueriesContext
+
+from api.models import AppUser, MenuItem
+from api.views_common import _issue_jwt
+from api.views_orders import orders
+
+
+class _Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = "Benchmark POST /api/orders: queries and latency per order against line count (rolled back)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--lines", default="1,5,15,30", help="Comma-separated line counts (default: 1,5,15,30)")
+        parser.add_argument("--orders", type=int, default=50, help="Orders placed per line count (default: 50)")
+
+    def handle(self, *args, **options):
+        line_counts = sorted({max(1, int(x)) for x in str(options.get("lines") or "1").split(",") if x.strip()})
+        per_size = max(1, int(options.get("orders") or 50))
+        try:
+            with transaction.atomic():
+                self._run(line_counts, per_size)
+                raise _Rollback()
+        except _Rollback:
+            pass
+
+    def _run(self, line_counts, per_size):
+        user = AppUser.objects.create(
+            email=f"bench-orders-{uuid.uuid4().hex[:8]}@example.invalid", name="Order Bench", role="staff", status="active"
+        )
+        menu = [MenuItem(name=f"Bench dish {i}", price=10 + i, available=True) for i in range(max(line_counts))]
+        MenuItem.objects.bulk_create(menu)
+        auth = {"HTTP_AUTHORIZATION": f"Bearer {_issue_jwt(user)}"}
+        factory = RequestFactory()
+        seq = 0
+        self.stdout.write(f"{'lines':>5} {'orders':>6} {'queries':>7} {'p50 ms':>8} {'p99 ms':>8}")
+        for n in line_counts:
+            body = json.dumps({"items": [{"menuItemId": str(m.id), "quantity": 1} for m in menu[:n]]})
+            latencies, queries = [], []
+            for _ in range(per_size):
+                seq += 1
+                req = factory.post(
+                    "/api/orders",
+                    data=body,
+                    content_type="application/json",
+                    REMOTE_ADDR=f"10.8.{(seq >> 8) & 255}.{seq & 255}",
+                    **auth,
+                )
+                with CaptureQueriesContext(connection) as ctx:
+                    start = time.perf_counter()
+                    resp = orders(req)
+                    latencies.append(time.perf_counter() - start)
+                if resp.status_code != 200:
+                    self.stderr.write(f"order failed with {resp.status_code}: {resp.content[:200]!r}")
+                    return
+                queries.append(len(ctx.captured_queries))
+                # Order numbers are time based; keep them distinct across the run
+                time.sleep(0.001)
+            latencies.sort()
+            p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))]
+            self.stdout.write(
+                f"{n:>5} {per_size:>6} {statistics.median(queries):>7.0f} "
+                f"{statistics.median(latencies) * 1000:>8.2f} {p99 * 1000:>8.2f}"
+            )
@@ -0,0 +1,66 @@
+import time
+
+from django.core.exceptions import ImproperlyConfigured
+from django.core.management.base import BaseCommand
+from django.http import JsonResponse
+from django.test import RequestFactory
+
+from api.utils_ratelimit import (
+    CacheRateLimitBackend,
+    LocalRateLimitBackend,
+    get_rate_limit_backend,
+    set_rate_limit_backend,
+)
+from api.views_common import rate_limit
+
+
+class Command(BaseCommand):
+    help = "Microbenchmark rate_limit decorator overhead across many distinct client keys."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--keys", type=int, default=10000, help="Distinct client IPs (default: 10000)")
+        parser.add_argument("--rounds", type=int, default=3, help="Requests per key (default: 3)")
+
+    def handle(self, *args, **options):
+        keys = max(1, int(options.get("keys") or 10000))
+        rounds = max(1, int(options.get("rounds") or 3))
+
+        factory = RequestFactory()
+        requests = [
+            factory.get("/api/bench", REMOTE_ADDR=f"10.{(i >> 16) & 255}.{(i >> 8) & 255}.{i & 255}")
+            for i in range(keys)
+        ]
+
+        def _view(request):
+            return JsonResponse({"ok": True})
+
+        limited = rate_limit(limit=60, window_seconds=60)(_view)
+
+        backends = [("local", LocalRateLimitBackend())]
+        try:
+            # Own prefix: reset() must not touch the live limiter's keys
+            backends.append(("django-cache", CacheRateLimitBackend(prefix="rl-bench:")))
+        except ImproperlyConfigured as e:
+            self.stdout.write(f"django-cache skipped: {e}")
+
+        previous = get_rate_limit_backend()
+        try:
+            self._run("baseline (no decorator)", _view, requests, rounds)
+            for label, backend in backends:
+                backend.reset()
+                set_rate_limit_backend(backend)
+                self._run(label, limited, requests, rounds, backend=backend)
+        finally:
+            set_rate_limit_backend(previous)
+
+    def _run(self, label, view, requests, rounds, backend=None):
+        total = len(requests) * rounds
+        start = time.perf_counter()
+        for _ in range(rounds):
+            for req in requests:
+                view(req)
+        elapsed = time.perf_counter() - start
+        extra = f" stored_keys={len(backend)}" if isinstance(backend, LocalRateLimitBackend) else ""
+        self.stdout.write(
+            f"{label:<24} calls={total} total={elapsed * 1000:.1f}ms per_call={elapsed / total * 1e6:.2f}us{extra}"
+        )
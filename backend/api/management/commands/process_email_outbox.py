@@ -0,0 +1,40 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from api.emails import send_outbox_batch
+
+
+class Command(BaseCommand):
+    help = "Deliver queued EmailOutbox messages in batches over a reused SMTP connection."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--limit", type=int, default=100, help="Max messages per batch")
+        parser.add_argument("--max-attempts", type=int, default=5, help="Retry attempts before marking a message dead")
+        parser.add_argument("--loop", action="store_true", help="Keep polling instead of exiting after one pass")
+        parser.add_argument("--sleep", type=float, default=5.0, help="Seconds to wait between polls when idle (with --loop)")
+
+    def handle(self, *args, **options):
+        limit = max(1, int(options.get("limit") or 100))
+        max_attempts = max(1, int(options.get("max_attempts") or 5))
+        loop = bool(options.get("loop"))
+        sleep = max(0.1, float(options.get("sleep") or 5.0))
+
+        while True:
+            totals = {"sent": 0, "failed": 0, "dead": 0}
+            # Drain everything that is due, one batch/connection at a time
+            while True:
+                stats = send_outbox_batch(limit=limit, max_attempts=max_attempts)
+                for k, v in stats.items():
+                    totals[k] += v
+                if sum(stats.values()) < limit:
+                    break
+            if not loop or any(totals.values()):
+                self.stdout.write(
+                    self.style.SUCCESS(
+                        f"Email outbox: sent={totals['sent']} retry={totals['failed']} dead={totals['dead']}"
+                    )
+                )
+            if not loop:
+                return
+            time.sleep(sleep)
@@ -0,0 +1,39 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from api.inventory_jobs import run_consumption_batch
+
+
+class Command(BaseCommand):
+    help = "Apply queued stock consumption for completed orders (InventoryConsumptionJob)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--limit", type=int, default=50, help="Max jobs per batch")
+        parser.add_argument("--max-attempts", type=int, default=5, help="Retry attempts before marking a job dead")
+        parser.add_argument("--loop", action="store_true", help="Keep polling instead of exiting after one pass")
+        parser.add_argument("--sleep", type=float, default=2.0, help="Seconds to wait between polls when idle (with --loop)")
+
+    def handle(self, *args, **options):
+        limit = max(1, int(options.get("limit") or 50))
+        max_attempts = max(1, int(options.get("max_attempts") or 5))
+        loop = bool(options.get("loop"))
+        sleep = max(0.1, float(options.get("sleep") or 2.0))
+
+        while True:
+            totals = {"done": 0, "failed": 0, "dead": 0}
+            while True:
+                stats = run_consumption_batch(limit=limit, max_attempts=max_attempts)
+                for k, v in stats.items():
+                    totals[k] += v
+                if sum(stats.values()) < limit:
+                    break
+            if not loop or any(totals.values()):
+                self.stdout.write(
+                    self.style.SUCCESS(
+                        f"Inventory jobs: done={totals['done']} retry={totals['failed']} dead={totals['dead']}"
+                    )
+                )
+            if not loop:
+                return
+            time.sleep(sleep)
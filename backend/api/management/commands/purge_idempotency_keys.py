@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from api.utils_idempotency import purge_expired_keys
+
+
+class Command(BaseCommand):
+    help = "Delete expired Idempotency-Key records (schedule daily from cron)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=5000, help="Rows deleted per statement")
+
+    def handle(self, *args, **options):
+        removed = purge_expired_keys(batch_size=max(1, int(options.get("batch_size") or 5000)))
+        self.stdout.write(self.style.SUCCESS(f"Purged {removed} expired idempotency keys"))
@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from api.stock_balances import find_drift, rebuild_balances
+
+
+class Command(BaseCommand):
+    help = "Recompute materialized stock balances from the StockMovement ledger and report drift."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--check", action="store_true", help="Only report drift; exit non-zero when any is found")
+        parser.add_argument("--item", action="append", default=None, help="Limit to an inventory item id (repeatable)")
+
+    def handle(self, *args, **options):
+        item_ids = options.get("item") or None
+        drift = find_drift(item_ids) if options.get("check") else rebuild_balances(item_ids)
+        for d in drift:
+            self.stdout.write(
+                f"item={d['itemId']} location={d['locationId']} batch={d['batchId'] or '-'} "
+                f"balance={d['balance']} ledger={d['ledger']}"
+            )
+        if options.get("check"):
+            if drift:
+                raise CommandError(f"{len(drift)} stock balance rows drifted from the ledger")
+            self.stdout.write(self.style.SUCCESS("Stock balances match the ledger"))
+            return
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt stock balances; {len(drift)} rows corrected"))
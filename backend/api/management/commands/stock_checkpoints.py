@@ -0,0 +1,52 @@
+from datetime import datetime
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone as dj_timezone
+
+from api.stock_checkpoints import recent_boundaries, verify_checkpoints, write_checkpoint
+
+
+class Command(BaseCommand):
+    help = "Write per-(item, location, batch) stock checkpoints at period boundaries, or verify them."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--period", choices=["day", "month"], default=None,
+                            help="Boundary granularity (default STOCK_CHECKPOINT_PERIOD)")
+        parser.add_argument("--backfill", type=int, default=1, help="Write the last N boundaries, oldest first (default: 1)")
+        parser.add_argument("--as-of", default=None, help="Write a single checkpoint at this ISO time instead")
+        parser.add_argument("--verify", action="store_true",
+                            help="Check checkpoints and checkpoint + tail answers against full ledger sums")
+        parser.add_argument("--limit", type=int, default=None, help="With --verify, only the newest N checkpoints")
+
+    def handle(self, *args, **options):
+        if options.get("verify"):
+            problems = verify_checkpoints(limit=options.get("limit"))
+            for p in problems:
+                self.stdout.write(
+                    f"{p['check']}: item={p['itemId']} location={p['locationId']} batch={p['batchId'] or '-'} "
+                    f"expected={p['expected']} actual={p['actual']}"
+                )
+            if problems:
+                raise CommandError(f"{len(problems)} stock checkpoint mismatches")
+            self.stdout.write(self.style.SUCCESS("Checkpoints plus tail match the full ledger"))
+            return
+
+        period = options.get("period") or getattr(settings, "STOCK_CHECKPOINT_PERIOD", "day")
+        if options.get("as_of"):
+            try:
+                as_of = datetime.fromisoformat(options["as_of"])
+            except ValueError:
+                raise CommandError("--as-of must be an ISO 8601 datetime")
+            if dj_timezone.is_naive(as_of):
+                as_of = dj_timezone.make_aware(as_of)
+            boundaries = [as_of]
+        else:
+            boundaries = recent_boundaries(options.get("backfill") or 1, period)
+        for as_of in boundaries:
+            try:
+                cp = write_checkpoint(as_of, period)
+            except ValueError as e:
+                raise CommandError(str(e))
+            self.stdout.write(f"{cp.as_of.isoformat()}: {cp.line_count} lines")
+        self.stdout.write(self.style.SUCCESS(f"Stock checkpoints up to date ({len(boundaries)} checked)"))
@@ -1,5 +1,4 @@
 import re
-import jwt
 from django.http import JsonResponse
 from django.conf import settings
 import time
@@ -88,32 +87,43 @@ class PendingUserGateMiddleware:
         return False
 
     def _user_from_jwt(self, request):
-        auth = request.META.get("HTTP_AUTHORIZATION", "")
-        if not auth.startswith("Bearer "):
-            return None
-        token = auth.split(" ", 1)[1].strip()
-        if not token:
-            return None
-        try:
-            payload = jwt.decode(token, settings.JWT_SECRET, algorithms=[settings.JWT_ALGORITHM])
-        except Exception:
-            return None
+        # Resolved once and attached to the request so views reuse it
+        from .views_common import _principal_from_request
+        return _principal_from_request(request)
 
-        user_id = str(payload.get("sub") or "")
-        email = (payload.get("email") or "").lower().strip()
-        try:
-            from .models import AppUser
-            if user_id:
-                u = AppUser.objects.filter(id=user_id).first()
-                if u:
-                    return u
-            if email:
-                u = AppUser.objects.filter(email=email).first()
-                return u
-        except Exception:
-            return None
+
+class RequestBodyLimitMiddleware:
+    """Reject oversized JSON bodies with 413 before any view work.
+
+    Checks Content-Length up front; bodies without one (chunked) are caught
+    when views read them through views_common._parse_json_body.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if request.path.startswith("/api/") and "json" in (request.META.get("CONTENT_TYPE") or ""):
+            from .views_common import RequestBodyTooLarge, _check_body_size
+            try:
+                _check_body_size(request)
+            except RequestBodyTooLarge as e:
+                return self._too_large(e)
+        return self.get_response(request)
+
+    def process_exception(self, request, exception):
+        from .views_common import RequestBodyTooLarge
+        if isinstance(exception, RequestBodyTooLarge):
+            return self._too_large(exception)
         return None
 
+    @staticmethod
+    def _too_large(exc):
+        return JsonResponse(
+            {"success": False, "message": f"Request body too large (limit {exc.limit} bytes)"},
+            status=413,
+        )
+
 
 class VersionHeaderMiddleware:
     """Attach API version header to all /api responses."""
@@ -0,0 +1,30 @@
+# Generated by Django 5.2.18 on 2026-10-17 06:08
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0034_ordernumbersequence'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OrderEvent',
+            fields=[
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('order_id', models.UUIDField()),
+                ('order_number', models.CharField(blank=True, max_length=32)),
+                ('kind', models.CharField(max_length=16)),
+                ('status', models.CharField(blank=True, max_length=16)),
+                ('previous_status', models.CharField(blank=True, max_length=16)),
+                ('data', models.JSONField(blank=True, default=dict)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'db_table': 'order_event',
+                'indexes': [models.Index(fields=['created_at'], name='order_event_created_3e3001_idx')],
+            },
+        ),
+    ]
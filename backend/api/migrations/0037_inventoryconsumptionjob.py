@@ -0,0 +1,38 @@
+# Generated by Django 5.2.18 on 2026-10-17 06:12
+
+import django.db.models.deletion
+import django.utils.timezone
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0036_order_change_seq'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='InventoryConsumptionJob',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('order_id', models.UUIDField(unique=True)),
+                ('order_number', models.CharField(blank=True, max_length=32)),
+                ('location_code', models.CharField(default='MAIN', max_length=32)),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('done', 'Done'), ('failed', 'Failed'), ('dead', 'Dead')], default='pending', max_length=16)),
+                ('attempts', models.PositiveIntegerField(default=0)),
+                ('last_error', models.TextField(blank=True)),
+                ('movements', models.PositiveIntegerField(default=0)),
+                ('next_attempt_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('processed_at', models.DateTimeField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('actor', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='api.appuser')),
+            ],
+            options={
+                'db_table': 'inv_consumption_job',
+                'indexes': [models.Index(fields=['status', 'next_attempt_at'], name='inv_consump_status_f0fcba_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 5.2.18 on 2026-10-17 06:20
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def seed_current_prices(apps, schema_editor):
+    # Earlier price changes were not recorded; current prices apply from creation
+    MenuItem = apps.get_model('api', 'MenuItem')
+    MenuItemPrice = apps.get_model('api', 'MenuItemPrice')
+    MenuItemPrice.objects.bulk_create([
+        MenuItemPrice(menu_item_id=mi.id, name=mi.name, price=mi.price, valid_from=mi.created_at)
+        for mi in MenuItem.objects.all().only('id', 'name', 'price', 'created_at')
+    ], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0039_order_archive'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MenuItemPrice',
+            fields=[
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('name', models.CharField(max_length=255)),
+                ('price', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('valid_from', models.DateTimeField()),
+                ('menu_item', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='price_history', to='api.menuitem')),
+            ],
+            options={
+                'db_table': 'menu_item_price',
+                'indexes': [models.Index(fields=['menu_item', 'valid_from'], name='menu_item_p_menu_it_653ec1_idx')],
+            },
+        ),
+        migrations.RunPython(seed_current_prices, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,47 @@
+# Generated by Django 5.2.18 on 2026-10-17 06:25
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Sum
+
+
+def backfill_balances(apps, schema_editor):
+    StockMovement = apps.get_model('api', 'StockMovement')
+    StockBalance = apps.get_model('api', 'StockBalance')
+    totals = {}
+    for row in StockMovement.objects.values('item_id', 'location_id', 'batch_id').annotate(total=Sum('qty')):
+        key = (row['item_id'], row['location_id'], row['batch_id'])
+        totals[key] = totals.get(key, 0) + (row['total'] or 0)
+    StockBalance.objects.bulk_create([
+        StockBalance(item_id=item_id, location_id=location_id, batch_id=batch_id,
+                     batch_key=str(batch_id) if batch_id else '', qty=qty)
+        for (item_id, location_id, batch_id), qty in totals.items()
+    ], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0040_menuitemprice'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StockBalance',
+            fields=[
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('batch_key', models.CharField(blank=True, default='', max_length=36)),
+                ('qty', models.DecimalField(decimal_places=4, default=0, max_digits=14)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('batch', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='balances', to='api.batch')),
+                ('item', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='balances', to='api.inventoryitem')),
+                ('location', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='balances', to='api.location')),
+            ],
+            options={
+                'db_table': 'inv_stock_balance',
+                'indexes': [models.Index(fields=['location', 'item'], name='inv_stock_b_locatio_1bf51a_idx')],
+                'constraints': [models.UniqueConstraint(fields=('item', 'location', 'batch_key'), name='uniq_stock_balance')],
+            },
+        ),
+        migrations.RunPython(backfill_balances, migrations.RunPython.noop),
+    ]
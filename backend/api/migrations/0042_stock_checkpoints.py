@@ -0,0 +1,43 @@
+# Generated by Django 5.2.18 on 2026-10-17 06:29
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0041_stockbalance'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StockCheckpoint',
+            fields=[
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('as_of', models.DateTimeField(unique=True)),
+                ('taken_at', models.DateTimeField()),
+                ('period', models.CharField(choices=[('day', 'Daily'), ('month', 'Monthly')], default='day', max_length=8)),
+                ('line_count', models.PositiveIntegerField(default=0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'db_table': 'inv_stock_checkpoint',
+            },
+        ),
+        migrations.CreateModel(
+            name='StockCheckpointLine',
+            fields=[
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('batch_key', models.CharField(blank=True, default='', max_length=36)),
+                ('qty', models.DecimalField(decimal_places=4, max_digits=14)),
+                ('checkpoint', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='lines', to='api.stockcheckpoint')),
+                ('item', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='api.inventoryitem')),
+                ('location', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='api.location')),
+            ],
+            options={
+                'db_table': 'inv_stock_checkpoint_line',
+                'constraints': [models.UniqueConstraint(fields=('checkpoint', 'item', 'location', 'batch_key'), name='uniq_stock_checkpoint_line')],
+            },
+        ),
+    ]
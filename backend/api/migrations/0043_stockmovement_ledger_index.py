@@ -0,0 +1,17 @@
+# Generated by Django 5.2.18 on 2026-10-17 06:32
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0042_stock_checkpoints'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='stockmovement',
+            index=models.Index(fields=['item', 'effective_at', 'recorded_at', 'id'], name='inv_move_ledger_idx'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-17 07:03
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0043_stockmovement_ledger_index'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='inventoryconsumptionjob',
+            name='status',
+            field=models.CharField(choices=[('pending', 'Pending'), ('processing', 'Processing'), ('done', 'Done'), ('failed', 'Failed'), ('dead', 'Dead')], default='pending', max_length=16),
+        ),
+    ]
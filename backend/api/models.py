@@ -485,6 +485,7 @@ class WebPushSubscription(models.Model):
 
 class NotificationOutbox(models.Model):
     STATUS_PENDING = "pending"
+    STATUS_SENDING = "sending"  # leased to a worker until next_attempt_at
     STATUS_SENT = "sent"
     STATUS_FAILED = "failed"
     id = models.UUIDField(primary_key=True, default=uuid4, editable=False)
@@ -506,6 +507,36 @@ class NotificationOutbox(models.Model):
         ]
 
 
+class EmailOutbox(models.Model):
+    """Queued outbound email, delivered by the process_email_outbox command."""
+
+    STATUS_PENDING = "pending"
+    STATUS_SENDING = "sending"  # leased to a worker until next_attempt_at
+    STATUS_SENT = "sent"
+    STATUS_FAILED = "failed"
+    STATUS_DEAD = "dead"
+    id = models.UUIDField(primary_key=True, default=uuid4, editable=False)
+    to = models.JSONField(default=list)
+    from_email = models.CharField(max_length=255, blank=True)
+    subject = models.CharField(max_length=255)
+    body = models.TextField(blank=True)
+    html_body = models.TextField(blank=True)
+    category = models.CharField(max_length=64, blank=True)
+    status = models.CharField(max_length=16, default=STATUS_PENDING)
+    attempts = models.PositiveIntegerField(default=0)
+    last_error = models.TextField(blank=True)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    sent_at = models.DateTimeField(blank=True, null=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = "email_outbox"
+        indexes = [
+            models.Index(fields=["status", "next_attempt_at"]),
+        ]
+
+
 # -----------------------------
 # Customer Feedback
 # -----------------------------
@@ -831,12 +862,84 @@ class StockMovement(models.Model):
             models.Index(fields=["recorded_at"]),
             models.Index(fields=["item", "recorded_at"]),
             models.Index(fields=["location", "recorded_at"]),
+            # Keyset order of the ledger API/export
+            models.Index(fields=["item", "effective_at", "recorded_at", "id"], name="inv_move_ledger_idx"),
         ]
         constraints = [
             models.CheckConstraint(check=~models.Q(qty=0), name="movement_qty_nonzero"),
         ]
 
 
+class StockBalance(models.Model):
+    """Running sum of StockMovement.qty per (item, location, batch).
+
+    Maintained by inventory_services in the same transaction as each
+    movement; `rebuild_stock_balances` recomputes it from the ledger.
+    batch_key is the batch id, or "" for unbatched stock, so the unique
+    constraint also covers rows without a batch.
+    """
+
+    id = models.BigAutoField(primary_key=True)
+    item = models.ForeignKey(InventoryItem, on_delete=models.CASCADE, related_name="balances")
+    location = models.ForeignKey(Location, on_delete=models.CASCADE, related_name="balances")
+    batch = models.ForeignKey(Batch, on_delete=models.SET_NULL, null=True, blank=True, related_name="balances")
+    batch_key = models.CharField(max_length=36, blank=True, default="")
+    qty = models.DecimalField(max_digits=14, decimal_places=4, default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = "inv_stock_balance"
+        constraints = [
+            models.UniqueConstraint(fields=["item", "location", "batch_key"], name="uniq_stock_balance"),
+        ]
+        indexes = [
+            models.Index(fields=["location", "item"]),
+        ]
+
+
+class StockCheckpoint(models.Model):
+    """Balances per (item, location, batch) as of a period boundary.
+
+    Lines include movements with effective_at <= as_of that were recorded
+    by taken_at; anything recorded later (including backdated movements) is
+    part of the tail read on top of the checkpoint.
+    """
+
+    PERIOD_DAY = "day"
+    PERIOD_MONTH = "month"
+    PERIOD_CHOICES = [
+        (PERIOD_DAY, "Daily"),
+        (PERIOD_MONTH, "Monthly"),
+    ]
+
+    id = models.BigAutoField(primary_key=True)
+    as_of = models.DateTimeField(unique=True)
+    taken_at = models.DateTimeField()
+    period = models.CharField(max_length=8, choices=PERIOD_CHOICES, default=PERIOD_DAY)
+    line_count = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        db_table = "inv_stock_checkpoint"
+
+
+class StockCheckpointLine(models.Model):
+    id = models.BigAutoField(primary_key=True)
+    checkpoint = models.ForeignKey(StockCheckpoint, on_delete=models.CASCADE, related_name="lines")
+    item = models.ForeignKey(InventoryItem, on_delete=models.CASCADE, related_name="+")
+    location = models.ForeignKey(Location, on_delete=models.CASCADE, related_name="+")
+    batch_key = models.CharField(max_length=36, blank=True, default="")
+    qty = models.DecimalField(max_digits=14, decimal_places=4)
+
+    class Meta:
+        db_table = "inv_stock_checkpoint_line"
+        constraints = [
+            models.UniqueConstraint(
+                fields=["checkpoint", "item", "location", "batch_key"], name="uniq_stock_checkpoint_line"
+            ),
+        ]
+
+
 class ReorderSetting(models.Model):
     id = models.UUIDField(primary_key=True, default=uuid4, editable=False)
     item = models.ForeignKey(InventoryItem, on_delete=models.CASCADE, related_name="reorder_settings")
@@ -855,6 +958,47 @@ class ReorderSetting(models.Model):
         ]
 
 
+class InventoryConsumptionJob(models.Model):
+    """Stock consumption owed by a completed order, applied by process_inventory_jobs.
+
+    One row per order (unique order_id), so completing an order twice or
+    re-running the worker never consumes stock twice.
+    """
+
+    STATUS_PENDING = "pending"
+    STATUS_PROCESSING = "processing"  # leased to a worker until next_attempt_at
+    STATUS_DONE = "done"
+    STATUS_FAILED = "failed"
+    STATUS_DEAD = "dead"
+    STATUS_CHOICES = [
+        (STATUS_PENDING, "Pending"),
+        (STATUS_PROCESSING, "Processing"),
+        (STATUS_DONE, "Done"),
+        (STATUS_FAILED, "Failed"),
+        (STATUS_DEAD, "Dead"),
+    ]
+
+    id = models.UUIDField(primary_key=True, default=uuid4, editable=False)
+    order_id = models.UUIDField(unique=True)
+    order_number = models.CharField(max_length=32, blank=True)
+    location_code = models.CharField(max_length=32, default="MAIN")
+    actor = models.ForeignKey(AppUser, on_delete=models.SET_NULL, null=True, blank=True, related_name="+")
+    status = models.CharField(max_length=16, choices=STATUS_CHOICES, default=STATUS_PENDING)
+    attempts = models.PositiveIntegerField(default=0)
+    last_error = models.TextField(blank=True)
+    movements = models.PositiveIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    processed_at = models.DateTimeField(blank=True, null=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = "inv_consumption_job"
+        indexes = [
+            models.Index(fields=["status", "next_attempt_at"]),
+        ]
+
+
 # -----------------------------
 # Menu Management
 # -----------------------------
@@ -885,6 +1029,26 @@ class MenuItem(models.Model):
         return f"{self.name} ({self.category})"
     
 
+class MenuItemPrice(models.Model):
+    """Price/name of a menu item from `valid_from` until the next row.
+
+    Appended whenever a MenuItem's price or name changes, so orders captured
+    offline can be priced as of the moment they were rung up.
+    """
+
+    id = models.BigAutoField(primary_key=True)
+    menu_item = models.ForeignKey(MenuItem, on_delete=models.CASCADE, related_name="price_history")
+    name = models.CharField(max_length=255)
+    price = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    valid_from = models.DateTimeField()
+
+    class Meta:
+        db_table = "menu_item_price"
+        indexes = [
+            models.Index(fields=["menu_item", "valid_from"]),
+        ]
+
+
 # -----------------------------
 # Orders
 # -----------------------------
@@ -919,6 +1083,9 @@ class Order(models.Model):
     payment_method = models.CharField(max_length=16, blank=True)  # cash/card/mobile
     placed_by = models.ForeignKey('AppUser', on_delete=models.SET_NULL, null=True, blank=True, related_name='orders')
     completed_at = models.DateTimeField(blank=True, null=True)
+    # Id of the latest OrderEvent for this order; a monotonically increasing
+    # change cursor shared with the order feed (0 = no recorded change)
+    change_seq = models.BigIntegerField(default=0, db_index=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
@@ -951,6 +1118,123 @@ class OrderItem(models.Model):
         ]
 
 
+class ArchivedOrder(models.Model):
+    """Closed order moved out of the hot `order` table by archive_orders.
+
+    Same columns and ids as Order so history and reports can read both.
+    """
+
+    id = models.UUIDField(primary_key=True, editable=False)
+    order_number = models.CharField(max_length=32, unique=True)
+    status = models.CharField(max_length=16, choices=Order.STATUS_CHOICES)
+    order_type = models.CharField(max_length=32, blank=True)
+    customer_name = models.CharField(max_length=255, blank=True)
+    subtotal = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    discount = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    total_amount = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    payment_method = models.CharField(max_length=16, blank=True)
+    placed_by = models.ForeignKey('AppUser', on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    completed_at = models.DateTimeField(blank=True, null=True)
+    change_seq = models.BigIntegerField(default=0)
+    created_at = models.DateTimeField()
+    updated_at = models.DateTimeField()
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        db_table = "order_archive"
+        indexes = [
+            models.Index(fields=["status", "created_at"]),
+            models.Index(fields=["created_at"]),
+        ]
+
+
+class ArchivedOrderItem(models.Model):
+    id = models.UUIDField(primary_key=True, editable=False)
+    order = models.ForeignKey(ArchivedOrder, on_delete=models.CASCADE, related_name='items')
+    menu_item = models.ForeignKey('MenuItem', on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    item_name = models.CharField(max_length=255)
+    price = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    quantity = models.PositiveIntegerField(default=1)
+    created_at = models.DateTimeField()
+    updated_at = models.DateTimeField()
+
+    class Meta:
+        db_table = "order_item_archive"
+        indexes = [
+            models.Index(fields=["order"]),
+        ]
+
+
+class OrderEvent(models.Model):
+    """Append-only log of order changes backing the SSE queue feed.
+
+    The auto-increment id orders the feed; cursors trail it by the settle
+    window because ids commit out of order (see api.utils_order_feed).
+    Rows are pruned after ORDER_FEED_RETENTION_SECONDS.
+    """
+
+    KIND_CREATED = "created"
+    KIND_STATUS = "status"
+
+    id = models.BigAutoField(primary_key=True)
+    order_id = models.UUIDField()
+    order_number = models.CharField(max_length=32, blank=True)
+    kind = models.CharField(max_length=16)
+    status = models.CharField(max_length=16, blank=True)
+    previous_status = models.CharField(max_length=16, blank=True)
+    data = models.JSONField(default=dict, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        db_table = "order_event"
+        indexes = [
+            models.Index(fields=["created_at"]),
+        ]
+
+
+class IdempotencyKey(models.Model):
+    """Stored outcome of a request sent with an Idempotency-Key header.
+
+    `key_hash` is SHA-256 of the caller and the client key, unique per scope,
+    so a replay is answered from this row without looking at the target
+    table. Rows past `expires_at` are removed by purge_idempotency_keys.
+    """
+
+    id = models.BigAutoField(primary_key=True)
+    scope = models.CharField(max_length=32)
+    key_hash = models.CharField(max_length=64)
+    request_hash = models.CharField(max_length=64)
+    status_code = models.PositiveSmallIntegerField(default=0)
+    response = models.JSONField(default=dict, blank=True)
+    resource_id = models.CharField(max_length=64, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    expires_at = models.DateTimeField(db_index=True)
+
+    class Meta:
+        db_table = "idempotency_key"
+        constraints = [
+            models.UniqueConstraint(fields=["scope", "key_hash"], name="uniq_idempotency_scope_key"),
+        ]
+
+
+class OrderNumberSequence(models.Model):
+    """Counter row per order-number scope (prefix + day/location).
+
+    `next_value` is the first number not yet handed out; workers reserve
+    blocks by advancing it (see api.utils_order_numbers).
+    """
+
+    key = models.CharField(max_length=32, unique=True)
+    next_value = models.BigIntegerField(default=1)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = "order_number_sequence"
+
+    def __str__(self) -> str:
+        return f"{self.key} -> {self.next_value}"
+
+
 # -----------------------------
 # Cash handling (sessions and movements)
 # -----------------------------
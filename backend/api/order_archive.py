@@ -0,0 +1,93 @@
+"""Hot/cold split for orders.
+
+The queue, bulk-progress and dashboard only ever touch open or recent
+orders, but `order` and `order_item` keep every ticket ever placed.
+archive_closed_orders() moves completed/cancelled/refunded orders created
+more than ORDER_ARCHIVE_AFTER_DAYS ago into `order_archive` /
+`order_item_archive` (same ids and columns), in batches of
+ORDER_ARCHIVE_BATCH_SIZE, each batch in its own transaction.
+
+Orders whose inventory consumption job has not finished are left in place,
+since the job still reads their line items. Archived orders remain visible
+through /orders/history, /orders/<id> and the order reports and analytics,
+which read both tables.
+
+Run `python manage.py archive_orders` from cron (e.g. nightly).
+"""
+
+from __future__ import annotations
+
+from datetime import timedelta
+from typing import Dict, Optional
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone as dj_timezone
+
+CLOSED_STATUSES = ("completed", "cancelled", "refunded")
+
+_ORDER_FIELDS = (
+    "id", "order_number", "status", "order_type", "customer_name", "subtotal", "discount",
+    "total_amount", "payment_method", "placed_by_id", "completed_at", "change_seq", "created_at", "updated_at",
+)
+_ITEM_FIELDS = ("id", "order_id", "menu_item_id", "item_name", "price", "quantity", "created_at", "updated_at")
+
+
+def archive_cutoff(older_than_days: Optional[int] = None):
+    days = older_than_days if older_than_days is not None else getattr(settings, "ORDER_ARCHIVE_AFTER_DAYS", 90)
+    return dj_timezone.now() - timedelta(days=max(0, int(days)))
+
+
+def archivable_orders(cutoff):
+    from .models import InventoryConsumptionJob, Order
+
+    unfinished = InventoryConsumptionJob.objects.exclude(status=InventoryConsumptionJob.STATUS_DONE).values("order_id")
+    return (
+        Order.objects.filter(status__in=CLOSED_STATUSES, created_at__lt=cutoff)
+        .exclude(id__in=unfinished)
+        .order_by("created_at")
+    )
+
+
+def _archive_batch(cutoff, batch_size: int) -> Dict[str, int]:
+    from .models import ArchivedOrder, ArchivedOrderItem, Order, OrderItem
+
+    with transaction.atomic():
+        ids = list(archivable_orders(cutoff).select_for_update(skip_locked=True).values_list("id", flat=True)[:batch_size])
+        if not ids:
+            return {"orders": 0, "items": 0}
+        orders = [ArchivedOrder(**row) for row in Order.objects.filter(id__in=ids).values(*_ORDER_FIELDS)]
+        items = [ArchivedOrderItem(**row) for row in OrderItem.objects.filter(order_id__in=ids).values(*_ITEM_FIELDS)]
+        ArchivedOrder.objects.bulk_create(orders, batch_size=500)
+        ArchivedOrderItem.objects.bulk_create(items, batch_size=1000)
+        OrderItem.objects.filter(order_id__in=ids).delete()
+        Order.objects.filter(id__in=ids).delete()
+    return {"orders": len(orders), "items": len(items)}
+
+
+def archive_closed_orders(older_than_days: Optional[int] = None, batch_size: Optional[int] = None,
+                          max_batches: Optional[int] = None) -> Dict[str, int]:
+    """Move closed orders past the horizon to the archive tables."""
+    cutoff = archive_cutoff(older_than_days)
+    if batch_size is None:
+        batch_size = getattr(settings, "ORDER_ARCHIVE_BATCH_SIZE", 500)
+    batch_size = max(1, int(batch_size))
+    totals = {"orders": 0, "items": 0, "batches": 0}
+    while max_batches is None or totals["batches"] < max_batches:
+        moved = _archive_batch(cutoff, batch_size)
+        if not moved["orders"]:
+            break
+        totals["orders"] += moved["orders"]
+        totals["items"] += moved["items"]
+        totals["batches"] += 1
+        if moved["orders"] < batch_size:
+            break
+    return totals
+
+
+__all__ = [
+    "CLOSED_STATUSES",
+    "archive_cutoff",
+    "archivable_orders",
+    "archive_closed_orders",
+]
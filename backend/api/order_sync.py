@@ -0,0 +1,313 @@
+"""Batch upload of orders captured offline by POS terminals.
+
+A terminal that loses connectivity keeps ringing up orders locally, each
+with a client-generated UUID and the local time it was placed. When it
+reconnects it posts them in batches (optionally gzip-compressed) to
+/orders/sync:
+
+    {"orders": [{"clientId": "<uuid>", "createdAt": "<iso time>",
+                 "items": [{"menuItemId": "<uuid>", "quantity": 2}],
+                 "type": "walk-in", "customerName": "", "discount": 0,
+                 "status": "completed", "completedAt": "<iso time>"}]}
+
+The client id becomes the order id, so re-sending a batch is harmless:
+orders that already exist (hot or archived) come back as "duplicate" with
+their server order number. Lines are priced from MenuItemPrice as of the
+client's createdAt, not from today's menu. An order with any line that
+cannot be read or priced is rejected whole, with a reason per line under
+`lines` (index into its items), rather than created with a smaller total.
+Everything new is written with
+bulk inserts; orders synced as completed get their inventory consumption
+jobs in the same transaction.
+"""
+
+from __future__ import annotations
+
+import bisect
+import logging
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal, InvalidOperation
+from typing import Any, Dict, List, Optional, Tuple
+from uuid import UUID
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import Case, DateTimeField, Value, When
+from django.utils import timezone as dj_timezone
+
+SYNC_STATUSES = {"in_queue", "in_progress", "ready", "completed", "cancelled"}
+
+logger = logging.getLogger(__name__)
+
+
+def record_menu_price(menu_item) -> None:
+    """Append a MenuItemPrice row when the item's price or name changed."""
+    from .models import MenuItemPrice
+
+    last = MenuItemPrice.objects.filter(menu_item_id=menu_item.id).order_by("-valid_from", "-id").first()
+    if last is not None and last.price == menu_item.price and last.name == menu_item.name:
+        return
+    MenuItemPrice.objects.create(
+        menu_item_id=menu_item.id,
+        name=menu_item.name,
+        price=menu_item.price or 0,
+        valid_from=dj_timezone.now(),
+    )
+
+
+def _on_menu_item_saved(sender, instance, **kwargs):
+    # A savepoint, so a failed history write cannot abort the caller's
+    # transaction (PostgreSQL) and the menu change itself still goes through.
+    # The failure is logged: synced orders would be priced from stale history.
+    try:
+        with transaction.atomic():
+            record_menu_price(instance)
+    except Exception:
+        logger.exception("Could not record price history for menu item %s", getattr(instance, "id", None))
+
+
+class PriceBook:
+    """Menu prices for a set of items at arbitrary points in time (one query)."""
+
+    def __init__(self, menu_ids, until: datetime):
+        from .models import MenuItem, MenuItemPrice
+
+        self._history: Dict[str, Tuple[List[datetime], List[Tuple[str, Decimal]]]] = {}
+        rows = (
+            MenuItemPrice.objects.filter(menu_item_id__in=list(menu_ids), valid_from__lte=until)
+            .order_by("menu_item_id", "valid_from", "id")
+            .values_list("menu_item_id", "valid_from", "name", "price")
+        )
+        for mid, valid_from, name, price in rows:
+            times, values = self._history.setdefault(str(mid), ([], []))
+            times.append(valid_from)
+            values.append((name, price))
+        self.items = {str(mi.id): mi for mi in MenuItem.objects.filter(id__in=list(menu_ids))}
+
+    def at(self, menu_id: str, when: datetime) -> Optional[Tuple[Any, str, Decimal]]:
+        """(MenuItem, name, price) valid at `when`, or None if unknown."""
+        mi = self.items.get(menu_id)
+        if mi is None:
+            return None
+        times, values = self._history.get(menu_id, ([], []))
+        idx = bisect.bisect_right(times, when) - 1
+        if idx >= 0:
+            name, price = values[idx]
+            return mi, name, price
+        # No snapshot that early: the item did not exist yet unless history is missing entirely
+        if times:
+            return None
+        return mi, mi.name, mi.price
+
+
+def _parse_time(value) -> Optional[datetime]:
+    if not value:
+        return None
+    try:
+        dt = datetime.fromisoformat(str(value).replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    if dj_timezone.is_naive(dt):
+        dt = dj_timezone.make_aware(dt, timezone.utc)
+    return dt
+
+
+def _reject(client_id, message: str, lines: Optional[List[Dict[str, Any]]] = None) -> Dict[str, Any]:
+    out = {"clientId": client_id, "result": "rejected", "message": message}
+    if lines:
+        out["lines"] = lines
+    return out
+
+
+def _line_error(index: int, message: str) -> Dict[str, Any]:
+    return {"index": index, "message": message}
+
+
+def _validate(entry, now, max_skew, oldest) -> Tuple[Optional[Dict[str, Any]], Optional[Dict[str, Any]]]:
+    """Returns (normalised order, None) or (None, rejection result)."""
+    if not isinstance(entry, dict):
+        return None, _reject(None, "Order must be an object")
+    raw_id = entry.get("clientId") or entry.get("id")
+    try:
+        client_id = str(UUID(str(raw_id)))
+    except Exception:
+        return None, _reject(raw_id, "clientId must be a UUID")
+    placed_at = _parse_time(entry.get("createdAt") or entry.get("clientCreatedAt"))
+    if placed_at is None:
+        return None, _reject(client_id, "createdAt is required (ISO 8601)")
+    if placed_at > now + max_skew:
+        return None, _reject(client_id, "createdAt is in the future")
+    if placed_at < oldest:
+        return None, _reject(client_id, "createdAt is older than the sync window")
+    status = str(entry.get("status") or "in_queue").lower()
+    if status not in SYNC_STATUSES:
+        return None, _reject(client_id, "Invalid status")
+    try:
+        discount = max(Decimal("0"), Decimal(str(entry.get("discount") or 0)))
+    except (InvalidOperation, ValueError):
+        return None, _reject(client_id, "discount must be a number")
+    lines, errors = [], []
+    for i, it in enumerate(entry.get("items") or []):
+        if not isinstance(it, dict):
+            errors.append(_line_error(i, "Item must be an object"))
+            continue
+        try:
+            mid = str(UUID(str(it.get("menuItemId") or it.get("id"))))
+        except (TypeError, ValueError):
+            errors.append(_line_error(i, "menuItemId must be a UUID"))
+            continue
+        try:
+            qty = int(it.get("quantity") or it.get("qty") or 0)
+        except (TypeError, ValueError):
+            qty = 0
+        if qty <= 0:
+            errors.append(_line_error(i, "quantity must be a positive integer"))
+            continue
+        lines.append((i, mid, qty))
+    if errors:
+        return None, _reject(client_id, "Invalid items", errors)
+    if not lines:
+        return None, _reject(client_id, "No valid items")
+    completed_at = None
+    if status == "completed":
+        completed_at = _parse_time(entry.get("completedAt")) or placed_at
+        completed_at = min(max(completed_at, placed_at), now + max_skew)
+    return {
+        "clientId": client_id,
+        "placedAt": placed_at,
+        "completedAt": completed_at,
+        "status": status,
+        "type": str(entry.get("type") or "walk-in").lower()[:32],
+        "customerName": str(entry.get("customerName") or "").strip()[:255],
+        "paymentMethod": str(entry.get("paymentMethod") or "").lower()[:16],
+        "discount": discount,
+        "lines": lines,
+    }, None
+
+
+def _existing_numbers(ids) -> Dict[str, str]:
+    from .models import ArchivedOrder, Order
+
+    found = {str(i): n for i, n in Order.objects.filter(id__in=ids).values_list("id", "order_number")}
+    missing = [i for i in ids if i not in found]
+    if missing:
+        found.update({str(i): n for i, n in ArchivedOrder.objects.filter(id__in=missing).values_list("id", "order_number")})
+    return found
+
+
+def sync_orders(entries, actor=None) -> Dict[str, Any]:
+    """Insert offline orders in bulk; returns per-order results in input order."""
+    from .models import Order, OrderItem
+    from .inventory_jobs import enqueue_orders_consumption
+    from .utils_order_feed import record_order_events
+    from .utils_order_numbers import next_order_number
+
+    now = dj_timezone.now()
+    max_skew = timedelta(seconds=int(getattr(settings, "ORDER_SYNC_MAX_CLOCK_SKEW_SECONDS", 300)))
+    oldest = now - timedelta(days=int(getattr(settings, "ORDER_SYNC_MAX_AGE_DAYS", 7)))
+
+    results: List[Dict[str, Any]] = []
+    pending: List[Tuple[int, Dict[str, Any]]] = []
+    seen = set()
+    for entry in entries:
+        order, rejection = _validate(entry, now, max_skew, oldest)
+        if rejection is not None:
+            results.append(rejection)
+            continue
+        if order["clientId"] in seen:
+            results.append({"clientId": order["clientId"], "result": "duplicate", "message": "Repeated in batch"})
+            continue
+        seen.add(order["clientId"])
+        results.append({})
+        pending.append((len(results) - 1, order))
+
+    for attempt in range(2):
+        existing = _existing_numbers([o["clientId"] for _, o in pending])
+        fresh = []
+        for idx, o in pending:
+            if o["clientId"] in existing:
+                results[idx] = {
+                    "clientId": o["clientId"], "result": "duplicate",
+                    "orderId": o["clientId"], "orderNumber": existing[o["clientId"]],
+                }
+            else:
+                fresh.append((idx, o))
+        if not fresh:
+            break
+
+        book = PriceBook({mid for _, o in fresh for _, mid, _ in o["lines"]}, until=now + max_skew)
+        orders: List[Any] = []
+        line_rows: List[Any] = []
+        placed: List[Tuple[int, Any]] = []
+        placed_at: Dict[Any, datetime] = {}
+        for idx, o in fresh:
+            subtotal = Decimal("0")
+            priced, errors = [], []
+            for i, mid, qty in o["lines"]:
+                hit = book.at(mid, o["placedAt"])
+                if hit is None:
+                    errors.append(_line_error(i, "Not on the menu at createdAt"))
+                    continue
+                mi, name, price = hit
+                subtotal += (price or 0) * qty
+                priced.append((mi, name, price, qty))
+            if errors:
+                results[idx] = _reject(o["clientId"], "Items not on the menu at createdAt", errors)
+                continue
+            order = Order(
+                id=UUID(o["clientId"]),
+                order_number=next_order_number("W"),
+                status=o["status"],
+                order_type=o["type"],
+                customer_name=o["customerName"],
+                subtotal=subtotal,
+                discount=o["discount"],
+                total_amount=max(Decimal("0"), subtotal - o["discount"]),
+                payment_method=o["paymentMethod"] or ("cash" if o["type"] == "walk-in" else ""),
+                placed_by=actor if hasattr(actor, "id") else None,
+                completed_at=o["completedAt"],
+            )
+            orders.append(order)
+            placed.append((idx, order))
+            placed_at[order.id] = o["placedAt"]
+            line_rows += [
+                OrderItem(order=order, menu_item=mi, item_name=name, price=price or 0, quantity=qty)
+                for mi, name, price, qty in priced
+            ]
+        if not orders:
+            break
+        try:
+            with transaction.atomic():
+                Order.objects.bulk_create(orders, batch_size=500)
+                # auto_now_add stamps the server time on insert; restore client times in one UPDATE
+                Order.objects.filter(id__in=[o.id for o in orders]).update(
+                    created_at=Case(
+                        *[When(id=oid, then=Value(at)) for oid, at in placed_at.items()],
+                        output_field=DateTimeField(),
+                    )
+                )
+                for o in orders:
+                    o.created_at = placed_at[o.id]
+                OrderItem.objects.bulk_create(line_rows, batch_size=1000)
+                record_order_events([(o, "") for o in orders], "created")
+                completed = [o for o in orders if o.status == "completed"]
+                if completed:
+                    enqueue_orders_consumption(completed, actor=actor)
+        except IntegrityError:
+            if attempt == 0:
+                continue  # another upload of the same batch won the race; re-check duplicates
+            raise
+        for idx, order in placed:
+            results[idx] = {
+                "clientId": str(order.id), "result": "created", "orderId": str(order.id),
+                "orderNumber": order.order_number, "total": float(order.total_amount or 0),
+            }
+        break
+
+    summary = {"created": 0, "duplicate": 0, "rejected": 0}
+    for r in results:
+        summary[r.get("result", "rejected")] = summary.get(r.get("result", "rejected"), 0) + 1
+    return {**summary, "results": results}
+
+
+__all__ = ["SYNC_STATUSES", "PriceBook", "record_menu_price", "sync_orders"]
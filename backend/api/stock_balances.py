@@ -0,0 +1,221 @@
+"""Materialized stock balances.
+
+Current stock used to be a SUM over the whole StockMovement ledger for the
+item, computed on every read and twice per write (validate, then refresh
+InventoryItem.quantity), so its cost grew with history instead of with
+current state. StockBalance keeps the running total per (item, location,
+batch) instead:
+
+- every movement written by inventory_services adds its qty to the matching
+  balance row in the same transaction (apply_movement, or apply_movements
+  for the bulk-written consumption and transfer slices);
+- write paths that must not over-draw stock read the rows they are about to
+  change with SELECT ... FOR UPDATE (lock_balances, lock_balance_rows), so
+  concurrent consumptions of the same item serialize on those rows;
+- every multi-row lock is taken in (location, item, batch_key) order, and a
+  transfer locks its destination rows together with its source rows, so
+  writers touching overlapping rows (e.g. A->B and B->A transfers) queue
+  instead of deadlocking;
+- reads of current stock (no as_of) sum a handful of balance rows.
+
+`python manage.py rebuild_stock_balances --check` compares the table with
+the ledger and reports drift; without --check it also repairs it.
+"""
+
+from __future__ import annotations
+
+from decimal import Decimal
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from django.db import IntegrityError, transaction
+from django.db.models import Case, F, Sum, Value, When
+from django.utils import timezone as dj_timezone
+
+DEC0 = Decimal("0")
+
+BalanceKey = Tuple[str, str, str]  # (item_id, location_id, batch_key)
+
+
+def batch_key(batch_id) -> str:
+    return str(batch_id) if batch_id else ""
+
+
+def apply_movement(item_id, location_id, batch_id, delta) -> None:
+    """Add `delta` to the (item, location, batch) balance within the caller's transaction."""
+    from .models import StockBalance
+
+    key = batch_key(batch_id)
+    rows = StockBalance.objects.filter(item_id=item_id, location_id=location_id, batch_key=key)
+    # UPDATE ... SET qty = qty + delta takes the row lock and never loses a concurrent increment
+    if rows.update(qty=F("qty") + delta, updated_at=dj_timezone.now()):
+        return
+    try:
+        with transaction.atomic():
+            StockBalance.objects.create(
+                item_id=item_id, location_id=location_id, batch_id=batch_id or None, batch_key=key, qty=delta
+            )
+        return
+    except IntegrityError:
+        pass  # another writer created the row first; add to it instead
+    rows.update(qty=F("qty") + delta, updated_at=dj_timezone.now())
+
+
+def lock_balance_rows(item_ids, location_ids) -> List[Tuple[int, str, str, str, Decimal]]:
+    """Lock every balance row of `item_ids` at `location_ids` in (location, item, batch_key) order.
+
+    Returns (pk, item_id, location_id, batch_key, qty) tuples in that order.
+    """
+    from .models import StockBalance
+
+    qs = (
+        StockBalance.objects.select_for_update()
+        .filter(item_id__in=sorted({str(i) for i in item_ids}), location_id__in=sorted({str(loc) for loc in location_ids}))
+        .order_by("location_id", "item_id", "batch_key")
+        .values_list("id", "item_id", "location_id", "batch_key", "qty")
+    )
+    return [(pk, str(i), str(loc), key, qty or DEC0) for pk, i, loc, key, qty in qs]
+
+
+def apply_movements(movements) -> None:
+    """Bulk form of apply_movement: one locking SELECT and one CASE UPDATE for rows that already exist."""
+    from .models import StockBalance
+
+    deltas: Dict[BalanceKey, Decimal] = {}
+    batch_ids: Dict[BalanceKey, object] = {}
+    for mv in movements:
+        key = (str(mv.item_id), str(mv.location_id), batch_key(mv.batch_id))
+        deltas[key] = deltas.get(key, DEC0) + Decimal(str(mv.qty))
+        batch_ids[key] = mv.batch_id
+    if not deltas:
+        return
+    # Locked in key order (a no-op for rows the caller already holds)
+    existing = {
+        (i, loc, key): pk
+        for pk, i, loc, key, _ in lock_balance_rows({k[0] for k in deltas}, {k[1] for k in deltas})
+    }
+    whens = [When(id=existing[k], then=Value(d)) for k, d in deltas.items() if k in existing]
+    if whens:
+        qty_field = StockBalance._meta.get_field("qty")
+        StockBalance.objects.filter(id__in=[existing[k] for k in deltas if k in existing]).update(
+            qty=F("qty") + Case(*whens, output_field=qty_field), updated_at=dj_timezone.now()
+        )
+    for key, delta in deltas.items():
+        if key not in existing:
+            apply_movement(key[0], key[1], batch_ids[key], delta)
+
+
+def lock_balances(item_id, location_id) -> Dict[str, Decimal]:
+    """{batch_key: qty} for an item at a location, rows locked until the transaction ends."""
+    from .models import StockBalance
+
+    qs = (
+        StockBalance.objects.select_for_update()
+        .filter(item_id=item_id, location_id=location_id)
+        .order_by("batch_key")
+        .values_list("batch_key", "qty")
+    )
+    return {key: qty or DEC0 for key, qty in qs}
+
+
+def current_balances(item_ids: Optional[Sequence[str]] = None, location_id: Optional[str] = None) -> Dict[str, Decimal]:
+    """{item_id: qty} summed over batches (and locations unless one is given)."""
+    from .models import StockBalance
+
+    qs = StockBalance.objects.all()
+    if item_ids:
+        qs = qs.filter(item_id__in=list(item_ids))
+    if location_id:
+        qs = qs.filter(location_id=location_id)
+    return {str(row["item_id"]): row["total"] or DEC0 for row in qs.values("item_id").annotate(total=Sum("qty"))}
+
+
+def batch_balances(item_id, location_id: Optional[str] = None) -> Dict[str, Decimal]:
+    """{batch_id: qty} for an item; unbatched stock is left out."""
+    from .models import StockBalance
+
+    qs = StockBalance.objects.filter(item_id=item_id).exclude(batch_key="")
+    if location_id:
+        qs = qs.filter(location_id=location_id)
+    out: Dict[str, Decimal] = {}
+    for key, total in qs.values("batch_key").annotate(total=Sum("qty")).values_list("batch_key", "total"):
+        out[key] = total or DEC0
+    return out
+
+
+def _ledger_totals(item_ids=None) -> Dict[BalanceKey, Decimal]:
+    from .models import StockMovement
+
+    qs = StockMovement.objects.all()
+    if item_ids:
+        qs = qs.filter(item_id__in=list(item_ids))
+    rows = qs.values("item_id", "location_id", "batch_id").annotate(total=Sum("qty"))
+    out: Dict[BalanceKey, Decimal] = {}
+    for r in rows:
+        key = (str(r["item_id"]), str(r["location_id"]), batch_key(r["batch_id"]))
+        out[key] = out.get(key, DEC0) + (r["total"] or DEC0)
+    return out
+
+
+def _stored_totals(item_ids=None) -> Dict[BalanceKey, Decimal]:
+    from .models import StockBalance
+
+    qs = StockBalance.objects.all()
+    if item_ids:
+        qs = qs.filter(item_id__in=list(item_ids))
+    return {
+        (str(i), str(loc), key): qty or DEC0
+        for i, loc, key, qty in qs.values_list("item_id", "location_id", "batch_key", "qty")
+    }
+
+
+def find_drift(item_ids: Optional[Sequence[str]] = None) -> List[dict]:
+    """Balance rows that disagree with the ledger (missing rows count as 0)."""
+    ledger = _ledger_totals(item_ids)
+    stored = _stored_totals(item_ids)
+    drift = []
+    for key in sorted(set(ledger) | set(stored)):
+        expected = ledger.get(key, DEC0)
+        actual = stored.get(key, DEC0)
+        if expected != actual:
+            drift.append({
+                "itemId": key[0],
+                "locationId": key[1],
+                "batchId": key[2] or None,
+                "ledger": expected,
+                "balance": actual,
+            })
+    return drift
+
+
+def rebuild_balances(item_ids: Optional[Sequence[str]] = None) -> List[dict]:
+    """Recompute balances from the ledger, one item per transaction; returns the drift fixed."""
+    from .models import InventoryItem, StockBalance
+
+    if item_ids is None:
+        item_ids = [str(i) for i in InventoryItem.objects.order_by("id").values_list("id", flat=True)]
+    fixed: List[dict] = []
+    for iid in item_ids:
+        with transaction.atomic():
+            list(StockBalance.objects.select_for_update().filter(item_id=iid).values_list("id", flat=True))
+            drift = find_drift([iid])
+            for d in drift:
+                key = d["batchId"] or ""
+                rows = StockBalance.objects.filter(item_id=iid, location_id=d["locationId"], batch_key=key)
+                if not rows.update(qty=d["ledger"], updated_at=dj_timezone.now()):
+                    StockBalance.objects.create(
+                        item_id=iid, location_id=d["locationId"], batch_id=d["batchId"], batch_key=key, qty=d["ledger"]
+                    )
+            fixed.extend(drift)
+    return fixed
+
+
+__all__ = [
+    "apply_movement",
+    "apply_movements",
+    "lock_balances",
+    "lock_balance_rows",
+    "current_balances",
+    "batch_balances",
+    "find_drift",
+    "rebuild_balances",
+]
@@ -0,0 +1,182 @@
+"""Stock checkpoints for point-in-time (as_of) queries.
+
+Without checkpoints, "stock as of T" re-sums every movement up to T, so
+period-end valuations and audits scan the whole ledger. The stock_checkpoints
+command stores per-(item, location, batch) balances at day or month
+boundaries, and point-in-time queries start from the nearest one:
+
+    C   = latest checkpoint with C.as_of <= T
+    qty = C's lines
+        + movements with C.as_of < effective_at <= T
+        + movements with effective_at <= C.as_of recorded at/after C.taken_at
+
+The last term covers movements backdated into a period after its checkpoint
+was written. A checkpoint only counts movements recorded before taken_at
+(database time, like StockMovement.recorded_at), which trails the clock by
+STOCK_CHECKPOINT_SETTLE_SECONDS so transactions still open when it is
+written end up in the tail rather than being missed.
+
+Each checkpoint is built from the previous one the same way. `--verify`
+recomputes checkpoints and as_of answers from the raw ledger and reports any
+difference.
+"""
+
+from __future__ import annotations
+
+from datetime import datetime, time, timedelta
+from decimal import Decimal
+from typing import Dict, List, Optional, Sequence
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import Q, Sum
+from django.utils import timezone as dj_timezone
+
+from .stock_balances import BalanceKey, batch_key
+from .utils_dbtime import db_now
+
+DEC0 = Decimal("0")
+
+
+def _settle_seconds() -> int:
+    return max(0, int(getattr(settings, "STOCK_CHECKPOINT_SETTLE_SECONDS", 60)))
+
+
+def period_start(when: datetime, period: str = "day") -> datetime:
+    """Local midnight of `when`'s day (or of the first of its month)."""
+    day = dj_timezone.localtime(when).date()
+    if period == "month":
+        day = day.replace(day=1)
+    return dj_timezone.make_aware(datetime.combine(day, time.min))
+
+
+def recent_boundaries(count: int, period: str = "day", now: Optional[datetime] = None) -> List[datetime]:
+    """The last `count` settled period boundaries at or before `now`, oldest first."""
+    out = []
+    edge = period_start(now or (db_now() - timedelta(seconds=_settle_seconds())), period)
+    for _ in range(max(1, int(count))):
+        out.append(edge)
+        edge = period_start(edge - timedelta(days=1), period)
+    return out[::-1]
+
+
+def _add_movements(totals: Dict[BalanceKey, Decimal], qs) -> None:
+    for r in qs.values("item_id", "location_id", "batch_id").annotate(total=Sum("qty")):
+        key = (str(r["item_id"]), str(r["location_id"]), batch_key(r["batch_id"]))
+        totals[key] = totals.get(key, DEC0) + (r["total"] or DEC0)
+
+
+def ledger_as_of(
+    as_of: datetime,
+    item_ids: Optional[Sequence[str]] = None,
+    location_id: Optional[str] = None,
+    recorded_before: Optional[datetime] = None,
+    use_checkpoints: bool = True,
+) -> Dict[BalanceKey, Decimal]:
+    """{(item, location, batch_key): qty} as of `as_of`, from the nearest checkpoint plus the tail."""
+    from .models import StockCheckpoint, StockCheckpointLine, StockMovement
+
+    movements = StockMovement.objects.all()
+    lines = StockCheckpointLine.objects.all()
+    if item_ids:
+        movements = movements.filter(item_id__in=list(item_ids))
+        lines = lines.filter(item_id__in=list(item_ids))
+    if location_id:
+        movements = movements.filter(location_id=location_id)
+        lines = lines.filter(location_id=location_id)
+    if recorded_before is not None:
+        movements = movements.filter(recorded_at__lt=recorded_before)
+
+    checkpoint = None
+    if use_checkpoints:
+        cps = StockCheckpoint.objects.filter(as_of__lte=as_of)
+        if recorded_before is not None:
+            cps = cps.filter(taken_at__lte=recorded_before)
+        checkpoint = cps.order_by("-as_of").first()
+
+    totals: Dict[BalanceKey, Decimal] = {}
+    if checkpoint is None:
+        _add_movements(totals, movements.filter(effective_at__lte=as_of))
+        return totals
+    for iid, loc, key, qty in lines.filter(checkpoint=checkpoint).values_list("item_id", "location_id", "batch_key", "qty"):
+        totals[(str(iid), str(loc), key)] = qty or DEC0
+    _add_movements(totals, movements.filter(
+        Q(effective_at__gt=checkpoint.as_of, effective_at__lte=as_of)
+        | Q(effective_at__lte=checkpoint.as_of, recorded_at__gte=checkpoint.taken_at)
+    ))
+    return totals
+
+
+def write_checkpoint(as_of: datetime, period: str = "day"):
+    """Store balances as of `as_of` (idempotent); returns the StockCheckpoint."""
+    from .models import StockCheckpoint, StockCheckpointLine
+
+    taken_at = db_now() - timedelta(seconds=_settle_seconds())
+    if as_of > taken_at:
+        raise ValueError("Checkpoint time has not settled yet")
+    existing = StockCheckpoint.objects.filter(as_of=as_of).first()
+    if existing is not None:
+        return existing
+    totals = ledger_as_of(as_of, recorded_before=taken_at)
+    rows = [
+        StockCheckpointLine(item_id=iid, location_id=loc, batch_key=key, qty=qty)
+        for (iid, loc, key), qty in sorted(totals.items())
+        if qty != DEC0
+    ]
+    try:
+        with transaction.atomic():
+            cp = StockCheckpoint.objects.create(as_of=as_of, taken_at=taken_at, period=period, line_count=len(rows))
+            for row in rows:
+                row.checkpoint = cp
+            StockCheckpointLine.objects.bulk_create(rows, batch_size=1000)
+    except IntegrityError:
+        return StockCheckpoint.objects.get(as_of=as_of)  # written concurrently
+    return cp
+
+
+def _diff(expected: Dict[BalanceKey, Decimal], actual: Dict[BalanceKey, Decimal], label: str) -> List[dict]:
+    out = []
+    for key in sorted(set(expected) | set(actual)):
+        if expected.get(key, DEC0) != actual.get(key, DEC0):
+            out.append({
+                "check": label,
+                "itemId": key[0],
+                "locationId": key[1],
+                "batchId": key[2] or None,
+                "expected": expected.get(key, DEC0),
+                "actual": actual.get(key, DEC0),
+            })
+    return out
+
+
+def verify_checkpoints(limit: Optional[int] = None, now: Optional[datetime] = None) -> List[dict]:
+    """Compare stored checkpoints, and checkpoint + tail answers, with full ledger sums."""
+    from .models import StockCheckpoint, StockCheckpointLine
+
+    cps = StockCheckpoint.objects.order_by("-as_of")
+    if limit:
+        cps = cps[: max(1, int(limit))]
+    problems: List[dict] = []
+    for cp in cps:
+        stored = {
+            (str(i), str(loc), key): qty
+            for i, loc, key, qty in StockCheckpointLine.objects.filter(checkpoint=cp).values_list(
+                "item_id", "location_id", "batch_key", "qty"
+            )
+        }
+        label = cp.as_of.isoformat()
+        full = ledger_as_of(cp.as_of, recorded_before=cp.taken_at, use_checkpoints=False)
+        problems += _diff(full, stored, f"checkpoint {label}")
+        problems += _diff(ledger_as_of(cp.as_of, use_checkpoints=False), ledger_as_of(cp.as_of), f"as_of {label}")
+    at = now or dj_timezone.now()
+    problems += _diff(ledger_as_of(at, use_checkpoints=False), ledger_as_of(at), f"as_of {at.isoformat()}")
+    return problems
+
+
+__all__ = [
+    "period_start",
+    "recent_boundaries",
+    "ledger_as_of",
+    "write_checkpoint",
+    "verify_checkpoints",
+]
@@ -0,0 +1,140 @@
+"""Keyset-paginated stock ledger with a running balance.
+
+Movements are ordered by (effective_at, recorded_at, id), which is total and
+stable, so a page ends at a position rather than an offset:
+
+- the opening balance (everything before the first row of the range) is
+  computed once, from the nearest stock checkpoint plus the tail;
+- each page's cursor carries the last row's sort key and the running balance
+  after it, so the next page is a single indexed range scan and never
+  re-sums earlier rows;
+- exports walk the same ordering with QuerySet.iterator(), so memory stays
+  flat however many movements the item has.
+
+Cursors are signed (django.core.signing), so a client cannot change the
+balance it resumes from.
+"""
+
+from __future__ import annotations
+
+from datetime import datetime, timedelta
+from decimal import Decimal
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from django.core import signing
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+
+from .stock_checkpoints import ledger_as_of
+
+DEC0 = Decimal("0")
+_CURSOR_SALT = "inventory.ledger"
+LEDGER_FIELDS = (
+    "id", "item_id", "location_id", "batch_id", "movement_type", "qty",
+    "effective_at", "recorded_at", "reference_type", "reference_id", "reason",
+)
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def encode_cursor(row: Dict[str, Any], balance: Decimal, params: Tuple) -> str:
+    return signing.dumps(
+        {
+            "e": row["effective_at"].isoformat(),
+            "r": row["recorded_at"].isoformat(),
+            "i": str(row["id"]),
+            "b": str(balance),
+            "p": [str(p or "") for p in params],
+        },
+        salt=_CURSOR_SALT,
+        compress=True,
+    )
+
+
+def decode_cursor(token: str, params: Tuple) -> Tuple[datetime, datetime, str, Decimal]:
+    try:
+        data = signing.loads(token, salt=_CURSOR_SALT)
+        if data.get("p") != [str(p or "") for p in params]:
+            raise InvalidCursor("Cursor belongs to a different query")
+        return parse_datetime(data["e"]), parse_datetime(data["r"]), data["i"], Decimal(data["b"])
+    except InvalidCursor:
+        raise
+    except Exception:
+        raise InvalidCursor("Invalid cursor")
+
+
+def _movements(item_id, location_id=None, date_from=None, date_to=None):
+    from .models import StockMovement
+
+    qs = StockMovement.objects.filter(item_id=item_id)
+    if location_id:
+        qs = qs.filter(location_id=location_id)
+    if date_from:
+        qs = qs.filter(effective_at__gte=date_from)
+    if date_to:
+        qs = qs.filter(effective_at__lte=date_to)
+    return qs.order_by("effective_at", "recorded_at", "id").values(*LEDGER_FIELDS)
+
+
+def opening_balance(item_id, location_id=None, date_from: Optional[datetime] = None) -> Decimal:
+    """Stock before `date_from` (0 when the range starts at the beginning of the ledger)."""
+    if not date_from:
+        return DEC0
+    totals = ledger_as_of(date_from - timedelta(microseconds=1), [str(item_id)], location_id)
+    return sum(totals.values(), DEC0)
+
+
+def iter_ledger(item_id, location_id=None, date_from=None, date_to=None, cursor: Optional[str] = None,
+                chunk_size: int = 2000) -> Iterator[Tuple[Dict[str, Any], Decimal]]:
+    """Yield (movement values, balance after it) in ledger order, streaming from the database."""
+    params = (item_id, location_id, date_from, date_to)
+    qs = _movements(item_id, location_id, date_from, date_to)
+    if cursor:
+        eff, rec, last_id, balance = decode_cursor(cursor, params)
+        qs = qs.filter(
+            Q(effective_at__gt=eff)
+            | Q(effective_at=eff, recorded_at__gt=rec)
+            | Q(effective_at=eff, recorded_at=rec, id__gt=last_id)
+        )
+    else:
+        balance = opening_balance(item_id, location_id, date_from)
+    for row in qs.iterator(chunk_size=chunk_size):
+        balance += row["qty"] or DEC0
+        yield row, balance
+
+
+def ledger_page(item_id, location_id=None, date_from=None, date_to=None, cursor: Optional[str] = None,
+                limit: int = 200) -> Dict[str, Any]:
+    """One page of the ledger: rows with running balances and the cursor for the next page."""
+    params = (item_id, location_id, date_from, date_to)
+    rows: List[Tuple[Dict[str, Any], Decimal]] = []
+    # One extra row tells whether another page exists
+    for row, balance in iter_ledger(item_id, location_id, date_from, date_to, cursor, chunk_size=limit + 1):
+        rows.append((row, balance))
+        if len(rows) > limit:
+            break
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    if rows:
+        opening = rows[0][1] - (rows[0][0]["qty"] or DEC0)
+    elif cursor:
+        opening = decode_cursor(cursor, params)[3]
+    else:
+        opening = opening_balance(item_id, location_id, date_from)
+    return {
+        "rows": rows,
+        "openingBalance": opening,
+        "closingBalance": rows[-1][1] if rows else opening,
+        "nextCursor": encode_cursor(rows[-1][0], rows[-1][1], params) if has_more else None,
+    }
+
+
+__all__ = [
+    "InvalidCursor",
+    "LEDGER_FIELDS",
+    "opening_balance",
+    "iter_ledger",
+    "ledger_page",
+]
@@ -0,0 +1,84 @@
+from types import SimpleNamespace
+from unittest import mock
+
+from django.core import mail
+from django.test import TestCase, override_settings
+
+from api.emails import email_user_login_otp, send_outbox_batch
+from api.models import EmailOutbox
+
+
+@override_settings(EMAIL_OUTBOX_ENABLED=True, EMAIL_OUTBOX_BACKOFF_SECONDS=30)
+class EmailOutboxTests(TestCase):
+    def _user(self, n=0):
+        return SimpleNamespace(email=f"user{n}@example.com", name="Test")
+
+    def test_otp_is_queued_not_sent_inline(self):
+        email_user_login_otp(self._user(), "123456")
+        self.assertEqual(len(mail.outbox), 0)
+        row = EmailOutbox.objects.get()
+        self.assertEqual(row.status, EmailOutbox.STATUS_PENDING)
+        self.assertEqual(row.to, ["user0@example.com"])
+        self.assertIn("123456", row.body)
+
+    def test_worker_sends_batch_over_one_connection(self):
+        for i in range(5):
+            email_user_login_otp(self._user(i), "654321")
+        with mock.patch("api.emails.get_connection", wraps=mail.get_connection) as get_conn:
+            stats = send_outbox_batch(limit=10)
+        self.assertEqual(get_conn.call_count, 1)
+        self.assertEqual(stats["sent"], 5)
+        self.assertEqual(len(mail.outbox), 5)
+        self.assertEqual(mail.outbox[0].alternatives[0][1], "text/html")
+        for row in EmailOutbox.objects.all():
+            self.assertEqual(row.status, EmailOutbox.STATUS_SENT)
+            # One-time codes are not kept after delivery
+            self.assertEqual(row.body, "")
+        self.assertEqual(send_outbox_batch(limit=10)["sent"], 0)
+
+    def test_failures_back_off_then_go_dead(self):
+        email_user_login_otp(self._user(), "111111")
+        with mock.patch("django.core.mail.EmailMultiAlternatives.send", side_effect=OSError("smtp down")):
+            self.assertEqual(send_outbox_batch(max_attempts=2)["failed"], 1)
+            row = EmailOutbox.objects.get()
+            self.assertEqual(row.status, EmailOutbox.STATUS_FAILED)
+            self.assertIn("smtp down", row.last_error)
+            # Not due yet: backoff pushed next_attempt_at into the future
+            self.assertEqual(sum(send_outbox_batch(max_attempts=2).values()), 0)
+            EmailOutbox.objects.update(next_attempt_at=row.created_at)
+            self.assertEqual(send_outbox_batch(max_attempts=2)["dead"], 1)
+        self.assertEqual(EmailOutbox.objects.get().status, EmailOutbox.STATUS_DEAD)
+
+    def test_rows_are_leased_before_sending_and_recovered_after_a_crash(self):
+        email_user_login_otp(self._user(), "333333")
+        seen = []
+
+        def send(msg):
+            # Claimed in its own step: another worker sees the lease, not a lock
+            seen.append(EmailOutbox.objects.values_list("status", flat=True).get())
+            self.assertEqual(sum(send_outbox_batch().values()), 0)
+            return 1
+
+        with mock.patch("django.core.mail.EmailMultiAlternatives.send", autospec=True, side_effect=send):
+            self.assertEqual(send_outbox_batch()["sent"], 1)
+        self.assertEqual(seen, [EmailOutbox.STATUS_SENDING])
+
+        # A worker died holding a lease: the row is picked up once it expires
+        email_user_login_otp(self._user(1), "444444")
+        row = EmailOutbox.objects.get(status=EmailOutbox.STATUS_PENDING)
+        with mock.patch("api.emails.get_connection", side_effect=SystemExit):
+            with self.assertRaises(SystemExit):
+                send_outbox_batch()
+        row.refresh_from_db()
+        self.assertEqual((row.status, row.attempts), (EmailOutbox.STATUS_SENDING, 1))
+        self.assertEqual(send_outbox_batch()["sent"], 0)
+        EmailOutbox.objects.filter(id=row.id).update(next_attempt_at=row.created_at)
+        self.assertEqual(send_outbox_batch()["sent"], 1)
+        row.refresh_from_db()
+        self.assertEqual((row.status, row.attempts), (EmailOutbox.STATUS_SENT, 2))
+
+    @override_settings(EMAIL_OUTBOX_ENABLED=False)
+    def test_disabled_sends_inline(self):
+        email_user_login_otp(self._user(), "222222")
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertFalse(EmailOutbox.objects.exists())
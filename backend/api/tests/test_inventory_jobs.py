@@ -0,0 +1,130 @@
+import json
+from datetime import timedelta
+from unittest import mock
+
+from django.db import connection
+from django.test import Client, TestCase, override_settings
+from django.utils import timezone as dj_tz
+
+from api import inventory_jobs
+from api.inventory_jobs import run_consumption_batch
+from api.inventory_services import get_current_stock, record_receipt
+from api.models import AppUser, InventoryConsumptionJob, InventoryItem, Location, MenuItem, StockMovement
+from api.tests.test_orders import auth_headers, reset_rate_limits
+
+
+@override_settings(INVENTORY_JOBS_ASYNC=True, INVENTORY_JOB_BACKOFF_SECONDS=30)
+class InventoryConsumptionJobTests(TestCase):
+    def setUp(self):
+        reset_rate_limits()
+        self.client = Client()
+        self.admin = AppUser.objects.create(email='admin@example.com', name='Admin', role='admin', status='active')
+        self.headers = auth_headers(self.admin)
+        self.loc, _ = Location.objects.get_or_create(code='MAIN', defaults={'name': 'Main'})
+        self.rice = InventoryItem.objects.create(name='Rice', unit='cup')
+        self.menu = MenuItem.objects.create(name='Rice Bowl', price=30, available=True, ingredients=[str(self.rice.id)])
+
+    def _complete_order(self, qty=2):
+        oid = self.client.post(
+            '/api/orders',
+            data=json.dumps({'items': [{'menuItemId': str(self.menu.id), 'quantity': qty}]}),
+            content_type='application/json',
+            **self.headers,
+        ).json()['data']['id']
+        for status in ('in_progress', 'ready', 'completed'):
+            resp = self.client.patch(f'/api/orders/{oid}/status', data=json.dumps({'status': status}),
+                                     content_type='application/json', **self.headers)
+            self.assertEqual(resp.status_code, 200)
+        return oid
+
+    def _stock(self):
+        return get_current_stock([str(self.rice.id)]).get(str(self.rice.id))
+
+    def test_completion_enqueues_and_worker_consumes_once(self):
+        record_receipt(item=self.rice, qty=10, location=self.loc)
+        oid = self._complete_order(qty=3)
+        # The PATCH only queued the work
+        self.assertEqual(StockMovement.objects.filter(reference_type='order').count(), 0)
+        job = InventoryConsumptionJob.objects.get(order_id=oid)
+        self.assertEqual(job.status, InventoryConsumptionJob.STATUS_PENDING)
+
+        self.assertEqual(run_consumption_batch()['done'], 1)
+        self.assertEqual(self._stock(), 7)
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.movements), (InventoryConsumptionJob.STATUS_DONE, 1))
+
+        # Re-running, or forcing the job back to pending, never consumes twice
+        self.assertEqual(run_consumption_batch(), {'done': 0, 'failed': 0, 'dead': 0})
+        InventoryConsumptionJob.objects.filter(id=job.id).update(status=InventoryConsumptionJob.STATUS_PENDING)
+        run_consumption_batch()
+        self.assertEqual(self._stock(), 7)
+
+    def test_failed_job_backs_off_and_can_be_retried_from_reconciliation_view(self):
+        oid = self._complete_order(qty=2)  # no stock on hand yet
+        stats = run_consumption_batch(max_attempts=1)
+        self.assertEqual(stats['dead'], 1)
+
+        listing = self.client.get('/api/inventory/consumption-jobs', **self.headers).json()
+        self.assertEqual([j['orderId'] for j in listing['data']], [oid])
+        self.assertIn('Insufficient stock', listing['data'][0]['lastError'])
+
+        record_receipt(item=self.rice, qty=5, location=self.loc)
+        job_id = listing['data'][0]['id']
+        resp = self.client.post(f'/api/inventory/consumption-jobs/{job_id}/retry', data=json.dumps({'runNow': True}),
+                                content_type='application/json', **self.headers)
+        self.assertEqual(resp.json()['data']['status'], 'done')
+        self.assertEqual(self._stock(), 3)
+        again = self.client.post(f'/api/inventory/consumption-jobs/{job_id}/retry', **self.headers)
+        self.assertEqual(again.status_code, 409)
+
+    def test_each_job_commits_on_its_own(self):
+        record_receipt(item=self.rice, qty=2, location=self.loc)
+        self._complete_order(qty=2)
+        self._complete_order(qty=5)  # more than is left once the first is applied
+        outside = len(connection.atomic_blocks)
+        depths = []
+
+        def tracking(job):
+            depths.append(len(connection.atomic_blocks))
+            return apply(job)
+
+        apply = inventory_jobs._apply
+        with mock.patch('api.inventory_jobs._apply', side_effect=tracking):
+            stats = run_consumption_batch()
+        # No batch-wide transaction around the per-job one
+        self.assertEqual(depths, [outside + 1, outside + 1])
+        self.assertEqual(stats, {'done': 1, 'failed': 1, 'dead': 0})
+        self.assertEqual(self._stock(), 0)
+
+    def test_leased_job_is_left_until_the_lease_expires(self):
+        record_receipt(item=self.rice, qty=10, location=self.loc)
+        oid = self._complete_order(qty=1)
+        job = InventoryConsumptionJob.objects.get(order_id=oid)
+        # Another worker holds it
+        InventoryConsumptionJob.objects.filter(id=job.id).update(
+            status=InventoryConsumptionJob.STATUS_PROCESSING, attempts=1,
+            next_attempt_at=dj_tz.now() + timedelta(minutes=5),
+        )
+        self.assertEqual(run_consumption_batch()['done'], 0)
+        self.assertEqual(run_consumption_batch(job_ids=[job.id])['done'], 0)
+        self.assertEqual(self._stock(), 10)
+
+        # That worker died; once the lease runs out the job is picked up again
+        InventoryConsumptionJob.objects.filter(id=job.id).update(next_attempt_at=dj_tz.now() - timedelta(seconds=1))
+        self.assertEqual(run_consumption_batch()['done'], 1)
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), (InventoryConsumptionJob.STATUS_DONE, 2))
+        self.assertEqual(self._stock(), 9)
+
+    def test_reconciliation_view_rejects_bad_paging(self):
+        for query in ('page=abc', 'page=0', 'limit=x', 'limit=-5'):
+            resp = self.client.get(f'/api/inventory/consumption-jobs?{query}', **self.headers)
+            self.assertEqual(resp.status_code, 400, query)
+        resp = self.client.get('/api/inventory/consumption-jobs?page=2&limit=500', **self.headers)
+        self.assertEqual(resp.json()['pagination']['limit'], 200)
+
+    def test_retryable_failure_waits_for_backoff(self):
+        self._complete_order()
+        self.assertEqual(run_consumption_batch()['failed'], 1)
+        # Not due yet
+        self.assertEqual(run_consumption_batch(), {'done': 0, 'failed': 0, 'dead': 0})
@@ -0,0 +1,49 @@
+import json
+from unittest import mock
+
+from django.test import Client, RequestFactory, SimpleTestCase, TestCase, override_settings
+
+from api.views_common import RequestBodyTooLarge, _json_body, _login_rate_key, _parse_json_body
+
+
+class JsonBodyAccessorTests(SimpleTestCase):
+    def setUp(self):
+        self.factory = RequestFactory()
+
+    def _post(self, body, **extra):
+        return self.factory.post("/api/x", data=body, content_type="application/json", **extra)
+
+    def test_parsed_once_and_shared_with_rate_key(self):
+        request = self._post(json.dumps({"email": "A@Example.com ", "password": "x"}))
+        with mock.patch("api.views_common._orjson") as fast:
+            fast.loads.side_effect = lambda raw: json.loads(raw)
+            self.assertTrue(_login_rate_key(request).endswith(":a@example.com"))
+            self.assertEqual(_json_body(request)["password"], "x")
+            self.assertIs(_json_body(request), _parse_json_body(request))
+        self.assertEqual(fast.loads.call_count, 1)
+
+    def test_invalid_and_non_object_bodies(self):
+        self.assertEqual(_json_body(self._post("")), {})
+        self.assertEqual(_json_body(self._post("[1, 2]")), {})
+        bad = self._post("{not json")
+        self.assertEqual(_json_body(bad), {})
+        with self.assertRaises(ValueError):
+            _parse_json_body(bad)
+
+    @override_settings(JSON_BODY_MAX_BYTES=64)
+    def test_oversized_body_rejected(self):
+        request = self._post(json.dumps({"pad": "x" * 100}))
+        with self.assertRaises(RequestBodyTooLarge):
+            _json_body(request)
+
+
+class RequestBodyLimitMiddlewareTests(TestCase):
+    @override_settings(JSON_BODY_MAX_BYTES=64)
+    def test_oversized_json_returns_413(self):
+        resp = Client().post(
+            "/api/auth/login",
+            data=json.dumps({"email": "a@example.com", "password": "x" * 200}),
+            content_type="application/json",
+        )
+        self.assertEqual(resp.status_code, 413)
+        self.assertFalse(resp.json()["success"])
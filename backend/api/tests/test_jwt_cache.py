@@ -0,0 +1,53 @@
+import time
+from unittest import mock
+
+import jwt
+from django.conf import settings
+from django.test import SimpleTestCase
+
+from api.utils_jwt import TokenCache, decode_token
+
+
+def make_token(sub="u1", exp_in=3600):
+    now = int(time.time())
+    payload = {"sub": sub, "email": f"{sub}@example.com", "iat": now, "exp": now + exp_in}
+    return jwt.encode(payload, settings.JWT_SECRET, algorithm=settings.JWT_ALGORITHM)
+
+
+class TokenCacheTests(SimpleTestCase):
+    def test_repeat_decodes_hit_cache(self):
+        cache = TokenCache(max_entries=10, ttl_seconds=300)
+        token = make_token()
+        with mock.patch("api.utils_jwt.jwt.decode", wraps=jwt.decode) as decode:
+            for _ in range(5):
+                self.assertEqual(decode_token(token, cache=cache)["sub"], "u1")
+        self.assertEqual(decode.call_count, 1)
+        self.assertEqual(cache.stats()["hits"], 4)
+
+    def test_entry_bounded_by_token_exp(self):
+        cache = TokenCache(max_entries=10, ttl_seconds=300)
+        token = make_token(exp_in=1)
+        decode_token(token, cache=cache)
+        with mock.patch("api.utils_jwt.time.time", return_value=time.time() + 5):
+            self.assertIsNone(cache.get(cache.digest(token)))
+        self.assertEqual(len(cache), 0)
+        with self.assertRaises(jwt.ExpiredSignatureError):
+            decode_token(make_token(exp_in=-10), cache=cache)
+        self.assertEqual(len(cache), 0)
+
+    def test_invalid_tokens_not_cached_and_lru_bounded(self):
+        cache = TokenCache(max_entries=3, ttl_seconds=300)
+        with self.assertRaises(jwt.InvalidTokenError):
+            decode_token("not-a-token", cache=cache)
+        self.assertEqual(len(cache), 0)
+        for i in range(10):
+            decode_token(make_token(sub=f"u{i}"), cache=cache)
+        self.assertEqual(len(cache), 3)
+
+    def test_purge_subject(self):
+        cache = TokenCache(max_entries=10, ttl_seconds=300)
+        decode_token(make_token(sub="a", exp_in=100), cache=cache)
+        decode_token(make_token(sub="a", exp_in=200), cache=cache)
+        decode_token(make_token(sub="b"), cache=cache)
+        self.assertEqual(cache.purge_subject("a"), 2)
+        self.assertEqual(len(cache), 1)
@@ -0,0 +1,47 @@
+from django.core.exceptions import ImproperlyConfigured
+from django.test import SimpleTestCase, override_settings
+
+from api.checks import check_shared_caches
+from api.tests.test_ratelimit import SHARED_CACHE
+from api.utils_lockout import CacheLockoutStore, LocalLockoutStore
+
+
+class LockoutStoreTests(SimpleTestCase):
+    def test_locks_after_threshold_and_clears_on_success(self):
+        store = LocalLockoutStore(max_keys=10)
+        for _ in range(4):
+            self.assertEqual(store.touch("a@example.com", "1.1.1.1", success=False), (False, 0))
+        locked, retry_after = store.touch("a@example.com", "1.1.1.1", success=False)
+        self.assertTrue(locked)
+        self.assertGreater(retry_after, 0)
+        self.assertTrue(store.is_locked("a@example.com", "1.1.1.1")[0])
+        self.assertFalse(store.is_locked("b@example.com", "1.1.1.1")[0])
+        stats = store.stats()
+        self.assertEqual(stats["lockouts"], 1)
+        self.assertEqual(stats["failures"], 5)
+
+        other = LocalLockoutStore(max_keys=10)
+        other.touch("c@example.com", "1.1.1.1", success=False)
+        other.touch("c@example.com", "1.1.1.1", success=True)
+        self.assertEqual(len(other), 0)
+
+    def test_memory_flat_under_email_spray(self):
+        store = LocalLockoutStore(max_keys=500)
+        for i in range(20000):
+            store.touch(f"user{i}@example.com", "9.9.9.9", success=False)
+        self.assertEqual(len(store), 500)
+        self.assertEqual(store.stats()["evictions"], 20000 - 500)
+
+    @override_settings(CACHES=SHARED_CACHE)
+    def test_cache_store_shared_between_instances(self):
+        a = CacheLockoutStore(prefix="lockout-test:")
+        b = CacheLockoutStore(prefix="lockout-test:")
+        for _ in range(5):
+            a.touch("d@example.com", "2.2.2.2", success=False)
+        self.assertTrue(b.is_locked("d@example.com", "2.2.2.2")[0])
+
+    @override_settings(LOGIN_LOCKOUT_BACKEND="api.utils_lockout.CacheLockoutStore")
+    def test_cache_store_fails_loudly_on_a_process_local_cache(self):
+        with self.assertRaises(ImproperlyConfigured):
+            CacheLockoutStore()
+        self.assertEqual([e.id for e in check_shared_caches()], ["api.E002"])
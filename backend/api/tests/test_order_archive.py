@@ -0,0 +1,86 @@
+from datetime import timedelta
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import Client, TestCase, override_settings
+from django.utils import timezone as dj_tz
+
+from api.models import (
+    AppUser,
+    ArchivedOrder,
+    ArchivedOrderItem,
+    InventoryConsumptionJob,
+    MenuItem,
+    Order,
+    OrderItem,
+)
+from api.order_archive import archive_closed_orders
+from api.tests.test_orders import auth_headers, reset_rate_limits
+
+
+@override_settings(ORDER_ARCHIVE_AFTER_DAYS=30)
+class OrderArchiveTests(TestCase):
+    def setUp(self):
+        reset_rate_limits()
+        self.client = Client()
+        self.admin = AppUser.objects.create(email='boss@example.com', name='Boss', role='admin', status='active')
+        self.menu = MenuItem.objects.create(name='Adobo', price=50, available=True)
+        self.seq = 0
+
+    def _order(self, status, age_days, qty=1):
+        self.seq += 1
+        o = Order.objects.create(order_number=f'T-{self.seq:04d}', status=status, total_amount=50 * qty)
+        OrderItem.objects.create(order=o, menu_item=self.menu, item_name='Adobo', price=50, quantity=qty)
+        Order.objects.filter(id=o.id).update(created_at=dj_tz.now() - timedelta(days=age_days))
+        return o
+
+    def test_moves_only_old_closed_orders(self):
+        old_done = self._order('completed', 60, qty=2)
+        old_cancelled = self._order('cancelled', 45)
+        old_open = self._order('in_queue', 60)
+        recent_done = self._order('completed', 2)
+        blocked = self._order('completed', 60)
+        InventoryConsumptionJob.objects.create(order_id=blocked.id, status=InventoryConsumptionJob.STATUS_FAILED)
+
+        totals = archive_closed_orders(batch_size=1)
+        self.assertEqual((totals['orders'], totals['items'], totals['batches']), (2, 2, 2))
+        self.assertEqual(
+            set(Order.objects.values_list('id', flat=True)), {old_open.id, recent_done.id, blocked.id}
+        )
+        archived = ArchivedOrder.objects.get(id=old_done.id)
+        self.assertEqual((archived.order_number, archived.status), (old_done.order_number, 'completed'))
+        self.assertEqual(ArchivedOrderItem.objects.get(order=archived).quantity, 2)
+        self.assertTrue(ArchivedOrder.objects.filter(id=old_cancelled.id).exists())
+        self.assertEqual(OrderItem.objects.filter(order_id=old_done.id).count(), 0)
+        # Nothing left to move
+        self.assertEqual(archive_closed_orders()['orders'], 0)
+
+    def test_archived_orders_stay_visible(self):
+        old = self._order('completed', 90, qty=3)
+        recent = self._order('completed', 1)
+        out = StringIO()
+        call_command('archive_orders', stdout=out)
+        self.assertIn('Archived 1 orders', out.getvalue())
+
+        headers = auth_headers(self.admin)
+        history = self.client.get('/api/orders/history?limit=1', **headers).json()
+        self.assertEqual(history['pagination']['total'], 2)
+        self.assertEqual(history['data'][0]['id'], str(recent.id))
+        page2 = self.client.get('/api/orders/history?limit=1&page=2', **headers).json()
+        self.assertEqual(page2['data'][0]['id'], str(old.id))
+        self.assertTrue(page2['data'][0]['archived'])
+        self.assertEqual(page2['data'][0]['items'][0]['quantity'], 3)
+
+        detail = self.client.get(f'/api/orders/{old.id}', **headers).json()
+        self.assertEqual(detail['data']['orderNumber'], old.order_number)
+        self.assertEqual(self.client.get('/api/reports/orders', **headers).json()['data'], {'completed': 2})
+        sales = self.client.get('/api/analytics/sales?range=365d', **headers).json()['data']
+        self.assertEqual(sales['totalOrders'], 2)
+        self.assertEqual(sales['topItems'][0]['quantity'], 4)
+
+    def test_dry_run_changes_nothing(self):
+        self._order('completed', 60)
+        out = StringIO()
+        call_command('archive_orders', '--dry-run', stdout=out)
+        self.assertIn('1 closed orders would be archived', out.getvalue())
+        self.assertEqual(ArchivedOrder.objects.count(), 0)
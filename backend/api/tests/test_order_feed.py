@@ -0,0 +1,219 @@
+import json
+from datetime import timedelta
+
+from django.test import Client, TestCase, override_settings
+from django.utils import timezone as dj_tz
+
+from api.models import AppUser, MenuItem, Order, OrderEvent
+from api.tests.test_orders import auth_headers, reset_rate_limits
+from api.utils_order_feed import stream_events
+
+
+def parse_sse(resp):
+    body = b"".join(resp.streaming_content).decode()
+    frames = []
+    for block in body.split("\n\n"):
+        fields = {}
+        for line in block.splitlines():
+            if line.startswith(":") or ": " not in line:
+                continue
+            k, v = line.split(": ", 1)
+            fields[k] = v
+        if "event" in fields:
+            frames.append({"id": int(fields.get("id", 0)), "event": fields["event"], "data": json.loads(fields["data"])})
+    return frames
+
+
+@override_settings(ORDER_FEED_MAX_SECONDS=0, ORDER_FEED_SETTLE_SECONDS=0)
+class OrderFeedTests(TestCase):
+    def setUp(self):
+        reset_rate_limits()
+        self.client = Client()
+        self.user = AppUser.objects.create(email='kitchen@example.com', name='Kitchen', role='staff', status='active')
+        self.menu = MenuItem.objects.create(name='Rice', price=15, available=True)
+        self.headers = auth_headers(self.user)
+
+    def _place(self):
+        resp = self.client.post(
+            '/api/orders',
+            data=json.dumps({'items': [{'menuItemId': str(self.menu.id), 'quantity': 1}]}),
+            content_type='application/json',
+            **self.headers,
+        )
+        return resp.json()['data']['id']
+
+    def test_feed_streams_creation_and_transitions_with_resume(self):
+        cursor = int(self.client.get('/api/orders/queue?feedCursor=1', **self.headers)['X-Order-Feed-Cursor'])
+        oid = self._place()
+        self.client.patch(f'/api/orders/{oid}/status', data=json.dumps({'status': 'in_progress'}),
+                          content_type='application/json', **self.headers)
+
+        resp = self.client.get('/api/orders/feed', HTTP_LAST_EVENT_ID=str(cursor), **self.headers)
+        self.assertEqual(resp['Content-Type'], 'text/event-stream')
+        frames = parse_sse(resp)
+        self.assertEqual([f['data']['kind'] for f in frames], ['created', 'status'])
+        self.assertEqual(frames[0]['data']['order']['items'][0]['name'], 'Rice')
+        self.assertEqual(frames[1]['data']['status'], 'in_progress')
+        self.assertEqual(frames[1]['data']['previousStatus'], 'in_queue')
+
+        # Resuming from the last id yields only newer deltas
+        self.client.patch(f'/api/orders/{oid}/status', data=json.dumps({'status': 'ready'}),
+                          content_type='application/json', **self.headers)
+        frames = parse_sse(self.client.get('/api/orders/feed', HTTP_LAST_EVENT_ID=str(frames[-1]['id']), **self.headers))
+        self.assertEqual([f['data']['status'] for f in frames], ['ready'])
+
+    def test_no_cursor_starts_at_head_and_stale_cursor_resets(self):
+        self._place()
+        frames = parse_sse(self.client.get('/api/orders/feed', **self.headers))
+        self.assertEqual([f['event'] for f in frames], ['ready'])
+        head = frames[0]['id']
+        self.assertEqual(head, OrderEvent.objects.latest('id').id)
+
+        self._place()
+        self._place()
+        OrderEvent.objects.filter(id__lte=head + 1).delete()
+        frames = parse_sse(self.client.get('/api/orders/feed?since=0', **self.headers))
+        self.assertEqual([f['data']['kind'] for f in frames], ['created'])
+        # Events after `head` were pruned, so the client must reload the snapshot
+        frames = parse_sse(self.client.get('/api/orders/feed', HTTP_LAST_EVENT_ID=str(head), **self.headers))
+        self.assertEqual(frames[0]['event'], 'reset')
+
+    def test_browser_token_authenticates_only_the_feed(self):
+        resp = self.client.post('/api/orders/feed/token', **self.headers)
+        self.assertEqual(resp.status_code, 200)
+        token, cursor = resp.json()['data']['token'], resp.json()['data']['cursor']
+        self._place()
+
+        # No Authorization header, as from EventSource
+        frames = parse_sse(self.client.get(f'/api/orders/feed?access_token={token}&since={cursor}'))
+        self.assertEqual([f['data']['kind'] for f in frames], ['created'])
+        self.assertEqual(self.client.get('/api/orders/feed').status_code, 401)
+        self.assertEqual(self.client.get('/api/orders/feed?access_token=bogus').status_code, 401)
+        # The token is not a session token, in a header or a query string
+        self.assertEqual(self.client.get('/api/orders/queue', HTTP_AUTHORIZATION=f'Bearer {token}').status_code, 401)
+        self.assertEqual(self.client.get(f'/api/orders/queue?access_token={token}').status_code, 401)
+
+    @override_settings(ORDER_FEED_TOKEN_TTL_SECONDS=-1)
+    def test_expired_browser_token_is_rejected(self):
+        token = self.client.post('/api/orders/feed/token', **self.headers).json()['data']['token']
+        self.assertEqual(self.client.get(f'/api/orders/feed?access_token={token}').status_code, 401)
+
+
+@override_settings(ORDER_FEED_SETTLE_SECONDS=30, ORDER_FEED_MAX_SECONDS=30, ORDER_FEED_POLL_SECONDS=0.05)
+class OrderFeedLateCommitTests(TestCase):
+    def _event(self, number, **extra):
+        return OrderEvent.objects.create(order_id='00000000-0000-0000-0000-%012d' % number,
+                                         order_number=str(number), kind='created', status='in_queue', **extra)
+
+    def _frames(self, gen, count):
+        frames = []
+        while len(frames) < count:
+            block = next(gen)
+            if block.startswith('id: '):
+                head, _, rest = block.partition('\n')
+                data = json.loads(rest.split('data: ', 1)[1])
+                frames.append((int(head[4:]), data))
+        return frames
+
+    def test_lower_id_committed_after_a_higher_one_is_still_streamed(self):
+        old = self._event(1)
+        OrderEvent.objects.filter(id=old.id).update(created_at=dj_tz.now() - timedelta(minutes=5))
+        # Transaction A takes the next id but has not committed when B does
+        late = self._event(2)
+        late_id = late.id
+        late.delete()
+        self._event(3)
+
+        gen = stream_events(old.id)
+        self.assertEqual(next(gen).split(':')[0], 'retry')
+        frames = self._frames(gen, 1)
+        self.assertEqual(frames[0][1]['orderNumber'], '3')
+        # The resume cursor stays at the last settled id, not the id just sent
+        self.assertEqual(frames[0][0], old.id)
+
+        # A commits
+        self._event(2, id=late_id)
+        frames = self._frames(gen, 1)
+        self.assertEqual((frames[0][1]['seq'], frames[0][1]['orderNumber']), (late_id, '2'))
+        gen.close()
+
+        # Reconnecting from the cursor replays both; clients dedupe on seq
+        gen = stream_events(frames[0][0])
+        replay = self._frames(gen, 2)
+        gen.close()
+        self.assertEqual(sorted(d['orderNumber'] for _, d in replay), ['2', '3'])
+
+
+@override_settings(ORDER_FEED_SETTLE_SECONDS=0)
+class BulkProgressDeltaTests(TestCase):
+    def setUp(self):
+        reset_rate_limits()
+        self.client = Client()
+        self.user = AppUser.objects.create(email='tracker@example.com', name='Tracker', role='staff', status='active')
+        self.menu = MenuItem.objects.create(name='Noodles', price=20, available=True)
+        self.headers = auth_headers(self.user)
+        self.ids = [self._place() for _ in range(3)]
+        self.url = '/api/orders/bulk-progress?ids=' + ','.join(self.ids)
+
+    def _place(self):
+        resp = self.client.post(
+            '/api/orders',
+            data=json.dumps({'items': [{'menuItemId': str(self.menu.id), 'quantity': 1}]}),
+            content_type='application/json',
+            **self.headers,
+        )
+        return resp.json()['data']['id']
+
+    def test_since_cursor_returns_only_changed_orders(self):
+        first = self.client.get(self.url, **self.headers).json()
+        self.assertEqual(len(first['data']), 3)
+        cursor = first['cursor']
+
+        self.client.patch(f'/api/orders/{self.ids[1]}/status', data=json.dumps({'status': 'in_progress'}),
+                          content_type='application/json', **self.headers)
+        delta = self.client.get(f'{self.url}&since={cursor}', **self.headers).json()
+        self.assertEqual([(d['id'], d['status']) for d in delta['data']], [(self.ids[1], 'in_progress')])
+        self.assertGreater(delta['cursor'], cursor)
+
+        empty = self.client.get(f"{self.url}&since={delta['cursor']}", **self.headers).json()
+        self.assertEqual(empty['data'], [])
+        self.assertEqual(self.client.get(f'{self.url}&since=abc', **self.headers).status_code, 400)
+
+    def test_unchanged_set_answers_304(self):
+        resp = self.client.get(self.url, **self.headers)
+        etag = resp['ETag']
+        with self.assertNumQueries(1):
+            cached = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag, **self.headers)
+        self.assertEqual(cached.status_code, 304)
+
+        self.client.patch(f'/api/orders/{self.ids[0]}/status', data=json.dumps({'status': 'in_progress'}),
+                          content_type='application/json', **self.headers)
+        fresh = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag, **self.headers)
+        self.assertEqual(fresh.status_code, 200)
+        self.assertNotEqual(fresh['ETag'], etag)
+
+    @override_settings(ORDER_FEED_SETTLE_SECONDS=30)
+    def test_change_committed_late_with_a_lower_seq_is_reported(self):
+        OrderEvent.objects.update(created_at=dj_tz.now() - timedelta(minutes=5))
+        settled = self.client.get(self.url, **self.headers).json()['cursor']
+
+        # Transaction A takes the next event id; B commits a higher one first
+        self.client.patch(f'/api/orders/{self.ids[0]}/status', data=json.dumps({'status': 'in_progress'}),
+                          content_type='application/json', **self.headers)
+        late = OrderEvent.objects.latest('id')
+        Order.objects.filter(id=self.ids[0]).update(status='in_queue', change_seq=settled)
+        late_id = late.id
+        late.delete()
+        self.client.patch(f'/api/orders/{self.ids[1]}/status', data=json.dumps({'status': 'in_progress'}),
+                          content_type='application/json', **self.headers)
+
+        delta = self.client.get(f'{self.url}&since={settled}', **self.headers).json()
+        self.assertEqual([d['id'] for d in delta['data']], [self.ids[1]])
+        # The cursor does not move past the uncommitted id
+        self.assertEqual(delta['cursor'], settled)
+
+        # A commits
+        OrderEvent.objects.create(id=late_id, order_id=self.ids[0], kind='status', status='in_progress')
+        Order.objects.filter(id=self.ids[0]).update(status='in_progress', change_seq=late_id)
+        delta = self.client.get(f"{self.url}&since={delta['cursor']}", **self.headers).json()
+        self.assertEqual(sorted(d['id'] for d in delta['data']), sorted(self.ids[:2]))
@@ -0,0 +1,120 @@
+import gzip
+import json
+import uuid
+from datetime import timedelta
+from decimal import Decimal
+from unittest import mock
+
+from django.db import connection, transaction
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone as dj_tz
+
+from api.models import AppUser, InventoryConsumptionJob, MenuItem, MenuItemPrice, Order, OrderItem
+from api.tests.test_orders import auth_headers, reset_rate_limits
+from api.utils_order_numbers import ORDER_NUMBERS
+
+
+class OrderSyncTests(TestCase):
+    def setUp(self):
+        reset_rate_limits()
+        ORDER_NUMBERS.reset()  # blocks reserved by earlier tests were rolled back with their sequence rows
+        self.client = Client()
+        self.user = AppUser.objects.create(email='pos1@example.com', name='POS 1', role='staff', status='active')
+        self.menu = MenuItem.objects.create(name='Halo-halo', price=Decimal('40.00'), available=True)
+        # Price history: 40 until two hours ago, 55 since
+        MenuItemPrice.objects.filter(menu_item=self.menu).update(valid_from=dj_tz.now() - timedelta(days=3))
+        self.menu.price = Decimal('55.00')
+        self.menu.save()
+        MenuItemPrice.objects.filter(menu_item=self.menu, price=Decimal('55.00')).update(
+            valid_from=dj_tz.now() - timedelta(hours=2)
+        )
+
+    def _entry(self, hours_ago, qty=1, **extra):
+        return {
+            'clientId': str(uuid.uuid4()),
+            'createdAt': (dj_tz.now() - timedelta(hours=hours_ago)).isoformat(),
+            'items': [{'menuItemId': str(self.menu.id), 'quantity': qty}],
+            **extra,
+        }
+
+    def _sync(self, orders, compress=False):
+        body = json.dumps({'orders': orders}).encode()
+        extra = {}
+        if compress:
+            body = gzip.compress(body)
+            extra['HTTP_CONTENT_ENCODING'] = 'gzip'
+        return self.client.post('/api/orders/sync', data=body, content_type='application/json',
+                                **extra, **auth_headers(self.user))
+
+    def test_prices_at_client_time_and_keeps_client_timestamps(self):
+        old, new = self._entry(5, qty=2), self._entry(1, qty=2, status='completed')
+        resp = self._sync([old, new], compress=True)
+        self.assertEqual(resp.status_code, 200)
+        data = resp.json()['data']
+        self.assertEqual((data['created'], data['duplicate'], data['rejected']), (2, 0, 0))
+        self.assertEqual([r['total'] for r in data['results']], [80.0, 110.0])
+
+        o = Order.objects.get(id=old['clientId'])
+        self.assertLess(abs((o.created_at - dj_tz.now()).total_seconds() + 5 * 3600), 5)
+        self.assertEqual(OrderItem.objects.get(order=o).price, Decimal('40.00'))
+        done = Order.objects.get(id=new['clientId'])
+        self.assertEqual(done.status, 'completed')
+        self.assertIsNotNone(done.completed_at)
+        self.assertTrue(InventoryConsumptionJob.objects.filter(order_id=done.id).exists())
+
+    def test_resent_batch_is_deduplicated(self):
+        entries = [self._entry(1) for _ in range(3)]
+        first = self._sync(entries).json()['data']
+        again = self._sync(entries + [entries[0]]).json()['data']
+        self.assertEqual(first['created'], 3)
+        self.assertEqual((again['created'], again['duplicate']), (0, 4))
+        self.assertEqual(again['results'][1]['orderNumber'], first['results'][1]['orderNumber'])
+        self.assertEqual(Order.objects.count(), 3)
+
+    def test_rejections_are_reported_per_order(self):
+        good = self._entry(1)
+        bad = [
+            {'clientId': 'not-a-uuid', 'createdAt': dj_tz.now().isoformat(), 'items': good['items']},
+            self._entry(-2),  # two hours in the future
+            self._entry(24 * 30),  # outside the sync window
+            self._entry(1, status='refunded'),
+            {**self._entry(1), 'items': [{'menuItemId': str(uuid.uuid4()), 'quantity': 1}]},
+        ]
+        data = self._sync([good] + bad).json()['data']
+        self.assertEqual([r['result'] for r in data['results']], ['created'] + ['rejected'] * 5)
+
+    def test_order_with_an_unknown_or_malformed_line_is_rejected_whole(self):
+        unknown = self._entry(1, qty=2)
+        unknown['items'].append({'menuItemId': str(uuid.uuid4()), 'quantity': 1})
+        malformed = self._entry(1)
+        malformed['items'] += [{'menuItemId': 'halo', 'quantity': 1}, {'menuItemId': str(self.menu.id), 'quantity': 0}]
+
+        data = self._sync([unknown, malformed]).json()['data']
+        self.assertEqual((data['created'], data['rejected']), (0, 2))
+        self.assertEqual(data['results'][0]['lines'], [{'index': 1, 'message': 'Not on the menu at createdAt'}])
+        self.assertEqual([e['index'] for e in data['results'][1]['lines']], [1, 2])
+        self.assertFalse(Order.objects.filter(id__in=[unknown['clientId'], malformed['clientId']]).exists())
+
+    def test_bulk_writes_do_not_scale_with_batch_size(self):
+        def count(n):
+            with CaptureQueriesContext(connection) as ctx:
+                self.assertEqual(self._sync([self._entry(1) for _ in range(n)]).json()['data']['created'], n)
+            return len([q for q in ctx.captured_queries if q['sql'].startswith('INSERT')])
+
+        count(1)  # first order of the day creates the order-number sequence row
+        self.assertEqual(count(2), count(40))
+
+    def test_failed_price_history_write_is_logged_and_contained(self):
+        def broken(item):
+            with connection.cursor() as cursor:
+                cursor.execute('SELECT * FROM no_such_price_table')
+
+        with mock.patch('api.order_sync.record_menu_price', side_effect=broken):
+            with self.assertLogs('api.order_sync', level='ERROR') as logs:
+                with transaction.atomic():
+                    self.menu.price = Decimal('99')
+                    self.menu.save()
+                    # The caller's transaction is still usable
+                    self.assertEqual(MenuItem.objects.get(id=self.menu.id).price, Decimal('99'))
+        self.assertIn(str(self.menu.id), logs.output[0])
@@ -1,5 +1,7 @@
 import json
+from django.db import connection
 from django.test import TestCase, Client
+from django.test.utils import CaptureQueriesContext
 from django.conf import settings
 from django.utils import timezone as dj_tz
 import jwt
@@ -19,8 +21,15 @@ def auth_headers(user):
     return {'HTTP_AUTHORIZATION': f'Bearer {token}'}
 
 
+def reset_rate_limits():
+    """Start each test with empty rate-limit buckets (order placement allows 20/min)."""
+    from api.utils_ratelimit import set_rate_limit_backend
+    set_rate_limit_backend(None)
+
+
 class OrderFlowTests(TestCase):
     def setUp(self):
+        reset_rate_limits()
         self.client = Client()
         self.user = AppUser.objects.create(email='staff@example.com', name='Staff', role='staff', status='active')
         self.m1 = MenuItem.objects.create(name='Item A', price=10, available=True)
@@ -58,3 +67,198 @@ class OrderFlowTests(TestCase):
         self.assertEqual(p2.status_code, 200)
         self.assertEqual(p1.json()['data']['id'], p2.json()['data']['id'])
 
+
+
+class OrderPlacementQueryTests(TestCase):
+    def setUp(self):
+        reset_rate_limits()
+        self.client = Client()
+        self.user = AppUser.objects.create(email='placer@example.com', name='Placer', role='staff', status='active')
+        self.menu = [MenuItem.objects.create(name=f'Dish {i}', price=5 + i, available=True) for i in range(15)]
+
+    def _place(self, lines):
+        return self.client.post('/api/orders', data=json.dumps({'items': lines}), content_type='application/json', **auth_headers(self.user))
+
+    def test_query_count_independent_of_line_count(self):
+        headers = auth_headers(self.user)
+        # Warm the principal cache so only placement queries are counted
+        self.client.get('/api/orders/queue', **headers)
+        small = [{'menuItemId': str(self.menu[0].id), 'quantity': 1}]
+        large = [{'menuItemId': str(m.id), 'quantity': 2} for m in self.menu]
+        with CaptureQueriesContext(connection) as q_small:
+            self.assertEqual(self._place(small).status_code, 200)
+        with CaptureQueriesContext(connection) as q_large:
+            resp = self._place(large)
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(len(q_small), len(q_large))
+        data = resp.json()['data']
+        self.assertEqual(data['status'], 'in_queue')
+        self.assertEqual(len(data['items']), 15)
+        self.assertEqual(data['subtotal'], float(sum((5 + i) * 2 for i in range(15))))
+
+    def test_unavailable_and_unknown_items_skipped(self):
+        self.menu[1].available = False
+        self.menu[1].save()
+        resp = self._place([
+            {'menuItemId': str(self.menu[0].id), 'quantity': 1},
+            {'menuItemId': str(self.menu[1].id), 'quantity': 1},
+            {'menuItemId': 'not-a-uuid', 'quantity': 1},
+        ])
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual([i['name'] for i in resp.json()['data']['items']], ['Dish 0'])
+        resp = self._place([{'menuItemId': str(self.menu[1].id), 'quantity': 1}])
+        self.assertEqual(resp.status_code, 400)
+
+
+class OrderListSerializationTests(TestCase):
+    def setUp(self):
+        reset_rate_limits()
+        self.client = Client()
+        self.user = AppUser.objects.create(email='lister@example.com', name='Lister', role='staff', status='active')
+        self.menu = MenuItem.objects.create(name='Soup', price=20, available=True)
+        self.headers = auth_headers(self.user)
+        self.client.get('/api/orders/queue', **self.headers)  # warm principal cache
+
+    def _make_orders(self, n):
+        from api.models import OrderItem
+        for i in range(n):
+            o = Order.objects.create(order_number=f'T-{Order.objects.count()}-{i}', status='in_queue')
+            OrderItem.objects.create(order=o, menu_item=self.menu, item_name='Soup', price=20, quantity=1)
+            OrderItem.objects.create(order=o, menu_item=self.menu, item_name='Soup', price=20, quantity=2)
+
+    def _count(self, url):
+        with CaptureQueriesContext(connection) as ctx:
+            resp = self.client.get(url, **self.headers)
+        self.assertEqual(resp.status_code, 200)
+        return len(ctx), resp.json()['data']
+
+    def test_constant_queries_regardless_of_page_size(self):
+        self._make_orders(2)
+        few, data = self._count('/api/orders/queue')
+        self.assertEqual(len(data[0]['items']), 2)
+        self._make_orders(10)
+        many, data = self._count('/api/orders/queue')
+        self.assertEqual(len(data), 12)
+        self.assertEqual(few, many)
+        list_few, _ = self._count('/api/orders?limit=2')
+        list_many, _ = self._count('/api/orders?limit=12')
+        self.assertEqual(list_few, list_many)
+
+    def test_fields_and_include_switches(self):
+        self._make_orders(3)
+        with_items, _ = self._count('/api/orders/queue')
+        without, data = self._count('/api/orders/queue?include=none')
+        self.assertEqual(without, with_items - 1)
+        self.assertNotIn('items', data[0])
+        _, data = self._count('/api/orders/queue?fields=id,status')
+        self.assertEqual(set(data[0]), {'id', 'status'})
+        _, data = self._count('/api/orders/queue?fields=id,items')
+        self.assertEqual(set(data[0]), {'id', 'items'})
+
+
+class OrderBulkStatusTests(TestCase):
+    def setUp(self):
+        reset_rate_limits()
+        self.client = Client()
+        self.user = AppUser.objects.create(email='line@example.com', name='Line', role='staff', status='active')
+        self.menu = MenuItem.objects.create(name='Soup', price=25, available=True)
+
+    def _place(self):
+        resp = self.client.post('/api/orders', data=json.dumps({
+            'items': [{'menuItemId': str(self.menu.id), 'quantity': 1}],
+        }), content_type='application/json', **auth_headers(self.user))
+        return resp.json()['data']['id']
+
+    def test_applies_valid_transitions_and_reports_the_rest(self):
+        ids = [self._place() for _ in range(4)]
+        Order.objects.filter(id=ids[3]).update(status='completed')
+        missing = '00000000-0000-0000-0000-000000000000'
+        with CaptureQueriesContext(connection) as ctx:
+            resp = self.client.post('/api/orders/status/bulk', data=json.dumps({
+                'ids': ids + [missing, 'nope'], 'status': 'in_progress',
+            }), content_type='application/json', **auth_headers(self.user))
+        self.assertEqual(resp.status_code, 200)
+        data = resp.json()['data']
+        self.assertEqual((data['updated'], data['failed']), (3, 3))
+        by_id = {r['id']: r for r in data['results']}
+        self.assertTrue(all(by_id[i]['ok'] for i in ids[:3]))
+        self.assertIn('Illegal transition', by_id[ids[3]]['message'])
+        self.assertEqual(by_id[missing]['message'], 'Not found')
+        self.assertEqual(set(Order.objects.filter(id__in=ids[:3]).values_list('status', flat=True)), {'in_progress'})
+        # Set-based: no per-order UPDATE statements
+        updates = [q['sql'] for q in ctx.captured_queries if q['sql'].startswith('UPDATE "order"')]
+        self.assertEqual(len(updates), 2)  # status + change_seq
+
+    def test_mixed_targets_and_completion_enqueues_jobs(self):
+        from api.models import InventoryConsumptionJob, OrderEvent
+
+        a, b = self._place(), self._place()
+        Order.objects.filter(id=b).update(status='ready')
+        resp = self.client.post('/api/orders/status/bulk', data=json.dumps({'transitions': [
+            {'id': a, 'status': 'in_progress'},
+            {'id': b, 'status': 'completed'},
+        ]}), content_type='application/json', **auth_headers(self.user))
+        self.assertEqual(resp.json()['data']['updated'], 2)
+        done = Order.objects.get(id=b)
+        self.assertIsNotNone(done.completed_at)
+        self.assertEqual(list(InventoryConsumptionJob.objects.values_list('order_id', flat=True)), [done.id])
+        ev = OrderEvent.objects.filter(order_id=done.id, kind='status').get()
+        self.assertEqual((ev.previous_status, ev.status, done.change_seq), ('ready', 'completed', ev.id))
+
+    def test_rejects_empty_and_oversized_batches(self):
+        url = '/api/orders/status/bulk'
+        self.assertEqual(self.client.post(url, data='{}', content_type='application/json', **auth_headers(self.user)).status_code, 400)
+        ids = ['00000000-0000-0000-0000-%012d' % i for i in range(201)]
+        resp = self.client.post(url, data=json.dumps({'ids': ids, 'status': 'ready'}), content_type='application/json', **auth_headers(self.user))
+        self.assertEqual(resp.status_code, 400)
+
+
+class OrderIdempotencyTests(TestCase):
+    def setUp(self):
+        reset_rate_limits()
+        self.client = Client()
+        self.user = AppUser.objects.create(email='tablet@example.com', name='Tablet', role='staff', status='active')
+        self.menu = MenuItem.objects.create(name='Tea', price=12, available=True)
+        self.body = json.dumps({'items': [{'menuItemId': str(self.menu.id), 'quantity': 2}]})
+
+    def _post(self, key, body=None, user=None):
+        return self.client.post('/api/orders', data=body or self.body, content_type='application/json',
+                                HTTP_IDEMPOTENCY_KEY=key, **auth_headers(user or self.user))
+
+    def test_replayed_key_returns_original_order_without_scanning_orders(self):
+        first = self._post('tab-1-0001')
+        self.assertEqual(first.status_code, 200)
+        with CaptureQueriesContext(connection) as ctx:
+            again = self._post('tab-1-0001')
+        self.assertEqual(again.json(), first.json())
+        self.assertEqual(again['Idempotent-Replayed'], 'true')
+        self.assertEqual(Order.objects.count(), 1)
+        self.assertFalse(any('FROM "order"' in q['sql'] for q in ctx.captured_queries))
+
+        # Same key, different payload or caller
+        other = json.dumps({'items': [{'menuItemId': str(self.menu.id), 'quantity': 5}]})
+        self.assertEqual(self._post('tab-1-0001', body=other).status_code, 422)
+        peer = AppUser.objects.create(email='peer@example.com', name='Peer', role='staff', status='active')
+        self.assertEqual(self._post('tab-1-0001', user=peer).status_code, 200)
+        self.assertEqual(Order.objects.count(), 2)
+
+    def test_expired_keys_are_purged_and_reusable(self):
+        from datetime import timedelta
+        from io import StringIO
+        from django.core.management import call_command
+        from api.models import IdempotencyKey
+
+        self._post('tab-2-0001')
+        IdempotencyKey.objects.update(expires_at=dj_tz.now() - timedelta(seconds=1))
+        self.assertEqual(self._post('tab-2-0001').status_code, 200)
+        self.assertEqual(Order.objects.count(), 2)
+        IdempotencyKey.objects.update(expires_at=dj_tz.now() - timedelta(seconds=1))
+        call_command('purge_idempotency_keys', stdout=StringIO())
+        self.assertFalse(IdempotencyKey.objects.exists())
+
+    def test_failed_request_does_not_consume_key(self):
+        from unittest import mock
+        with mock.patch('api.views_orders._safe_order', side_effect=RuntimeError('boom')):
+            self.assertEqual(self._post('tab-3-0001').status_code, 500)
+        self.assertEqual(Order.objects.count(), 0)
+        self.assertEqual(self._post('tab-3-0001').status_code, 200)
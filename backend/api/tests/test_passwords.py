@@ -0,0 +1,125 @@
+import hashlib
+import json
+import threading
+from datetime import timedelta
+from unittest import mock
+
+from django.contrib.auth.hashers import check_password, make_password
+from django.test import Client, TestCase, override_settings
+from django.utils import timezone as dj_tz
+
+from api.models import AppUser, ResetToken
+from api.utils_passwords import (
+    PasswordHashingService,
+    set_password_hashing,
+)
+
+
+class PasswordHashingServiceTests(TestCase):
+    def tearDown(self):
+        set_password_hashing(None)
+
+    def _login(self, email, password):
+        return Client().post(
+            "/api/auth/login",
+            data=json.dumps({"email": email, "password": password}),
+            content_type="application/json",
+        )
+
+    @override_settings(PASSWORD_HASH_ITERATIONS=1000)
+    def test_login_rehashes_when_iterations_change(self):
+        with self.settings(PASSWORD_HASH_ITERATIONS=500):
+            old_hash = make_password("secret-pass-1")
+        user = AppUser.objects.create(
+            email="rehash@example.com", name="R", role="staff", status="pending", password_hash=old_hash
+        )
+        self.assertIn("$500$", old_hash)
+        resp = self._login(user.email, "secret-pass-1")
+        self.assertEqual(resp.status_code, 200)
+        user.refresh_from_db()
+        self.assertIn("$1000$", user.password_hash)
+        # Wrong password never triggers an upgrade
+        self.assertEqual(self._login(user.email, "wrong-password").status_code, 401)
+
+    def test_saturated_pool_returns_503(self):
+        service = PasswordHashingService(concurrency=1, queue_timeout=0)
+        set_password_hashing(service)
+        AppUser.objects.create(
+            email="busy@example.com", name="B", role="staff", status="pending",
+            password_hash=make_password("secret-pass-2"),
+        )
+        service._slots.acquire()
+        try:
+            resp = self._login("busy@example.com", "secret-pass-2")
+        finally:
+            service._slots.release()
+        self.assertEqual(resp.status_code, 503)
+        self.assertIn("Retry-After", resp)
+        self.assertEqual(service.stats()["rejected"], 1)
+
+    def test_busy_reset_keeps_the_token_for_a_retry(self):
+        from api.tests.test_orders import reset_rate_limits
+        from api.views_common import _issue_pwdcommit_token_from_db
+
+        service = PasswordHashingService(concurrency=1, queue_timeout=0)
+        set_password_hashing(service)
+        user = AppUser.objects.create(
+            email="reset@example.com", name="R", role="staff", status="active",
+            password_hash=make_password("old-password"),
+        )
+
+        def reset(token):
+            return Client().post(
+                "/api/auth/reset-password",
+                data=json.dumps({"token": token, "newPassword": "new-password-1"}),
+                content_type="application/json",
+            )
+
+        for raw in ("link-token", "code-token"):
+            reset_rate_limits()
+            rt = ResetToken.objects.create(
+                user=user, token_hash=hashlib.sha256(raw.encode()).hexdigest(),
+                expires_at=dj_tz.now() + timedelta(hours=1),
+            )
+            # The emailed link, or the commit token issued after a verified code
+            token = raw if raw == "link-token" else _issue_pwdcommit_token_from_db(user, rt.id)
+            with self.subTest(raw):
+                service._slots.acquire()
+                try:
+                    self.assertEqual(reset(token).status_code, 503)
+                finally:
+                    service._slots.release()
+                rt.refresh_from_db()
+                self.assertIsNone(rt.used_at)
+
+                self.assertEqual(reset(token).status_code, 200)
+                rt.refresh_from_db()
+                self.assertIsNotNone(rt.used_at)
+                user.refresh_from_db()
+                self.assertTrue(check_password("new-password-1", user.password_hash))
+                # The token is single-use
+                self.assertEqual(reset(token).status_code, 400)
+
+    def test_concurrency_is_bounded(self):
+        service = PasswordHashingService(concurrency=2, queue_timeout=30)
+        active = {"now": 0, "peak": 0}
+        lock = threading.Lock()
+
+        def tracking(raw):
+            with lock:
+                active["now"] += 1
+                active["peak"] = max(active["peak"], active["now"])
+            try:
+                return make_password(raw)
+            finally:
+                with lock:
+                    active["now"] -= 1
+
+        with mock.patch("api.utils_passwords._django_make_password", side_effect=tracking):
+            threads = [threading.Thread(target=service.make_password, args=(f"pw-{i}",)) for i in range(8)]
+            for t in threads:
+                t.start()
+            for t in threads:
+                t.join()
+        self.assertLessEqual(active["peak"], 2)
+        self.assertEqual(service.stats()["hashed"], 8)
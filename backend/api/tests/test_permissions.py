@@ -0,0 +1,42 @@
+from django.test import SimpleTestCase
+
+from api.models import AppUser
+from api.utils_permissions import ALL_BIT, PERMISSIONS
+from api.views_common import DEFAULT_ROLE_PERMISSIONS, _effective_permissions, _has_permission, _permission_mask
+from api.views_modules import _serialize_modules
+
+
+class PermissionMaskTests(SimpleTestCase):
+    def test_role_defaults_and_explicit_grants(self):
+        staff = AppUser(email="s@example.com", role="staff", permissions=["menu.manage"])
+        self.assertTrue(_has_permission(staff, "order.place"))
+        self.assertTrue(_has_permission(staff, "menu.manage"))
+        self.assertFalse(_has_permission(staff, "payment.refund"))
+        self.assertEqual(
+            _effective_permissions(staff),
+            DEFAULT_ROLE_PERMISSIONS["staff"] | {"menu.manage"},
+        )
+
+    def test_admin_and_wildcard_collapse_to_all(self):
+        admin = AppUser(email="a@example.com", role="admin")
+        granted = AppUser(email="g@example.com", role="staff", permissions=["all"])
+        self.assertEqual(_permission_mask(admin), ALL_BIT)
+        self.assertEqual(_permission_mask(granted), ALL_BIT)
+        self.assertTrue(_has_permission(admin, "anything.at.all"))
+        self.assertEqual(_effective_permissions(admin), {"all"})
+
+    def test_dict_users_are_supported(self):
+        user = {"role": "manager", "permissions": []}
+        self.assertTrue(_has_permission(user, "payment.refund"))
+        self.assertFalse(_has_permission({"role": "staff"}, "payment.refund"))
+
+    def test_module_grants_from_mask(self):
+        mask = PERMISSIONS.mask(["inventory.menu.manage"])
+        inventory = next(m for m in _serialize_modules(mask) if m["code"] == "inventory")
+        menu = next(f for f in inventory["features"] if f["code"] == "menu")
+        # Feature requires both inventory.menu.manage and menu.manage
+        self.assertFalse(menu["granted"])
+        mask |= PERMISSIONS.mask(["menu.manage"])
+        inventory = next(m for m in _serialize_modules(mask) if m["code"] == "inventory")
+        menu = next(f for f in inventory["features"] if f["code"] == "menu")
+        self.assertTrue(menu["granted"])
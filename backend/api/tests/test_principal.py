@@ -0,0 +1,102 @@
+from datetime import timedelta
+from unittest import mock
+
+import jwt
+from django.conf import settings
+from django.test import Client, RequestFactory, TestCase
+from django.utils import timezone as dj_tz
+
+from api.models import AppUser
+
+
+def auth_headers(user):
+    now = dj_tz.now()
+    payload = {
+        "sub": str(user.id),
+        "email": user.email,
+        "role": user.role,
+        "iat": int(now.timestamp()),
+        "exp": int((now + timedelta(hours=1)).timestamp()),
+    }
+    token = jwt.encode(payload, settings.JWT_SECRET, algorithm=settings.JWT_ALGORITHM)
+    return {"HTTP_AUTHORIZATION": f"Bearer {token}"}
+
+
+class RequestPrincipalTests(TestCase):
+    def setUp(self):
+        self.client = Client()
+        self.user = AppUser.objects.create(
+            email="staff@example.com",
+            name="Staff",
+            role="staff",
+            status="active",
+        )
+
+    def test_jwt_decoded_once_per_request(self):
+        headers = auth_headers(self.user)
+        with mock.patch("api.views_common.jwt.decode", wraps=jwt.decode) as decode:
+            resp = self.client.get("/api/orders/queue", **headers)
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(decode.call_count, 1)
+
+    def test_deactivated_principal_blocked_by_gate(self):
+        self.user.status = "deactivated"
+        self.user.save(update_fields=["status"])
+        resp = self.client.get("/api/orders/queue", **auth_headers(self.user))
+        self.assertEqual(resp.status_code, 403)
+
+    def test_admin_views_reuse_principal(self):
+        admin = AppUser.objects.create(email="admin@example.com", name="Admin", role="admin", status="active")
+        resp = self.client.get("/api/users", **auth_headers(admin))
+        self.assertEqual(resp.status_code, 200)
+        resp = self.client.get("/api/users", **auth_headers(self.user))
+        self.assertEqual(resp.status_code, 403)
+
+
+class PrincipalCacheTests(TestCase):
+    def setUp(self):
+        from api.utils_principal import invalidate_all_principals
+
+        invalidate_all_principals()
+        self.client = Client()
+        self.admin = AppUser.objects.create(email="admin@example.com", name="Admin", role="admin", status="active")
+        self.user = AppUser.objects.create(email="staff@example.com", name="Staff", role="staff", status="active")
+
+    def test_repeat_requests_skip_user_lookup(self):
+        headers = auth_headers(self.user)
+        self.client.get("/api/orders/queue", **headers)
+        # Warm cache: only the queue query itself remains
+        with self.assertNumQueries(1):
+            resp = self.client.get("/api/orders/queue", **headers)
+        self.assertEqual(resp.status_code, 200)
+
+    def test_status_change_invalidates_cached_principal(self):
+        headers = auth_headers(self.user)
+        self.assertEqual(self.client.get("/api/orders/queue", **headers).status_code, 200)
+        resp = self.client.patch(
+            f"/api/users/{self.user.id}/status",
+            data='{"status": "deactivated"}',
+            content_type="application/json",
+            **auth_headers(self.admin),
+        )
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(self.client.get("/api/orders/queue", **headers).status_code, 403)
+
+    def test_cached_principal_has_every_column_the_views_read(self):
+        from api.utils_principal import PRINCIPAL_FIELDS
+        from api.views_common import _principal_from_request, _safe_user_from_db
+
+        self.user.phone = "555-0100"
+        self.user.last_login = dj_tz.now()
+        self.user.save(update_fields=["phone", "last_login"])
+        factory = RequestFactory()
+        self.assertIsNotNone(_principal_from_request(factory.get("/api/auth/me", **auth_headers(self.user))))
+
+        request = factory.get("/api/auth/me", **auth_headers(self.user))
+        with self.assertNumQueries(0):
+            principal = _principal_from_request(request)
+            data = _safe_user_from_db(principal)
+        self.assertEqual(data["phone"], "555-0100")
+        self.assertIsNotNone(data["lastLogin"])
+        self.assertEqual(principal.get_deferred_fields(), {"password_hash"})
+        self.assertNotIn("password_hash", PRINCIPAL_FIELDS)
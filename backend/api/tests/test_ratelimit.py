@@ -0,0 +1,81 @@
+import tempfile
+
+from django.core.exceptions import ImproperlyConfigured
+from django.http import JsonResponse
+from django.test import RequestFactory, SimpleTestCase, override_settings
+
+from api.utils_ratelimit import (
+    CacheRateLimitBackend,
+    LocalRateLimitBackend,
+    get_rate_limit_backend,
+    set_rate_limit_backend,
+)
+from api.checks import check_shared_caches
+from api.views_common import rate_limit
+
+SHARED_CACHE = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+        "LOCATION": tempfile.mkdtemp(prefix="api-test-cache-"),
+    }
+}
+
+
+class RateLimitBackendTests(SimpleTestCase):
+    def test_local_backend_allows_burst_then_blocks(self):
+        backend = LocalRateLimitBackend(max_keys=10)
+        results = [backend.hit("k", 3, 60)[0] for _ in range(4)]
+        self.assertEqual(results, [True, True, True, False])
+        allowed, retry_after = backend.hit("k", 3, 60)
+        self.assertFalse(allowed)
+        self.assertGreater(retry_after, 0)
+
+    def test_local_backend_is_bounded(self):
+        backend = LocalRateLimitBackend(max_keys=100)
+        for i in range(1000):
+            backend.hit(f"key-{i}", 5, 60)
+        self.assertLessEqual(len(backend), 100)
+
+    @override_settings(CACHES=SHARED_CACHE)
+    def test_cache_backend_shares_state(self):
+        a = CacheRateLimitBackend(prefix="rl-test:")
+        b = CacheRateLimitBackend(prefix="rl-test:")
+        a.reset()
+        self.assertTrue(a.hit("shared", 2, 60)[0])
+        self.assertTrue(b.hit("shared", 2, 60)[0])
+        self.assertFalse(a.hit("shared", 2, 60)[0])
+
+    @override_settings(CACHES=SHARED_CACHE)
+    def test_cache_backend_reset_leaves_other_cache_keys(self):
+        from django.core.cache import cache
+
+        cache.set("unrelated", "kept")
+        backend = CacheRateLimitBackend(prefix="rl-reset:")
+        self.assertTrue(backend.hit("k", 1, 60)[0])
+        self.assertFalse(backend.hit("k", 1, 60)[0])
+        backend.reset()
+        self.assertTrue(backend.hit("k", 1, 60)[0])
+        # Other instances with the same prefix see the reset too
+        self.assertFalse(CacheRateLimitBackend(prefix="rl-reset:").hit("k", 1, 60)[0])
+        self.assertEqual(cache.get("unrelated"), "kept")
+
+    def test_cache_backend_refuses_a_process_local_cache(self):
+        with self.assertRaises(ImproperlyConfigured):
+            CacheRateLimitBackend()
+        with override_settings(RATE_LIMIT_BACKEND="api.utils_ratelimit.CacheRateLimitBackend"):
+            self.assertEqual([e.id for e in check_shared_caches()], ["api.E001"])
+            with override_settings(CACHES=SHARED_CACHE):
+                self.assertEqual(check_shared_caches(), [])
+
+    def test_decorator_returns_429_with_retry_after(self):
+        previous = get_rate_limit_backend()
+        set_rate_limit_backend(LocalRateLimitBackend())
+        try:
+            view = rate_limit(limit=1, window_seconds=60)(lambda request: JsonResponse({"ok": True}))
+            request = RequestFactory().get("/api/x", REMOTE_ADDR="10.0.0.1")
+            self.assertEqual(view(request).status_code, 200)
+            resp = view(request)
+            self.assertEqual(resp.status_code, 429)
+            self.assertGreaterEqual(int(resp["Retry-After"]), 1)
+        finally:
+            set_rate_limit_backend(previous)
@@ -0,0 +1,191 @@
+from datetime import date, timedelta
+from decimal import Decimal
+from io import StringIO
+
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone as dj_tz
+
+from api.inventory_services import (
+    adjust_stock,
+    consume_for_order,
+    get_batch_stock_by_location,
+    get_current_stock,
+    get_low_stock,
+    record_receipt,
+    transfer_stock,
+)
+from api.models import InventoryItem, Location, ReorderSetting, StockBalance, StockMovement
+from api.stock_balances import find_drift, lock_balance_rows
+
+
+class StockBalanceTests(TestCase):
+    def setUp(self):
+        self.main, _ = Location.objects.get_or_create(code='MAIN', defaults={'name': 'Main'})
+        self.annex = Location.objects.create(code='ANNEX', name='Annex')
+        self.milk = InventoryItem.objects.create(name='Milk', unit='l')
+
+    def _receive(self, qty, expiry_days, location=None):
+        return record_receipt(
+            item=self.milk, qty=Decimal(qty), location=location or self.main,
+            batch_payload={'lot_code': f'L{expiry_days}', 'expiry_date': date.today() + timedelta(days=expiry_days)},
+        )
+
+    def test_write_paths_keep_balances_in_step_with_the_ledger(self):
+        late = self._receive('10', 20)
+        early = self._receive('5', 3)
+        adjust_stock(item=self.milk, delta_qty=Decimal('2'), location=self.main, reason='count')
+        consume_for_order(order_id='o-1', components=[(self.milk, Decimal('6'))], location=self.main)
+        transfer_stock(item=self.milk, qty=Decimal('4'), from_location=self.main, to_location=self.annex)
+
+        self.assertEqual(find_drift(), [])
+        iid = str(self.milk.id)
+        self.assertEqual(get_current_stock([iid])[iid], Decimal('11'))
+        self.assertEqual(get_current_stock([iid], location_id=str(self.main.id))[iid], Decimal('7'))
+        # FEFO drained the early batch first, then the transfer took from the late one
+        self.assertEqual(
+            get_batch_stock_by_location(iid, location_id=str(self.main.id)),
+            {str(early.batch_id): Decimal('0'), str(late.batch_id): Decimal('5')},
+        )
+        self.milk.refresh_from_db()
+        self.assertEqual(self.milk.quantity, Decimal('11'))
+
+    def test_current_stock_reads_do_not_scan_the_ledger(self):
+        for n in range(5):
+            self._receive('1', n + 1)
+        with CaptureQueriesContext(connection) as ctx:
+            total = get_current_stock([str(self.milk.id)])[str(self.milk.id)]
+        self.assertEqual(total, Decimal('5'))
+        self.assertFalse(any('inv_stock_movement' in q['sql'] for q in ctx.captured_queries))
+        # as_of still answers from the ledger
+        past = get_current_stock([str(self.milk.id)], as_of=dj_tz.now() - timedelta(days=1))
+        self.assertEqual(past, {})
+
+    def test_overdraw_is_refused_from_balances(self):
+        self._receive('3', 5)
+        with self.assertRaises(ValueError):
+            consume_for_order(order_id='o-2', components=[(self.milk, Decimal('4'))], location=self.main)
+        with self.assertRaises(ValueError):
+            adjust_stock(item=self.milk, delta_qty=Decimal('-4'), location=self.main)
+        self.assertEqual(StockMovement.objects.count(), 1)
+        self.assertEqual(find_drift(), [])
+
+    def test_command_reports_and_repairs_drift(self):
+        self._receive('8', 5)
+        adjust_stock(item=self.milk, delta_qty=Decimal('1'), location=self.main)
+        StockBalance.objects.filter(item=self.milk, batch_key='').update(qty=Decimal('40'))
+
+        with self.assertRaises(CommandError):
+            call_command('rebuild_stock_balances', '--check', stdout=StringIO())
+        out = StringIO()
+        call_command('rebuild_stock_balances', stdout=out)
+        self.assertIn('1 rows corrected', out.getvalue())
+        self.assertEqual(find_drift(), [])
+        self.assertEqual(get_current_stock([str(self.milk.id)])[str(self.milk.id)], Decimal('9'))
+
+
+class LowStockTests(TestCase):
+    def setUp(self):
+        self.main, _ = Location.objects.get_or_create(code='MAIN', defaults={'name': 'Main'})
+        self.annex = Location.objects.create(code='ANNEX', name='Annex')
+
+    def _setting(self, name, location, reorder_point, on_hand):
+        item = InventoryItem.objects.create(name=name, unit='pc')
+        ReorderSetting.objects.create(item=item, location=location, reorder_point=Decimal(reorder_point))
+        if on_hand:
+            record_receipt(item=item, qty=Decimal(on_hand), location=location)
+        return item
+
+    def test_compares_location_stock_with_reorder_point_in_one_query(self):
+        at_point = self._setting('Eggs', self.main, '5', '5')
+        self._setting('Flour', self.main, '5', '6')
+        empty = self._setting('Sugar', self.annex, '1', None)
+        # Stock at another location does not count towards this setting
+        record_receipt(item=empty, qty=Decimal('50'), location=self.main)
+
+        with self.assertNumQueries(1):
+            low = [(item.name, qty) for item, qty in get_low_stock()]
+        self.assertEqual(low, [('Eggs', Decimal('5')), ('Sugar', Decimal('0'))])
+        self.assertEqual([i.id for i, _ in get_low_stock([str(at_point.id)])], [at_point.id])
+
+
+class FefoAllocationTests(TestCase):
+    def setUp(self):
+        self.main, _ = Location.objects.get_or_create(code='MAIN', defaults={'name': 'Main'})
+        self.annex = Location.objects.create(code='ANNEX', name='Annex')
+
+    def _stocked_item(self, name, expiry_days):
+        item = InventoryItem.objects.create(name=name, unit='pc')
+        for days in expiry_days:
+            record_receipt(
+                item=item, qty=Decimal('4'), location=self.main,
+                batch_payload={'lot_code': f'{name}-{days}', 'expiry_date': date.today() + timedelta(days=days)},
+            )
+        return item
+
+    def _consume_queries(self, components):
+        with CaptureQueriesContext(connection) as ctx:
+            consume_for_order(order_id='o-q', components=components, location=self.main)
+        return len(ctx.captured_queries)
+
+    def test_query_count_does_not_grow_with_components_or_batches(self):
+        single = self._stocked_item('Salt', [5])
+        small = self._consume_queries([(single, Decimal('1'))])
+        items = [self._stocked_item(f'Spice {n}', [9, 2, 5]) for n in range(4)]
+        # Each component spans all three batches
+        large = self._consume_queries([(it, Decimal('10')) for it in items])
+        self.assertEqual(small, large)
+        self.assertEqual(StockMovement.objects.filter(reference_id='o-q').count(), 1 + 4 * 3)
+        self.assertEqual(find_drift(), [])
+        items[0].refresh_from_db()
+        self.assertEqual(items[0].quantity, Decimal('2'))
+
+    def test_repeated_components_draw_down_batches_in_expiry_order(self):
+        item = self._stocked_item('Cream', [7, 1])
+        adjust_stock(item=item, delta_qty=Decimal('3'), location=self.main)  # unbatched
+        movements = consume_for_order(
+            order_id='o-r', components=[(item, Decimal('3')), (item, Decimal('3')), (item, Decimal('4'))],
+            location=self.main,
+        )
+        taken = [(mv.batch.lot_code if mv.batch else None, -mv.qty) for mv in movements]
+        self.assertEqual(taken, [
+            ('Cream-1', Decimal('3')),
+            ('Cream-1', Decimal('1')), ('Cream-7', Decimal('2')),
+            ('Cream-7', Decimal('2')), (None, Decimal('2')),
+        ])
+        with self.assertRaises(ValueError):
+            consume_for_order(order_id='o-s', components=[(item, Decimal('2'))], location=self.main)
+        self.assertEqual(get_current_stock([str(item.id)])[str(item.id)], Decimal('1'))
+
+    def test_transfer_moves_fefo_slices_with_their_batches(self):
+        item = self._stocked_item('Butter', [10, 3])
+        movements = transfer_stock(item=item, qty=Decimal('6'), from_location=self.main, to_location=self.annex)
+        self.assertEqual(len(movements), 4)
+        self.assertEqual(
+            sorted((mv.batch.lot_code, mv.qty) for mv in movements if mv.location_id == self.annex.id),
+            [('Butter-10', Decimal('2')), ('Butter-3', Decimal('4'))],
+        )
+        self.assertEqual(get_current_stock([str(item.id)], location_id=str(self.annex.id))[str(item.id)], Decimal('6'))
+        self.assertEqual(find_drift(), [])
+
+    def test_opposite_transfers_lock_both_ends_in_the_same_order(self):
+        item = self._stocked_item('Oil', [4])
+        record_receipt(item=item, qty=Decimal('4'), location=self.annex,
+                       batch_payload={'lot_code': 'Oil-annex', 'expiry_date': date.today() + timedelta(days=6)})
+
+        def lock_query(src, dst):
+            with CaptureQueriesContext(connection) as ctx:
+                transfer_stock(item=item, qty=Decimal('1'), from_location=src, to_location=dst)
+            return next(q['sql'] for q in ctx.captured_queries if 'inv_stock_balance' in q['sql'])
+
+        # The first statement covers source and destination rows alike, so
+        # A->B and B->A acquire the same row locks in the same order
+        there, back = lock_query(self.main, self.annex), lock_query(self.annex, self.main)
+        self.assertEqual(there, back)
+        self.assertIn('ORDER BY', there)
+        keys = [(r[2], r[1], r[3]) for r in lock_balance_rows([item.id], [self.annex.id, self.main.id])]
+        self.assertEqual(keys, sorted(keys))
+        self.assertEqual(len({k[0] for k in keys}), 2)
+        self.assertEqual(find_drift(), [])
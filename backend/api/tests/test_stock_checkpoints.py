@@ -0,0 +1,93 @@
+from datetime import timedelta
+from decimal import Decimal
+from io import StringIO
+
+from django.core.management import CommandError, call_command
+from django.db.models import F
+from django.test import TestCase, override_settings
+from django.utils import timezone as dj_tz
+
+from api.inventory_services import adjust_stock, get_batch_stock_by_location, get_current_stock, record_receipt
+from api.models import InventoryItem, Location, StockCheckpoint, StockCheckpointLine, StockMovement
+from api.stock_checkpoints import ledger_as_of, period_start, verify_checkpoints, write_checkpoint
+
+
+@override_settings(STOCK_CHECKPOINT_SETTLE_SECONDS=0)
+class StockCheckpointTests(TestCase):
+    def setUp(self):
+        self.main, _ = Location.objects.get_or_create(code='MAIN', defaults={'name': 'Main'})
+        self.flour = InventoryItem.objects.create(name='Flour', unit='kg')
+        self.today = period_start(dj_tz.now())
+
+    def _receive(self, qty, days_ago, lot=None):
+        return record_receipt(
+            item=self.flour, qty=Decimal(qty), location=self.main,
+            effective_at=self.today - timedelta(days=days_ago, hours=-6),
+            batch_payload={'lot_code': lot} if lot else None,
+        )
+
+    def _settle(self):
+        # Checkpoints count movements recorded before they are taken; shift the history into the past
+        StockMovement.objects.update(recorded_at=F('recorded_at') - timedelta(minutes=5))
+        StockCheckpoint.objects.update(taken_at=F('taken_at') - timedelta(minutes=5))
+
+    def _full(self, as_of):
+        totals = ledger_as_of(as_of, use_checkpoints=False)
+        return sum(totals.values(), Decimal('0'))
+
+    def test_as_of_reads_checkpoint_plus_tail(self):
+        self._receive('10', 5, lot='A')
+        self._receive('4', 3)
+        self._settle()
+        cp = write_checkpoint(self.today - timedelta(days=2))
+        self.assertEqual(cp.line_count, 2)
+        self._receive('6', 1, lot='B')
+        # Backdated into the checkpointed period after the checkpoint was written
+        self._receive('3', 4)
+
+        iid = str(self.flour.id)
+        for days in (6, 4, 2, 1, 0):
+            at = self.today - timedelta(days=days)
+            self.assertEqual(get_current_stock([iid], as_of=at).get(iid, Decimal('0')), self._full(at))
+        self.assertEqual(get_current_stock([iid], as_of=self.today)[iid], Decimal('23'))
+        batches = get_batch_stock_by_location(iid, as_of=self.today)
+        self.assertEqual(sorted(batches.values()), [Decimal('6'), Decimal('10')])
+        self.assertEqual(verify_checkpoints(), [])
+
+        # The stored lines really are the starting point
+        StockCheckpointLine.objects.filter(checkpoint=cp, batch_key='').update(qty=Decimal('100'))
+        self.assertEqual(get_current_stock([iid], as_of=self.today)[iid], Decimal('119'))
+        problems = verify_checkpoints()
+        self.assertTrue(problems)
+        self.assertEqual(problems[0]['check'], f'checkpoint {cp.as_of.isoformat()}')
+
+    def test_checkpoints_chain_from_the_previous_one(self):
+        self._receive('5', 9)
+        self._settle()
+        first = write_checkpoint(self.today - timedelta(days=7))
+        adjust_stock(item=self.flour, delta_qty=Decimal('-2'), location=self.main,
+                     effective_at=self.today - timedelta(days=8))
+        self._receive('1', 6)
+        self._settle()
+        second = write_checkpoint(self.today - timedelta(days=5))
+        self.assertEqual(write_checkpoint(second.as_of).id, second.id)
+        line = StockCheckpointLine.objects.get(checkpoint=second)
+        self.assertEqual(line.qty, Decimal('4'))
+        self.assertEqual(StockCheckpointLine.objects.get(checkpoint=first).qty, Decimal('5'))
+        self.assertEqual(verify_checkpoints(), [])
+
+    def test_command_backfills_and_verifies(self):
+        self._receive('8', 4)
+        self._settle()
+        out = StringIO()
+        call_command('stock_checkpoints', '--backfill', '3', stdout=out)
+        self.assertEqual(StockCheckpoint.objects.count(), 3)
+        call_command('stock_checkpoints', '--backfill', '3', stdout=StringIO())
+        self.assertEqual(StockCheckpoint.objects.count(), 3)
+        call_command('stock_checkpoints', '--verify', stdout=StringIO())
+
+        with self.assertRaises(CommandError):
+            call_command('stock_checkpoints', '--as-of', (dj_tz.now() + timedelta(hours=1)).isoformat(), stdout=StringIO())
+        StockCheckpointLine.objects.update(qty=Decimal('1'))
+        with self.assertRaises(CommandError):
+            call_command('stock_checkpoints', '--verify', stdout=StringIO())
@@ -0,0 +1,73 @@
+import json
+from datetime import timedelta
+from decimal import Decimal
+
+from django.test import Client, TestCase
+from django.utils import timezone as dj_tz
+
+from api.inventory_services import adjust_stock, record_receipt
+from api.models import AppUser, InventoryItem, Location
+from api.tests.test_orders import auth_headers, reset_rate_limits
+
+
+class StockLedgerApiTests(TestCase):
+    def setUp(self):
+        reset_rate_limits()
+        self.client = Client()
+        self.admin = AppUser.objects.create(email='admin@example.com', name='Admin', role='admin', status='active')
+        self.headers = auth_headers(self.admin)
+        self.loc, _ = Location.objects.get_or_create(code='MAIN', defaults={'name': 'Main'})
+        self.oil = InventoryItem.objects.create(name='Oil', unit='l')
+        self.start = dj_tz.now() - timedelta(days=10)
+        # Ten receipts of 1..10 a day apart, then a withdrawal on the last day
+        for n in range(1, 11):
+            record_receipt(item=self.oil, qty=Decimal(n), location=self.loc, effective_at=self.start + timedelta(days=n))
+        adjust_stock(item=self.oil, delta_qty=Decimal('-5'), location=self.loc,
+                     effective_at=self.start + timedelta(days=10, hours=1))
+
+    def _get(self, path, **params):
+        return self.client.get(path, {'item_id': str(self.oil.id), **params}, **self.headers)
+
+    def test_pages_follow_the_cursor_with_a_running_balance(self):
+        seen, cursor = [], None
+        while True:
+            params = {'limit': 4, **({'cursor': cursor} if cursor else {})}
+            body = self._get('/api/inventory/ledger', **params).json()
+            seen += body['data']
+            cursor = body['pagination']['nextCursor']
+            if not cursor:
+                break
+        self.assertEqual(len(seen), 11)
+        self.assertEqual([r['balance'] for r in seen][:4], [1, 3, 6, 10])
+        self.assertEqual(seen[-1]['balance'], 50)
+        self.assertEqual(len({r['id'] for r in seen}), 11)
+
+    def test_date_range_starts_from_the_opening_balance(self):
+        body = self._get(
+            '/api/inventory/ledger', **{'from': (self.start + timedelta(days=8)).isoformat(), 'limit': 2}
+        ).json()
+        self.assertEqual(body['pagination']['openingBalance'], 28)
+        self.assertEqual([r['balance'] for r in body['data']], [36, 45])
+        nxt = self._get('/api/inventory/ledger', **{
+            'from': (self.start + timedelta(days=8)).isoformat(), 'cursor': body['pagination']['nextCursor'],
+        }).json()
+        self.assertEqual([r['balance'] for r in nxt['data']], [55, 50])
+        self.assertFalse(nxt['pagination']['hasMore'])
+        # A cursor is bound to the query it came from and cannot be edited
+        other = self._get('/api/inventory/ledger', cursor=body['pagination']['nextCursor'])
+        self.assertEqual(other.status_code, 400)
+        self.assertEqual(self._get('/api/inventory/ledger', cursor='x' + body['pagination']['nextCursor']).status_code, 400)
+
+    def test_export_streams_csv_and_ndjson(self):
+        resp = self._get('/api/inventory/ledger/export')
+        self.assertTrue(resp.streaming)
+        lines = b''.join(resp.streaming_content).decode().splitlines()
+        self.assertEqual(lines[0].split(',')[:8], ['effectiveAt', 'recordedAt', 'id', 'locationId', 'batchId', 'type', 'qty', 'balance'])
+        self.assertEqual(len(lines), 12)
+        self.assertEqual(lines[-1].split(',')[7], '50.0')
+
+        resp = self._get('/api/inventory/ledger/export', format='ndjson')
+        self.assertEqual(resp['Content-Type'], 'application/x-ndjson')
+        rows = [json.loads(x) for x in b''.join(resp.streaming_content).decode().splitlines()]
+        self.assertEqual([r['balance'] for r in rows][-2:], [55, 50])
+        self.assertEqual(self._get('/api/inventory/ledger/export', format='xml').status_code, 400)
@@ -121,6 +121,10 @@ urlpatterns = [
     path("orders/queue", order_views.order_queue, name="order_queue"),
     path("orders/history", order_views.order_history, name="order_history"),
     path("orders/bulk-progress", order_views.order_bulk_progress, name="order_bulk_progress"),
+    path("orders/feed", order_views.order_feed, name="order_feed"),
+    path("orders/feed/token", order_views.order_feed_token, name="order_feed_token"),
+    path("orders/status/bulk", order_views.order_status_bulk, name="order_status_bulk"),
+    path("orders/sync", order_views.order_sync, name="order_sync"),
     path("orders/<uuid:oid>", order_views.order_detail, name="order_detail"),
     path("orders/<uuid:oid>/status", order_views.order_status, name="order_status"),
 
@@ -150,6 +154,9 @@ urlpatterns = [
     path("inventory/transfer", inv_views.inventory_transfer, name="inventory_transfer"),
     path("inventory/adjust", inv_views.inventory_adjust, name="inventory_adjust"),
     path("inventory/ledger", inv_views.inventory_ledger, name="inventory_ledger"),
+    path("inventory/ledger/export", inv_views.inventory_ledger_export, name="inventory_ledger_export"),
+    path("inventory/consumption-jobs", inv_views.inventory_consumption_jobs, name="inventory_consumption_jobs"),
+    path("inventory/consumption-jobs/<uuid:jid>/retry", inv_views.inventory_consumption_job_retry, name="inventory_consumption_job_retry"),
 
     # Reports
     path("reports/sales", rpt_views.reports_sales, name="reports_sales"),
@@ -181,4 +188,5 @@ urlpatterns = [
     path("diagnostics/media", diag_views.diag_media, name="diag_media"),
     path("diagnostics/receipt", diag_views.diag_receipt, name="diag_receipt"),
     path("diagnostics/cash-drawer", diag_views.diag_cash_drawer, name="diag_cash_drawer"),
+    path("diagnostics/lockout", diag_views.diag_lockout, name="diag_lockout"),
 ]
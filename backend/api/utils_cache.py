@@ -0,0 +1,44 @@
+"""Access to caches that must be shared between worker processes.
+
+The cache-backed rate limiter and login lockout exist to give every worker
+the same view. On a process-local cache (LocMemCache, DummyCache) they would
+silently degrade to per-process state -- or none -- so they refuse to start
+instead. Set CACHE_URL (see config.settings_components.get_caches).
+"""
+
+from __future__ import annotations
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+
+LOCAL_CACHE_BACKENDS = {
+    "django.core.cache.backends.locmem.LocMemCache",
+    "django.core.cache.backends.dummy.DummyCache",
+}
+
+
+def local_cache_problem(alias: str, user: str) -> str:
+    """Why `alias` cannot back `user` ("" when it is a shared cache)."""
+    conf = getattr(settings, "CACHES", {}).get(alias)
+    if conf is None:
+        return f"{user} uses cache alias '{alias}', which is not in CACHES"
+    backend = conf.get("BACKEND", "")
+    if backend in LOCAL_CACHE_BACKENDS:
+        return (
+            f"{user} needs a cache shared by all workers, but CACHES['{alias}'] is "
+            f"{backend.rsplit('.', 1)[-1]}; set CACHE_URL (e.g. redis://host:6379/0)"
+        )
+    return ""
+
+
+def shared_cache(alias: str, user: str):
+    """caches[alias], or ImproperlyConfigured when it is process-local."""
+    from django.core.cache import caches
+
+    problem = local_cache_problem(alias, user)
+    if problem:
+        raise ImproperlyConfigured(problem)
+    return caches[alias]
+
+
+__all__ = ["LOCAL_CACHE_BACKENDS", "local_cache_problem", "shared_cache"]
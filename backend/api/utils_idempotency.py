@@ -0,0 +1,147 @@
+"""Idempotency-Key support for non-idempotent POST endpoints.
+
+Clients on flaky networks retry requests whose response they never saw.
+When such a request carries an `Idempotency-Key` header, the first
+successful response is stored in IdempotencyKey and later requests with the
+same key (from the same caller, within IDEMPOTENCY_KEY_TTL_SECONDS) get that
+response back instead of repeating the side effect.
+
+Usage inside a view:
+
+    idem = IdempotentRequest.from_request(request, actor, "orders.create")
+    replay = idem.replay()            # one indexed lookup
+    if replay is not None:
+        return replay
+    with transaction.atomic():
+        conflict = idem.claim()      # unique row; concurrent duplicates wait here
+        if conflict is not None:
+            return conflict
+        ... do the work ...
+        idem.store(200, body, resource_id=...)
+
+The claim is inserted in the same transaction as the work, so a failed
+request leaves no key behind and can be retried, and a duplicate that races
+the first request blocks on the unique index until it commits.
+Expired rows are deleted by `manage.py purge_idempotency_keys`.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+from datetime import timedelta
+from typing import Any, Optional
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.http import JsonResponse
+from django.utils import timezone as dj_timezone
+
+MAX_KEY_LENGTH = 255
+
+
+def _ttl_seconds() -> int:
+    return max(60, int(getattr(settings, "IDEMPOTENCY_KEY_TTL_SECONDS", 24 * 60 * 60)))
+
+
+def _sha256(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class IdempotentRequest:
+    def __init__(self, scope: str, key: str, caller: str, payload: Any):
+        self.scope = scope
+        self.key = key
+        self.key_hash = _sha256(f"{caller}:{key}") if key else ""
+        self.request_hash = _sha256(json.dumps(payload, sort_keys=True, default=str)) if key else ""
+        self.row = None
+
+    @classmethod
+    def from_request(cls, request, actor, scope: str, payload: Any = None) -> "IdempotentRequest":
+        key = (request.META.get("HTTP_IDEMPOTENCY_KEY") or "").strip()
+        caller = str(getattr(actor, "id", "") or getattr(actor, "email", "") or "")
+        return cls(scope, key, caller, payload)
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.key)
+
+    def invalid(self) -> Optional[JsonResponse]:
+        if self.key and len(self.key) > MAX_KEY_LENGTH:
+            return JsonResponse(
+                {"success": False, "message": f"Idempotency-Key longer than {MAX_KEY_LENGTH} characters"}, status=400
+            )
+        return None
+
+    def _answer(self, row) -> JsonResponse:
+        if row.request_hash != self.request_hash:
+            return JsonResponse(
+                {"success": False, "message": "Idempotency-Key was already used for a different request"}, status=422
+            )
+        if not row.status_code:
+            return JsonResponse({"success": False, "message": "A request with this Idempotency-Key is in progress"}, status=409)
+        resp = JsonResponse(row.response, status=row.status_code)
+        resp["Idempotent-Replayed"] = "true"
+        return resp
+
+    def replay(self) -> Optional[JsonResponse]:
+        """Stored response (or a 409/422) for a known key, else None."""
+        if not self.enabled:
+            return None
+        from .models import IdempotencyKey
+
+        row = IdempotencyKey.objects.filter(
+            scope=self.scope, key_hash=self.key_hash, expires_at__gt=dj_timezone.now()
+        ).first()
+        return self._answer(row) if row is not None else None
+
+    def claim(self) -> Optional[JsonResponse]:
+        """Insert the key row inside the caller's transaction.
+
+        Returns None when this request owns the key, or the response to send
+        when another request already claimed it.
+        """
+        if not self.enabled:
+            return None
+        from .models import IdempotencyKey
+
+        now = dj_timezone.now()
+        IdempotencyKey.objects.filter(scope=self.scope, key_hash=self.key_hash, expires_at__lte=now).delete()
+        try:
+            with transaction.atomic():
+                self.row = IdempotencyKey.objects.create(
+                    scope=self.scope,
+                    key_hash=self.key_hash,
+                    request_hash=self.request_hash,
+                    expires_at=now + timedelta(seconds=_ttl_seconds()),
+                )
+            return None
+        except IntegrityError:
+            row = IdempotencyKey.objects.filter(scope=self.scope, key_hash=self.key_hash).first()
+            if row is None:
+                return JsonResponse({"success": False, "message": "A request with this Idempotency-Key is in progress"}, status=409)
+            return self._answer(row)
+
+    def store(self, status_code: int, body: dict, resource_id: str = "") -> None:
+        if self.row is None:
+            return
+        self.row.status_code = int(status_code)
+        self.row.response = body
+        self.row.resource_id = str(resource_id or "")
+        self.row.save(update_fields=["status_code", "response", "resource_id"])
+
+
+def purge_expired_keys(batch_size: int = 5000) -> int:
+    """Delete expired IdempotencyKey rows in batches; returns the count removed."""
+    from .models import IdempotencyKey
+
+    removed = 0
+    now = dj_timezone.now()
+    while True:
+        ids = list(IdempotencyKey.objects.filter(expires_at__lte=now).values_list("id", flat=True)[:batch_size])
+        if not ids:
+            return removed
+        removed += IdempotencyKey.objects.filter(id__in=ids).delete()[0]
+
+
+__all__ = ["IdempotentRequest", "purge_expired_keys"]
@@ -0,0 +1,157 @@
+"""Verified-JWT cache keyed by token digest.
+
+Queue boards and dashboards poll with the same bearer token many times per
+minute; re-verifying its signature on each request is pure overhead (and for
+asymmetric algorithms such as RS256/ES256 a noticeable one). decode_token()
+keeps a bounded LRU from SHA-256(token) to the decoded payload.
+
+An entry never outlives the token: it expires at the token's own `exp`
+(capped by JWT_DECODE_CACHE_TTL_SECONDS). Invalid or expired tokens are never
+cached, so a miss always falls through to jwt.decode and raises the same
+exceptions. Entries are indexed by subject so revocation paths can purge a
+user's tokens with purge_subject().
+
+Signing uses settings.JWT_SECRET; verification uses settings.JWT_PUBLIC_KEY
+when set (asymmetric DJANGO_JWT_ALG), otherwise JWT_SECRET.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Set, Tuple
+
+import jwt
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+
+
+def jwt_verifying_key():
+    return getattr(settings, "JWT_PUBLIC_KEY", "") or settings.JWT_SECRET
+
+
+class TokenCache:
+    """Thread-safe LRU of decoded payloads with per-entry wall-clock expiry."""
+
+    def __init__(self, max_entries: int = 4096, ttl_seconds: float = 300.0):
+        self.max_entries = max(1, int(max_entries))
+        self.ttl_seconds = float(ttl_seconds)
+        self._data: "OrderedDict[str, Tuple[float, Dict[str, Any], str]]" = OrderedDict()
+        self._by_sub: Dict[str, Set[str]] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl_seconds > 0
+
+    @staticmethod
+    def digest(token: str) -> str:
+        return hashlib.sha256(token.encode("utf-8")).hexdigest()
+
+    def _drop(self, digest: str) -> None:
+        entry = self._data.pop(digest, None)
+        if entry is not None:
+            keys = self._by_sub.get(entry[2])
+            if keys is not None:
+                keys.discard(digest)
+                if not keys:
+                    self._by_sub.pop(entry[2], None)
+
+    def get(self, digest: str) -> Optional[Dict[str, Any]]:
+        now = time.time()
+        with self._lock:
+            entry = self._data.get(digest)
+            if entry is None or entry[0] <= now:
+                if entry is not None:
+                    self._drop(digest)
+                self.misses += 1
+                return None
+            self._data.move_to_end(digest)
+            self.hits += 1
+            return dict(entry[1])
+
+    def put(self, digest: str, payload: Dict[str, Any]) -> None:
+        if not self.enabled:
+            return
+        now = time.time()
+        expires_at = now + self.ttl_seconds
+        exp = payload.get("exp")
+        if isinstance(exp, (int, float)):
+            expires_at = min(expires_at, float(exp))
+        if expires_at <= now:
+            return
+        sub = str(payload.get("sub") or "")
+        with self._lock:
+            self._drop(digest)
+            self._data[digest] = (expires_at, dict(payload), sub)
+            self._by_sub.setdefault(sub, set()).add(digest)
+            while len(self._data) > self.max_entries:
+                self._drop(next(iter(self._data)))
+
+    def purge_subject(self, sub) -> int:
+        with self._lock:
+            digests = list(self._by_sub.get(str(sub), ()))
+            for d in digests:
+                self._drop(d)
+            return len(digests)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+            self._by_sub.clear()
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"size": len(self._data), "hits": self.hits, "misses": self.misses}
+
+    def __len__(self):
+        return len(self._data)
+
+
+TOKEN_CACHE = TokenCache(
+    max_entries=getattr(settings, "JWT_DECODE_CACHE_MAX_ENTRIES", 4096),
+    ttl_seconds=getattr(settings, "JWT_DECODE_CACHE_TTL_SECONDS", 300),
+)
+
+
+def decode_token(token: str, cache: Optional[TokenCache] = None) -> Dict[str, Any]:
+    """jwt.decode with the configured key/algorithm, served from cache when possible."""
+
+    cache = TOKEN_CACHE if cache is None else cache
+    digest = cache.digest(token) if cache.enabled else ""
+    if digest:
+        payload = cache.get(digest)
+        if payload is not None:
+            return payload
+    payload = jwt.decode(token, jwt_verifying_key(), algorithms=[settings.JWT_ALGORITHM])
+    if digest:
+        cache.put(digest, payload)
+    return payload
+
+
+def purge_subject(sub) -> int:
+    """Forget cached tokens for a user (after revocation or status change)."""
+
+    if not sub:
+        return 0
+    return TOKEN_CACHE.purge_subject(sub)
+
+
+@receiver(setting_changed)
+def _on_setting_changed(setting, **kwargs):
+    if setting.startswith("JWT_"):
+        TOKEN_CACHE.clear()
+
+
+__all__ = [
+    "TokenCache",
+    "TOKEN_CACHE",
+    "decode_token",
+    "purge_subject",
+    "jwt_verifying_key",
+]
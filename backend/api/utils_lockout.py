@@ -0,0 +1,224 @@
+"""Login lockout stores used by views_common._lockout_check_and_touch.
+
+A record per (email, ip) tracks failures inside a sliding window; reaching the
+threshold locks the pair for a fixed period. Records are only meaningful
+until both the window and any lock have elapsed, so every store evicts on
+that expiry instead of keeping entries forever.
+
+Stores:
+- LocalLockoutStore: per-process, bounded LRU (LOGIN_LOCKOUT_MAX_KEYS).
+- CacheLockoutStore: shared across workers via Django's cache framework;
+  each record is stored with a timeout equal to its remaining lifetime. It
+  requires a shared cache (CACHE_URL) and raises ImproperlyConfigured on a
+  process-local one, where lockouts would silently stop being shared.
+
+Select with settings.LOGIN_LOCKOUT_BACKEND (dotted path). Counters
+(failures, lockouts, blocked checks, evictions) are kept per process and
+exposed via stats() for monitoring.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+from .utils_cache import shared_cache
+
+
+class LockoutStore:
+    """Shared lockout policy; subclasses provide record storage."""
+
+    def __init__(self):
+        self.threshold = max(1, int(getattr(settings, "LOGIN_LOCKOUT_THRESHOLD", 5)))
+        self.window = max(1, int(getattr(settings, "LOGIN_LOCKOUT_WINDOW_SECONDS", 10 * 60)))
+        self.lock_seconds = max(1, int(getattr(settings, "LOGIN_LOCKOUT_SECONDS", 10 * 60)))
+        self._counters = {"failures": 0, "lockouts": 0, "blocked": 0, "cleared": 0, "evictions": 0}
+        self._counter_lock = threading.Lock()
+
+    # -- storage hooks -------------------------------------------------
+    def _load(self, key: str) -> Optional[Dict[str, int]]:
+        raise NotImplementedError
+
+    def _save(self, key: str, rec: Dict[str, int], ttl: int) -> None:
+        raise NotImplementedError
+
+    def _delete(self, key: str) -> None:
+        raise NotImplementedError
+
+    # -- policy --------------------------------------------------------
+    @staticmethod
+    def _key(email: str, ip: str) -> str:
+        return f"{email or ''}|{ip or ''}"
+
+    def _count(self, name: str, n: int = 1) -> None:
+        with self._counter_lock:
+            self._counters[name] = self._counters.get(name, 0) + n
+
+    def _ttl(self, rec: Dict[str, int], now: int) -> int:
+        return max(1, max(rec["first"] + self.window, rec["locked_until"]) - now)
+
+    def is_locked(self, email: str, ip: str) -> Tuple[bool, int]:
+        now = int(time.time())
+        rec = self._load(self._key(email, ip))
+        if rec and rec.get("locked_until", 0) > now:
+            self._count("blocked")
+            return True, int(rec["locked_until"] - now)
+        return False, 0
+
+    def touch(self, email: str, ip: str, success: bool) -> Tuple[bool, int]:
+        """Record a login outcome; returns (locked, retry_after_seconds)."""
+        now = int(time.time())
+        key = self._key(email, ip)
+        rec = self._load(key)
+
+        if rec and rec.get("locked_until", 0) > now:
+            self._count("blocked")
+            return True, int(rec["locked_until"] - now)
+
+        if success:
+            if rec:
+                self._delete(key)
+                self._count("cleared")
+            return False, 0
+
+        self._count("failures")
+        if not rec or now - rec.get("first", now) > self.window:
+            rec = {"first": now, "fail": 1, "locked_until": 0}
+            self._save(key, rec, self._ttl(rec, now))
+            return False, 0
+        rec["fail"] = int(rec.get("fail", 0)) + 1
+        locked = rec["fail"] >= self.threshold
+        if locked:
+            rec["locked_until"] = now + self.lock_seconds
+            self._count("lockouts")
+        self._save(key, rec, self._ttl(rec, now))
+        return (True, self.lock_seconds) if locked else (False, 0)
+
+    def stats(self) -> Dict[str, int]:
+        with self._counter_lock:
+            return dict(self._counters)
+
+    def reset(self) -> None:
+        """Forget all records (used by tests)."""
+
+
+class LocalLockoutStore(LockoutStore):
+    """In-process store bounded to `max_keys` records.
+
+    Expired records are pruned from the cold end on every write. If the store
+    is full of live records (e.g. a credential-stuffing spray), the least
+    recently touched record is dropped, keeping memory flat.
+    """
+
+    def __init__(self, max_keys: Optional[int] = None):
+        super().__init__()
+        self.max_keys = max(1, int(max_keys or getattr(settings, "LOGIN_LOCKOUT_MAX_KEYS", 100_000)))
+        self._data: "OrderedDict[str, Tuple[int, Dict[str, int]]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _load(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            expires_at, rec = entry
+            if expires_at <= int(time.time()):
+                self._data.pop(key, None)
+                return None
+            return dict(rec)
+
+    def _save(self, key, rec, ttl):
+        now = int(time.time())
+        evicted = 0
+        with self._lock:
+            self._data[key] = (now + ttl, dict(rec))
+            self._data.move_to_end(key)
+            while self._data:
+                _, (expires_at, _) = next(iter(self._data.items()))
+                if expires_at <= now or len(self._data) > self.max_keys:
+                    self._data.popitem(last=False)
+                    evicted += 1
+                    continue
+                break
+        if evicted:
+            self._count("evictions", evicted)
+
+    def _delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def stats(self):
+        out = super().stats()
+        out["size"] = len(self._data)
+        out["maxKeys"] = self.max_keys
+        return out
+
+    def reset(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+
+class CacheLockoutStore(LockoutStore):
+    """Records kept in a Django cache so every worker sees the same lockouts.
+
+    Keys are hashed to stay within cache key limits. Memory is bounded by the
+    cache backend itself; records expire with their own lifetime.
+    """
+
+    def __init__(self, alias: Optional[str] = None, prefix: str = "lockout:"):
+        super().__init__()
+        alias = alias or getattr(settings, "LOGIN_LOCKOUT_CACHE_ALIAS", "default")
+        self.cache = shared_cache(alias, "CacheLockoutStore")
+        self.prefix = prefix
+
+    def _ckey(self, key):
+        return self.prefix + hashlib.sha256(key.encode("utf-8")).hexdigest()
+
+    def _load(self, key):
+        rec = self.cache.get(self._ckey(key))
+        return dict(rec) if rec else None
+
+    def _save(self, key, rec, ttl):
+        self.cache.set(self._ckey(key), dict(rec), timeout=ttl)
+
+    def _delete(self, key):
+        self.cache.delete(self._ckey(key))
+
+
+_STORE = None
+_STORE_LOCK = threading.Lock()
+
+
+def get_lockout_store() -> LockoutStore:
+    global _STORE
+    if _STORE is None:
+        with _STORE_LOCK:
+            if _STORE is None:
+                path = getattr(settings, "LOGIN_LOCKOUT_BACKEND", "api.utils_lockout.LocalLockoutStore")
+                _STORE = import_string(path)()
+    return _STORE
+
+
+def set_lockout_store(store: Optional[LockoutStore]) -> None:
+    """Swap the active store (None re-reads settings on next use)."""
+    global _STORE
+    with _STORE_LOCK:
+        _STORE = store
+
+
+__all__ = [
+    "LockoutStore",
+    "LocalLockoutStore",
+    "CacheLockoutStore",
+    "get_lockout_store",
+    "set_lockout_store",
+]
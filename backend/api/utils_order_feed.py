@@ -0,0 +1,253 @@
+"""Order change feed served to kitchen/counter screens over Server-Sent Events.
+
+Order placement and status transitions append an OrderEvent row in the same
+transaction as the change. Ids are allocated at INSERT but become visible at
+COMMIT, so a lower id can appear after a higher one has been streamed. The
+resume cursor is therefore not the last id sent but the commit-safe point
+below which nothing more can appear:
+
+    settled = highest id created more than ORDER_FEED_SETTLE_SECONDS ago
+    cursor  = min(highest id sent, settled)
+
+Streams re-scan everything above that cursor on each poll and skip ids they
+have already sent on the connection. The SSE `id:` carries the cursor,
+browsers echo it back in `Last-Event-ID` when they reconnect, and the events
+between it and the last one seen are replayed; each event carries its own id
+as `seq` so clients drop those duplicates. A transaction that stays open
+longer than the settle window can still be missed, so keep it above the
+longest order write.
+
+Streams poll the table every ORDER_FEED_POLL_SECONDS (one indexed range
+query), and are woken immediately by commits made in the same process. Each
+connection ends after ORDER_FEED_MAX_SECONDS so sync workers are recycled;
+EventSource reconnects transparently with its last cursor.
+
+When a cursor predates the retained window (events pruned after
+ORDER_FEED_RETENTION_SECONDS) the stream emits a `reset` event and clients
+should reload the queue snapshot.
+
+Each event id is also stored on the order as Order.change_seq, which backs
+the `since` cursor and ETag of /orders/bulk-progress for clients that poll.
+"""
+
+from __future__ import annotations
+
+import json
+import threading
+import time
+from datetime import timedelta
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Set
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils import timezone as dj_tz
+
+
+_WAKE = threading.Condition()
+_PRUNE_EVERY = 500
+
+
+def _notify():
+    with _WAKE:
+        _WAKE.notify_all()
+
+
+def record_order_event(order, kind: str, previous_status: str = "", data: Optional[Dict[str, Any]] = None):
+    """Append a feed event for `order`; never fails the caller's transaction."""
+    try:
+        from .models import Order, OrderEvent
+        with transaction.atomic():
+            ev = OrderEvent.objects.create(
+                order_id=order.id,
+                order_number=order.order_number or "",
+                kind=kind,
+                status=order.status or "",
+                previous_status=previous_status or "",
+                data=data or {},
+            )
+            # Stamp the order with the event id so pollers can ask "what changed since N"
+            Order.objects.filter(id=order.id).update(change_seq=ev.id)
+            order.change_seq = ev.id
+        transaction.on_commit(_notify)
+        if ev.id % _PRUNE_EVERY == 0:
+            prune_events()
+        return ev
+    except Exception:
+        return None
+
+
+def record_order_events(changes, kind: str = "status") -> list:
+    """Bulk form of record_order_event for [(order, previous_status)] pairs.
+
+    One INSERT for the events and one UPDATE (CASE on id) for the orders'
+    change_seq. Never fails the caller's transaction.
+    """
+    changes = list(changes or [])
+    if not changes:
+        return []
+    try:
+        from django.db.models import BigIntegerField, Case, Value, When
+        from .models import Order, OrderEvent
+        with transaction.atomic():
+            rows = [
+                OrderEvent(
+                    order_id=o.id,
+                    order_number=o.order_number or "",
+                    kind=kind,
+                    status=o.status or "",
+                    previous_status=prev or "",
+                    data={},
+                )
+                for o, prev in changes
+            ]
+            if connection.features.can_return_rows_from_bulk_insert:
+                created = OrderEvent.objects.bulk_create(rows)
+            else:
+                # e.g. MySQL: ids are needed as cursors, so insert row by row
+                for ev in rows:
+                    ev.save(force_insert=True)
+                created = rows
+            whens = []
+            for (o, _), ev in zip(changes, created):
+                o.change_seq = ev.id
+                whens.append(When(id=o.id, then=Value(ev.id)))
+            Order.objects.filter(id__in=[o.id for o, _ in changes]).update(
+                change_seq=Case(*whens, output_field=BigIntegerField())
+            )
+        transaction.on_commit(_notify)
+        return created
+    except Exception:
+        return []
+
+
+def prune_events() -> int:
+    from .models import OrderEvent
+    retention = int(getattr(settings, "ORDER_FEED_RETENTION_SECONDS", 24 * 60 * 60))
+    cutoff = dj_tz.now() - timedelta(seconds=max(60, retention))
+    deleted, _ = OrderEvent.objects.filter(created_at__lt=cutoff).delete()
+    return deleted
+
+
+def latest_event_id() -> int:
+    from .models import OrderEvent
+    row = OrderEvent.objects.order_by("-id").values_list("id", flat=True).first()
+    return int(row or 0)
+
+
+def settled_event_id(settle_seconds: Optional[float] = None) -> int:
+    """Highest event id below which no further commits are expected."""
+    from .models import OrderEvent
+    if settle_seconds is None:
+        settle_seconds = float(getattr(settings, "ORDER_FEED_SETTLE_SECONDS", 10))
+    if settle_seconds <= 0:
+        return latest_event_id()
+    cutoff = dj_tz.now() - timedelta(seconds=settle_seconds)
+    row = OrderEvent.objects.filter(created_at__lt=cutoff).order_by("-id").values_list("id", flat=True).first()
+    return int(row or 0)
+
+
+def serialize_event(ev) -> Dict[str, Any]:
+    out = {
+        "seq": ev.id,
+        "kind": ev.kind,
+        "orderId": str(ev.order_id),
+        "orderNumber": ev.order_number,
+        "status": ev.status,
+        "previousStatus": ev.previous_status or None,
+        "at": ev.created_at.isoformat() if ev.created_at else None,
+    }
+    if ev.data:
+        out["order"] = ev.data
+    return out
+
+
+def events_after(cursor: int, limit: int = 200, exclude: Iterable[int] = ()) -> List[Any]:
+    """Events after `cursor` in id order, skipping ids already delivered."""
+    from .models import OrderEvent
+    qs = OrderEvent.objects.filter(id__gt=cursor)
+    exclude = list(exclude)
+    if exclude:
+        qs = qs.exclude(id__in=exclude)
+    return list(qs.order_by("id")[:limit])
+
+
+def cursor_is_stale(cursor: int) -> bool:
+    """True when events after `cursor` may have been pruned (or the log was reset)."""
+    from .models import OrderEvent
+    if cursor <= 0:
+        return False
+    oldest = OrderEvent.objects.order_by("id").values_list("id", flat=True).first()
+    if oldest is None:
+        return False
+    newest = OrderEvent.objects.order_by("-id").values_list("id", flat=True).first()
+    return cursor < oldest - 1 or cursor > newest
+
+
+def _ids_after(cursor: int) -> List[int]:
+    from .models import OrderEvent
+    return list(OrderEvent.objects.filter(id__gt=cursor).values_list("id", flat=True))
+
+
+def _sse(event: str, data: Any, event_id: Optional[int] = None) -> str:
+    lines = []
+    if event_id is not None:
+        lines.append(f"id: {event_id}")
+    lines.append(f"event: {event}")
+    lines.append("data: " + json.dumps(data, separators=(",", ":")))
+    return "\n".join(lines) + "\n\n"
+
+
+def stream_events(cursor: Optional[int]) -> Iterator[str]:
+    """Yield SSE frames from `cursor` (None = only new events) until the time budget ends."""
+    max_seconds = float(getattr(settings, "ORDER_FEED_MAX_SECONDS", 55))
+    poll = max(0.05, float(getattr(settings, "ORDER_FEED_POLL_SECONDS", 1.0)))
+    heartbeat = max(1.0, float(getattr(settings, "ORDER_FEED_HEARTBEAT_SECONDS", 15)))
+    retry_ms = int(getattr(settings, "ORDER_FEED_RETRY_MS", 3000))
+
+    # Ids above `cursor` already delivered on this connection; bounded by the
+    # settle window because the cursor catches up once they settle
+    sent: Set[int] = set()
+    yield f"retry: {retry_ms}\n\n"
+    if cursor is None or cursor_is_stale(cursor):
+        event = "ready" if cursor is None else "reset"
+        # The client's snapshot already reflects what is committed now
+        cursor = settled_event_id()
+        sent = set(_ids_after(cursor))
+        yield _sse(event, {"cursor": cursor}, event_id=cursor)
+
+    deadline = time.monotonic() + max_seconds
+    last_sent = time.monotonic()
+    while True:
+        # Read before the scan: every id up to `settled` is visible to it
+        settled = settled_event_id()
+        batch = events_after(cursor, exclude=sent)
+        high = max([cursor, *sent])
+        for ev in batch:
+            sent.add(ev.id)
+            high = max(high, ev.id)
+            yield _sse("order", serialize_event(ev), event_id=max(cursor, min(high, settled)))
+        cursor = max(cursor, min(high, settled))
+        sent = {i for i in sent if i > cursor}
+        now = time.monotonic()
+        if batch:
+            last_sent = now
+            continue  # drain a backlog before sleeping
+        if now >= deadline:
+            return
+        if now - last_sent >= heartbeat:
+            last_sent = now
+            yield ": keep-alive\n\n"
+        with _WAKE:
+            _WAKE.wait(timeout=min(poll, max(0.0, deadline - now)))
+
+
+__all__ = [
+    "record_order_event",
+    "record_order_events",
+    "prune_events",
+    "latest_event_id",
+    "settled_event_id",
+    "serialize_event",
+    "events_after",
+    "stream_events",
+]
@@ -0,0 +1,141 @@
+"""Order number allocation backed by a counter table.
+
+Numbers look like ``W-261017-0042`` (prefix, local date, sequence) or, with
+ORDER_NUMBER_LOCATION set, ``W-C2-261017-0042``. Each scope (prefix +
+location + day, or prefix + location with ORDER_NUMBER_SCOPE="global") has an
+OrderNumberSequence row.
+
+Instead of one database round trip per order, every process reserves a block
+of ORDER_NUMBER_BLOCK_SIZE numbers at a time by advancing the row's
+`next_value` in its own short transaction, then hands them out from memory.
+Blocks never overlap, so numbers are unique across workers and tills; the
+price is that numbers are not strictly ordered across workers and the unused
+tail of a block is skipped when a process exits.
+
+Numbers must fit Order.order_number (32 characters) with room for a
+six-digit sequence, so scope keys are capped at KEY_MAX_LENGTH. A location
+code too long for that is reported by the api.E003 system check; at run
+time it is shortened (never the date) rather than overflowing the column.
+
+Reserve numbers before opening the order transaction: a reservation made
+inside an outer atomic block is undone if that block rolls back, while this
+process would still hold the block in memory.
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from typing import Dict, List, Optional
+
+from django.conf import settings
+from django.db import IntegrityError, OperationalError, transaction
+from django.db.models import F
+from django.utils import timezone as dj_tz
+
+
+ORDER_NUMBER_MAX_LENGTH = 32  # Order.order_number / OrderNumberSequence.key
+SEQUENCE_DIGITS = 6  # "-NNNNNN": formatted with at least 4, room for 6
+KEY_MAX_LENGTH = ORDER_NUMBER_MAX_LENGTH - 1 - SEQUENCE_DIGITS
+
+
+def max_location_length(prefix: str = "W") -> int:
+    """Longest ORDER_NUMBER_LOCATION that fits beside `prefix`, the date and the sequence."""
+    day = 7 if getattr(settings, "ORDER_NUMBER_SCOPE", "day") != "global" else 0  # "-YYMMDD"
+    return KEY_MAX_LENGTH - len(str(prefix or "W")) - 1 - day
+
+
+class OrderNumberAllocator:
+    def __init__(self, block_size: Optional[int] = None):
+        if block_size is None:
+            block_size = getattr(settings, "ORDER_NUMBER_BLOCK_SIZE", 20)
+        self.block_size = max(1, int(block_size))
+        self._blocks: Dict[str, List[int]] = {}  # key -> [next, end_exclusive]
+        self._lock = threading.Lock()
+        self.reservations = 0
+
+    # -- formatting ----------------------------------------------------
+    @staticmethod
+    def scope_key(prefix: str = "W", location: Optional[str] = None, day=None) -> str:
+        location = location if location is not None else getattr(settings, "ORDER_NUMBER_LOCATION", "")
+        prefix = str(prefix or "W").upper()
+        parts = [prefix]
+        if location:
+            # Shorten the site code, not the date, to leave room for the sequence
+            parts.append(str(location).upper()[: max(1, max_location_length(prefix))])
+        if getattr(settings, "ORDER_NUMBER_SCOPE", "day") != "global":
+            parts.append((day or dj_tz.localdate()).strftime("%y%m%d"))
+        return "-".join(parts)[:KEY_MAX_LENGTH]
+
+    @staticmethod
+    def format(key: str, value: int) -> str:
+        number = f"{key}-{value:04d}"
+        if len(number) > ORDER_NUMBER_MAX_LENGTH:
+            raise ValueError(f"Order number {number} exceeds {ORDER_NUMBER_MAX_LENGTH} characters")
+        return number
+
+    # -- reservation ---------------------------------------------------
+    def _reserve(self, key: str) -> List[int]:
+        """Advance the counter row by one block; returns [start, end)."""
+        from .models import OrderNumberSequence
+
+        size = self.block_size
+        for attempt in range(10):
+            try:
+                with transaction.atomic():
+                    updated = OrderNumberSequence.objects.filter(key=key).update(next_value=F("next_value") + size)
+                    if updated:
+                        end = OrderNumberSequence.objects.filter(key=key).values_list("next_value", flat=True).get()
+                        self.reservations += 1
+                        return [end - size, end]
+                    try:
+                        with transaction.atomic():
+                            OrderNumberSequence.objects.create(key=key, next_value=1 + size)
+                        self.reservations += 1
+                        return [1, 1 + size]
+                    except IntegrityError:
+                        continue  # another worker created the row; bump it instead
+            except OperationalError:
+                # Lock timeout/contention (e.g. SQLite "database is locked"): back off and retry
+                if attempt == 9:
+                    raise
+                time.sleep(0.005 * (attempt + 1))
+        raise OperationalError(f"could not reserve order numbers for {key}")
+
+    def next_value(self, key: str) -> int:
+        with self._lock:
+            block = self._blocks.get(key)
+            if block is None or block[0] >= block[1]:
+                # Only the current scopes are worth keeping
+                if block is None and len(self._blocks) >= 8:
+                    self._blocks.clear()
+                block = self._blocks[key] = self._reserve(key)
+            value = block[0]
+            block[0] += 1
+            return value
+
+    def allocate(self, prefix: str = "W", location: Optional[str] = None) -> str:
+        key = self.scope_key(prefix, location)
+        return self.format(key, self.next_value(key))
+
+    def reset(self) -> None:
+        """Drop reserved blocks held by this process (used by tests)."""
+        with self._lock:
+            self._blocks.clear()
+
+
+ORDER_NUMBERS = OrderNumberAllocator()
+
+
+def next_order_number(prefix: str = "W", location: Optional[str] = None) -> str:
+    return ORDER_NUMBERS.allocate(prefix, location)
+
+
+__all__ = [
+    "ORDER_NUMBER_MAX_LENGTH",
+    "KEY_MAX_LENGTH",
+    "max_location_length",
+    "OrderNumberAllocator",
+    "ORDER_NUMBERS",
+    "next_order_number",
+]
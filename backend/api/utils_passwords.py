@@ -0,0 +1,172 @@
+"""Password hashing service with bounded concurrency.
+
+PBKDF2 is deliberately expensive (tens of ms of CPU per call). Running it
+unbounded on every request thread means a burst of logins at shift change
+can pin every worker on hashing while cheap requests (queue polling, menu
+reads) wait behind them.
+
+All hash/verify calls made by the views go through get_password_hashing(), which
+admits at most PASSWORD_HASH_CONCURRENCY computations per process at a time.
+Callers beyond that wait up to PASSWORD_HASH_QUEUE_TIMEOUT_SECONDS for a slot
+and then get PasswordHashingBusy, which views turn into a 503 with
+Retry-After instead of piling up.
+
+The PBKDF2 work factor is set per deployment with PASSWORD_HASH_ITERATIONS
+(ConfiguredPBKDF2PasswordHasher). When it changes, existing hashes are
+transparently upgraded on the user's next successful login.
+"""
+
+from __future__ import annotations
+
+import threading
+from contextlib import contextmanager
+from typing import Callable, Dict, Optional
+
+from django.conf import settings
+from django.contrib.auth.hashers import (
+    PBKDF2PasswordHasher,
+    check_password as _django_check_password,
+    make_password as _django_make_password,
+)
+
+
+class ConfiguredPBKDF2PasswordHasher(PBKDF2PasswordHasher):
+    """PBKDF2-SHA256 whose iteration count comes from settings.
+
+    Uses the stock "pbkdf2_sha256" algorithm name, so hashes produced by
+    Django's default hasher verify unchanged; must_update() reports them as
+    stale when their iteration count differs from the configured one.
+    """
+
+    @property
+    def iterations(self):
+        configured = int(getattr(settings, "PASSWORD_HASH_ITERATIONS", 0) or 0)
+        return configured if configured > 0 else PBKDF2PasswordHasher.iterations
+
+
+class PasswordHashingBusy(Exception):
+    """Raised when no hashing slot frees up within the queue timeout."""
+
+    def __init__(self, retry_after: int = 1):
+        super().__init__("password hashing capacity exhausted")
+        self.retry_after = max(1, int(retry_after))
+
+
+class PasswordHashingService:
+    def __init__(self, concurrency: Optional[int] = None, queue_timeout: Optional[float] = None):
+        if concurrency is None:
+            concurrency = getattr(settings, "PASSWORD_HASH_CONCURRENCY", 4)
+        if queue_timeout is None:
+            queue_timeout = getattr(settings, "PASSWORD_HASH_QUEUE_TIMEOUT_SECONDS", 5.0)
+        self.concurrency = max(1, int(concurrency))
+        self.queue_timeout = max(0.0, float(queue_timeout))
+        self._slots = threading.BoundedSemaphore(self.concurrency)
+        self._lock = threading.Lock()
+        self._counters = {"hashed": 0, "verified": 0, "rehashed": 0, "rejected": 0, "waiting": 0, "peakWaiting": 0}
+
+    def _count(self, name: str, n: int = 1) -> None:
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + n
+            if name == "waiting":
+                self._counters["peakWaiting"] = max(self._counters["peakWaiting"], self._counters["waiting"])
+
+    @contextmanager
+    def _slot(self):
+        self._count("waiting")
+        try:
+            acquired = self._slots.acquire(timeout=self.queue_timeout)
+        finally:
+            self._count("waiting", -1)
+        if not acquired:
+            self._count("rejected")
+            raise PasswordHashingBusy(retry_after=max(1, int(self.queue_timeout) or 1))
+        try:
+            yield
+        finally:
+            self._slots.release()
+
+    def make_password(self, raw: str) -> str:
+        with self._slot():
+            encoded = _django_make_password(raw)
+        self._count("hashed")
+        return encoded
+
+    def check_password(self, raw: str, encoded: str, setter: Optional[Callable[[str], None]] = None) -> bool:
+        """Verify `raw` against `encoded`.
+
+        If the password is correct but `encoded` uses outdated parameters,
+        a fresh hash is computed and passed to `setter` (if given). A busy
+        pool during the upgrade is ignored; it is retried on the next login.
+        """
+        if not raw or not encoded:
+            return False
+        needs_upgrade = []
+        with self._slot():
+            ok = _django_check_password(raw, encoded, setter=needs_upgrade.append)
+        self._count("verified")
+        if ok and needs_upgrade and setter is not None:
+            try:
+                setter(self.make_password(raw))
+                self._count("rehashed")
+            except PasswordHashingBusy:
+                pass
+        return ok
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            out = dict(self._counters)
+        out["concurrency"] = self.concurrency
+        return out
+
+
+_SERVICE = None
+_SERVICE_LOCK = threading.Lock()
+
+
+def get_password_hashing() -> PasswordHashingService:
+    global _SERVICE
+    if _SERVICE is None:
+        with _SERVICE_LOCK:
+            if _SERVICE is None:
+                _SERVICE = PasswordHashingService()
+    return _SERVICE
+
+
+def set_password_hashing(service: Optional[PasswordHashingService]) -> None:
+    """Swap the active service (None re-reads settings on next use)."""
+    global _SERVICE
+    with _SERVICE_LOCK:
+        _SERVICE = service
+
+
+def hash_password(raw: str) -> str:
+    return get_password_hashing().make_password(raw)
+
+
+def verify_password(raw: str, encoded: str, setter: Optional[Callable[[str], None]] = None) -> bool:
+    return get_password_hashing().check_password(raw, encoded, setter=setter)
+
+
+def rehash_setter(user) -> Callable[[str], None]:
+    """Setter for verify_password that persists an upgraded AppUser hash."""
+
+    def _save(encoded: str) -> None:
+        user.password_hash = encoded
+        try:
+            type(user).objects.filter(pk=user.pk).update(password_hash=encoded)
+        except Exception:
+            pass
+
+    return _save
+
+
+__all__ = [
+    "ConfiguredPBKDF2PasswordHasher",
+    "PasswordHashingBusy",
+    "PasswordHashingService",
+    "get_password_hashing",
+    "set_password_hashing",
+    "hash_password",
+    "verify_password",
+    "rehash_setter",
+]
@@ -0,0 +1,70 @@
+"""Permission registry that interns permission codes to bit positions.
+
+Every permission code (e.g. "order.place") is assigned a stable bit index the
+first time it is seen. Role defaults and per-user grants are then compiled
+into integer masks, so a permission check is a single AND instead of building
+and probing a fresh set on every call.
+
+Bit 0 is reserved for the "all" wildcard granted to admins.
+"""
+
+from __future__ import annotations
+
+import threading
+from typing import Dict, Iterable, List, Set
+
+
+WILDCARD = "all"
+
+
+class PermissionRegistry:
+    def __init__(self):
+        self._index: Dict[str, int] = {}
+        self._codes: List[str] = []
+        self._lock = threading.Lock()
+        self.intern(WILDCARD)
+
+    def intern(self, code: str) -> int:
+        """Return the bit (1 << index) for a code, assigning one if new."""
+
+        idx = self._index.get(code)
+        if idx is None:
+            with self._lock:
+                idx = self._index.get(code)
+                if idx is None:
+                    idx = len(self._codes)
+                    self._codes.append(code)
+                    self._index[code] = idx
+        return 1 << idx
+
+    def mask(self, codes: Iterable[str]) -> int:
+        m = 0
+        for code in codes or ():
+            if code:
+                m |= self.intern(str(code))
+        return m
+
+    def codes(self, mask: int) -> Set[str]:
+        """Expand a mask back into the set of permission codes."""
+
+        out = set()
+        idx = 0
+        while mask:
+            if mask & 1:
+                out.add(self._codes[idx])
+            mask >>= 1
+            idx += 1
+        return out
+
+    def has(self, mask: int, code: str) -> bool:
+        return bool(mask & (ALL_BIT | self.intern(code)))
+
+    def has_all(self, mask: int, required: int) -> bool:
+        return bool(mask & ALL_BIT) or (mask & required) == required
+
+
+PERMISSIONS = PermissionRegistry()
+ALL_BIT = PERMISSIONS.intern(WILDCARD)
+
+
+__all__ = ["PermissionRegistry", "PERMISSIONS", "ALL_BIT", "WILDCARD"]
@@ -0,0 +1,145 @@
+"""Process-wide cache of authenticated principals keyed by JWT subject.
+
+Pollers (queue boards, dashboards) hit the API several times per second with
+the same bearer token. Instead of loading the AppUser row on every request,
+the gate middleware keeps a small bounded LRU of the user's columns plus the
+compiled effective permission mask (see utils_permissions). Every column the
+views read (profile fields, timestamps, flags) is cached, so a cache hit never
+falls back to a lazy per-attribute query. password_hash is the one exception:
+it stays deferred, since only the login and password-change paths read it and
+they want the stored value rather than a cached copy.
+
+Entries expire after a short TTL and are dropped eagerly on AppUser
+post_save/post_delete, so status and role changes take effect immediately in
+the worker that made them and within the TTL everywhere else.
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+from django.conf import settings
+
+
+PRINCIPAL_FIELDS = (
+    "id", "email", "name", "role", "status", "permissions", "avatar", "phone",
+    "created_at", "updated_at", "last_login", "email_verified",
+)
+
+
+class PrincipalCache:
+    """Thread-safe LRU with per-entry TTL.
+
+    Values are (fields, permission_mask) tuples; `fields` maps
+    PRINCIPAL_FIELDS to the column values loaded from the database.
+    """
+
+    def __init__(self, max_entries: int = 1024, ttl_seconds: float = 30.0):
+        self.max_entries = max(1, int(max_entries))
+        self.ttl_seconds = float(ttl_seconds)
+        self._data: "OrderedDict[str, Tuple[float, Dict[str, Any], int]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl_seconds > 0
+
+    def get(self, sub: str) -> Optional[Tuple[Dict[str, Any], int]]:
+        if not self.enabled or not sub:
+            return None
+        now = time.monotonic()
+        with self._lock:
+            entry = self._data.get(sub)
+            if entry is None:
+                self.misses += 1
+                return None
+            expires_at, fields, mask = entry
+            if expires_at <= now:
+                self._data.pop(sub, None)
+                self.misses += 1
+                return None
+            self._data.move_to_end(sub)
+            self.hits += 1
+            return fields, mask
+
+    def put(self, sub: str, fields: Dict[str, Any], mask: int) -> None:
+        if not self.enabled or not sub:
+            return
+        expires_at = time.monotonic() + self.ttl_seconds
+        with self._lock:
+            self._data[sub] = (expires_at, fields, mask)
+            self._data.move_to_end(sub)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def invalidate(self, sub: str) -> None:
+        with self._lock:
+            self._data.pop(str(sub), None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"size": len(self._data), "hits": self.hits, "misses": self.misses}
+
+
+PRINCIPAL_CACHE = PrincipalCache(
+    max_entries=getattr(settings, "PRINCIPAL_CACHE_MAX_ENTRIES", 1024),
+    ttl_seconds=getattr(settings, "PRINCIPAL_CACHE_TTL_SECONDS", 30),
+)
+
+
+def principal_fields(user) -> Dict[str, Any]:
+    """Snapshot the cached columns of an AppUser instance."""
+
+    fields = {name: getattr(user, name) for name in PRINCIPAL_FIELDS}
+    fields["permissions"] = list(user.permissions or [])
+    return fields
+
+
+def user_from_fields(fields: Dict[str, Any]):
+    """Rebuild an AppUser from cached columns without touching the database.
+
+    The instance is created via Model.from_db with every column but
+    password_hash, which stays deferred: reading it lazily loads from the DB,
+    and save() only writes the loaded columns.
+    """
+
+    from .models import AppUser
+
+    names = list(PRINCIPAL_FIELDS)
+    values = [fields[n] if n != "permissions" else list(fields[n]) for n in names]
+    return AppUser.from_db("default", names, values)
+
+
+def invalidate_principal(user_or_id) -> None:
+    """Drop a single cached principal (AppUser instance or id)."""
+
+    uid = getattr(user_or_id, "id", user_or_id)
+    if uid:
+        PRINCIPAL_CACHE.invalidate(str(uid))
+
+
+def invalidate_all_principals() -> None:
+    PRINCIPAL_CACHE.clear()
+
+
+def _on_appuser_changed(sender, instance, **kwargs):
+    invalidate_principal(instance)
+
+
+__all__ = [
+    "PrincipalCache",
+    "PRINCIPAL_CACHE",
+    "principal_fields",
+    "user_from_fields",
+    "invalidate_principal",
+    "invalidate_all_principals",
+]
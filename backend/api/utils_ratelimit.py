@@ -0,0 +1,175 @@
+"""Rate-limit backends used by views_common.rate_limit.
+
+Both backends implement GCRA (generic cell rate algorithm), a token-bucket
+equivalent that stores a single timestamp per key -- the "theoretical arrival
+time" (TAT) -- instead of a list of recent hits. A key allows `limit` requests
+per `window` seconds with bursts up to `limit`.
+
+Backends:
+- LocalRateLimitBackend: per-process, bounded LRU with expiry-driven eviction.
+- CacheRateLimitBackend: shared across workers via Django's cache framework.
+  Requires CACHE_URL (Redis/Memcached/DatabaseCache, see settings) and
+  raises ImproperlyConfigured on a process-local cache.
+
+Select with settings.RATE_LIMIT_BACKEND (dotted path).
+"""
+
+from __future__ import annotations
+
+import math
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+from .utils_cache import shared_cache
+
+
+def _gcra(tat: Optional[float], now: float, limit: int, window: float) -> Tuple[bool, float, float]:
+    """Single GCRA step.
+
+    Returns (allowed, new_tat, retry_after). When not allowed, new_tat equals
+    the stored value so the rejected hit does not consume capacity.
+    """
+    interval = window / max(1, limit)
+    tat = now if tat is None or tat < now else tat
+    new_tat = tat + interval
+    allow_at = new_tat - window
+    if allow_at > now:
+        return False, tat, allow_at - now
+    return True, new_tat, 0.0
+
+
+class RateLimitBackend:
+    """Interface: `hit` records one request for `key` and decides on it."""
+
+    def hit(self, key: str, limit: int, window: float) -> Tuple[bool, float]:
+        """Return (allowed, retry_after_seconds)."""
+        raise NotImplementedError
+
+    def reset(self) -> None:
+        """Forget all state (used by tests and benchmarks)."""
+
+    def __len__(self) -> int:
+        return 0
+
+
+class LocalRateLimitBackend(RateLimitBackend):
+    """In-process GCRA store, bounded to `max_keys` entries.
+
+    Entries whose TAT has passed are equivalent to absent keys, so they are
+    pruned from the LRU end on every insert. When the store is full of live
+    keys the least recently used one is dropped (that key starts fresh).
+    """
+
+    def __init__(self, max_keys: Optional[int] = None):
+        self.max_keys = max(1, int(max_keys or getattr(settings, "RATE_LIMIT_MAX_KEYS", 100_000)))
+        self._tats: "OrderedDict[str, float]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def hit(self, key, limit, window):
+        now = time.monotonic()
+        with self._lock:
+            allowed, new_tat, retry_after = _gcra(self._tats.get(key), now, limit, window)
+            if allowed:
+                self._tats[key] = new_tat
+                self._tats.move_to_end(key)
+                self._evict(now)
+            return allowed, retry_after
+
+    def _evict(self, now: float):
+        tats = self._tats
+        # Drop expired keys from the cold end, then enforce the hard bound
+        while tats:
+            oldest_key, oldest_tat = next(iter(tats.items()))
+            if oldest_tat <= now or len(tats) > self.max_keys:
+                tats.popitem(last=False)
+                continue
+            break
+
+    def reset(self):
+        with self._lock:
+            self._tats.clear()
+
+    def __len__(self):
+        return len(self._tats)
+
+
+class CacheRateLimitBackend(RateLimitBackend):
+    """GCRA state kept in a Django cache so all workers share one view.
+
+    Each key stores its TAT (wall-clock seconds) with a timeout equal to the
+    time until it expires, so the cache's own eviction bounds memory. Updates
+    are read-then-write; under heavy contention on a single key a few extra
+    requests may be admitted, which is acceptable for throttling.
+
+    Keys live under `<prefix><generation>:`. reset() bumps the generation
+    stored at `<prefix>gen` rather than clearing the cache, which other
+    subsystems share; the abandoned keys expire on their own. The generation
+    is read once per process, so a reset is seen by instances created after
+    it and by every instance in the resetting process.
+    """
+
+    _generations: Dict[Tuple[str, str], int] = {}
+
+    def __init__(self, alias: Optional[str] = None, prefix: str = "rl:"):
+        self.alias = alias or getattr(settings, "RATE_LIMIT_CACHE_ALIAS", "default")
+        self.cache = shared_cache(self.alias, "CacheRateLimitBackend")
+        self.prefix = prefix
+
+    def _namespace(self) -> str:
+        gen = self._generations.get((self.alias, self.prefix))
+        if gen is None:
+            gen = int(self.cache.get(self.prefix + "gen") or 0)
+            self._generations[(self.alias, self.prefix)] = gen
+        return f"{self.prefix}{gen}:"
+
+    def hit(self, key, limit, window):
+        now = time.time()
+        ckey = self._namespace() + key
+        allowed, new_tat, retry_after = _gcra(self.cache.get(ckey), now, limit, window)
+        if allowed:
+            self.cache.set(ckey, new_tat, timeout=max(1, math.ceil(new_tat - now)))
+        return allowed, retry_after
+
+    def reset(self):
+        gen_key = self.prefix + "gen"
+        try:
+            gen = self.cache.incr(gen_key)
+        except ValueError:
+            gen = int(self._generations.get((self.alias, self.prefix)) or 0) + 1
+            self.cache.set(gen_key, gen, timeout=None)
+        self._generations[(self.alias, self.prefix)] = gen
+
+
+_BACKEND = None
+_BACKEND_LOCK = threading.Lock()
+
+
+def get_rate_limit_backend() -> RateLimitBackend:
+    global _BACKEND
+    if _BACKEND is None:
+        with _BACKEND_LOCK:
+            if _BACKEND is None:
+                path = getattr(settings, "RATE_LIMIT_BACKEND", "api.utils_ratelimit.LocalRateLimitBackend")
+                _BACKEND = import_string(path)()
+    return _BACKEND
+
+
+def set_rate_limit_backend(backend: Optional[RateLimitBackend]) -> None:
+    """Swap the active backend (None re-reads settings on next use)."""
+    global _BACKEND
+    with _BACKEND_LOCK:
+        _BACKEND = backend
+
+
+__all__ = [
+    "RateLimitBackend",
+    "LocalRateLimitBackend",
+    "CacheRateLimitBackend",
+    "get_rate_limit_backend",
+    "set_rate_limit_backend",
+]
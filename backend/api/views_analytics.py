@@ -1,6 +1,5 @@
 from __future__ import annotations
 
-import json
 from collections import defaultdict
 from datetime import date, datetime, timedelta
 from decimal import Decimal
@@ -14,6 +13,8 @@ from django.views.decorators.http import require_http_methods
 from .models import (
     AnalyticsEvent,
     AnalyticsSnapshot,
+    ArchivedOrder,
+    ArchivedOrderItem,
     AttendanceRecord,
     Employee,
     InventoryItem,
@@ -22,7 +23,7 @@ from .models import (
     PaymentTransaction,
     ScheduleEntry,
 )
-from .views_common import _actor_from_request, _has_permission
+from .views_common import _actor_from_request, _has_permission, _parse_json_body
 
 
 ANALYTICS_PERMISSIONS = {
@@ -129,7 +130,10 @@ def analytics_sales(request):
             created_at__lte=end,
         )
         total_revenue = transactions.aggregate(total=Sum("amount")).get("total") or Decimal("0")
-        total_orders = Order.objects.filter(created_at__gte=start, created_at__lte=end).count()
+        total_orders = sum(
+            model.objects.filter(created_at__gte=start, created_at__lte=end).count()
+            for model in (Order, ArchivedOrder)
+        )
         avg_order_value = float(total_revenue / total_orders) if total_orders else 0.0
 
         daily_rows = (
@@ -163,28 +167,33 @@ def analytics_sales(request):
             if row.get("month")
         ]
 
-        items = (
-            OrderItem.objects.filter(order__created_at__gte=start, order__created_at__lte=end)
-            .annotate(
-                item_revenue=ExpressionWrapper(
-                    F("price") * F("quantity"),
-                    output_field=DecimalField(max_digits=14, decimal_places=2),
+        item_totals = defaultdict(lambda: [0, Decimal("0")])
+        for model in (OrderItem, ArchivedOrderItem):
+            rows = (
+                model.objects.filter(order__created_at__gte=start, order__created_at__lte=end)
+                .annotate(
+                    item_revenue=ExpressionWrapper(
+                        F("price") * F("quantity"),
+                        output_field=DecimalField(max_digits=14, decimal_places=2),
+                    )
+                )
+                .values("item_name")
+                .annotate(
+                    quantity=Sum("quantity"),
+                    revenue=Sum("item_revenue"),
                 )
             )
-            .values("item_name")
-            .annotate(
-                quantity=Sum("quantity"),
-                revenue=Sum("item_revenue"),
-            )
-            .order_by("-quantity")[:10]
-        )
+            for row in rows:
+                acc = item_totals[row.get("item_name") or ""]
+                acc[0] += int(row.get("quantity") or 0)
+                acc[1] += row.get("revenue") or Decimal("0")
         top_items = [
             {
-                "name": row.get("item_name") or "Uncategorized",
-                "quantity": int(row.get("quantity") or 0),
-                "revenue": _decimal_to_float(row.get("revenue")),
+                "name": name or "Uncategorized",
+                "quantity": qty,
+                "revenue": _decimal_to_float(revenue),
             }
-            for row in items
+            for name, (qty, revenue) in sorted(item_totals.items(), key=lambda kv: -kv[1][0])[:10]
         ]
 
         summary = {
@@ -299,25 +308,31 @@ def analytics_orders(request):
     start, end = _parse_range(range_param)
 
     try:
-        orders_qs = Order.objects.filter(created_at__gte=start, created_at__lte=end)
-        orders_by_day = (
-            orders_qs.annotate(day=TruncDay("created_at"))
-            .values("day")
-            .annotate(order_count=Count("id"), revenue=Sum("total_amount"))
-            .order_by("day")
-        )
+        by_day = defaultdict(lambda: [0, Decimal("0")])
+        status_breakdown = defaultdict(int)
+        for model in (Order, ArchivedOrder):
+            orders_qs = model.objects.filter(created_at__gte=start, created_at__lte=end)
+            orders_by_day = (
+                orders_qs.annotate(day=TruncDay("created_at"))
+                .values("day")
+                .annotate(order_count=Count("id"), revenue=Sum("total_amount"))
+            )
+            for row in orders_by_day:
+                if row.get("day"):
+                    acc = by_day[row["day"].date()]
+                    acc[0] += row.get("order_count", 0) or 0
+                    acc[1] += row.get("revenue") or Decimal("0")
+            for row in orders_qs.values("status").annotate(count=Count("id")):
+                status_breakdown[row["status"]] += row["count"]
         orders_vs_revenue = [
             {
-                "date": row["day"].date().isoformat() if row["day"] else None,
-                "orders": row.get("order_count", 0) or 0,
-                "revenue": _decimal_to_float(row.get("revenue")),
+                "date": day.isoformat(),
+                "orders": count,
+                "revenue": _decimal_to_float(revenue),
             }
-            for row in orders_by_day
-            if row.get("day")
+            for day, (count, revenue) in sorted(by_day.items())
         ]
-
-        status_rows = orders_qs.values("status").annotate(count=Count("id"))
-        status_breakdown = {row["status"]: row["count"] for row in status_rows}
+        status_breakdown = dict(status_breakdown)
 
         transactions = PaymentTransaction.objects.filter(
             created_at__gte=start,
@@ -521,8 +536,8 @@ def analytics_events(request):
 
     if request.method == "POST":
         try:
-            payload = json.loads(request.body or "{}")
-        except json.JSONDecodeError:
+            payload = _parse_json_body(request)
+        except ValueError:
             return JsonResponse({"success": False, "message": "Invalid JSON body"}, status=400)
 
         category = str(payload.get("category") or "general")[:64]
@@ -5,14 +5,13 @@ Rules:
 - Only Manager/Admin (attendance.manage / leave.manage) can create/update/delete.
 """
 
-import json
 from datetime import datetime, date, time
 from django.http import JsonResponse
 from django.views.decorators.http import require_http_methods
 from django.db import transaction
 from django.utils import timezone as dj_tz
 
-from .views_common import _actor_from_request, _has_permission
+from .views_common import _actor_from_request, _has_permission, _json_body
 
 
 def _parse_date(val):
@@ -94,10 +93,7 @@ def attendance(request):
         # POST (manager/admin)
         if not _has_permission(actor, "attendance.manage"):
             return JsonResponse({"success": False, "message": "Forbidden"}, status=403)
-        try:
-            payload = json.loads(request.body.decode("utf-8") or "{}")
-        except Exception:
-            payload = {}
+        payload = _json_body(request)
         emp_id = payload.get("employeeId")
         d = _parse_date(payload.get("date"))
         if not emp_id or not d:
@@ -132,10 +128,7 @@ def attendance_detail(request, rid):
         if request.method == "DELETE":
             rec.delete()
             return JsonResponse({"success": True})
-        try:
-            payload = json.loads(request.body.decode("utf-8") or "{}")
-        except Exception:
-            payload = {}
+        payload = _json_body(request)
         if "employeeId" in payload and payload["employeeId"]:
             e = Employee.objects.filter(id=payload["employeeId"]).first()
             if not e:
@@ -186,10 +179,7 @@ def leaves(request):
 
         # POST: allow staff/managers to request; managers/admins manage
         can_manage = _has_permission(actor, "leave.manage")
-        try:
-            payload = json.loads(request.body.decode("utf-8") or "{}")
-        except Exception:
-            payload = {}
+        payload = _json_body(request)
         emp_id = payload.get("employeeId")
         sd = _parse_date(payload.get("startDate"))
         ed = _parse_date(payload.get("endDate"))
@@ -252,10 +242,7 @@ def leave_detail(request, lid):
         if request.method == "DELETE":
             rec.delete()
             return JsonResponse({"success": True})
-        try:
-            payload = json.loads(request.body.decode("utf-8") or "{}")
-        except Exception:
-            payload = {}
+        payload = _json_body(request)
         if "employeeId" in payload and payload["employeeId"]:
             e = Employee.objects.filter(id=payload["employeeId"]).first()
             if not e:
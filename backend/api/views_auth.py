@@ -1,6 +1,5 @@
 """Auth-related views: login, signup, password, tokens, Google, email verify."""
 
-import json
 import uuid
 import os
 from django.http import JsonResponse
@@ -9,13 +8,13 @@ from django.conf import settings
 from django.db.utils import OperationalError, ProgrammingError
 from django.db import connection
 from django.utils import timezone as dj_timezone
-from django.contrib.auth.hashers import check_password
 import jwt
 import secrets
 import requests as _requests
 
 from .views_common import (
     rate_limit,
+    hashing_guard,
     _login_rate_key,
     _is_locked,
     _lockout_check_and_touch,
@@ -35,6 +34,7 @@ from .views_common import (
     _revoke_all_refresh_tokens_mem,
     _issue_verify_token_from_db,
     _issue_verify_token_from_dict,
+    _json_body,
 )
 from .utils_audit import record_audit
 from .utils_login_otp import (
@@ -43,6 +43,8 @@ from .utils_login_otp import (
     get_login_otp_ttl_seconds,
 )
 from .emails import email_user_login_otp
+from .utils_passwords import hash_password, verify_password, rehash_setter
+from .utils_jwt import decode_token
 
 
 @require_http_methods(["GET"]) 
@@ -115,12 +117,10 @@ def health_db(request):
 
 
 @rate_limit(limit=7, window_seconds=60, key_fn=_login_rate_key)
+@hashing_guard
 @require_http_methods(["POST"]) 
 def auth_login(request):
-    try:
-        data = json.loads(request.body.decode("utf-8") or "{}")
-    except Exception:
-        data = {}
+    data = _json_body(request)
     email = (data.get("email") or "").lower().strip()
     password = data.get("password") or ""
     remember_raw = data.get("remember")
@@ -179,11 +179,10 @@ def auth_login(request):
     user_exists = False
     try:
         from .models import AppUser
-        _maybe_seed_from_memory()
         db_user = AppUser.objects.filter(email=email).first()
         if db_user:
             user_exists = True
-        if db_user and db_user.password_hash and password and check_password(password, db_user.password_hash):
+        if db_user and db_user.password_hash and password and verify_password(password, db_user.password_hash, setter=rehash_setter(db_user)):
             status_l = (db_user.status or "").lower()
             safe_user = _safe_user_from_db(db_user)
             # Block deactivated accounts
@@ -396,10 +395,7 @@ def auth_login(request):
 @require_http_methods(["POST"]) 
 
 def auth_login_verify_otp(request):
-    try:
-        data = json.loads(request.body.decode("utf-8") or "{}")
-    except Exception:
-        data = {}
+    data = _json_body(request)
 
     email = (data.get("email") or "").lower().strip()
     otp_token = (data.get("otpToken") or data.get("otpId") or "").strip()
@@ -480,10 +476,7 @@ def auth_login_verify_otp(request):
 @rate_limit(limit=5, window_seconds=60, key_fn=_login_rate_key)
 @require_http_methods(["POST"]) 
 def auth_login_resend_otp(request):
-    try:
-        data = json.loads(request.body.decode("utf-8") or "{}")
-    except Exception:
-        data = {}
+    data = _json_body(request)
 
     email = (data.get("email") or "").lower().strip()
     otp_token = (data.get("otpToken") or data.get("otpId") or "").strip()
@@ -573,10 +566,7 @@ def auth_login_resend_otp(request):
 
 @require_http_methods(["POST"]) 
 def auth_logout(request):
-    try:
-        data = json.loads(request.body.decode("utf-8") or "{}")
-    except Exception:
-        data = {}
+    data = _json_body(request)
     rtoken = (data.get("refreshToken") or "").strip()
     if rtoken:
         _revoke_refresh_token(request, rtoken)
@@ -613,7 +603,7 @@ def auth_me(request):
         return JsonResponse({"success": False, "message": "Missing token"}, status=401)
     token = auth.split(" ", 1)[1].strip()
     try:
-        payload = jwt.decode(token, settings.JWT_SECRET, algorithms=[settings.JWT_ALGORITHM])
+        payload = decode_token(token)
     except jwt.ExpiredSignatureError:
         return JsonResponse({"success": False, "message": "Token expired"}, status=401)
     except Exception:
@@ -652,10 +642,7 @@ def auth_me(request):
 @rate_limit(limit=10, window_seconds=60)
 @require_http_methods(["POST"]) 
 def auth_google(request):
-    try:
-        data = json.loads(request.body.decode("utf-8") or "{}")
-    except Exception:
-        data = {}
+    data = _json_body(request)
 
     client_id = settings.GOOGLE_CLIENT_ID or os.getenv("GOOGLE_CLIENT_ID", "").strip()
     client_secret = settings.GOOGLE_CLIENT_SECRET or os.getenv("GOOGLE_CLIENT_SECRET", "").strip()
@@ -881,10 +868,7 @@ def verify_email(request):
     if request.method == "GET":
         token = request.GET.get("token") or ""
     else:
-        try:
-            data = json.loads(request.body.decode("utf-8") or "{}")
-        except Exception:
-            data = {}
+        data = _json_body(request)
         token = (data.get("token") or "").strip()
     if not token:
         return JsonResponse({"success": False, "message": "Missing token"}, status=400)
@@ -916,10 +900,7 @@ from .views_common import rate_limit
 @rate_limit(limit=5, window_seconds=60, key_fn=_email_rate_key)
 @require_http_methods(["POST"]) 
 def resend_verification(request):
-    try:
-        data = json.loads(request.body.decode("utf-8") or "{}")
-    except Exception:
-        data = {}
+    data = _json_body(request)
     email = (data.get("email") or "").lower().strip()
     if email:
         try:
@@ -946,17 +927,14 @@ def resend_verification(request):
     return resp
 
 from django.db import transaction
-from django.contrib.auth.hashers import make_password
 from .views_common import _issue_emailverify_token_from_db, _issue_emailverify_token_from_dict, _now_iso
 from .emails import email_user_email_verification
 
 @rate_limit(limit=3, window_seconds=60)
+@hashing_guard
 @require_http_methods(["POST"]) 
 def auth_register(request):
-    try:
-        data = json.loads(request.body.decode("utf-8") or "{}")
-    except Exception:
-        data = {}
+    data = _json_body(request)
 
     name = (data.get("name") or "").strip() or (data.get("firstName", "").strip() + " " + data.get("lastName", "").strip()).strip() or "New User"
     email = (data.get("email") or "").lower().strip()
@@ -980,6 +958,8 @@ def auth_register(request):
         _maybe_seed_from_memory()
         db_user = AppUser.objects.filter(email=email).first()
         if not db_user:
+            # Hash before opening the transaction so no row locks are held meanwhile
+            password_hash = hash_password(password) if password else ""
             with transaction.atomic():
                 db_user = AppUser.objects.create(
                     email=email,
@@ -987,7 +967,7 @@ def auth_register(request):
                     role=role,
                     status="pending",
                     permissions=[],
-                    password_hash=make_password(password) if password else "",
+                    password_hash=password_hash,
                     email_verified=False,
                     phone=phone,
                 )
@@ -1049,10 +1029,7 @@ from .emails import email_user_password_reset
 @rate_limit(limit=5, window_seconds=60, key_fn=_email_rate_key)
 @require_http_methods(["POST"]) 
 def forgot_password(request):
-    try:
-        data = json.loads(request.body.decode("utf-8") or "{}")
-    except Exception:
-        data = {}
+    data = _json_body(request)
     email = (data.get("email") or "").lower().strip()
 
     debug_link = None
@@ -1109,13 +1086,36 @@ def forgot_password(request):
     return resp
 
 
+def _commit_password_reset(user, reset_token_id, new_password) -> bool:
+    """Hash first, then spend the reset token and store the hash in one transaction.
+
+    Hashing can wait for a slot and fail with PasswordHashingBusy (503); doing
+    it before the token is touched means a busy server never burns the link.
+    The token row is locked and re-checked, so two concurrent submissions
+    cannot both use it. Returns False when the token is no longer usable.
+    """
+    from .models import ResetToken
+    from .views_common import _revoke_all_refresh_tokens
+
+    encoded = hash_password(new_password)
+    with transaction.atomic():
+        if reset_token_id:
+            rt = ResetToken.objects.select_for_update().filter(id=reset_token_id).first()
+            if not rt or not rt.is_active:
+                return False
+            rt.used_at = dj_timezone.now()
+            rt.save(update_fields=["used_at"])
+        user.password_hash = encoded
+        user.save(update_fields=["password_hash"])
+        _revoke_all_refresh_tokens(user)
+    return True
+
+
 @rate_limit(limit=5, window_seconds=60)
+@hashing_guard
 @require_http_methods(["POST"]) 
 def reset_password(request):
-    try:
-        data = json.loads(request.body.decode("utf-8") or "{}")
-    except Exception:
-        data = {}
+    data = _json_body(request)
     token = (data.get("token") or "").strip()
     new_password = data.get("newPassword") or data.get("password") or ""
     if not token:
@@ -1123,43 +1123,31 @@ def reset_password(request):
     if not new_password or len(new_password) < 8:
         return JsonResponse({"success": False, "message": "Password must be at least 8 characters"}, status=400)
 
-    from .views_common import _decode_pwdcommit_token, _decode_pwdreset_token, _revoke_all_refresh_tokens, _revoke_all_refresh_tokens_mem
+    from .views_common import _decode_pwdcommit_token, _decode_pwdreset_token, _revoke_all_refresh_tokens_mem
     payload_commit = _decode_pwdcommit_token(token)
     if payload_commit:
         email = (payload_commit.get("email") or "").lower().strip()
         rid = (payload_commit.get("rid") or "").strip()
         try:
-            from .models import AppUser, ResetToken
+            from .models import AppUser
             u = AppUser.objects.filter(email=email).first()
             if not u:
                 return JsonResponse({"success": False, "message": "Invalid token"}, status=400)
-            if rid:
-                rt = ResetToken.objects.filter(id=rid).first()
-                if rt and rt.is_active:
-                    rt.used_at = dj_timezone.now()
-                    rt.save(update_fields=["used_at"])
-            from django.contrib.auth.hashers import make_password
-            u.password_hash = make_password(new_password)
-            u.save(update_fields=["password_hash"])
-            _revoke_all_refresh_tokens(u)
+            if not _commit_password_reset(u, rid, new_password):
+                return JsonResponse({"success": False, "message": "Invalid or expired token"}, status=400)
             return JsonResponse({"success": True, "message": "Password reset successful"})
         except (OperationalError, ProgrammingError):
             pass
 
     try:
-        from .models import AppUser, ResetToken
+        from .models import ResetToken
         raw = token
         rhash = hashlib.sha256(raw.encode("utf-8")).hexdigest()
         rt = ResetToken.objects.select_related("user").filter(token_hash=rhash).first()
         if not rt or not rt.is_active:
             raise OperationalError("not found")
-        u = rt.user
-        from django.contrib.auth.hashers import make_password
-        u.password_hash = make_password(new_password)
-        u.save(update_fields=["password_hash"])
-        rt.used_at = dj_timezone.now()
-        rt.save(update_fields=["used_at"])
-        _revoke_all_refresh_tokens(u)
+        if not _commit_password_reset(rt.user, rt.id, new_password):
+            return JsonResponse({"success": False, "message": "Invalid or expired token"}, status=400)
         return JsonResponse({"success": True, "message": "Password reset successful"})
     except (OperationalError, ProgrammingError):
         pass
@@ -1182,12 +1170,10 @@ def reset_password(request):
 
 
 @rate_limit(limit=5, window_seconds=60, key_fn=_email_rate_key)
+@hashing_guard
 @require_http_methods(["POST"]) 
 def reset_password_code(request):
-    try:
-        data = json.loads(request.body.decode("utf-8") or "{}")
-    except Exception:
-        data = {}
+    data = _json_body(request)
     email = (data.get("email") or "").lower().strip()
     code = (data.get("code") or "").strip()
     new_password = data.get("newPassword") or data.get("password") or ""
@@ -1209,13 +1195,8 @@ def reset_password_code(request):
                 break
         if not ok:
             return JsonResponse({"success": False, "message": "Invalid or expired code"}, status=400)
-        from django.contrib.auth.hashers import make_password
-        u.password_hash = make_password(new_password)
-        u.save(update_fields=["password_hash"])
-        ok.used_at = dj_timezone.now()
-        ok.save(update_fields=["used_at"])
-        from .views_common import _revoke_all_refresh_tokens
-        _revoke_all_refresh_tokens(u)
+        if not _commit_password_reset(u, ok.id, new_password):
+            return JsonResponse({"success": False, "message": "Invalid or expired code"}, status=400)
         return JsonResponse({"success": True, "message": "Password reset successful"})
     except (OperationalError, ProgrammingError):
         return JsonResponse({"success": False, "message": "Invalid or expired code"}, status=400)
@@ -1224,10 +1205,7 @@ def reset_password_code(request):
 @rate_limit(limit=5, window_seconds=60, key_fn=_email_rate_key)
 @require_http_methods(["POST"]) 
 def verify_reset_code(request):
-    try:
-        data = json.loads(request.body.decode("utf-8") or "{}")
-    except Exception:
-        data = {}
+    data = _json_body(request)
     email = (data.get("email") or "").lower().strip()
     code = (data.get("code") or "").strip()
     if not email or not code:
@@ -1257,10 +1235,7 @@ def verify_reset_code(request):
 
 @require_http_methods(["POST"]) 
 def refresh_token(request):
-    try:
-        data = json.loads(request.body.decode("utf-8") or "{}")
-    except Exception:
-        data = {}
+    data = _json_body(request)
     rtoken = (data.get("refreshToken") or "").strip()
     if not rtoken:
         return JsonResponse({"success": False, "message": "Missing refresh token"}, status=400)
@@ -1327,6 +1302,7 @@ def refresh_token(request):
     return JsonResponse({"success": True, "token": out["token"], "refreshToken": out["refreshToken"]})
 
 
+@hashing_guard
 @require_http_methods(["POST"]) 
 def change_password(request):
     auth = request.META.get("HTTP_AUTHORIZATION", "")
@@ -1334,14 +1310,11 @@ def change_password(request):
         return JsonResponse({"success": False, "message": "Unauthorized"}, status=401)
     token = auth.split(" ", 1)[1].strip()
     try:
-        payload = jwt.decode(token, settings.JWT_SECRET, algorithms=[settings.JWT_ALGORITHM])
+        payload = decode_token(token)
     except Exception:
         return JsonResponse({"success": False, "message": "Unauthorized"}, status=401)
 
-    try:
-        data = json.loads(request.body.decode("utf-8") or "{}")
-    except Exception:
-        data = {}
+    data = _json_body(request)
     current = data.get("currentPassword") or data.get("current") or ""
     new = data.get("newPassword") or data.get("password") or ""
     if not new or len(new) < 8:
@@ -1359,10 +1332,9 @@ def change_password(request):
             u = AppUser.objects.filter(email=email).first()
         if not u:
             raise OperationalError("not found")
-        if not u.password_hash or not current or not check_password(current, u.password_hash):
+        if not u.password_hash or not current or not verify_password(current, u.password_hash):
             return JsonResponse({"success": False, "message": "Invalid current password"}, status=400)
-        from django.contrib.auth.hashers import make_password
-        u.password_hash = make_password(new)
+        u.password_hash = hash_password(new)
         u.save(update_fields=["password_hash"])
         try:
             record_audit(
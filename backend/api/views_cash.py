@@ -6,13 +6,12 @@ Permissions:
 
 from __future__ import annotations
 
-import json
 from decimal import Decimal
 from django.http import JsonResponse
 from django.views.decorators.http import require_http_methods
 from django.utils import timezone as dj_tz
 
-from .views_common import _actor_from_request, _has_permission, rate_limit
+from .views_common import _actor_from_request, _has_permission, rate_limit, _json_body
 
 
 def _safe_session(s, total_cash=None):
@@ -43,10 +42,7 @@ def cash_open(request):
         open_sess = CashSession.objects.filter(status=CashSession.STATUS_OPEN).first()
         if open_sess:
             return JsonResponse({"success": True, "data": _safe_session(open_sess)})
-        try:
-            data = json.loads(request.body.decode("utf-8") or "{}")
-        except Exception:
-            data = {}
+        data = _json_body(request)
         opening = Decimal(str(data.get("openingFloat") or 0))
         s = CashSession.objects.create(opened_by=actor if hasattr(actor, "id") else None, opening_float=opening)
         return JsonResponse({"success": True, "data": _safe_session(s)})
@@ -92,10 +88,7 @@ def cash_move(request):
         s = CashSession.objects.filter(status=CashSession.STATUS_OPEN).first()
         if not s:
             return JsonResponse({"success": False, "message": "No open session"}, status=400)
-        try:
-            data = json.loads(request.body.decode("utf-8") or "{}")
-        except Exception:
-            data = {}
+        data = _json_body(request)
         type_v = (data.get("type") or "").lower()  # cash_in | cash_out
         if type_v not in {CashEntry.TYPE_IN, CashEntry.TYPE_OUT}:
             return JsonResponse({"success": False, "message": "Invalid type"}, status=400)
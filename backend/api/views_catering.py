@@ -2,7 +2,6 @@
 
 from __future__ import annotations
 
-import json
 from datetime import date, datetime, time
 from decimal import Decimal, InvalidOperation
 
@@ -13,7 +12,7 @@ from django.utils import timezone as dj_timezone
 from django.views.decorators.http import require_http_methods
 
 from .models import CateringEvent, MenuItem
-from .views_common import _actor_from_request, _has_permission, rate_limit
+from .views_common import _actor_from_request, _has_permission, rate_limit, _json_body, _parse_json_body
 
 DECIMAL_ZERO = Decimal("0")
 TWO_PLACES = Decimal("0.01")
@@ -235,10 +234,7 @@ def catering_events(request):
     elif request.method == "POST":
         if not _has_permission(actor, "catering.events.create"):
             return JsonResponse({"success": False, "message": "Forbidden"}, status=403)
-        try:
-            data = json.loads(request.body.decode("utf-8"))
-        except Exception:
-            data = {}
+        data = _json_body(request)
 
         try:
             event = CateringEvent(
@@ -291,10 +287,7 @@ def catering_event_detail(request, event_id):
     elif request.method in ("PUT", "PATCH"):
         if not _has_permission(actor, "catering.events.edit"):
             return JsonResponse({"success": False, "message": "Forbidden"}, status=403)
-        try:
-            data = json.loads(request.body.decode("utf-8"))
-        except Exception:
-            data = {}
+        data = _json_body(request)
 
         # Update fields
         event.name = data.get("name", event.name)
@@ -343,7 +336,7 @@ def catering_event_menu(request, event_id):
         return JsonResponse({"success": False, "message": "Forbidden"}, status=403)
 
     try:
-        data = json.loads(request.body.decode("utf-8"))
+        data = _parse_json_body(request)
         items = data.get("menuItems", [])
         sanitized_items, total = _sanitize_menu_items(items)
         menu_ids = [MenuItem.objects.get(id=item["menuItemId"]) for item in sanitized_items if item.get("menuItemId")]
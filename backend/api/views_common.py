@@ -1,8 +1,11 @@
 import json
+import math
 import os
 import uuid
 import time
 import functools
+import threading
+import zlib
 from datetime import datetime, timezone, timedelta
 from django.http import JsonResponse
 from django.conf import settings
@@ -14,12 +17,116 @@ import re
 import hashlib
 import secrets
 
+from .utils_permissions import PERMISSIONS, ALL_BIT
+from .utils_ratelimit import get_rate_limit_backend
+from .utils_lockout import get_lockout_store
+from .utils_passwords import PasswordHashingBusy
+from .utils_principal import PRINCIPAL_CACHE, principal_fields, user_from_fields
+from .utils_jwt import decode_token, jwt_verifying_key, purge_subject
+
+try:  # optional fast JSON parser
+    import orjson as _orjson
+except Exception:  # pragma: no cover - orjson not installed
+    _orjson = None
+
 # -----------------------------
-# Rate limit and lockout helpers
+# Request body helpers
 # -----------------------------
 
-_RATE_BUCKETS = {}
-FAILED_LOGIN_TRACK = {}
+_JSON_BODY_ATTR = "_json_body_cache"
+
+
+class RequestBodyTooLarge(Exception):
+    """Request body exceeds settings.JSON_BODY_MAX_BYTES (answered with 413)."""
+
+    def __init__(self, size: int, limit: int):
+        super().__init__(f"request body of {size} bytes exceeds {limit}")
+        self.size = size
+        self.limit = limit
+
+
+def _json_body_limit() -> int:
+    return int(getattr(settings, "JSON_BODY_MAX_BYTES", 2621440) or 0)
+
+
+def _check_body_size(request):
+    """Raise RequestBodyTooLarge from Content-Length, before the body is read."""
+    limit = _json_body_limit()
+    if limit <= 0:
+        return
+    try:
+        size = int(request.META.get("CONTENT_LENGTH") or 0)
+    except (TypeError, ValueError):
+        size = 0
+    if size > limit:
+        raise RequestBodyTooLarge(size, limit)
+
+
+def _gunzip(raw: bytes, limit: int) -> bytes:
+    """Inflate a gzip body, stopping as soon as it exceeds `limit` bytes."""
+    inflater = zlib.decompressobj(16 + zlib.MAX_WBITS)
+    try:
+        out = inflater.decompress(raw, limit + 1 if limit > 0 else 0)
+    except zlib.error as e:
+        raise ValueError(f"invalid gzip body: {e}")
+    if limit > 0 and (len(out) > limit or inflater.unconsumed_tail):
+        raise RequestBodyTooLarge(max(len(out), limit + 1), limit)
+    return out
+
+
+def _parse_json_body(request):
+    """Parse the JSON request body once per request.
+
+    Returns the decoded value ({} for an empty body) and memoizes it, so the
+    rate-limit key functions and the view share one parse. Raises ValueError
+    on malformed JSON and RequestBodyTooLarge above JSON_BODY_MAX_BYTES.
+    `Content-Encoding: gzip` bodies are inflated first (the limit applies to
+    the inflated size). Uses orjson when installed.
+    """
+    cached = getattr(request, _JSON_BODY_ATTR, None)
+    if cached is not None:
+        data, error = cached
+        if error is not None:
+            raise error
+        return data
+    data, error = None, None
+    try:
+        _check_body_size(request)
+        raw = request.body or b""
+        limit = _json_body_limit()
+        if limit > 0 and len(raw) > limit:
+            raise RequestBodyTooLarge(len(raw), limit)
+        if (request.META.get("HTTP_CONTENT_ENCODING") or "").strip().lower() == "gzip":
+            raw = _gunzip(raw, limit)
+        if not raw.strip():
+            data = {}
+        elif _orjson is not None:
+            data = _orjson.loads(raw)
+        else:
+            data = json.loads(raw.decode("utf-8"))
+    except (ValueError, RequestBodyTooLarge) as e:
+        error = e
+    setattr(request, _JSON_BODY_ATTR, (data, error))
+    if error is not None:
+        raise error
+    return data
+
+
+def _json_body(request):
+    """Lenient variant of _parse_json_body: {} for invalid or non-object JSON.
+
+    Oversized bodies still raise RequestBodyTooLarge.
+    """
+    try:
+        data = _parse_json_body(request)
+    except ValueError:
+        return {}
+    return data if isinstance(data, dict) else {}
+
+
+# -----------------------------
+# Rate limit and lockout helpers
+# -----------------------------
 
 
 def _client_ip(request):
@@ -30,77 +137,40 @@ def _client_ip(request):
 
 
 def _login_rate_key(request):
-    try:
-        data = json.loads(request.body.decode("utf-8") or "{}")
-    except Exception:
-        data = {}
-    email = (data.get("email") or "").lower().strip()
+    email = str(_json_body(request).get("email") or "").lower().strip()
     return f"{_client_ip(request)}:{email}"
 
 
 def _email_rate_key(request):
-    try:
-        data = json.loads(request.body.decode("utf-8") or "{}")
-    except Exception:
-        data = {}
-    email = (data.get("email") or "").lower().strip()
+    email = str(_json_body(request).get("email") or "").lower().strip()
     return f"{_client_ip(request)}:{email}"
 
 
 def _lockout_check_and_touch(email: str, ip: str, success: bool):
-    now = int(time.time())
-    key = (email or "", ip or "")
-    rec = FAILED_LOGIN_TRACK.get(key)
-    window = 10 * 60
-    lock_seconds = 10 * 60
-    threshold = 5
-
-    if rec and rec.get("locked_until", 0) > now:
-        return True, int(rec["locked_until"] - now)
-
-    if success:
-        if rec:
-            FAILED_LOGIN_TRACK.pop(key, None)
-        return False, 0
-
-    if not rec or now - rec.get("first", now) > window:
-        FAILED_LOGIN_TRACK[key] = {"first": now, "fail": 1, "locked_until": 0}
-        return False, 0
-    rec["fail"] = int(rec.get("fail", 0)) + 1
-    if rec["fail"] >= threshold:
-        rec["locked_until"] = now + lock_seconds
-        return True, lock_seconds
-    return False, 0
+    return get_lockout_store().touch(email, ip, success)
 
 
 def _is_locked(email: str, ip: str):
-    now = int(time.time())
-    key = (email or "", ip or "")
-    rec = FAILED_LOGIN_TRACK.get(key)
-    if rec and rec.get("locked_until", 0) > now:
-        return True, int(rec["locked_until"] - now)
-    return False, 0
+    return get_lockout_store().is_locked(email, ip)
 
 
 def rate_limit(limit=10, window_seconds=60, key_fn=None):
+    """Throttle a view to `limit` requests per `window_seconds` per key.
+
+    State lives in the configured backend (settings.RATE_LIMIT_BACKEND, see
+    utils_ratelimit); the default is a bounded in-process GCRA store.
+    """
     def decorator(view_func):
         @functools.wraps(view_func)
         def _wrapped(request, *args, **kwargs):
-            now = time.time()
             key_base = key_fn(request) if key_fn else _client_ip(request)
             bucket_key = f"{key_base}:{request.path}:{request.method}:{window_seconds}:{limit}"
-            bucket = _RATE_BUCKETS.get(bucket_key, [])
-            threshold = now - window_seconds
-            bucket = [t for t in bucket if t > threshold]
-            if len(bucket) >= limit:
-                oldest = min(bucket)
-                retry_after = max(1, int(window_seconds - (now - oldest)))
+            allowed, retry_after = get_rate_limit_backend().hit(bucket_key, limit, window_seconds)
+            if not allowed:
                 resp = JsonResponse({"success": False, "message": "Too many requests, slow down."})
                 resp.status_code = 429
-                resp["Retry-After"] = str(retry_after)
+                resp["Retry-After"] = str(max(1, int(math.ceil(retry_after))))
                 return resp
-            bucket.append(now)
-            _RATE_BUCKETS[bucket_key] = bucket
             return view_func(request, *args, **kwargs)
 
         return _wrapped
@@ -108,6 +178,22 @@ def rate_limit(limit=10, window_seconds=60, key_fn=None):
     return decorator
 
 
+def hashing_guard(view_func):
+    """Answer 503 + Retry-After when the password hashing pool is saturated."""
+
+    @functools.wraps(view_func)
+    def _wrapped(request, *args, **kwargs):
+        try:
+            return view_func(request, *args, **kwargs)
+        except PasswordHashingBusy as e:
+            resp = JsonResponse({"success": False, "message": "Server is busy, please try again shortly."})
+            resp.status_code = 503
+            resp["Retry-After"] = str(e.retry_after)
+            return resp
+
+    return _wrapped
+
+
 # -----------------------------
 # Small utils and in-memory stores
 # -----------------------------
@@ -154,14 +240,32 @@ def _safe_user_from_db(db_user):
     }
 
 
+# Process-wide latch: the in-memory seed check runs at most once per worker
+_SEED_LOCK = threading.Lock()
+_SEED_STATE = {"done": False}
+
+
 def _maybe_seed_from_memory():
+    if _SEED_STATE["done"]:
+        return
+    with _SEED_LOCK:
+        if _SEED_STATE["done"]:
+            return
+        _seed_from_memory_once()
+
+
+def _seed_from_memory_once():
     try:
         from django.conf import settings as dj_settings
         # Do not auto-seed from in-memory fixtures when fallbacks are disabled (prod/staging)
         if getattr(dj_settings, "DISABLE_INMEM_FALLBACK", False):
+            _SEED_STATE["done"] = True
             return
         from .models import AppUser
-        if AppUser.objects.count() == 0 and USERS:
+        has_users = AppUser.objects.exists()
+        # Latch once the table is reachable; an unmigrated DB is retried later
+        _SEED_STATE["done"] = True
+        if not has_users and USERS:
             for u in USERS:
                 try:
                     from django.contrib.auth.hashers import make_password
@@ -278,30 +382,122 @@ DEFAULT_ROLE_PERMISSIONS = {
 }
 
 
+# Role defaults compiled once into bitmasks (see utils_permissions)
+ROLE_PERMISSION_MASKS = {
+    role: PERMISSIONS.mask(codes) for role, codes in DEFAULT_ROLE_PERMISSIONS.items()
+}
+
+
 def _effective_permissions_from_role(role: str):
     role_l = (role or "").lower()
     return set(DEFAULT_ROLE_PERMISSIONS.get(role_l, set()))
 
 
-def _effective_permissions(user_or_dict):
-    try:
-        # DB model
-        role = (getattr(user_or_dict, "role", "") or "").lower()
-        explicit = set(getattr(user_or_dict, "permissions", []) or [])
-    except Exception:
-        # Dict-like
+def _permission_mask(user_or_dict) -> int:
+    """Compiled permission mask for a user (AppUser or USERS dict).
+
+    Admins and explicit "all" grants collapse to the wildcard bit. For model
+    instances the mask is memoized on the object, so repeated checks within a
+    request cost a single AND each.
+    """
+    cached = getattr(user_or_dict, "_permission_mask_cache", None)
+    if cached is not None:
+        return cached
+    if isinstance(user_or_dict, dict):
         role = (user_or_dict.get("role") or "").lower()
-        explicit = set(user_or_dict.get("permissions") or [])
-    # Admin wildcard
-    if role == "admin" or "all" in explicit:
-        return {"all"}
-    # Union of defaults and explicit grants
-    return _effective_permissions_from_role(role) | explicit
+        explicit = user_or_dict.get("permissions") or []
+    else:
+        role = (getattr(user_or_dict, "role", "") or "").lower()
+        explicit = getattr(user_or_dict, "permissions", []) or []
+    explicit_mask = PERMISSIONS.mask(explicit)
+    if role == "admin" or explicit_mask & ALL_BIT:
+        mask = ALL_BIT
+    else:
+        # Union of defaults and explicit grants
+        mask = ROLE_PERMISSION_MASKS.get(role, 0) | explicit_mask
+    if not isinstance(user_or_dict, dict):
+        try:
+            user_or_dict._permission_mask_cache = mask
+        except Exception:
+            pass
+    return mask
+
+
+def _effective_permissions(user_or_dict):
+    return PERMISSIONS.codes(_permission_mask(user_or_dict))
 
 
 def _has_permission(user_or_dict, perm_code: str) -> bool:
-    perms = _effective_permissions(user_or_dict)
-    return "all" in perms or perm_code in perms
+    return PERMISSIONS.has(_permission_mask(user_or_dict), perm_code)
+
+
+# -----------------------------
+# Request-scoped principal
+# -----------------------------
+
+_UNRESOLVED = object()
+
+
+def _jwt_payload_from_request(request):
+    """Decode the bearer JWT once per request.
+
+    The payload (or None when missing/invalid) is memoized on the request so
+    the gate middleware and the views share a single verification.
+    """
+    cached = getattr(request, "_jwt_payload", _UNRESOLVED)
+    if cached is not _UNRESOLVED:
+        return cached
+    payload = None
+    auth = request.META.get("HTTP_AUTHORIZATION", "")
+    if auth.startswith("Bearer "):
+        token = auth.split(" ", 1)[1].strip()
+        if token:
+            try:
+                payload = decode_token(token)
+            except Exception:
+                payload = None
+            # Feed tokens travel in URLs; they never stand in for a session token
+            if payload and payload.get("typ") == ORDER_FEED_TOKEN_TYP:
+                payload = None
+    elif request.path == ORDER_FEED_PATH:
+        # EventSource cannot send headers, so the feed takes a short-lived token
+        payload = _decode_order_feed_token(request.GET.get("access_token") or "")
+    request._jwt_payload = payload
+    return payload
+
+
+def _principal_from_request(request):
+    """Return the AppUser behind the bearer JWT, resolved once per request.
+
+    Looks up by `sub` first and falls back to the `email` claim. The result is
+    attached as `request.principal` (None when unauthenticated or not found).
+    """
+    cached = getattr(request, "principal", _UNRESOLVED)
+    if cached is not _UNRESOLVED:
+        return cached
+    user = None
+    payload = _jwt_payload_from_request(request)
+    if payload:
+        sub = str(payload.get("sub") or "")
+        email = (payload.get("email") or "").lower().strip()
+        hit = PRINCIPAL_CACHE.get(sub)
+        if hit is not None:
+            fields, mask = hit
+            user = user_from_fields(fields)
+            user._permission_mask_cache = mask
+        else:
+            try:
+                from .models import AppUser
+                if sub:
+                    user = AppUser.objects.filter(id=sub).first()
+                if not user and email:
+                    user = AppUser.objects.filter(email=email).first()
+            except Exception:
+                user = None
+            if user is not None and sub == str(user.id):
+                PRINCIPAL_CACHE.put(sub, principal_fields(user), _permission_mask(user))
+    request.principal = user
+    return user
 
 
 def _actor_from_request(request):
@@ -310,30 +506,16 @@ def _actor_from_request(request):
     Returns (actor, error_response) where actor is either AppUser instance or a
     dict from USERS fallback. If not authorized/invalid, returns (None, JsonResponse).
     """
-    auth = request.META.get("HTTP_AUTHORIZATION", "")
-    if not auth.startswith("Bearer "):
-        return None, JsonResponse({"success": False, "message": "Unauthorized"}, status=401)
-    token = auth.split(" ", 1)[1].strip()
-    try:
-        payload = jwt.decode(token, settings.JWT_SECRET, algorithms=[settings.JWT_ALGORITHM])
-    except Exception:
+    payload = _jwt_payload_from_request(request)
+    if not payload:
         return None, JsonResponse({"success": False, "message": "Unauthorized"}, status=401)
 
     email = (payload.get("email") or "").lower().strip()
     sub = str(payload.get("sub") or "")
-    # Try DB
-    try:
-        from .models import AppUser
-        _maybe_seed_from_memory()
-        actor = None
-        if sub:
-            actor = AppUser.objects.filter(id=sub).first()
-        if not actor and email:
-            actor = AppUser.objects.filter(email=email).first()
-        if actor:
-            return actor, None
-    except Exception:
-        pass
+    # Try DB (shared with the gate middleware via request.principal)
+    actor = _principal_from_request(request)
+    if actor:
+        return actor, None
     # Fallback to in-memory USERS
     if email:
         actor = next((u for u in USERS if (u.get("email") or "").lower() == email), None)
@@ -422,7 +604,7 @@ def _issue_emailverify_token_from_dict(user_dict):
 
 def _decode_emailverify_token(token: str):
     try:
-        payload = jwt.decode(token, settings.JWT_SECRET, algorithms=[settings.JWT_ALGORITHM])
+        payload = jwt.decode(token, jwt_verifying_key(), algorithms=[settings.JWT_ALGORITHM])
         if payload.get("typ") != "emailverify":
             return None
         return payload
@@ -446,7 +628,7 @@ def _issue_pwdreset_token_from_dict(user_dict):
 
 def _decode_pwdreset_token(token: str):
     try:
-        payload = jwt.decode(token, settings.JWT_SECRET, algorithms=[settings.JWT_ALGORITHM])
+        payload = jwt.decode(token, jwt_verifying_key(), algorithms=[settings.JWT_ALGORITHM])
         if payload.get("typ") != "pwdreset":
             return None
         return payload
@@ -463,7 +645,7 @@ def _issue_pwdcommit_token_from_db(db_user, reset_token_id: str, ttl_seconds: in
 
 def _decode_pwdcommit_token(token: str):
     try:
-        payload = jwt.decode(token, settings.JWT_SECRET, algorithms=[settings.JWT_ALGORITHM])
+        payload = jwt.decode(token, jwt_verifying_key(), algorithms=[settings.JWT_ALGORITHM])
         if payload.get("typ") != "pwdcommit":
             return None
         return payload
@@ -471,9 +653,35 @@ def _decode_pwdcommit_token(token: str):
         return None
 
 
+ORDER_FEED_PATH = "/api/orders/feed"
+ORDER_FEED_TOKEN_TYP = "orderfeed"
+
+
+def _issue_order_feed_token(actor, ttl_seconds: int = 60):
+    now = int(time.time())
+    if isinstance(actor, dict):
+        sub, email = actor.get("id"), actor.get("email")
+    else:
+        sub, email = actor.id, actor.email
+    payload = {"typ": ORDER_FEED_TOKEN_TYP, "sub": str(sub), "email": email, "iat": now, "exp": now + int(ttl_seconds)}
+    return jwt.encode(payload, settings.JWT_SECRET, algorithm=settings.JWT_ALGORITHM)
+
+
+def _decode_order_feed_token(token: str):
+    if not token:
+        return None
+    try:
+        payload = jwt.decode(token, jwt_verifying_key(), algorithms=[settings.JWT_ALGORITHM])
+        if payload.get("typ") != ORDER_FEED_TOKEN_TYP:
+            return None
+        return payload
+    except Exception:
+        return None
+
+
 def _decode_verify_token(token: str):
     try:
-        payload = jwt.decode(token, settings.JWT_SECRET, algorithms=[settings.JWT_ALGORITHM])
+        payload = jwt.decode(token, jwt_verifying_key(), algorithms=[settings.JWT_ALGORITHM])
         if payload.get("typ") != "verify":
             return None
         return payload
@@ -485,7 +693,7 @@ def _decode_verify_token_ignore_exp(token: str):
     try:
         payload = jwt.decode(
             token,
-            settings.JWT_SECRET,
+            jwt_verifying_key(),
             algorithms=[settings.JWT_ALGORITHM],
             options={"verify_exp": False},
         )
@@ -603,6 +811,7 @@ def _revoke_all_refresh_tokens(db_user):
         RefreshToken.objects.filter(user=db_user, revoked_at__isnull=True).update(revoked_at=dj_timezone.now())
     except Exception:
         pass
+    purge_subject(getattr(db_user, "id", None))
     try:
         sub = str(getattr(db_user, "id", ""))
         email = (getattr(db_user, "email", "") or "").lower().strip()
@@ -616,6 +825,7 @@ def _revoke_all_refresh_tokens(db_user):
 
 
 def _revoke_all_refresh_tokens_mem(user_dict):
+    purge_subject(user_dict.get("id"))
     try:
         sub = str(user_dict.get("id") or "")
         email = (user_dict.get("email") or "").lower().strip()
@@ -2,7 +2,7 @@ from __future__ import annotations
 
 from django.http import JsonResponse, HttpResponse
 from django.views.decorators.http import require_http_methods
-from .views_common import _actor_from_request
+from .views_common import _actor_from_request, _require_admin_or_manager
 from django.utils import timezone as dj_tz
 from django.core.files.storage import default_storage
 
@@ -97,4 +97,17 @@ def diag_receipt(request):
     return resp
 
 
-__all__ = ["diag_ping", "diag_cash_drawer", "diag_receipt", "diag_media"]
+@require_http_methods(["GET"])  # /diagnostics/lockout
+def diag_lockout(request):
+    """Login lockout counters for monitoring (admin/manager only)."""
+    actor, err = _actor_from_request(request)
+    if not actor:
+        return err
+    if not _require_admin_or_manager(actor):
+        return JsonResponse({"success": False, "message": "Forbidden"}, status=403)
+    from .utils_lockout import get_lockout_store
+    store = get_lockout_store()
+    return JsonResponse({"success": True, "backend": type(store).__name__, "data": store.stats()})
+
+
+__all__ = ["diag_ping", "diag_cash_drawer", "diag_receipt", "diag_media", "diag_lockout"]
@@ -4,13 +4,12 @@ Follows project conventions: JWT auth via Authorization Bearer, role/permission
 checks via helpers in views_common, and JSON responses with { success, data }.
 """
 
-import json
 from datetime import time
 from django.http import JsonResponse
 from django.views.decorators.http import require_http_methods
 from django.db import transaction
 
-from .views_common import _actor_from_request, _has_permission, _paginate
+from .views_common import _actor_from_request, _has_permission, _paginate, _json_body
 
 
 DAYS = [
@@ -159,10 +158,7 @@ def employees(request):
     role_l = getattr(actor, "role", "").lower()
     if not (_has_permission(actor, "employees.manage") or role_l in {"admin", "manager"}):
         return JsonResponse({"success": False, "message": "Forbidden"}, status=403)
-    try:
-        payload = json.loads(request.body.decode("utf-8") or "{}")
-    except Exception:
-        payload = {}
+    payload = _json_body(request)
     name = (payload.get("name") or "").strip()
     if not name:
         return JsonResponse({"success": False, "message": "Name is required"}, status=400)
@@ -222,10 +218,7 @@ def employee_detail(request, emp_id):
             emp.delete()
             return JsonResponse({"success": True})
 
-        try:
-            payload = json.loads(request.body.decode("utf-8") or "{}")
-        except Exception:
-            payload = {}
+        payload = _json_body(request)
         changed = False
         if "name" in payload and payload["name"] is not None:
             emp.name = str(payload["name"]).strip(); changed = True
@@ -327,10 +320,7 @@ def schedule(request):
             return JsonResponse({"success": True, "data": items})
 
         # POST create
-        try:
-            payload = json.loads(request.body.decode("utf-8") or "{}")
-        except Exception:
-            payload = {}
+        payload = _json_body(request)
         emp_id = payload.get("employeeId") or payload.get("employee")
         day = payload.get("day")
         st = _parse_time(payload.get("startTime"))
@@ -369,10 +359,7 @@ def schedule_detail(request, sid):
         if request.method == "DELETE":
             s.delete()
             return JsonResponse({"success": True})
-        try:
-            payload = json.loads(request.body.decode("utf-8") or "{}")
-        except Exception:
-            payload = {}
+        payload = _json_body(request)
         changed = False
         if "employeeId" in payload and payload["employeeId"]:
             emp = Employee.objects.filter(id=payload["employeeId"]).first()
@@ -6,7 +6,6 @@ login without heavy dependencies. Do not use as-is for high security needs.
 """
 
 import io
-import json
 from typing import Optional
 from django.http import JsonResponse
 from django.views.decorators.http import require_http_methods
@@ -18,6 +17,9 @@ from .views_common import (
     _safe_user_from_db,
     _issue_jwt,
     _issue_refresh_token_db,
+    _jwt_payload_from_request,
+    _principal_from_request,
+    _json_body,
 )
 from .utils_audit import record_audit
 
@@ -63,21 +65,10 @@ def face_register(request):
     Expects Authorization: Bearer <jwt> and JSON body with `image` or `images` (data URLs).
     Stores an average-hash and optional reference image.
     """
-    auth = request.META.get("HTTP_AUTHORIZATION", "")
-    if not auth.startswith("Bearer "):
+    if not _jwt_payload_from_request(request):
         return JsonResponse({"success": False, "message": "Unauthorized"}, status=401)
-    token = auth.split(" ", 1)[1].strip()
 
-    import jwt
-    try:
-        payload = jwt.decode(token, settings.JWT_SECRET, algorithms=[settings.JWT_ALGORITHM])
-    except Exception:
-        return JsonResponse({"success": False, "message": "Unauthorized"}, status=401)
-
-    try:
-        data = json.loads(request.body.decode("utf-8") or "{}")
-    except Exception:
-        data = {}
+    data = _json_body(request)
 
     def _first_image_bytes():
         image = data.get("image") or data.get("imageData") or ""
@@ -96,8 +87,8 @@ def face_register(request):
         return JsonResponse({"success": False, "message": "Image processing failed"}, status=400)
 
     try:
-        from .models import AppUser, FaceTemplate
-        user = AppUser.objects.filter(id=payload.get("sub")).first()
+        from .models import FaceTemplate
+        user = _principal_from_request(request)
         if not user:
             return JsonResponse({"success": False, "message": "User not found"}, status=404)
         tpl, created = FaceTemplate.objects.get_or_create(user=user, defaults={"ahash": ahash})
@@ -133,10 +124,7 @@ def face_login(request):
     Expects JSON body: { image: dataURL, remember?: bool }
     On match to an active user, issues JWT + refresh token.
     """
-    try:
-        data = json.loads(request.body.decode("utf-8") or "{}")
-    except Exception:
-        data = {}
+    data = _json_body(request)
     image = data.get("image") or data.get("imageData") or ""
     remember_raw = data.get("remember")
     remember = False
@@ -282,20 +270,12 @@ def face_unregister(request):
     Requires Authorization: Bearer <jwt>.
     Accepts POST or DELETE for convenience.
     """
-    auth = request.META.get("HTTP_AUTHORIZATION", "")
-    if not auth.startswith("Bearer "):
+    if not _jwt_payload_from_request(request):
         return JsonResponse({"success": False, "message": "Unauthorized"}, status=401)
-    token = auth.split(" ", 1)[1].strip()
 
-    import jwt
     try:
-        payload = jwt.decode(token, settings.JWT_SECRET, algorithms=[settings.JWT_ALGORITHM])
-    except Exception:
-        return JsonResponse({"success": False, "message": "Unauthorized"}, status=401)
-
-    try:
-        from .models import AppUser, FaceTemplate
-        user = AppUser.objects.filter(id=payload.get("sub")).first()
+        from .models import FaceTemplate
+        user = _principal_from_request(request)
         if not user:
             return JsonResponse({"success": False, "message": "User not found"}, status=404)
         tpl = FaceTemplate.objects.filter(user=user).first()
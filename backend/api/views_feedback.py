@@ -1,6 +1,5 @@
 """Customer feedback endpoints: list, create, update, resolve, summary."""
 
-import json
 from typing import Any, Dict, List
 from uuid import uuid4
 
@@ -10,7 +9,7 @@ from django.http import JsonResponse
 from django.utils import timezone as dj_timezone
 from django.views.decorators.http import require_http_methods
 
-from .views_common import _actor_from_request, _has_permission, rate_limit
+from .views_common import _actor_from_request, _has_permission, rate_limit, _json_body
 
 
 FEEDBACK_MEM: List[Dict[str, Any]] = []
@@ -65,13 +64,6 @@ def _permission_guard(actor, perm: str):
         return False
 
 
-def _parse_body(request):
-    try:
-        return json.loads(request.body.decode("utf-8") or "{}")
-    except Exception:
-        return {}
-
-
 def _rating_from_data(data: Dict[str, Any]):
     rating = data.get("rating")
     try:
@@ -165,7 +157,7 @@ def feedback(request):
     if not _permission_guard(actor, "feedback.submit"):
         return JsonResponse({"success": False, "message": "Forbidden"}, status=403)
 
-    data = _parse_body(request)
+    data = _json_body(request)
     rating = _rating_from_data(data)
     if rating is None:
         return JsonResponse({"success": False, "message": "Rating must be between 1 and 5"}, status=400)
@@ -220,7 +212,7 @@ def feedback_detail(request, feedback_id: str):
     if not actor:
         return err
 
-    data = _parse_body(request) if request.method == "PATCH" else {}
+    data = _json_body(request) if request.method == "PATCH" else {}
 
     try:
         from .models import CustomerFeedback
@@ -321,7 +313,7 @@ def feedback_resolve(request, feedback_id: str):
     if not _permission_guard(actor, "feedback.manage"):
         return JsonResponse({"success": False, "message": "Forbidden"}, status=403)
 
-    data = _parse_body(request)
+    data = _json_body(request)
     explicit = data.get("resolved")
     explicit_bool = None
     if isinstance(explicit, bool):
@@ -1,16 +1,17 @@
 """Inventory endpoints: items CRUD, stock adjustments, low stock, activities."""
 
+import csv
 import json
 from datetime import datetime
 from decimal import Decimal, InvalidOperation
 from uuid import UUID
-from django.http import JsonResponse
+from django.http import JsonResponse, StreamingHttpResponse
 from django.views.decorators.http import require_http_methods
 from django.db import transaction
 from django.db.models import Q
 from django.utils import timezone as dj_timezone
 
-from .views_common import _actor_from_request, _has_permission, _paginate, rate_limit
+from .views_common import _actor_from_request, _has_permission, _paginate, rate_limit, _json_body, _parse_json_body
 from .inventory_services import (
     get_current_stock,
     record_receipt,
@@ -22,6 +23,7 @@ from .inventory_services import (
     get_recent_activity,
     trigger_low_stock_notifications,
 )
+from .stock_ledger import InvalidCursor, iter_ledger, ledger_page
 
 
 def _safe_item(i, stock_qty: float | None = None):
@@ -120,7 +122,7 @@ def inventory_items(request):
         return JsonResponse({"success": False, "message": "Forbidden"}, status=403)
     try:
         from .models import InventoryItem, Location
-        data = json.loads(request.body.decode("utf-8") or "{}")
+        data = _parse_json_body(request)
         name = (data.get("name") or "").strip()
         if not name:
             return JsonResponse({"success": False, "message": "Name is required"}, status=400)
@@ -176,7 +178,7 @@ def inventory_item_detail(request, iid):
         if request.method == "DELETE":
             item.delete()
             return JsonResponse({"success": True, "message": "Deleted"})
-        data = json.loads(request.body.decode("utf-8") or "{}")
+        data = _parse_json_body(request)
         fields = ["name", "category", "unit", "supplier"]
         changed = False
         changes = {}
@@ -249,7 +251,7 @@ def inventory_item_stock(request, iid):
     try:
         from django.db import connection
         from .models import InventoryItem, InventoryActivity, Location
-        data = json.loads(request.body.decode("utf-8") or "{}")
+        data = _parse_json_body(request)
         try:
             qty = float(data.get("quantity") or 0)
         except Exception:
@@ -347,10 +349,7 @@ def inventory_low_stock_notify(request):
         return err
     if not _has_permission(actor, "inventory.lowstock.alerts"):
         return JsonResponse({"success": False, "message": "Forbidden"}, status=403)
-    try:
-        payload = json.loads(request.body.decode("utf-8") or "{}")
-    except Exception:
-        payload = {}
+    payload = _json_body(request)
     items = payload.get("itemIds") or payload.get("item_ids") or payload.get("items")
     item_ids: list[str] = []
     if isinstance(items, str):
@@ -461,7 +460,7 @@ def inventory_receipts(request):
         return JsonResponse({"success": False, "message": "Forbidden"}, status=403)
     try:
         from .models import InventoryItem, Location, Batch
-        payload = json.loads(request.body.decode("utf-8") or "{}")
+        payload = _parse_json_body(request)
         item_id = payload.get("itemId") or payload.get("item_id")
         qty = float(payload.get("qty") or payload.get("quantity") or 0)
         location_code = (payload.get("location") or payload.get("locationCode") or "MAIN").strip() or "MAIN"
@@ -507,10 +506,7 @@ def inventory_reorder_settings(request):
             data = [_safe_reorder_setting(rs) for rs in rows]
             return JsonResponse({"success": True, "data": data})
 
-        try:
-            payload = json.loads(request.body.decode("utf-8") or "{}")
-        except Exception:
-            payload = {}
+        payload = _json_body(request)
 
         item_id = payload.get("itemId") or payload.get("item_id")
         if not item_id:
@@ -600,10 +596,7 @@ def inventory_reorder_setting_detail(request, rid):
             rs.delete()
             return JsonResponse({"success": True, "message": "Deleted"})
 
-        try:
-            payload = json.loads(request.body.decode("utf-8") or "{}")
-        except Exception:
-            payload = {}
+        payload = _json_body(request)
 
         if "itemId" in payload or "item_id" in payload:
             new_item_id = payload.get("itemId") or payload.get("item_id")
@@ -689,7 +682,7 @@ def inventory_adjust(request):
         return JsonResponse({"success": False, "message": "Forbidden"}, status=403)
     try:
         from .models import InventoryItem, Location
-        payload = json.loads(request.body.decode("utf-8") or "{}")
+        payload = _parse_json_body(request)
         item_id = payload.get("itemId") or payload.get("item_id")
         delta = float(payload.get("delta") or payload.get("quantity") or 0)
         reason = (payload.get("reason") or "Manual adjustment").strip()
@@ -706,41 +699,134 @@ def inventory_adjust(request):
         return JsonResponse({"success": False, "message": "Failed to adjust"}, status=500)
 
 
+LEDGER_PAGE_MAX = 1000
+LEDGER_EXPORT_COLUMNS = [
+    "effectiveAt", "recordedAt", "id", "locationId", "batchId", "type", "qty", "balance",
+    "referenceType", "referenceId", "reason",
+]
+
+
+def _ledger_params(request):
+    """(item_id, location_id, date_from, date_to) from the query string, or an error response."""
+    item_id = request.GET.get("item_id") or request.GET.get("itemId")
+    if not item_id:
+        return None, JsonResponse({"success": False, "message": "item_id required"}, status=400)
+    location_id = request.GET.get("location_id") or request.GET.get("locationId") or None
+    try:
+        UUID(str(item_id))
+        if location_id:
+            UUID(str(location_id))
+    except ValueError:
+        return None, JsonResponse({"success": False, "message": "Invalid item_id or location_id"}, status=400)
+    bounds = []
+    for key in ("from", "to"):
+        raw = request.GET.get(key) or None
+        if not raw:
+            bounds.append(None)
+            continue
+        try:
+            value = datetime.fromisoformat(raw)
+        except ValueError:
+            return None, JsonResponse({"success": False, "message": f"Invalid '{key}' datetime"}, status=400)
+        bounds.append(dj_timezone.make_aware(value) if dj_timezone.is_naive(value) else value)
+    return (str(item_id), location_id, bounds[0], bounds[1]), None
+
+
+def _ledger_row(m, balance):
+    return {
+        "id": str(m["id"]),
+        "itemId": str(m["item_id"]),
+        "locationId": str(m["location_id"]),
+        "batchId": str(m["batch_id"]) if m["batch_id"] else None,
+        "type": m["movement_type"],
+        "qty": float(m["qty"] or 0),
+        "balance": float(balance or 0),
+        "effectiveAt": m["effective_at"].isoformat() if m["effective_at"] else None,
+        "recordedAt": m["recorded_at"].isoformat() if m["recorded_at"] else None,
+        "referenceType": m["reference_type"],
+        "referenceId": m["reference_id"],
+        "reason": m["reason"],
+    }
+
+
 @require_http_methods(["GET"]) 
 @rate_limit(limit=120, window_seconds=60)
 def inventory_ledger(request):
+    """Keyset-paginated ledger for one item with a running balance per row.
+
+    Pass `nextCursor` from the previous page as `?cursor=` to continue; the
+    opening balance is only computed for the first page.
+    """
     actor, err = _actor_from_request(request)
     if not actor:
         return err
+    params, err = _ledger_params(request)
+    if err:
+        return err
     try:
-        from .inventory_services import get_stock_ledger
-        item_id = request.GET.get("item_id") or request.GET.get("itemId")
-        if not item_id:
-            return JsonResponse({"success": False, "message": "item_id required"}, status=400)
-        date_from = request.GET.get("from") or None
-        date_to = request.GET.get("to") or None
-        location_id = request.GET.get("location_id") or None
-        df = datetime.fromisoformat(date_from) if date_from else None
-        dt = datetime.fromisoformat(date_to) if date_to else None
-        moves = get_stock_ledger(item_id=item_id, date_from=df, date_to=dt, location_id=location_id)
-        data = []
-        for m in moves:
-            data.append({
-                "id": str(m.id),
-                "itemId": str(m.item_id),
-                "locationId": str(m.location_id),
-                "batchId": str(m.batch_id) if m.batch_id else None,
-                "type": m.movement_type,
-                "qty": float(m.qty or 0),
-                "effectiveAt": m.effective_at.isoformat() if m.effective_at else None,
-                "recordedAt": m.recorded_at.isoformat() if m.recorded_at else None,
-                "referenceType": m.reference_type,
-                "referenceId": m.reference_id,
-                "reason": m.reason,
-            })
-        return JsonResponse({"success": True, "data": data})
+        limit = max(1, min(LEDGER_PAGE_MAX, int(request.GET.get("limit") or LEDGER_PAGE_MAX)))
+    except (TypeError, ValueError):
+        limit = LEDGER_PAGE_MAX
+    try:
+        page = ledger_page(*params, cursor=request.GET.get("cursor") or None, limit=limit)
+    except InvalidCursor as e:
+        return JsonResponse({"success": False, "message": str(e)}, status=400)
     except Exception:
         return JsonResponse({"success": True, "data": []})
+    return JsonResponse({
+        "success": True,
+        "data": [_ledger_row(row, balance) for row, balance in page["rows"]],
+        "pagination": {
+            "limit": limit,
+            "openingBalance": float(page["openingBalance"] or 0),
+            "closingBalance": float(page["closingBalance"] or 0),
+            "nextCursor": page["nextCursor"],
+            "hasMore": page["nextCursor"] is not None,
+        },
+    })
+
+
+class _Echo:
+    """File-like object whose write() returns the value, for streaming csv.writer output."""
+
+    def write(self, value):
+        return value
+
+
+def _ledger_csv(rows):
+    writer = csv.writer(_Echo())
+    yield writer.writerow(LEDGER_EXPORT_COLUMNS)
+    for row, balance in rows:
+        out = _ledger_row(row, balance)
+        yield writer.writerow(["" if out[c] is None else out[c] for c in LEDGER_EXPORT_COLUMNS])
+
+
+def _ledger_ndjson(rows):
+    for row, balance in rows:
+        yield json.dumps(_ledger_row(row, balance), separators=(",", ":")) + "\n"
+
+
+@require_http_methods(["GET"])
+@rate_limit(limit=10, window_seconds=60)
+def inventory_ledger_export(request):
+    """Stream an item's whole ledger (or a date range) as CSV or NDJSON with running balances."""
+    actor, err = _actor_from_request(request)
+    if not actor:
+        return err
+    params, err = _ledger_params(request)
+    if err:
+        return err
+    fmt = (request.GET.get("format") or "csv").lower()
+    if fmt not in {"csv", "ndjson"}:
+        return JsonResponse({"success": False, "message": "format must be csv or ndjson"}, status=400)
+    rows = iter_ledger(*params)
+    if fmt == "csv":
+        resp = StreamingHttpResponse(_ledger_csv(rows), content_type="text/csv; charset=utf-8")
+    else:
+        resp = StreamingHttpResponse(_ledger_ndjson(rows), content_type="application/x-ndjson")
+    resp["Content-Disposition"] = f'attachment; filename="ledger-{params[0]}.{fmt}"'
+    resp["X-Accel-Buffering"] = "no"
+    return resp
 
 
 @require_http_methods(["GET"]) 
@@ -852,7 +938,7 @@ def inventory_consume(request):
         return JsonResponse({"success": False, "message": "Forbidden"}, status=403)
     try:
         from .models import InventoryItem, Location
-        payload = json.loads(request.body.decode("utf-8") or "{}")
+        payload = _parse_json_body(request)
         order_id = str(payload.get("orderId") or payload.get("order_id") or "")
         comps = payload.get("components") or []
         location_code = (payload.get("location") or payload.get("locationCode") or "MAIN").strip() or "MAIN"
@@ -884,7 +970,7 @@ def inventory_transfer(request):
         return JsonResponse({"success": False, "message": "Forbidden"}, status=403)
     try:
         from .models import InventoryItem, Location
-        payload = json.loads(request.body.decode("utf-8") or "{}")
+        payload = _parse_json_body(request)
         item_id = payload.get("itemId") or payload.get("item_id")
         qty = float(payload.get("qty") or payload.get("quantity") or 0)
         from_code = (payload.get("fromLocation") or payload.get("from") or "MAIN").strip() or "MAIN"
@@ -902,6 +988,91 @@ def inventory_transfer(request):
         return JsonResponse({"success": False, "message": "Failed to transfer"}, status=500)
 
 
+def _safe_consumption_job(j):
+    return {
+        "id": str(j.id),
+        "orderId": str(j.order_id),
+        "orderNumber": j.order_number,
+        "location": j.location_code,
+        "status": j.status,
+        "attempts": j.attempts,
+        "movements": j.movements,
+        "lastError": j.last_error,
+        "nextAttemptAt": j.next_attempt_at.isoformat() if j.next_attempt_at else None,
+        "processedAt": j.processed_at.isoformat() if j.processed_at else None,
+        "createdAt": j.created_at.isoformat() if j.created_at else None,
+    }
+
+
+@require_http_methods(["GET"])
+@rate_limit(limit=60, window_seconds=60)
+def inventory_consumption_jobs(request):
+    """Reconciliation list of order consumption jobs (failed and dead by default)."""
+    actor, err = _actor_from_request(request)
+    if not actor:
+        return err
+    if not _has_permission(actor, "inventory.update"):
+        return JsonResponse({"success": False, "message": "Forbidden"}, status=403)
+    try:
+        from .models import InventoryConsumptionJob
+        statuses = [s.strip() for s in (request.GET.get("status") or "failed,dead").split(",") if s.strip()]
+        qs = InventoryConsumptionJob.objects.filter(status__in=statuses).order_by("-updated_at")
+        order_id = request.GET.get("orderId") or request.GET.get("order_id")
+        if order_id:
+            try:
+                qs = qs.filter(order_id=UUID(str(order_id)))
+            except Exception:
+                return JsonResponse({"success": False, "message": "Invalid orderId"}, status=400)
+        try:
+            page = int(request.GET.get("page") or 1)
+        except ValueError:
+            return JsonResponse({"success": False, "message": "Invalid page"}, status=400)
+        try:
+            limit = int(request.GET.get("limit") or 50)
+        except ValueError:
+            return JsonResponse({"success": False, "message": "Invalid limit"}, status=400)
+        if page < 1:
+            return JsonResponse({"success": False, "message": "Invalid page"}, status=400)
+        if limit < 1:
+            return JsonResponse({"success": False, "message": "Invalid limit"}, status=400)
+        limit = min(200, limit)
+        total = qs.count()
+        rows = [_safe_consumption_job(j) for j in qs[(page - 1) * limit: page * limit]]
+        return JsonResponse({
+            "success": True,
+            "data": rows,
+            "pagination": {"page": page, "limit": limit, "total": total, "totalPages": max(1, (total + limit - 1) // limit)},
+        })
+    except Exception:
+        return JsonResponse({"success": True, "data": []})
+
+
+@require_http_methods(["POST"])
+@rate_limit(limit=30, window_seconds=60)
+def inventory_consumption_job_retry(request, jid):
+    """Re-queue a failed or dead consumption job; `{"runNow": true}` applies it immediately."""
+    actor, err = _actor_from_request(request)
+    if not actor:
+        return err
+    if not _has_permission(actor, "inventory.update"):
+        return JsonResponse({"success": False, "message": "Forbidden"}, status=403)
+    try:
+        from .models import InventoryConsumptionJob
+        from .inventory_jobs import requeue_job, run_consumption_batch
+        job = InventoryConsumptionJob.objects.filter(id=jid).first()
+        if not job:
+            return JsonResponse({"success": False, "message": "Not found"}, status=404)
+        if job.status == InventoryConsumptionJob.STATUS_DONE:
+            return JsonResponse({"success": False, "message": "Job already applied"}, status=409)
+        requeue_job(job)
+        if _json_body(request).get("runNow"):
+            run_consumption_batch(job_ids=[job.id])
+            job.refresh_from_db()
+        return JsonResponse({"success": True, "data": _safe_consumption_job(job)})
+    except Exception:
+        return JsonResponse({"success": False, "message": "Server error"}, status=500)
+
+
 _all_ = [
     "inventory_items",
     "inventory_item_detail",
@@ -917,4 +1088,6 @@ _all_ = [
     "inventory_consume",
     "inventory_transfer",
     "inventory_recent_activity",
+    "inventory_consumption_jobs",
+    "inventory_consumption_job_retry",
 ]
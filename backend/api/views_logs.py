@@ -3,14 +3,13 @@
 DB-backed when available; falls back to in-memory list when DB is not ready.
 """
 
-import json
 from datetime import timedelta, datetime
 from django.http import JsonResponse
 from django.views.decorators.http import require_http_methods
 from django.db.utils import OperationalError, ProgrammingError
 from django.utils import timezone as dj_timezone
 
-from .views_common import _actor_from_request, _require_admin_or_manager, _client_meta
+from .views_common import _actor_from_request, _require_admin_or_manager, _client_meta, _json_body
 
 
 LOGS_MEM = []  # in-memory fallback: list of dicts
@@ -68,10 +67,7 @@ def logs(request):
         return err
 
     if request.method == "POST":
-        try:
-            data = json.loads(request.body.decode("utf-8") or "{}")
-        except Exception:
-            data = {}
+        data = _json_body(request)
         action = (data.get("action") or "").strip() or "Activity"
         ltype = (data.get("type") or "action").lower()
         details = (data.get("details") or "").strip()
@@ -7,7 +7,6 @@ Production readiness goals:
 - Validated image uploads (type/size) using Pillow.
 """
 
-import json
 import uuid
 from datetime import datetime
 import os
@@ -19,7 +18,7 @@ from django.db.models import Q
 from django.core.paginator import Paginator
 from django.utils import timezone as dj_tz
 from django.conf import settings
-from .views_common import MENU_ITEMS, _paginate, _actor_from_request, _has_permission
+from .views_common import MENU_ITEMS, _paginate, _actor_from_request, _has_permission, _json_body, _parse_json_body
 from .utils_audit import record_audit
 
 
@@ -130,7 +129,7 @@ def menu_items(request):
     try:
         from decimal import Decimal, ROUND_HALF_UP
         from .models import MenuItem
-        payload = json.loads(request.body.decode("utf-8") or "{}")
+        payload = _parse_json_body(request)
         name = (payload.get("name") or "").strip()
         if not name:
             return JsonResponse({"success": False, "message": "name is required"}, status=400)
@@ -170,10 +169,7 @@ def menu_items(request):
         if getattr(settings, "DISABLE_INMEM_FALLBACK", False):
             return JsonResponse({"success": False, "message": "Failed to create menu item"}, status=500)
         # Fallback to in-memory add (dev only)
-        try:
-            payload = json.loads(request.body.decode("utf-8") or "{}")
-        except Exception:
-            payload = {}
+        payload = _json_body(request)
         item = {
             "id": payload.get("id") or str(uuid.uuid4()),
             "name": payload.get("name", "Unnamed Item"),
@@ -252,10 +248,7 @@ def menu_item_detail(request, item_id):
                 pass
             return JsonResponse({"success": True})
         # Update
-        try:
-            payload = json.loads(request.body.decode("utf-8") or "{}")
-        except Exception:
-            payload = {}
+        payload = _json_body(request)
         if mi:
             from decimal import Decimal, ROUND_HALF_UP
             fields = {}
@@ -347,10 +340,7 @@ def menu_item_availability(request, item_id):
         return err
     if not _has_permission(actor, "menu.manage") and not _has_permission(actor, "inventory.menu.manage"):
         return JsonResponse({"success": False, "message": "Forbidden"}, status=403)
-    try:
-        payload = json.loads(request.body.decode("utf-8") or "{}")
-    except Exception:
-        payload = {}
+    payload = _json_body(request)
     available = bool(payload.get("available", True))
     try:
         if mi:
@@ -5,10 +5,11 @@ from django.views.decorators.http import require_http_methods
 
 from .views_common import (
     DEFAULT_ROLE_PERMISSIONS,
+    ROLE_PERMISSION_MASKS,
     _actor_from_request,
-    _effective_permissions,
-    _effective_permissions_from_role,
+    _permission_mask,
 )
+from .utils_permissions import PERMISSIONS, ALL_BIT
 
 
 MODULE_DEFINITIONS = [
@@ -106,9 +107,20 @@ MODULE_DEFINITIONS = [
 ]
 
 
-def _serialize_modules(perms: set[str] | None):
+# Required permission mask per (module, feature), compiled at import time
+FEATURE_MASKS = {
+    (module["code"], feature["code"]): PERMISSIONS.mask(feature["permissions"])
+    for module in MODULE_DEFINITIONS
+    for feature in module["features"]
+}
+
+
+def _permission_list(mask: int):
+    return ["all"] if mask & ALL_BIT else sorted(PERMISSIONS.codes(mask))
+
+
+def _serialize_modules(mask: int | None):
     modules = []
-    wildcard = bool(perms and "all" in perms)
     for module in MODULE_DEFINITIONS:
         features = []
         for feature in module["features"]:
@@ -118,8 +130,8 @@ def _serialize_modules(perms: set[str] | None):
                 "label": feature["label"],
                 "permissions": required,
             }
-            if perms is not None:
-                entry["granted"] = wildcard or all(req in perms for req in required)
+            if mask is not None:
+                entry["granted"] = PERMISSIONS.has_all(mask, FEATURE_MASKS[(module["code"], feature["code"])])
             features.append(entry)
         modules.append(
             {
@@ -134,7 +146,7 @@ def _serialize_modules(perms: set[str] | None):
 
 @require_http_methods(["GET"])
 def modules_catalog(_request):
-    return JsonResponse({"success": True, "data": _serialize_modules(perms=None)})
+    return JsonResponse({"success": True, "data": _serialize_modules(mask=None)})
 
 
 @require_http_methods(["GET"])
@@ -142,11 +154,11 @@ def modules_for_role(_request, role: str):
     role_key = (role or "").lower()
     if role_key not in DEFAULT_ROLE_PERMISSIONS and role_key != "admin":
         return JsonResponse({"success": False, "message": "Role not found"}, status=404)
-    perms = _effective_permissions_from_role(role_key)
-    modules = _serialize_modules(perms)
+    mask = ALL_BIT if role_key == "admin" else ROLE_PERMISSION_MASKS.get(role_key, 0)
+    modules = _serialize_modules(mask)
     payload = {
         "role": role_key,
-        "permissions": sorted(list(perms)) if "all" not in perms else ["all"],
+        "permissions": _permission_list(mask),
         "modules": modules,
     }
     return JsonResponse({"success": True, "data": payload})
@@ -157,8 +169,8 @@ def modules_for_me(request):
     actor, err = _actor_from_request(request)
     if not actor:
         return err
-    perms = _effective_permissions(actor)
-    modules = _serialize_modules(perms)
+    mask = _permission_mask(actor)
+    modules = _serialize_modules(mask)
     role = None
     if hasattr(actor, "role"):
         role = getattr(actor, "role", None)
@@ -166,7 +178,7 @@ def modules_for_me(request):
         role = actor.get("role")
     payload = {
         "role": (role or "").lower(),
-        "permissions": sorted(list(perms)) if "all" not in perms else ["all"],
+        "permissions": _permission_list(mask),
         "modules": modules,
     }
     return JsonResponse({"success": True, "data": payload})
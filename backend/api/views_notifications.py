@@ -3,13 +3,12 @@
 DB-backed when available; safe fallbacks if DB not yet migrated.
 """
 
-import json
 from django.http import JsonResponse
 from django.views.decorators.http import require_http_methods
 from django.utils import timezone as dj_timezone
 from django.db.utils import OperationalError, ProgrammingError
 
-from .views_common import _actor_from_request, _has_permission, rate_limit
+from .views_common import _actor_from_request, _has_permission, rate_limit, _json_body
 from .utils_notify import create_notification
 
 
@@ -110,10 +109,7 @@ def notifications(request):
     except Exception:
         return JsonResponse({"success": False, "message": "Forbidden"}, status=403)
 
-    try:
-        data = json.loads(request.body.decode("utf-8") or "{}")
-    except Exception:
-        data = {}
+    data = _json_body(request)
     title = (data.get("title") or "").strip() or "Notification"
     message = (data.get("message") or "").strip()
     ntype = (data.get("type") or "info").lower()
@@ -286,10 +282,7 @@ def notifications_settings(request):
         if request.method == "GET":
             return JsonResponse({"success": True, "data": _serialize_pref(pref)})
         # PUT: update
-        try:
-            data = json.loads(request.body.decode("utf-8") or "{}")
-        except Exception:
-            data = {}
+        data = _json_body(request)
         def _getb(k, curr):
             v = data.get(k)
             if isinstance(v, bool):
@@ -318,10 +311,7 @@ def notifications_settings(request):
         if not data:
             data = {"emailEnabled": True, "pushEnabled": False, "lowStock": True, "order": True, "payment": True}
         return JsonResponse({"success": True, "data": data})
-    try:
-        data = json.loads(request.body.decode("utf-8") or "{}")
-    except Exception:
-        data = {}
+    data = _json_body(request)
     if curr:
         curr_data = {**curr.get("data", {}), **data}
         curr["data"] = curr_data
@@ -346,10 +336,7 @@ def notifications_push_subscribe(request):
     actor, err = _actor_from_request(request)
     if not actor:
         return err
-    try:
-        data = json.loads(request.body.decode("utf-8") or "{}")
-    except Exception:
-        data = {}
+    data = _json_body(request)
     endpoint = (data.get("endpoint") or "").strip()
     keys = data.get("keys") or {}
     p256dh = (keys.get("p256dh") or "").strip()
@@ -402,10 +389,7 @@ def notifications_push_unsubscribe(request):
     actor, err = _actor_from_request(request)
     if not actor:
         return err
-    try:
-        data = json.loads(request.body.decode("utf-8") or "{}")
-    except Exception:
-        data = {}
+    data = _json_body(request)
     endpoint = (data.get("endpoint") or "").strip()
     if not endpoint:
         return JsonResponse({"success": False, "message": "Missing endpoint"}, status=400)
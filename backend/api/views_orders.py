@@ -7,16 +7,22 @@ Permissions mapping (from views_common.DEFAULT_ROLE_PERMISSIONS):
 
 from __future__ import annotations
 
-import json
 from datetime import datetime
 from uuid import UUID
 from decimal import Decimal
-from django.http import JsonResponse
+from django.conf import settings
+from django.http import HttpResponseNotModified, JsonResponse, StreamingHttpResponse
 from django.views.decorators.http import require_http_methods
 from django.db import transaction
+from django.db.models import Count, Max, Sum
 from django.utils import timezone as dj_tz
 
-from .views_common import _actor_from_request, _has_permission, rate_limit
+from .views_common import _actor_from_request, _has_permission, _issue_order_feed_token, rate_limit, _json_body, _parse_json_body
+from .utils_order_numbers import next_order_number
+from .utils_order_feed import record_order_event, record_order_events, settled_event_id, stream_events
+from .inventory_jobs import enqueue_order_consumption, enqueue_orders_consumption
+from .utils_idempotency import IdempotentRequest
+from .order_archive import CLOSED_STATUSES
 
 
 ORDER_STATES = [
@@ -63,7 +69,7 @@ def _safe_item(i):
     }
 
 
-def _safe_order(o, with_items=True):
+def _safe_order(o, with_items=True, fields=None):
     data = {
         "id": str(o.id),
         "orderNumber": o.order_number,
@@ -85,9 +91,40 @@ def _safe_order(o, with_items=True):
             data["items"] = [_safe_item(x) for x in items]
         except Exception:
             data["items"] = []
+    if fields:
+        data = {k: v for k, v in data.items() if k in fields}
     return data
 
 
+def _serialize_options(request):
+    """Read the list-endpoint projection switches.
+
+    - ``fields=id,status,...`` returns only those keys; line items are loaded
+      only when ``items`` is listed.
+    - ``include=items`` (default) or ``include=none`` toggles line items.
+    Returns (with_items, fields or None).
+    """
+    fields = None
+    raw_fields = (request.GET.get("fields") or "").strip()
+    if raw_fields:
+        fields = {f.strip() for f in raw_fields.split(",") if f.strip()}
+    include = request.GET.get("include")
+    if fields is not None:
+        with_items = "items" in fields
+    elif include is not None:
+        with_items = "items" in {x.strip().lower() for x in include.split(",")}
+    else:
+        with_items = True
+    return with_items, fields
+
+
+def _serialize_orders(qs, with_items=True, fields=None):
+    """Serialize a queryset of orders with line items prefetched in one query."""
+    if with_items:
+        qs = qs.prefetch_related("items")
+    return [_safe_order(x, with_items=with_items, fields=fields) for x in qs]
+
+
 @require_http_methods(["GET", "POST"])  # list or create
 @rate_limit(limit=20, window_seconds=60)
 def orders(request):
@@ -119,8 +156,8 @@ def orders(request):
             total = qs.count()
             start = (page - 1) * limit
             end = start + limit
-            rows = list(qs[start:end])
-            data = [_safe_order(x) for x in rows]
+            with_items, fields = _serialize_options(request)
+            data = _serialize_orders(qs[start:end], with_items=with_items, fields=fields)
             return JsonResponse({
                 "success": True,
                 "data": data,
@@ -137,10 +174,15 @@ def orders(request):
     # POST create (place order)
     if not _has_permission(actor, "order.place"):
         return JsonResponse({"success": False, "message": "Forbidden"}, status=403)
-    try:
-        payload = json.loads(request.body.decode("utf-8") or "{}")
-    except Exception:
-        payload = {}
+    payload = _json_body(request)
+    # Retried submissions with the same Idempotency-Key get the original response
+    idem = IdempotentRequest.from_request(request, actor, "orders.create", payload)
+    bad_key = idem.invalid()
+    if bad_key is not None:
+        return bad_key
+    replay = idem.replay()
+    if replay is not None:
+        return replay
     items = payload.get("items") or []
     order_type = (payload.get("type") or "walk-in").lower()
     customer_name = (payload.get("customerName") or "").strip()
@@ -148,32 +190,50 @@ def orders(request):
     if not isinstance(items, list) or not items:
         return JsonResponse({"success": False, "message": "items is required"}, status=400)
 
+    # Normalise requested lines before touching the database
+    requested: list[tuple[str, int]] = []
+    for it in items:
+        if not isinstance(it, dict):
+            continue
+        mid = _parse_uuid(it.get("menuItemId") or it.get("id"))
+        try:
+            qty = int(it.get("quantity") or it.get("qty") or 0)
+        except (TypeError, ValueError):
+            qty = 0
+        if mid and qty > 0:
+            requested.append((str(UUID(mid)), qty))
+    if not requested:
+        return JsonResponse({"success": False, "message": "No valid items"}, status=400)
+
     try:
         from .models import Order, OrderItem, MenuItem
+        # One query for every referenced menu item; price from authoritative rows
+        menu = {
+            str(mi.id): mi
+            for mi in MenuItem.objects.filter(id__in={mid for mid, _ in requested}, available=True).only("id", "name", "price")
+        }
+        subtotal = Decimal("0")
+        line_items: list[tuple[MenuItem, int]] = []
+        for mid, qty in requested:
+            mi = menu.get(mid)
+            if not mi:
+                continue
+            subtotal += (mi.price or 0) * qty
+            line_items.append((mi, qty))
+        if not line_items:
+            return JsonResponse({"success": False, "message": "No valid items"}, status=400)
+
+        total = max(Decimal("0"), subtotal - max(Decimal("0"), discount))
+        # Reserved outside the transaction (see utils_order_numbers)
+        num = next_order_number("W")
         with transaction.atomic():
-            # Build subtotal from authoritative menu prices
-            subtotal = Decimal("0")
-            line_items: list[tuple[MenuItem, int]] = []
-            for it in items:
-                mid = it.get("menuItemId") or it.get("id")
-                qty = int(it.get("quantity") or it.get("qty") or 0)
-                if not mid or qty <= 0:
-                    continue
-                mi = MenuItem.objects.filter(id=mid, available=True).first()
-                if not mi:
-                    continue
-                subtotal += (mi.price or 0) * qty
-                line_items.append((mi, qty))
-            if not line_items:
-                return JsonResponse({"success": False, "message": "No valid items"}, status=400)
-
-            total = max(Decimal("0"), subtotal - max(Decimal("0"), discount))
-            # Generate a simple order number
-            ts = dj_tz.now()
-            num = f"W-{ts.strftime('%H%M%S')}{str(ts.microsecond)[:3]}"
+            conflict = idem.claim()
+            if conflict is not None:
+                return conflict
+            # Placed orders go straight to the queue
             o = Order.objects.create(
                 order_number=num,
-                status="pending",
+                status="in_queue",
                 order_type=order_type,
                 customer_name=customer_name,
                 subtotal=subtotal,
@@ -182,18 +242,21 @@ def orders(request):
                 payment_method=("cash" if order_type == "walk-in" else ""),
                 placed_by=actor if hasattr(actor, "id") else None,
             )
-            for mi, qty in line_items:
-                OrderItem.objects.create(
+            OrderItem.objects.bulk_create([
+                OrderItem(
                     order=o,
                     menu_item=mi,
                     item_name=mi.name,
                     price=mi.price or 0,
                     quantity=qty,
                 )
-            # Auto enqueue
-            o.status = "in_queue"
-            o.save(update_fields=["status", "updated_at"])
-        return JsonResponse({"success": True, "data": _safe_order(o)})
+                for mi, qty in line_items
+            ])
+            data = _safe_order(o)
+            record_order_event(o, "created", data=data)
+            body = {"success": True, "data": data}
+            idem.store(200, body, resource_id=o.id)
+        return JsonResponse(body)
     except Exception:
         return JsonResponse({"success": False, "message": "Failed to create order"}, status=500)
 
@@ -208,8 +271,17 @@ def order_queue(request):
         return JsonResponse({"success": False, "message": "Forbidden"}, status=403)
     try:
         from .models import Order
+        # Read the feed cursor before the snapshot so clients resuming from it
+        # miss nothing; it trails by the settle window, so a few events already
+        # in the snapshot may be replayed
+        want_cursor = str(request.GET.get("feedCursor") or "").lower() in {"1", "true", "yes"}
+        cursor = settled_event_id() if want_cursor else None
         qs = Order.objects.filter(status__in=["pending", "in_queue", "in_progress", "ready"]).order_by("created_at")
-        return JsonResponse({"success": True, "data": [_safe_order(x) for x in qs]})
+        with_items, fields = _serialize_options(request)
+        resp = JsonResponse({"success": True, "data": _serialize_orders(qs, with_items=with_items, fields=fields)})
+        if cursor is not None:
+            resp["X-Order-Feed-Cursor"] = str(cursor)
+        return resp
     except Exception:
         return JsonResponse({"success": True, "data": []})
 
@@ -217,13 +289,50 @@ def order_queue(request):
 @require_http_methods(["GET"])  # history
 @rate_limit(limit=30, window_seconds=60)
 def order_history(request):
+    """Closed orders, newest first, paginated across the hot and archive tables.
+
+    `scope=all` (default) lists recent closed orders followed by archived
+    ones; `scope=hot` or `scope=archive` restricts to one table.
+    """
     actor, err = _actor_from_request(request)
     if not actor:
         return err
     try:
-        from .models import Order
-        qs = Order.objects.filter(status__in=["completed", "cancelled", "refunded"]).order_by("-created_at")
-        return JsonResponse({"success": True, "data": [_safe_order(x) for x in qs]})
+        from .models import ArchivedOrder, Order
+        try:
+            page = max(1, int(request.GET.get("page") or 1))
+        except Exception:
+            page = 1
+        try:
+            limit = max(1, min(200, int(request.GET.get("limit") or 50)))
+        except Exception:
+            limit = 50
+        scope = (request.GET.get("scope") or "all").lower()
+        hot = Order.objects.filter(status__in=CLOSED_STATUSES).order_by("-created_at")
+        cold = ArchivedOrder.objects.order_by("-created_at")
+        hot_total = hot.count() if scope != "archive" else 0
+        cold_total = cold.count() if scope != "hot" else 0
+        with_items, fields = _serialize_options(request)
+        start = (page - 1) * limit
+        end = start + limit
+        data = []
+        if start < hot_total:
+            data += _serialize_orders(hot[start:min(end, hot_total)], with_items=with_items, fields=fields)
+        if end > hot_total and cold_total:
+            for row in _serialize_orders(cold[max(0, start - hot_total):end - hot_total], with_items=with_items, fields=fields):
+                row["archived"] = True
+                data.append(row)
+        total = hot_total + cold_total
+        return JsonResponse({
+            "success": True,
+            "data": data,
+            "pagination": {
+                "page": page,
+                "limit": limit,
+                "total": total,
+                "totalPages": max(1, (total + limit - 1) // limit),
+            },
+        })
     except Exception:
         return JsonResponse({"success": True, "data": []})
 
@@ -231,6 +340,16 @@ def order_history(request):
 @require_http_methods(["GET"])  # bulk progress by IDs
 @rate_limit(limit=120, window_seconds=60)
 def order_bulk_progress(request):
+    """Status of the given orders, as a delta when the client passes a cursor.
+
+    `since=<cursor>` returns only orders whose change_seq is greater; the
+    response's `cursor` is the value to send next time. It trails the newest
+    change by ORDER_FEED_SETTLE_SECONDS because change sequences commit out of
+    order, so recent changes are reported again until they settle (clients
+    apply rows idempotently). The ETag covers the change sequences of every
+    requested order, so an unchanged set answers `304 Not Modified` (via
+    If-None-Match) after a single aggregate query.
+    """
     actor, err = _actor_from_request(request)
     if not actor:
         return err
@@ -243,11 +362,42 @@ def order_bulk_progress(request):
         u = _parse_uuid(s)
         if u:
             uuids.append(u)
+    since_raw = (request.GET.get("since") or "").strip()
+    since = None
+    if since_raw:
+        try:
+            since = max(0, int(since_raw))
+        except Exception:
+            return JsonResponse({"success": False, "message": "Invalid since cursor"}, status=400)
     try:
         from .models import Order
         qs = Order.objects.filter(id__in=uuids)
-        data = [{"id": str(x.id), "status": x.status, "updatedAt": x.updated_at.isoformat() if x.updated_at else None} for x in qs]
-        return JsonResponse({"success": True, "data": data})
+        agg = qs.aggregate(n=Count("id"), top=Max("change_seq"), total=Sum("change_seq"))
+        cursor = int(agg["top"] or 0)
+        # Any change raises some order's change_seq, hence the sum
+        etag = f'W/"bp-{agg["n"]}-{cursor}-{int(agg["total"] or 0)}-{since if since is not None else ""}"'
+        if etag in [t.strip() for t in (request.META.get("HTTP_IF_NONE_MATCH") or "").split(",")]:
+            resp = HttpResponseNotModified()
+            resp["ETag"] = etag
+            return resp
+        if since is not None:
+            qs = qs.filter(change_seq__gt=since)
+        # A lower change_seq may still commit after `top`; resume below it
+        cursor = min(cursor, settled_event_id())
+        rows = qs.only("id", "status", "updated_at", "change_seq").order_by("change_seq")
+        data = [
+            {
+                "id": str(x.id),
+                "status": x.status,
+                "updatedAt": x.updated_at.isoformat() if x.updated_at else None,
+                "changeSeq": x.change_seq,
+            }
+            for x in rows
+        ]
+        resp = JsonResponse({"success": True, "data": data, "cursor": cursor})
+        resp["ETag"] = etag
+        resp["Cache-Control"] = "private, no-cache"
+        return resp
     except Exception:
         return JsonResponse({"success": True, "data": []})
 
@@ -259,10 +409,13 @@ def order_detail(request, oid):
     if not actor:
         return err
     try:
-        from .models import Order
+        from .models import ArchivedOrder, Order
         o = Order.objects.filter(id=oid).first()
         if not o:
-            return JsonResponse({"success": False, "message": "Not found"}, status=404)
+            o = ArchivedOrder.objects.filter(id=oid).first()
+            if not o:
+                return JsonResponse({"success": False, "message": "Not found"}, status=404)
+            return JsonResponse({"success": True, "data": {**_safe_order(o), "archived": True}})
         return JsonResponse({"success": True, "data": _safe_order(o)})
     except Exception:
         return JsonResponse({"success": False, "message": "Server error"}, status=500)
@@ -281,50 +434,23 @@ def order_status(request, oid):
         o = Order.objects.filter(id=oid).first()
         if not o:
             return JsonResponse({"success": False, "message": "Not found"}, status=404)
-        try:
-            payload = json.loads(request.body.decode("utf-8") or "{}")
-        except Exception:
-            payload = {}
+        payload = _json_body(request)
         new_status = (payload.get("status") or "").lower()
         if new_status not in {s for s, _ in ORDER_STATES}:
             return JsonResponse({"success": False, "message": "Invalid status"}, status=400)
         allowed = ALLOWED_TRANSITIONS.get(o.status, set())
         if new_status not in allowed:
             return JsonResponse({"success": False, "message": f"Illegal transition from {o.status} to {new_status}"}, status=400)
+        previous = o.status
         o.status = new_status
         if new_status == "completed":
             o.completed_at = dj_tz.now()
-        o.save(update_fields=["status", "completed_at", "updated_at"])
-        # Optional: decrement inventory on completion using simple recipe from MenuItem.ingredients
-        if new_status == "completed":
-            try:
-                from .models import InventoryItem
-                from .inventory_services import consume_for_order
-                # Build components = [(InventoryItem, qty)]
-                comp_map: dict[str, int] = {}
-                for li in o.items.select_related("menu_item").all():
-                    mi = li.menu_item
-                    if not mi:
-                        continue
-                    ings = mi.ingredients or []
-                    for inv_id in ings:
-                        try:
-                            # treat ingredient as inventory item id; 1 unit per line-item quantity
-                            iid = str(inv_id)
-                            comp_map[iid] = comp_map.get(iid, 0) + int(li.quantity or 0)
-                        except Exception:
-                            continue
-                if comp_map:
-                    # Load items present in comp_map
-                    invs = {str(x.id): x for x in InventoryItem.objects.filter(id__in=list(comp_map.keys()))}
-                    components = [(invs[k], comp_map[k]) for k in comp_map.keys() if k in invs]
-                    if components:
-                        # Use MAIN location by default
-                        from .models import Location
-                        loc = Location.objects.filter(code="MAIN").first() or Location.objects.create(code="MAIN", name="Main")
-                        consume_for_order(order_id=str(o.id), components=components, location=loc, actor=actor if hasattr(actor, "id") else None)
-            except Exception:
-                pass
+        with transaction.atomic():
+            o.save(update_fields=["status", "completed_at", "updated_at"])
+            record_order_event(o, "status", previous_status=previous)
+            # Ingredient consumption runs in the inventory job worker, not in this request
+            if new_status == "completed":
+                enqueue_order_consumption(o, actor=actor)
         # Optional: audit log
         try:
             from .utils_audit import record_audit
@@ -344,6 +470,209 @@ def order_status(request, oid):
         return JsonResponse({"success": False, "message": "Server error"}, status=500)
 
 
+BULK_STATUS_MAX = 200
+
+
+@require_http_methods(["POST"])  # bulk status update
+@rate_limit(limit=30, window_seconds=60)
+def order_status_bulk(request):
+    """Advance many orders in one request.
+
+    Body: {"transitions": [{"id": "...", "status": "ready"}, ...]} or
+    {"ids": [...], "status": "ready"}. Each order is checked against
+    ALLOWED_TRANSITIONS; valid ones are applied together in one transaction
+    (one UPDATE per target status) and invalid ones are reported without
+    blocking the rest. Feed events, inventory jobs and the audit entry are
+    written in bulk.
+    """
+    actor, err = _actor_from_request(request)
+    if not actor:
+        return err
+    if not _has_permission(actor, "order.status.update"):
+        return JsonResponse({"success": False, "message": "Forbidden"}, status=403)
+    payload = _json_body(request)
+    requested = []
+    if isinstance(payload.get("transitions"), list):
+        for t in payload["transitions"]:
+            if isinstance(t, dict):
+                requested.append((str(t.get("id") or t.get("orderId") or ""), str(t.get("status") or "").lower()))
+    elif isinstance(payload.get("ids"), list):
+        target = str(payload.get("status") or "").lower()
+        requested = [(str(x), target) for x in payload["ids"]]
+    if not requested:
+        return JsonResponse({"success": False, "message": "No transitions given"}, status=400)
+    if len(requested) > BULK_STATUS_MAX:
+        return JsonResponse({"success": False, "message": f"At most {BULK_STATUS_MAX} orders per request"}, status=400)
+
+    valid_states = {s for s, _ in ORDER_STATES}
+    results = []
+    wanted = {}  # order id -> target status (last one wins for duplicates)
+    for raw_id, new_status in requested:
+        u = _parse_uuid(raw_id)
+        if not u:
+            results.append({"id": raw_id, "ok": False, "message": "Invalid id"})
+        elif new_status not in valid_states:
+            results.append({"id": str(u), "ok": False, "message": "Invalid status"})
+        else:
+            wanted[str(u)] = new_status
+    try:
+        from .models import Order
+        now = dj_tz.now()
+        changed = []  # (order, previous status)
+        with transaction.atomic():
+            locked = {
+                str(o.id): o
+                for o in Order.objects.select_for_update().filter(id__in=list(wanted.keys())).only(
+                    "id", "order_number", "status", "completed_at", "change_seq"
+                )
+            }
+            by_target = {}
+            for oid, new_status in wanted.items():
+                o = locked.get(oid)
+                if not o:
+                    results.append({"id": oid, "ok": False, "message": "Not found"})
+                    continue
+                if new_status not in ALLOWED_TRANSITIONS.get(o.status, set()):
+                    results.append({
+                        "id": oid, "ok": False, "status": o.status,
+                        "message": f"Illegal transition from {o.status} to {new_status}",
+                    })
+                    continue
+                by_target.setdefault(new_status, []).append(o)
+            for new_status, group in by_target.items():
+                fields = {"status": new_status, "updated_at": now}
+                if new_status == "completed":
+                    fields["completed_at"] = now
+                Order.objects.filter(id__in=[o.id for o in group]).update(**fields)
+                for o in group:
+                    changed.append((o, o.status))
+                    o.status = new_status
+                    results.append({
+                        "id": str(o.id), "ok": True, "orderNumber": o.order_number,
+                        "status": new_status, "previousStatus": changed[-1][1],
+                    })
+            record_order_events(changed, "status")
+            completed = by_target.get("completed") or []
+            if completed:
+                enqueue_orders_consumption(completed, actor=actor)
+        if changed:
+            try:
+                from .utils_audit import record_audit
+                record_audit(
+                    request,
+                    user=actor if hasattr(actor, "id") else None,
+                    type="action",
+                    action="Order status bulk update",
+                    details=", ".join(f"{o.order_number}={o.status}" for o, _ in changed)[:1000],
+                    severity="info",
+                    meta={"orders": [{"orderId": str(o.id), "from": prev, "status": o.status} for o, prev in changed]},
+                )
+            except Exception:
+                pass
+        return JsonResponse({
+            "success": True,
+            "data": {"updated": len(changed), "failed": len(results) - len(changed), "results": results},
+        })
+    except Exception:
+        return JsonResponse({"success": False, "message": "Server error"}, status=500)
+
+
+ORDER_SYNC_MAX_BATCH = 500
+
+
+@require_http_methods(["POST"])  # offline batch upload
+@rate_limit(limit=30, window_seconds=60)
+def order_sync(request):
+    """Accept a batch of orders captured offline by a terminal (see api.order_sync).
+
+    Send gzip with `Content-Encoding: gzip` for large batches. Returns one
+    result per submitted order, in order: created, duplicate or rejected.
+    """
+    actor, err = _actor_from_request(request)
+    if not actor:
+        return err
+    if not _has_permission(actor, "order.place"):
+        return JsonResponse({"success": False, "message": "Forbidden"}, status=403)
+    try:
+        payload = _parse_json_body(request)
+    except ValueError:
+        return JsonResponse({"success": False, "message": "Invalid JSON body"}, status=400)
+    entries = payload.get("orders") if isinstance(payload, dict) else None
+    if not isinstance(entries, list) or not entries:
+        return JsonResponse({"success": False, "message": "orders is required"}, status=400)
+    if len(entries) > ORDER_SYNC_MAX_BATCH:
+        return JsonResponse({"success": False, "message": f"At most {ORDER_SYNC_MAX_BATCH} orders per batch"}, status=400)
+    try:
+        from .order_sync import sync_orders
+        return JsonResponse({"success": True, "data": sync_orders(entries, actor=actor)})
+    except Exception:
+        return JsonResponse({"success": False, "message": "Failed to sync orders"}, status=500)
+
+
+def _can_follow_feed(actor) -> bool:
+    return _has_permission(actor, "order.queue.handle") or _has_permission(actor, "order.bulk.track")
+
+
+@require_http_methods(["POST"])  # SSE feed token
+@rate_limit(limit=30, window_seconds=60)
+def order_feed_token(request):
+    """Short-lived token for /orders/feed, plus the cursor to subscribe from.
+
+    Browsers' EventSource cannot send an Authorization header, so the feed
+    accepts `?access_token=<token>` instead. The token is only valid on the
+    feed URL and expires after ORDER_FEED_TOKEN_TTL_SECONDS; clients fetch a
+    new one whenever they reconnect. Read `cursor` before loading the queue
+    snapshot, then open the feed with `since=<cursor>`.
+    """
+    actor, err = _actor_from_request(request)
+    if not actor:
+        return err
+    if not _can_follow_feed(actor):
+        return JsonResponse({"success": False, "message": "Forbidden"}, status=403)
+    try:
+        ttl = int(getattr(settings, "ORDER_FEED_TOKEN_TTL_SECONDS", 60))
+        return JsonResponse({
+            "success": True,
+            "data": {
+                "token": _issue_order_feed_token(actor, ttl_seconds=ttl),
+                "expiresIn": ttl,
+                "cursor": settled_event_id(),
+            },
+        })
+    except Exception:
+        return JsonResponse({"success": False, "message": "Failed to issue feed token"}, status=500)
+
+
+@require_http_methods(["GET"])  # SSE change feed
+@rate_limit(limit=30, window_seconds=60)
+def order_feed(request):
+    """Stream order creations and status transitions as Server-Sent Events.
+
+    Authenticate with a Bearer header or, from a browser EventSource, with
+    `?access_token=` from POST /orders/feed/token. Resume with the
+    `Last-Event-ID` header (sent automatically by EventSource) or
+    `?since=<id>`; without either only new events are streamed. Take the
+    cursor from /orders/feed/token (or /orders/queue?feedCursor=1) before
+    loading the snapshot and subscribe from it.
+    """
+    actor, err = _actor_from_request(request)
+    if not actor:
+        return err
+    if not _can_follow_feed(actor):
+        return JsonResponse({"success": False, "message": "Forbidden"}, status=403)
+    raw = request.META.get("HTTP_LAST_EVENT_ID") or request.GET.get("since") or request.GET.get("lastEventId")
+    cursor = None
+    if raw not in (None, ""):
+        try:
+            cursor = max(0, int(str(raw).strip()))
+        except ValueError:
+            return JsonResponse({"success": False, "message": "Invalid event id"}, status=400)
+    resp = StreamingHttpResponse(stream_events(cursor), content_type="text/event-stream")
+    resp["Cache-Control"] = "no-cache"
+    resp["X-Accel-Buffering"] = "no"
+    return resp
+
+
 __all__ = [
     "orders",
     "order_queue",
@@ -351,4 +680,8 @@ __all__ = [
     "order_bulk_progress",
     "order_detail",
     "order_status",
+    "order_status_bulk",
+    "order_sync",
+    "order_feed_token",
+    "order_feed",
 ]
@@ -6,17 +6,16 @@ Endpoints:
 - POST /auth/password-reset/confirm  { resetToken, password }
 """
 
-import json
 from django.http import JsonResponse
 from django.views.decorators.http import require_http_methods
 from django.conf import settings
 from django.core.exceptions import ValidationError
-from django.contrib.auth.hashers import make_password
 from django.contrib.auth.password_validation import validate_password
 from django.db.utils import OperationalError, ProgrammingError
 from django.utils import timezone as dj_timezone
 
-from .views_common import rate_limit, _email_rate_key, _revoke_all_refresh_tokens
+from .views_common import rate_limit, hashing_guard, _email_rate_key, _revoke_all_refresh_tokens, _json_body
+from .utils_passwords import hash_password
 from .utils_password_reset import (
     create_password_reset_code,
     verify_password_reset_code,
@@ -27,17 +26,10 @@ from .utils_password_reset import (
 from .emails import email_user_password_reset
 
 
-def _parse_json(request):
-    try:
-        return json.loads(request.body.decode("utf-8") or "{}")
-    except Exception:
-        return {}
-
-
 @rate_limit(limit=5, window_seconds=60, key_fn=_email_rate_key)
 @require_http_methods(["POST"]) 
 def password_reset_request(request):
-    data = _parse_json(request)
+    data = _json_body(request)
     email = (data.get("email") or "").lower().strip()
 
     # Always respond generically to avoid user enumeration
@@ -74,7 +66,7 @@ def password_reset_request(request):
 @rate_limit(limit=10, window_seconds=60, key_fn=_email_rate_key)
 @require_http_methods(["POST"]) 
 def password_reset_verify(request):
-    data = _parse_json(request)
+    data = _json_body(request)
     email = (data.get("email") or "").lower().strip()
     code = (data.get("code") or "").strip()
 
@@ -97,9 +89,10 @@ def password_reset_verify(request):
 
 
 @rate_limit(limit=10, window_seconds=60)
+@hashing_guard
 @require_http_methods(["POST"]) 
 def password_reset_confirm(request):
-    data = _parse_json(request)
+    data = _json_body(request)
     token = (data.get("resetToken") or data.get("token") or "").strip()
     new_password = data.get("newPassword") or data.get("password") or ""
 
@@ -125,7 +118,7 @@ def password_reset_confirm(request):
         u = AppUser.objects.filter(id=uid).first()
         if not u:
             return JsonResponse({"success": False, "message": "Invalid or expired token"}, status=400)
-        u.password_hash = make_password(new_password)
+        u.password_hash = hash_password(new_password)
         u.save(update_fields=["password_hash"])
         _revoke_all_refresh_tokens(u)
         return JsonResponse({"success": True, "message": "Password reset successful"})
@@ -8,13 +8,12 @@ Permissions:
 
 from __future__ import annotations
 
-import json
 from django.http import JsonResponse
 from django.views.decorators.http import require_http_methods
 from django.utils import timezone as dj_timezone
 from django.db.utils import OperationalError, ProgrammingError
 
-from .views_common import _actor_from_request, _has_permission, _client_meta, _require_admin_or_manager, rate_limit
+from .views_common import _actor_from_request, _has_permission, _client_meta, _require_admin_or_manager, rate_limit, _json_body
 
 
 def _serialize_db(p):
@@ -43,10 +42,7 @@ def order_payment(request, order_id: str):
     except Exception:
         return JsonResponse({"success": False, "message": "Forbidden"}, status=403)
 
-    try:
-        data = json.loads(request.body.decode("utf-8") or "{}")
-    except Exception:
-        data = {}
+    data = _json_body(request)
     amount = data.get("amount")
     method = (data.get("method") or "").lower()
     customer = (data.get("customer") or "").strip()
@@ -270,10 +266,7 @@ def payments_config(request):
         # PUT update -> admin/manager only
         if not _require_admin_or_manager(actor):
             return JsonResponse({"success": False, "message": "Forbidden"}, status=403)
-        try:
-            data = json.loads(request.body.decode("utf-8") or "{}")
-        except Exception:
-            data = {}
+        data = _json_body(request)
         def _getb(v, curr):
             if isinstance(v, bool):
                 return v
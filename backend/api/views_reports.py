@@ -96,9 +96,13 @@ def reports_orders(request):
         return JsonResponse({"success": False, "message": "Forbidden"}, status=403)
     try:
         from django.db.models import Count
-        from .models import Order
-        rows = Order.objects.values("status").annotate(count=Count("id"))
-        return JsonResponse({"success": True, "data": {r["status"]: r["count"] for r in rows}})
+        from .models import ArchivedOrder, Order
+        counts = {}
+        # Archived orders are closed orders moved out of the hot table
+        for model in (Order, ArchivedOrder):
+            for r in model.objects.values("status").annotate(count=Count("id")):
+                counts[r["status"]] = counts.get(r["status"], 0) + r["count"]
+        return JsonResponse({"success": True, "data": counts})
     except Exception:
         return JsonResponse({"success": True, "data": {}})
 
@@ -1,16 +1,27 @@
 """User management endpoints and role configs."""
 
-import json
 import uuid
 from django.http import JsonResponse
 from django.views.decorators.http import require_http_methods
 from django.db.utils import OperationalError, ProgrammingError
 from django.db import transaction
 from django.conf import settings
-import jwt
-from django.contrib.auth.hashers import make_password
 
-from .views_common import USERS, _paginate, _maybe_seed_from_memory, _safe_user_from_db, _now_iso, DEFAULT_ROLE_PERMISSIONS
+from .views_common import (
+    USERS,
+    _paginate,
+    _maybe_seed_from_memory,
+    _safe_user_from_db,
+    _now_iso,
+    DEFAULT_ROLE_PERMISSIONS,
+    _jwt_payload_from_request,
+    _principal_from_request,
+    hashing_guard,
+    _json_body,
+)
+from .utils_principal import invalidate_principal, invalidate_all_principals
+from .utils_passwords import hash_password
+from .utils_jwt import purge_subject
 
 
 ROLES = {
@@ -35,25 +46,15 @@ ROLES = {
 }
 
 
+@hashing_guard
 @require_http_methods(["GET", "POST"]) 
 def users(request):
     # For any access to the users collection, require Admin role
-    auth = request.META.get("HTTP_AUTHORIZATION", "")
-    if not auth.startswith("Bearer "):
+    if not _jwt_payload_from_request(request):
         return JsonResponse({"success": False, "message": "Unauthorized"}, status=401)
-    token = auth.split(" ", 1)[1].strip()
-    try:
-        tp = jwt.decode(token, settings.JWT_SECRET, algorithms=[settings.JWT_ALGORITHM])
-    except Exception:
-        return JsonResponse({"success": False, "message": "Unauthorized"}, status=401)
-    # Determine actor role (from DB if available; otherwise rely on token claims if present)
-    actor_role = None
-    try:
-        from .models import AppUser
-        current = AppUser.objects.filter(email=(tp.get("email") or "").lower()).first()
-        actor_role = (current.role or "").lower() if current else None
-    except Exception:
-        actor_role = (tp.get("role") or "").lower()
+    # Determine actor role from the request principal resolved by the gate middleware
+    current = _principal_from_request(request)
+    actor_role = (current.role or "").lower() if current else None
     if actor_role != "admin":
         return JsonResponse(
             {
@@ -136,18 +137,10 @@ def users(request):
         return JsonResponse({"success": True, "data": page_data, "pagination": pagination})
 
     # Create user (admin only)
-    try:
-        payload = json.loads(request.body.decode("utf-8") or "{}")
-    except Exception:
-        payload = {}
+    payload = _json_body(request)
     try:
         # Authorization: only admin can create users
-        # (Auth already decoded above; tp set. Verify actor is admin.)
-        try:
-            from .models import AppUser
-            current = AppUser.objects.filter(email=(tp.get("email") or "").lower()).first()
-        except Exception:
-            current = None
+        # (Principal already resolved above; verify actor is admin.)
         if not current or (current.role or "").lower() != "admin":
             return JsonResponse({"success": False, "message": "Forbidden"}, status=403)
 
@@ -157,6 +150,7 @@ def users(request):
         raw_password = (payload.get("password") or "").strip()
         if raw_password and len(raw_password) < 8:
             return JsonResponse({"success": False, "message": "Password must be at least 8 characters"}, status=400)
+        password_hash = hash_password(raw_password) if raw_password else ""
         with transaction.atomic():
             db_user = AppUser.objects.create(
                 email=(payload.get("email") or "user@example.com").lower().strip(),
@@ -165,7 +159,7 @@ def users(request):
                 status="active",
                 permissions=payload.get("permissions") or [],
                 phone=(payload.get("phone") or ""),
-                password_hash=make_password(raw_password) if raw_password else "",
+                password_hash=password_hash,
             )
         return JsonResponse({"success": True, "data": _safe_user_from_db(db_user)})
     except (OperationalError, ProgrammingError):
@@ -191,6 +185,7 @@ def users(request):
     return JsonResponse({"success": True, "data": user})
 
 
+@hashing_guard
 @require_http_methods(["GET", "PUT", "DELETE"])
 def user_detail(request, user_id):
     user_id = str(user_id)
@@ -198,15 +193,9 @@ def user_detail(request, user_id):
         from .models import AppUser
         _maybe_seed_from_memory()
         # Require admin for all operations in user management, including viewing details
-        auth = request.META.get("HTTP_AUTHORIZATION", "")
-        if not auth.startswith("Bearer "):
+        if not _jwt_payload_from_request(request):
             return JsonResponse({"success": False, "message": "Unauthorized"}, status=401)
-        token = auth.split(" ", 1)[1].strip()
-        try:
-            tp = jwt.decode(token, settings.JWT_SECRET, algorithms=[settings.JWT_ALGORITHM])
-        except Exception:
-            return JsonResponse({"success": False, "message": "Unauthorized"}, status=401)
-        actor = AppUser.objects.filter(email=(tp.get("email") or "").lower()).first()
+        actor = _principal_from_request(request)
         if not actor or (actor.role or "").lower() != "admin":
             return JsonResponse(
                 {
@@ -226,10 +215,7 @@ def user_detail(request, user_id):
             db_user.delete()
             return JsonResponse({"success": True, "message": "Deleted"})
 
-        try:
-            payload = json.loads(request.body.decode("utf-8") or "{}")
-        except Exception:
-            payload = {}
+        payload = _json_body(request)
         # Only admin can update user details in User Management
         # (actor already validated as admin above)
         changed = False
@@ -239,7 +225,7 @@ def user_detail(request, user_id):
             if new_pw and len(new_pw) < 8:
                 return JsonResponse({"success": False, "message": "Password must be at least 8 characters"}, status=400)
             if new_pw:
-                db_user.password_hash = make_password(new_pw)
+                db_user.password_hash = hash_password(new_pw)
                 changed = True
 
         for k in ["name", "email", "role", "status", "permissions", "phone"]:
@@ -266,10 +252,7 @@ def user_detail(request, user_id):
     if request.method == "DELETE":
         USERS.pop(idx)
         return JsonResponse({"success": True, "message": "Deleted"})
-    try:
-        payload = json.loads(request.body.decode("utf-8") or "{}")
-    except Exception:
-        payload = {}
+    payload = _json_body(request)
     user = {**USERS[idx]}
     for k in ["name", "email", "role", "status", "permissions"]:
         if k in payload and payload[k] is not None:
@@ -285,15 +268,9 @@ def user_status(request, user_id):
         from .models import AppUser
         _maybe_seed_from_memory()
         # Only admin can change status
-        auth = request.META.get("HTTP_AUTHORIZATION", "")
-        if not auth.startswith("Bearer "):
-            return JsonResponse({"success": False, "message": "Unauthorized"}, status=401)
-        token = auth.split(" ", 1)[1].strip()
-        try:
-            tp = jwt.decode(token, settings.JWT_SECRET, algorithms=[settings.JWT_ALGORITHM])
-        except Exception:
+        if not _jwt_payload_from_request(request):
             return JsonResponse({"success": False, "message": "Unauthorized"}, status=401)
-        actor = AppUser.objects.filter(email=(tp.get("email") or "").lower()).first()
+        actor = _principal_from_request(request)
         if not actor or (actor.role or "").lower() != "admin":
             return JsonResponse(
                 {
@@ -305,15 +282,14 @@ def user_status(request, user_id):
         db_user = AppUser.objects.filter(id=user_id).first()
         if not db_user:
             raise OperationalError("not found")
-        try:
-            payload = json.loads(request.body.decode("utf-8") or "{}")
-        except Exception:
-            payload = {}
+        payload = _json_body(request)
         status = (payload.get("status") or "").lower()
         if status not in {"active", "deactivated"}:
             return JsonResponse({"success": False, "message": "Invalid status"}, status=400)
         db_user.status = status
         db_user.save(update_fields=["status"])
+        invalidate_principal(db_user)
+        purge_subject(db_user.id)
         return JsonResponse({"success": True, "data": _safe_user_from_db(db_user)})
     except (OperationalError, ProgrammingError):
         pass
@@ -327,10 +303,7 @@ def user_status(request, user_id):
     idx = next((i for i, u in enumerate(USERS) if u.get("id") == user_id), -1)
     if idx == -1:
         return JsonResponse({"success": False, "message": "Not found"}, status=404)
-    try:
-        payload = json.loads(request.body.decode("utf-8") or "{}")
-    except Exception:
-        payload = {}
+    payload = _json_body(request)
     status = (payload.get("status") or "").lower()
     if status not in {"active", "deactivated"}:
         return JsonResponse({"success": False, "message": "Invalid status"}, status=400)
@@ -345,24 +318,15 @@ def user_role(request, user_id):
         from .models import AppUser
         _maybe_seed_from_memory()
         # Admin only
-        auth = request.META.get("HTTP_AUTHORIZATION", "")
-        if not auth.startswith("Bearer "):
+        if not _jwt_payload_from_request(request):
             return JsonResponse({"success": False, "message": "Unauthorized"}, status=401)
-        token = auth.split(" ", 1)[1].strip()
-        try:
-            tp = jwt.decode(token, settings.JWT_SECRET, algorithms=[settings.JWT_ALGORITHM])
-        except Exception:
-            return JsonResponse({"success": False, "message": "Unauthorized"}, status=401)
-        actor = AppUser.objects.filter(email=(tp.get("email") or "").lower()).first()
+        actor = _principal_from_request(request)
         if not actor or (actor.role or "").lower() != "admin":
             return JsonResponse({"success": False, "message": "Forbidden"}, status=403)
         db_user = AppUser.objects.filter(id=user_id).first()
         if not db_user:
             raise OperationalError("not found")
-        try:
-            payload = json.loads(request.body.decode("utf-8") or "{}")
-        except Exception:
-            payload = {}
+        payload = _json_body(request)
         role = (payload.get("role") or "").lower()
         if role not in ROLES:
             return JsonResponse({"success": False, "message": "Invalid role"}, status=400)
@@ -373,6 +337,8 @@ def user_role(request, user_id):
             db_user.save(update_fields=["role", "permissions"])
         else:
             db_user.save(update_fields=["role"])
+        invalidate_principal(db_user)
+        purge_subject(db_user.id)
         return JsonResponse({"success": True, "data": _safe_user_from_db(db_user)})
     except (OperationalError, ProgrammingError):
         pass
@@ -380,10 +346,7 @@ def user_role(request, user_id):
     idx = next((i for i, u in enumerate(USERS) if u.get("id") == user_id), -1)
     if idx == -1:
         return JsonResponse({"success": False, "message": "Not found"}, status=404)
-    try:
-        payload = json.loads(request.body.decode("utf-8") or "{}")
-    except Exception:
-        payload = {}
+    payload = _json_body(request)
     role = (payload.get("role") or "").lower()
     if role not in ROLES:
         return JsonResponse({"success": False, "message": "Invalid role"}, status=400)
@@ -398,23 +361,13 @@ def user_roles(request):
 
 @require_http_methods(["PUT"]) 
 def user_role_config(request, value):
-    try:
-        payload = json.loads(request.body.decode("utf-8") or "{}")
-    except Exception:
-        payload = {}
+    payload = _json_body(request)
     # Admin only can change role configs
-    auth = request.META.get("HTTP_AUTHORIZATION", "")
-    if not auth.startswith("Bearer "):
-        return JsonResponse({"success": False, "message": "Unauthorized"}, status=401)
-    try:
-        token = auth.split(" ", 1)[1].strip()
-        tp = jwt.decode(token, settings.JWT_SECRET, algorithms=[settings.JWT_ALGORITHM])
-        from .models import AppUser
-        actor = AppUser.objects.filter(email=(tp.get("email") or "").lower()).first()
-        if not actor or (actor.role or "").lower() != "admin":
-            return JsonResponse({"success": False, "message": "Forbidden"}, status=403)
-    except Exception:
+    if not _jwt_payload_from_request(request):
         return JsonResponse({"success": False, "message": "Unauthorized"}, status=401)
+    actor = _principal_from_request(request)
+    if not actor or (actor.role or "").lower() != "admin":
+        return JsonResponse({"success": False, "message": "Forbidden"}, status=403)
     role_value = (value or payload.get("value") or "").lower()
     if not role_value:
         return JsonResponse({"success": False, "message": "Missing role value"}, status=400)
@@ -428,6 +381,7 @@ def user_role_config(request, value):
         "permissions": payload.get("permissions") or [],
     }
     ROLES[role_value] = cfg
+    invalidate_all_principals()
     return JsonResponse({"success": True, "data": cfg})
 
 
@@ -1,12 +1,9 @@
 """Identity verification endpoints: status, upload, resend token, review."""
 
-import json
 from django.http import JsonResponse, FileResponse
 from django.views.decorators.http import require_http_methods
-from django.conf import settings
 from django.db.utils import OperationalError, ProgrammingError
 from django.utils import timezone as dj_timezone
-import jwt
 
 from .views_common import (
     _decode_verify_token,
@@ -19,6 +16,9 @@ from .views_common import (
     _require_admin_or_manager,
     _actor_from_request,
     _has_permission,
+    _jwt_payload_from_request,
+    _principal_from_request,
+    _json_body,
 )
 from .emails import (
     notify_admins_verification_submitted,
@@ -37,11 +37,7 @@ def verify_status(request):
     if not token:
         token = request.GET.get("token") or ""
     if not token:
-        try:
-            data = json.loads(request.body.decode("utf-8") or "{}")
-            token = data.get("verifyToken") or ""
-        except Exception:
-            token = ""
+        token = _json_body(request).get("verifyToken") or ""
     payload = _decode_verify_token(token)
     if not payload:
         return JsonResponse({"success": False, "message": "Invalid token"}, status=401)
@@ -66,10 +62,7 @@ def verify_status(request):
 
 @require_http_methods(["POST"]) 
 def verify_upload(request):
-    try:
-        data = json.loads(request.body.decode("utf-8") or "{}")
-    except Exception:
-        data = {}
+    data = _json_body(request)
     verify_token = data.get("verifyToken") or ""
     consent = bool(data.get("consent", False))
     image_data = data.get("imageData") or data.get("headshot") or ""
@@ -127,10 +120,7 @@ from .views_common import _issue_verify_token_from_dict
 
 @require_http_methods(["POST"]) 
 def verify_resend_token(request):
-    try:
-        data = json.loads(request.body.decode("utf-8") or "{}")
-    except Exception:
-        data = {}
+    data = _json_body(request)
     old = (data.get("verifyToken") or data.get("token") or "").strip()
     if not old:
         return JsonResponse({"success": False, "message": "Missing token"}, status=400)
@@ -154,18 +144,12 @@ def verify_resend_token(request):
 
 @require_http_methods(["GET"]) 
 def verify_requests(request):
-    auth = request.META.get("HTTP_AUTHORIZATION", "")
-    if not auth.startswith("Bearer "):
-        return JsonResponse({"success": False, "message": "Unauthorized"}, status=401)
-    token = auth.split(" ", 1)[1]
-    try:
-        payload = jwt.decode(token, settings.JWT_SECRET, algorithms=[settings.JWT_ALGORITHM])
-    except Exception:
+    if not _jwt_payload_from_request(request):
         return JsonResponse({"success": False, "message": "Unauthorized"}, status=401)
 
     try:
-        from .models import AppUser, AccessRequest
-        reviewer = AppUser.objects.filter(email=(payload.get("email") or "").lower()).first()
+        from .models import AccessRequest
+        reviewer = _principal_from_request(request)
         # Require manager/admin role and explicit permission
         if not reviewer or not _require_admin_or_manager(reviewer) or not _has_permission(reviewer, "verify.review"):
             return JsonResponse({"success": False, "message": "Forbidden"}, status=403)
@@ -222,18 +206,12 @@ def verify_requests(request):
 
 @require_http_methods(["GET"]) 
 def verify_headshot(request, request_id):
-    auth = request.META.get("HTTP_AUTHORIZATION", "")
-    if not auth.startswith("Bearer "):
-        return JsonResponse({"success": False, "message": "Unauthorized"}, status=401)
-    token = auth.split(" ", 1)[1]
-    try:
-        payload = jwt.decode(token, settings.JWT_SECRET, algorithms=[settings.JWT_ALGORITHM])
-    except Exception:
+    if not _jwt_payload_from_request(request):
         return JsonResponse({"success": False, "message": "Unauthorized"}, status=401)
 
     try:
-        from .models import AppUser, AccessRequest
-        reviewer = AppUser.objects.filter(email=(payload.get("email") or "").lower()).first()
+        from .models import AccessRequest
+        reviewer = _principal_from_request(request)
         # Require manager/admin role and explicit permission
         if not reviewer or not _require_admin_or_manager(reviewer) or not _has_permission(reviewer, "verify.review"):
             return JsonResponse({"success": False, "message": "Forbidden"}, status=403)
@@ -256,18 +234,9 @@ def verify_headshot(request, request_id):
 
 @require_http_methods(["POST"]) 
 def verify_approve(request):
-    try:
-        data = json.loads(request.body.decode("utf-8") or "{}")
-    except Exception:
-        data = {}
+    data = _json_body(request)
 
-    auth = request.META.get("HTTP_AUTHORIZATION", "")
-    if not auth.startswith("Bearer "):
-        return JsonResponse({"success": False, "message": "Unauthorized"}, status=401)
-    token = auth.split(" ", 1)[1]
-    try:
-        payload = jwt.decode(token, settings.JWT_SECRET, algorithms=[settings.JWT_ALGORITHM])
-    except Exception:
+    if not _jwt_payload_from_request(request):
         return JsonResponse({"success": False, "message": "Unauthorized"}, status=401)
 
     request_id = (data.get("requestId") or "").strip()
@@ -279,8 +248,8 @@ def verify_approve(request):
         return JsonResponse({"success": False, "message": "Missing requestId"}, status=400)
 
     try:
-        from .models import AppUser, AccessRequest
-        reviewer = AppUser.objects.filter(email=(payload.get("email") or "").lower()).first()
+        from .models import AccessRequest
+        reviewer = _principal_from_request(request)
         if not reviewer or not _require_admin_or_manager(reviewer):
             return JsonResponse({"success": False, "message": "Forbidden"}, status=403)
         ar = AccessRequest.objects.filter(id=request_id).select_related("user").first()
@@ -316,25 +285,16 @@ def verify_approve(request):
 
 @require_http_methods(["POST"]) 
 def verify_reject(request):
-    try:
-        data = json.loads(request.body.decode("utf-8") or "{}")
-    except Exception:
-        data = {}
+    data = _json_body(request)
     request_id = (data.get("requestId") or "").strip()
     note = (data.get("note") or "").strip()
 
-    auth = request.META.get("HTTP_AUTHORIZATION", "")
-    if not auth.startswith("Bearer "):
-        return JsonResponse({"success": False, "message": "Unauthorized"}, status=401)
-    token = auth.split(" ", 1)[1]
-    try:
-        payload = jwt.decode(token, settings.JWT_SECRET, algorithms=[settings.JWT_ALGORITHM])
-    except Exception:
+    if not _jwt_payload_from_request(request):
         return JsonResponse({"success": False, "message": "Unauthorized"}, status=401)
 
     try:
-        from .models import AppUser, AccessRequest
-        reviewer = AppUser.objects.filter(email=(payload.get("email") or "").lower()).first()
+        from .models import AccessRequest
+        reviewer = _principal_from_request(request)
         if not reviewer or not _require_admin_or_manager(reviewer):
             return JsonResponse({"success": False, "message": "Forbidden"}, status=403)
         ar = AccessRequest.objects.filter(id=request_id).select_related("user").first()
@@ -1,6 +1,6 @@
 import os
 from pathlib import Path
-from .settings_components import get_database, get_cors, get_jwt, get_email
+from .settings_components import get_caches, get_database, get_cors, get_jwt, get_email
 try:
     from dotenv import load_dotenv  # type: ignore
 except Exception:
@@ -54,6 +54,7 @@ MIDDLEWARE = [
     "django.contrib.messages.middleware.MessageMiddleware",
     "allauth.account.middleware.AccountMiddleware",
     "api.middleware.RequestIdMiddleware",
+    "api.middleware.RequestBodyLimitMiddleware",
     # Gate API routes for pending/unauthorized users (JWT-aware)
     "api.middleware.PendingUserGateMiddleware",
     "api.middleware.VersionHeaderMiddleware",
@@ -86,6 +87,11 @@ WSGI_APPLICATION = "config.wsgi.application"
 # Database configuration (SQLite by default; supports MySQL/Postgres via env)
 DATABASES = get_database(BASE_DIR)
 
+# Cache (see get_caches): set CACHE_URL (e.g. redis://host:6379/0) whenever
+# several workers must share state -- the cache-backed rate limiter and login
+# lockout below. Without it each process gets its own LocMemCache.
+CACHES = get_caches()
+
 # Static files (optional for API-only)
 STATIC_URL = "/static/"
 STATIC_ROOT = BASE_DIR / "staticfiles"
@@ -118,11 +124,53 @@ AUTH_PASSWORD_VALIDATORS = [
 _jwt = get_jwt()
 JWT_SECRET = _jwt["JWT_SECRET"]
 JWT_ALGORITHM = _jwt["JWT_ALGORITHM"]
+JWT_PUBLIC_KEY = _jwt["JWT_PUBLIC_KEY"]
 JWT_EXP_SECONDS = _jwt["JWT_EXP_SECONDS"]
 JWT_REMEMBER_EXP_SECONDS = _jwt["JWT_REMEMBER_EXP_SECONDS"]
 JWT_REFRESH_EXP_SECONDS = _jwt["JWT_REFRESH_EXP_SECONDS"]
 JWT_REFRESH_REMEMBER_EXP_SECONDS = _jwt["JWT_REFRESH_REMEMBER_EXP_SECONDS"]
 
+# In-process cache of authenticated principals (JWT sub -> user/permissions).
+# Entries are invalidated on AppUser save/delete; the TTL bounds staleness
+# across workers. Set the TTL to 0 to disable.
+PRINCIPAL_CACHE_TTL_SECONDS = int(os.getenv("PRINCIPAL_CACHE_TTL_SECONDS", "30"))
+PRINCIPAL_CACHE_MAX_ENTRIES = int(os.getenv("PRINCIPAL_CACHE_MAX_ENTRIES", "1024"))
+
+# Verified JWT payloads cached by token digest (api.utils_jwt). Entries never
+# outlive the token's exp; TTL caps them further. TTL 0 disables the cache.
+JWT_DECODE_CACHE_TTL_SECONDS = int(os.getenv("JWT_DECODE_CACHE_TTL_SECONDS", "300"))
+JWT_DECODE_CACHE_MAX_ENTRIES = int(os.getenv("JWT_DECODE_CACHE_MAX_ENTRIES", "4096"))
+
+# Rate limiting backend (see api/utils_ratelimit.py). Use
+# "api.utils_ratelimit.CacheRateLimitBackend" together with CACHE_URL
+# (Redis/Memcached/DatabaseCache) when running several workers.
+RATE_LIMIT_BACKEND = os.getenv("RATE_LIMIT_BACKEND", "api.utils_ratelimit.LocalRateLimitBackend")
+RATE_LIMIT_MAX_KEYS = int(os.getenv("RATE_LIMIT_MAX_KEYS", "100000"))
+RATE_LIMIT_CACHE_ALIAS = os.getenv("RATE_LIMIT_CACHE_ALIAS", "default")
+
+# Login lockout store (see api/utils_lockout.py); same local/shared split as above
+LOGIN_LOCKOUT_BACKEND = os.getenv("LOGIN_LOCKOUT_BACKEND", "api.utils_lockout.LocalLockoutStore")
+LOGIN_LOCKOUT_MAX_KEYS = int(os.getenv("LOGIN_LOCKOUT_MAX_KEYS", "100000"))
+LOGIN_LOCKOUT_CACHE_ALIAS = os.getenv("LOGIN_LOCKOUT_CACHE_ALIAS", "default")
+LOGIN_LOCKOUT_THRESHOLD = int(os.getenv("LOGIN_LOCKOUT_THRESHOLD", "5"))
+LOGIN_LOCKOUT_WINDOW_SECONDS = int(os.getenv("LOGIN_LOCKOUT_WINDOW_SECONDS", "600"))
+LOGIN_LOCKOUT_SECONDS = int(os.getenv("LOGIN_LOCKOUT_SECONDS", "600"))
+
+# Password hashing. At most PASSWORD_HASH_CONCURRENCY hashes run at once per
+# process (see api.utils_passwords); excess logins wait up to the queue
+# timeout and then get a 503. PASSWORD_HASH_ITERATIONS sets the PBKDF2 work
+# factor (0 = Django's default); stored hashes are upgraded on next login.
+PASSWORD_HASH_CONCURRENCY = int(os.getenv("PASSWORD_HASH_CONCURRENCY", "4"))
+PASSWORD_HASH_QUEUE_TIMEOUT_SECONDS = float(os.getenv("PASSWORD_HASH_QUEUE_TIMEOUT_SECONDS", "5"))
+PASSWORD_HASH_ITERATIONS = int(os.getenv("PASSWORD_HASH_ITERATIONS", "0"))
+PASSWORD_HASHERS = [
+    "api.utils_passwords.ConfiguredPBKDF2PasswordHasher",
+    "django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher",
+    "django.contrib.auth.hashers.Argon2PasswordHasher",
+    "django.contrib.auth.hashers.BCryptSHA256PasswordHasher",
+    "django.contrib.auth.hashers.ScryptPasswordHasher",
+]
+
 # Google OAuth
 GOOGLE_CLIENT_ID = os.getenv("GOOGLE_CLIENT_ID", "").strip()
 GOOGLE_CLIENT_SECRET = os.getenv("GOOGLE_CLIENT_SECRET", "").strip()
@@ -178,6 +226,17 @@ EMAIL_USE_SSL = _email["EMAIL_USE_SSL"]
 ADMINS = _email["ADMINS"]
 EMAIL_SUBJECT_PREFIX = _email["EMAIL_SUBJECT_PREFIX"]
 
+# Queue outbound mail in the EmailOutbox table and deliver it from the
+# process_email_outbox worker (one reused SMTP connection per batch), so
+# request handlers never block on SMTP. Off by default: only enable it where
+# that worker is scheduled (see RUNBOOK.md), or OTP/reset mail is never sent.
+EMAIL_OUTBOX_ENABLED = os.getenv("EMAIL_OUTBOX_ENABLED", "0") in {"1", "true", "True", "yes", "on"}
+# How long a worker owns the rows it claimed; set above the time one batch
+# can take to send, or slow batches may be picked up (and sent) twice.
+EMAIL_OUTBOX_LEASE_SECONDS = int(os.getenv("EMAIL_OUTBOX_LEASE_SECONDS", "300"))
+EMAIL_OUTBOX_BACKOFF_SECONDS = int(os.getenv("EMAIL_OUTBOX_BACKOFF_SECONDS", "30"))
+EMAIL_OUTBOX_BACKOFF_MAX_SECONDS = int(os.getenv("EMAIL_OUTBOX_BACKOFF_MAX_SECONDS", "3600"))
+
 # Frontend base URL for building links in emails (password reset, verification)
 FRONTEND_BASE_URL = os.getenv("FRONTEND_BASE_URL", "http://localhost:8080")
 
@@ -193,6 +252,65 @@ if not DEBUG:
 # API version
 API_VERSION = os.getenv("API_VERSION", "1")
 
+# Largest JSON request body the API will parse (bytes); larger ones get 413.
+# Defaults to Django's DATA_UPLOAD_MAX_MEMORY_SIZE (2.5 MiB).
+JSON_BODY_MAX_BYTES = int(os.getenv("JSON_BODY_MAX_BYTES", "2621440"))
+
+# Order numbers (api.utils_order_numbers): each worker reserves blocks of
+# ORDER_NUMBER_BLOCK_SIZE from a counter table. Scope "day" restarts the
+# sequence daily (W-261017-0001); "global" never resets. ORDER_NUMBER_LOCATION
+# adds a site code for multi-canteen deployments (W-C2-261017-0001); at most
+# 16 characters with the day scope (checked by `manage.py check`, api.E003).
+ORDER_NUMBER_BLOCK_SIZE = int(os.getenv("ORDER_NUMBER_BLOCK_SIZE", "20"))
+ORDER_NUMBER_SCOPE = os.getenv("ORDER_NUMBER_SCOPE", "day").strip().lower()
+ORDER_NUMBER_LOCATION = os.getenv("ORDER_NUMBER_LOCATION", "").strip()
+
+# Order SSE feed (/api/orders/feed, api.utils_order_feed). Each stream holds a
+# worker thread for up to ORDER_FEED_MAX_SECONDS, then the client reconnects
+# with Last-Event-ID; run gunicorn with threads (gthread) when enabling it.
+# ORDER_FEED_SETTLE_SECONDS bounds how long an order write may stay
+# uncommitted and still reach the feed: cursors trail by this much and the
+# events in between are re-scanned (clients dedupe on `seq`). Browsers
+# authenticate the stream with an ?access_token= from /orders/feed/token,
+# valid for ORDER_FEED_TOKEN_TTL_SECONDS and only on the feed URL.
+ORDER_FEED_MAX_SECONDS = float(os.getenv("ORDER_FEED_MAX_SECONDS", "55"))
+ORDER_FEED_POLL_SECONDS = float(os.getenv("ORDER_FEED_POLL_SECONDS", "1"))
+ORDER_FEED_TOKEN_TTL_SECONDS = int(os.getenv("ORDER_FEED_TOKEN_TTL_SECONDS", "60"))
+ORDER_FEED_SETTLE_SECONDS = float(os.getenv("ORDER_FEED_SETTLE_SECONDS", "10"))
+ORDER_FEED_HEARTBEAT_SECONDS = float(os.getenv("ORDER_FEED_HEARTBEAT_SECONDS", "15"))
+ORDER_FEED_RETENTION_SECONDS = int(os.getenv("ORDER_FEED_RETENTION_SECONDS", str(24 * 60 * 60)))
+
+# Offline order sync (POST /orders/sync): accepted client clock drift into the
+# future, and how far back a terminal may still upload orders
+ORDER_SYNC_MAX_CLOCK_SKEW_SECONDS = int(os.getenv("ORDER_SYNC_MAX_CLOCK_SKEW_SECONDS", "300"))
+ORDER_SYNC_MAX_AGE_DAYS = int(os.getenv("ORDER_SYNC_MAX_AGE_DAYS", "7"))
+
+# Closed orders older than this move to the archive tables (archive_orders command)
+ORDER_ARCHIVE_AFTER_DAYS = int(os.getenv("ORDER_ARCHIVE_AFTER_DAYS", "90"))
+ORDER_ARCHIVE_BATCH_SIZE = int(os.getenv("ORDER_ARCHIVE_BATCH_SIZE", "500"))
+
+# How long a stored Idempotency-Key response is replayed (POST /orders);
+# expired keys are removed by the purge_idempotency_keys command.
+IDEMPOTENCY_KEY_TTL_SECONDS = int(os.getenv("IDEMPOTENCY_KEY_TTL_SECONDS", str(24 * 60 * 60)))
+
+# Stock consumption for completed orders is queued as an InventoryConsumptionJob.
+# Off by default: jobs run right after the status change commits. With async on,
+# nothing is consumed until the process_inventory_jobs worker runs, so enable it
+# only together with that worker (see RUNBOOK.md).
+INVENTORY_JOBS_ASYNC = os.getenv("INVENTORY_JOBS_ASYNC", "0") in {"1", "true", "True", "yes", "on"}
+INVENTORY_JOB_BACKOFF_SECONDS = int(os.getenv("INVENTORY_JOB_BACKOFF_SECONDS", "30"))
+INVENTORY_JOB_BACKOFF_MAX_SECONDS = int(os.getenv("INVENTORY_JOB_BACKOFF_MAX_SECONDS", "3600"))
+# A worker leases its batch for this long; jobs it has not finished by then
+# (e.g. it crashed) become due again for another worker.
+INVENTORY_JOB_LEASE_SECONDS = int(os.getenv("INVENTORY_JOB_LEASE_SECONDS", "300"))
+
+# Stock checkpoints (stock_checkpoints command) let as_of stock queries start
+# from a stored balance instead of the start of the ledger. A checkpoint only
+# includes movements recorded at least STOCK_CHECKPOINT_SETTLE_SECONDS before
+# it was written, so transactions still in flight are picked up as the tail.
+STOCK_CHECKPOINT_PERIOD = os.getenv("STOCK_CHECKPOINT_PERIOD", "day")
+STOCK_CHECKPOINT_SETTLE_SECONDS = int(os.getenv("STOCK_CHECKPOINT_SETTLE_SECONDS", "60"))
+
 # Security hardening flags (sane defaults, can be tuned via env)
 SECURE_HSTS_SECONDS = int(os.getenv("SECURE_HSTS_SECONDS", "0" if DEBUG else "31536000"))
 SECURE_HSTS_INCLUDE_SUBDOMAINS = os.getenv("SECURE_HSTS_INCLUDE_SUBDOMAINS", "1") in {"1","true","True","yes","on"}
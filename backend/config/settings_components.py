@@ -46,6 +46,34 @@ def get_database(BASE_DIR: Path):
     }
 
 
+def get_caches():
+    """CACHES from CACHE_URL; per-process LocMemCache when unset.
+
+    - redis://host:6379/0 or rediss://... -> RedisCache (needs the redis package)
+    - memcached://host:11211[,host2:11211] -> PyMemcacheCache (needs pymemcache)
+    - db://table_name -> DatabaseCache (run `manage.py createcachetable` first)
+    """
+    url = (os.getenv("CACHE_URL", "") or "").strip()
+    prefix = os.getenv("CACHE_KEY_PREFIX", "")
+    if url.startswith(("redis://", "rediss://")):
+        cache = {"BACKEND": "django.core.cache.backends.redis.RedisCache", "LOCATION": url}
+    elif url.startswith("memcached://"):
+        hosts = [h for h in url[len("memcached://"):].split(",") if h]
+        cache = {"BACKEND": "django.core.cache.backends.memcached.PyMemcacheCache", "LOCATION": hosts}
+    elif url.startswith("db://"):
+        cache = {
+            "BACKEND": "django.core.cache.backends.db.DatabaseCache",
+            "LOCATION": url[len("db://"):] or "django_cache",
+        }
+    elif url:
+        raise ValueError(f"Unsupported CACHE_URL scheme: {url.split(':', 1)[0]}")
+    else:
+        cache = {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}
+    if prefix:
+        cache["KEY_PREFIX"] = prefix
+    return {"default": cache}
+
+
 def get_cors():
     allowed = [
         "http://localhost:8080",
@@ -59,6 +87,7 @@ def get_cors():
                 "authorization",
                 "content-type",
                 "dnt",
+                "idempotency-key",
                 "origin",
                 "user-agent",
                 "x-csrftoken",
@@ -74,6 +103,11 @@ def get_jwt():
 
     JWT_SECRET = os.getenv("DJANGO_JWT_SECRET", dj_settings.SECRET_KEY)
     JWT_ALGORITHM = os.getenv("DJANGO_JWT_ALG", "HS256")
+    # Asymmetric algorithms (RS256/ES256/EdDSA): DJANGO_JWT_SECRET holds the
+    # private key PEM and DJANGO_JWT_PUBLIC_KEY the verification key PEM.
+    JWT_PUBLIC_KEY = os.getenv("DJANGO_JWT_PUBLIC_KEY", "").replace("\\n", "\n")
+    if JWT_SECRET.startswith("-----BEGIN"):
+        JWT_SECRET = JWT_SECRET.replace("\\n", "\n")
     try:
         JWT_EXP_SECONDS = int(os.getenv("DJANGO_JWT_EXP_SECONDS", "3600"))
     except Exception:
@@ -101,6 +135,7 @@ def get_jwt():
     return {
         "JWT_SECRET": JWT_SECRET,
         "JWT_ALGORITHM": JWT_ALGORITHM,
+        "JWT_PUBLIC_KEY": JWT_PUBLIC_KEY,
         "JWT_EXP_SECONDS": JWT_EXP_SECONDS,
         "JWT_REMEMBER_EXP_SECONDS": JWT_REMEMBER_EXP_SECONDS,
         "JWT_REFRESH_EXP_SECONDS": JWT_REFRESH_EXP_SECONDS,
@@ -105,7 +105,18 @@ class OrderService {
       };
       return normalizeApiResult({ success: true, data: newOrder });
     }
-    const res = await apiClient.post('/orders', orderData);
+    // One key per submission: retries (ours or the caller's) replay the same order
+    const idempotencyKey =
+      orderData?.idempotencyKey ||
+      (typeof crypto !== 'undefined' && crypto.randomUUID
+        ? crypto.randomUUID()
+        : `${Date.now()}-${Math.random().toString(36).slice(2)}`);
+    const body = { ...(orderData || {}) };
+    delete body.idempotencyKey;
+    const res = await apiClient.post('/orders', body, {
+      headers: { 'Idempotency-Key': idempotencyKey },
+      retry: { retryMethods: ['GET', 'HEAD', 'OPTIONS', 'POST'] },
+    });
     return normalizeApiResult(res);
   }
 
@@ -147,6 +158,33 @@ class OrderService {
     return normalizeApiResult(res);
   }
 
+  // Short-lived token and starting cursor for the SSE order feed
+  async getFeedToken() {
+    const res = await apiClient.post('/orders/feed/token', {});
+    return res?.data || {};
+  }
+
+  getFeedUrl({ token, since } = {}) {
+    const query = new URLSearchParams();
+    if (token) query.set('access_token', token);
+    if (since !== undefined && since !== null && since !== '') {
+      query.set('since', String(since));
+    }
+    return `${apiClient.baseURL}/orders/feed?${query.toString()}`;
+  }
+
+  normalizeFeedEvent(event) {
+    if (!event || typeof event !== 'object') return event;
+    return {
+      ...event,
+      status: normalizeStatus(event.status),
+      previousStatus: event.previousStatus
+        ? normalizeStatus(event.previousStatus)
+        : null,
+      order: event.order ? normalizeOrder(event.order) : undefined,
+    };
+  }
+
   async getOrderHistory(params = {}) {
     if (shouldUseMocks()) {
       await mockDelay(800);
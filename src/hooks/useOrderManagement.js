@@ -2,6 +2,7 @@ import { useState, useEffect, useRef, useCallback } from 'react';
 import { useToast } from '@/hooks/use-toast';
 import orderService from '@/api/services/orderService';
 import { createRealtime } from '@/lib/realtime';
+import { createOrderFeed } from '@/lib/orderFeed';
 
 export const useOrderManagement = (params = {}) => {
   const [orders, setOrders] = useState([]);
@@ -205,6 +206,7 @@ export const useOrderQueue = (params = {}) => {
   const { toast } = useToast();
   const pollRef = useRef(null);
   const rtRef = useRef(null);
+  const feedRef = useRef(null);
 
   const queueParamKey = JSON.stringify(
     (() => {
@@ -247,9 +249,16 @@ export const useOrderQueue = (params = {}) => {
   }, [queueParamKey, toast]);
 
   useEffect(() => {
-    fetchOrderQueue();
-
     const enableRealtime = Boolean(import.meta?.env?.VITE_WS_URL);
+    const env = import.meta?.env || {};
+    const enableFeed =
+      !enableRealtime &&
+      env.VITE_ORDER_FEED !== 'false' &&
+      env.VITE_ENABLE_MOCKS !== 'true' &&
+      env.VITE_ENABLE_MOCKS !== '1' &&
+      typeof EventSource !== 'undefined';
+    // The feed loads the snapshot itself, after reading its cursor
+    if (!enableFeed) fetchOrderQueue();
     const startPolling = () => {
       if (pollRef.current) return;
       pollRef.current = setInterval(fetchOrderQueue, 5000);
@@ -291,6 +300,32 @@ export const useOrderQueue = (params = {}) => {
       });
       // While connecting, start a short-lived polling to keep data fresh
       startPolling();
+    } else if (enableFeed) {
+      feedRef.current = createOrderFeed({
+        onSnapshot: fetchOrderQueue,
+        onEvent: (evt) => {
+          const active = ['pending', 'preparing', 'ready'];
+          setOrderQueue((prev) => {
+            const exists = prev.some((x) => x.id === evt.orderId);
+            if (!active.includes(evt.status)) {
+              return prev.filter((x) => x.id !== evt.orderId);
+            }
+            if (exists) {
+              return prev.map((x) =>
+                x.id === evt.orderId ? { ...x, status: evt.status } : x
+              );
+            }
+            return evt.order ? [...prev, evt.order] : prev;
+          });
+        },
+        onStatusChange: (status) => {
+          if (status === 'open') {
+            stopPolling();
+          } else if (status === 'closed' || status === 'disabled') {
+            startPolling();
+          }
+        },
+      });
     } else {
       startPolling();
     }
@@ -298,6 +333,7 @@ export const useOrderQueue = (params = {}) => {
     return () => {
       stopPolling();
       rtRef.current?.close?.();
+      feedRef.current?.close?.();
     };
   }, [queueParamKey, fetchOrderQueue]);
 
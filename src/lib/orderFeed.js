@@ -0,0 +1,114 @@
+// Server-Sent Events client for /api/orders/feed with token refresh and dedupe
+// Usage: const feed = createOrderFeed({ onSnapshot, onEvent }); feed.close()
+//
+// EventSource cannot send an Authorization header, so each connection uses a
+// short-lived ?access_token= from POST /orders/feed/token. The server's
+// resume cursor trails the newest event and replays the ones after it, so
+// events are deduplicated on their `seq`.
+import orderService from '@/api/services/orderService';
+
+const SEEN_LIMIT = 2000;
+
+export function createOrderFeed({ onSnapshot, onEvent, onStatusChange } = {}) {
+  if (typeof EventSource === 'undefined') {
+    onStatusChange?.('disabled');
+    return { close() {}, isActive: () => false };
+  }
+
+  let es = null;
+  let active = true;
+  let cursor = null;
+  let reconnectAttempts = 0;
+  let timer = null;
+  const seen = new Set();
+
+  const remember = (seq) => {
+    seen.add(seq);
+    if (seen.size > SEEN_LIMIT) {
+      // Sets iterate in insertion order: drop the oldest
+      seen.delete(seen.values().next().value);
+    }
+  };
+
+  const connect = async ({ snapshot = false } = {}) => {
+    if (!active) return;
+    let data;
+    try {
+      data = await orderService.getFeedToken();
+    } catch (e) {
+      onStatusChange?.('error', e);
+      scheduleReconnect({ snapshot });
+      return;
+    }
+    if (!active) return;
+    if (snapshot || cursor === null) {
+      // The token's cursor predates the snapshot, so nothing falls in between
+      cursor = data.cursor ?? 0;
+      try {
+        await onSnapshot?.();
+      } catch {}
+    }
+    if (!active) return;
+    es = new EventSource(orderService.getFeedUrl({ token: data.token, since: cursor }));
+
+    es.onopen = () => {
+      reconnectAttempts = 0;
+      onStatusChange?.('open');
+    };
+    es.addEventListener('order', (evt) => {
+      if (evt.lastEventId) cursor = evt.lastEventId;
+      let payload;
+      try {
+        payload = JSON.parse(evt.data);
+      } catch {
+        return;
+      }
+      if (payload?.seq !== undefined) {
+        if (seen.has(payload.seq)) return;
+        remember(payload.seq);
+      }
+      onEvent?.(orderService.normalizeFeedEvent(payload));
+    });
+    es.addEventListener('ready', (evt) => {
+      if (evt.lastEventId) cursor = evt.lastEventId;
+    });
+    es.addEventListener('reset', () => {
+      // Our cursor was pruned: reload the snapshot from a fresh cursor
+      es.close();
+      connect({ snapshot: true });
+    });
+    es.onerror = (e) => {
+      if (!active) return;
+      // CONNECTING means the browser retries by itself (with Last-Event-ID);
+      // CLOSED usually means the token expired, so fetch a new one
+      if (es.readyState === EventSource.CLOSED) {
+        onStatusChange?.('closed', e);
+        scheduleReconnect();
+      } else {
+        onStatusChange?.('reconnecting', e);
+      }
+    };
+  };
+
+  const scheduleReconnect = ({ snapshot = false } = {}) => {
+    if (!active || timer) return;
+    reconnectAttempts += 1;
+    const delay = Math.min(30_000, 1000 * Math.pow(2, reconnectAttempts - 1));
+    onStatusChange?.('reconnecting', { delay });
+    timer = setTimeout(() => {
+      timer = null;
+      connect({ snapshot });
+    }, delay);
+  };
+
+  connect({ snapshot: true });
+
+  return {
+    close() {
+      active = false;
+      if (timer) clearTimeout(timer);
+      try { es && es.close(); } catch {}
+    },
+    isActive: () => active,
+  };
+}